@@ -0,0 +1,528 @@
+# backend/alertas.py
+"""
+Despacho de alertas (ENTRADA/GREEN/RED) pra destinos externos, sem os bots
+precisarem fazer polling.
+
+Destinos (sinks), por spec ("tipo:alvo"):
+- webhook:http://host:porta/caminho   POST com o lote em JSON (lista de eventos)
+- jsonl:/var/log/alertas.jsonl        um evento por linha (append)
+- socket:127.0.0.1:9200               um evento por linha num socket TCP
+- socket:unix:/run/viper/alertas.sock  ... ou unix
+
+Ligados junto com a API: VIPER_ALERTAS="webhook:http://127.0.0.1:9300/;jsonl:/tmp/alertas.jsonl"
+(configuração do operador: qualquer destino). Em runtime, POST /alertas/sinks só aceita
+destinos dentro do que o operador liberou (a API não tem autenticação):
+- VIPER_ALERTAS_DIR:   jsonl (e socket unix) só dentro desse diretório
+- VIPER_ALERTAS_HOSTS: webhook/socket TCP só pra esses hosts ("host" ou "host:porta", vírgula)
+Sem a variável, o tipo correspondente é recusado em runtime. Webhook não segue redirect.
+
+Fluxo (nada disso toca o /spin):
+    pos_spin (worker) -> despachante.publicar(evento)
+        -> fila asyncio limitada de cada sink (cheia => descarta e conta)
+        -> task do sink: espera ficha do limite de taxa, junta o que tiver na fila
+           (até `lote_max`, esperando até `lote_ms` pelo resto do lote), envia
+        -> falha => retry com backoff exponencial + jitter; esgotou => lote descartado
+
+Cada evento leva `id` = "boot:mesa:geracao:seq" (estável entre retries) pro destino
+deduplicar: o seq recomeça em restart/reset da mesa, mas o boot (BOOT_ID do processo)
+não repete e a geração (MesaEngine.geracao) sobe a cada reset.
+
+asyncio só é importado quando o despachante sobe (a engine importa este módulo pro
+`evento_alerta`/`despachante.ativo` e não paga os ~30 ms do import).
+
+Stub local pra testar webhooks (imprime os lotes; --falhar/--lento simulam destino ruim):
+    python -m backend.alertas --stub 127.0.0.1:9300 --falhar 0.3 --lento 0.2
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from backend.pipeline import SpinEvento
+
+TIPOS: FrozenSet[str] = frozenset({"ENTRADA", "GREEN", "RED"})
+
+FILA_MAX = int(os.getenv("VIPER_ALERTAS_FILA", "1000"))           # eventos por sink
+LOTE_MAX = int(os.getenv("VIPER_ALERTAS_LOTE", "50"))             # eventos por envio
+LOTE_MS = float(os.getenv("VIPER_ALERTAS_LOTE_MS", "50"))         # espera pelo resto do lote
+TAXA = float(os.getenv("VIPER_ALERTAS_TAXA", "5"))                # envios/s por sink (0 = sem limite)
+RAJADA = float(os.getenv("VIPER_ALERTAS_RAJADA", "10"))           # envios seguidos antes do limite
+TENTATIVAS = int(os.getenv("VIPER_ALERTAS_TENTATIVAS", "5"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+TIMEOUT = 5.0
+LATENCIA_EWMA_ALFA = 0.05
+# destinos liberados pra sinks criados em runtime (POST /alertas/sinks)
+ALERTAS_DIR = os.getenv("VIPER_ALERTAS_DIR", "")
+ALERTAS_HOSTS = os.getenv("VIPER_ALERTAS_HOSTS", "")
+
+
+def evento_alerta(ev: SpinEvento, boot: str) -> Dict:
+    """Payload do alerta a partir do spin já resolvido (`boot` = BOOT_ID do processo)."""
+    e = ev.entrada
+    return {
+        "id": f"{boot}:{ev.mesa}:{ev.geracao}:{ev.seq}",
+        "boot": boot,
+        "geracao": ev.geracao,
+        "tipo": ev.status,
+        "mesa": ev.mesa,
+        "seq": ev.seq,
+        "ts": ev.ts,
+        "numero": ev.numero,
+        "entrada_id": e.id if e is not None else None,
+        "estrategia": e.estrategia if e is not None else None,
+        "padrao": e.padrao if e is not None else None,
+        "terminal_previsto": e.terminal_previsto if e is not None else None,
+        "numeros_alvo": sorted(e.numeros_alvo) if e is not None else None,
+        "gale": e.gale if e is not None else None,
+        "score": ev.registro.get("score_combinado"),
+        "mensagem": ev.registro.get("mensagem"),
+    }
+
+
+class _Balde:
+    """Limite de taxa (token bucket): `taxa` envios/s, até `rajada` seguidos."""
+
+    def __init__(self, taxa: float, rajada: float):
+        self.taxa = taxa
+        self.rajada = max(1.0, rajada)
+        self._fichas = self.rajada
+        self._t = time.monotonic()
+        self.esperas = 0
+
+    async def esperar(self) -> None:
+        if self.taxa <= 0:
+            return
+        import asyncio
+
+        while True:
+            agora = time.monotonic()
+            self._fichas = min(self.rajada, self._fichas + (agora - self._t) * self.taxa)
+            self._t = agora
+            if self._fichas >= 1.0:
+                self._fichas -= 1.0
+                return
+            self.esperas += 1
+            await asyncio.sleep((1.0 - self._fichas) / self.taxa)
+
+
+# ==============================
+# SINKS
+# ==============================
+class Sink(ABC):
+    """Interface: `enviar(lote)` levanta exceção se o destino não aceitou (=> retry)."""
+
+    tipo: str = "sink"
+
+    def __init__(
+        self,
+        alvo: str,
+        nome: Optional[str] = None,
+        tipos: Optional[Sequence[str]] = None,
+        mesas: Optional[Sequence[str]] = None,
+        lote_max: int = LOTE_MAX,
+        lote_ms: float = LOTE_MS,
+        taxa: float = TAXA,
+        rajada: float = RAJADA,
+        tentativas: int = TENTATIVAS,
+        fila_max: int = FILA_MAX,
+    ):
+        tipos_ok = frozenset(tipos) if tipos else TIPOS
+        if not tipos_ok <= TIPOS:
+            raise ValueError(f"tipos desconhecidos: {', '.join(sorted(tipos_ok - TIPOS))} (use {', '.join(sorted(TIPOS))})")
+        if lote_max < 1 or tentativas < 1 or fila_max < 1:
+            raise ValueError("lote_max, tentativas e fila_max precisam ser >= 1")
+        self.alvo = alvo
+        self.nome = nome or f"{self.tipo}:{alvo}"
+        self.tipos = tipos_ok
+        self.mesas = frozenset(mesas) if mesas else None
+        self.lote_max = lote_max
+        self.lote_ms = lote_ms
+        self.tentativas = tentativas
+        import asyncio   # sinks só existem com o loop rodando
+
+        self.limite = _Balde(taxa, rajada)
+        self.fila: "asyncio.Queue[Dict]" = asyncio.Queue(maxsize=fila_max)
+        self.task: Optional[asyncio.Task] = None
+
+        self.enfileirados = 0
+        self.enviados = 0
+        self.lotes = 0
+        self.erros = 0
+        self.retries = 0
+        self.descartados_fila = 0
+        self.descartados_erro = 0
+        self.latencia_ms_ewma = 0.0     # ts do spin -> entregue
+        self.ultimo_erro: Optional[str] = None
+        self.ultimo_envio: Optional[float] = None
+
+    def aceita(self, evento: Dict) -> bool:
+        return evento["tipo"] in self.tipos and (self.mesas is None or evento["mesa"] in self.mesas)
+
+    @abstractmethod
+    async def enviar(self, lote: List[Dict]) -> None:
+        ...
+
+    async def fechar(self) -> None:
+        pass
+
+    def info(self) -> Dict:
+        return {
+            "nome": self.nome,
+            "tipo": self.tipo,
+            "alvo": self.alvo,
+            "tipos": sorted(self.tipos),
+            "mesas": sorted(self.mesas) if self.mesas is not None else None,
+            "fila": self.fila.qsize(),
+            "enfileirados": self.enfileirados,
+            "enviados": self.enviados,
+            "lotes": self.lotes,
+            "erros": self.erros,
+            "retries": self.retries,
+            "descartados_fila": self.descartados_fila,
+            "descartados_erro": self.descartados_erro,
+            "esperas_taxa": self.limite.esperas,
+            "latencia_ms_ewma": round(self.latencia_ms_ewma, 3),
+            "ultimo_erro": self.ultimo_erro,
+            "ultimo_envio": self.ultimo_envio,
+        }
+
+
+class SinkWebhook(Sink):
+    """POST JSON (lista de eventos). Status >= 400 ou erro de rede => retry."""
+
+    tipo = "webhook"
+
+    async def enviar(self, lote: List[Dict]) -> None:
+        import asyncio
+
+        corpo = json.dumps(lote, ensure_ascii=False).encode()
+        await asyncio.to_thread(self._post, corpo)
+
+    def _post(self, corpo: bytes) -> None:
+        import urllib.request   # stdlib, só quem tem webhook paga o import
+
+        req = urllib.request.Request(
+            self.alvo, data=corpo, method="POST",
+            headers={"Content-Type": "application/json", "User-Agent": "viper-alertas"},
+        )
+        # sem seguir redirect: 3xx vira HTTPError (=> retry), não um POST pra outro host
+        opener = urllib.request.build_opener(_sem_redirect())
+        with opener.open(req, timeout=TIMEOUT) as resp:   # HTTPError (>= 400) levanta
+            resp.read()
+
+
+def _sem_redirect():
+    import urllib.request
+
+    class SemRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, req, fp, code, msg, headers, newurl):
+            return None
+
+    return SemRedirect()
+
+
+class SinkJsonl(Sink):
+    """Append de uma linha JSON por evento (escrita numa thread: disco lento não trava o loop)."""
+
+    tipo = "jsonl"
+
+    async def enviar(self, lote: List[Dict]) -> None:
+        import asyncio
+
+        texto = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in lote)
+        await asyncio.to_thread(self._escrever, texto)
+
+    def _escrever(self, texto: str) -> None:
+        pasta = os.path.dirname(self.alvo)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(self.alvo, "a", encoding="utf-8") as f:
+            f.write(texto)
+
+
+class SinkSocket(Sink):
+    """Conexão persistente ("host:porta" ou "unix:/caminho"), uma linha JSON por evento."""
+
+    tipo = "socket"
+
+    def __init__(self, alvo: str, **kw):
+        super().__init__(alvo, **kw)
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def enviar(self, lote: List[Dict]) -> None:
+        import asyncio
+
+        if self._writer is None or self._writer.is_closing():
+            if self.alvo.startswith("unix:"):
+                _, self._writer = await asyncio.open_unix_connection(self.alvo[5:])
+            else:
+                host, _, porta = self.alvo.rpartition(":")
+                _, self._writer = await asyncio.open_connection(host or "127.0.0.1", int(porta))
+        try:
+            self._writer.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in lote).encode())
+            await asyncio.wait_for(self._writer.drain(), TIMEOUT)
+        except BaseException:
+            await self.fechar()     # reconecta na próxima tentativa
+            raise
+
+    async def fechar(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+_TIPOS_SINK = {"webhook": SinkWebhook, "jsonl": SinkJsonl, "socket": SinkSocket}
+
+
+def sink_de_spec(spec: str, **kw) -> Sink:
+    """'webhook:http://...', 'jsonl:/caminho', 'socket:host:porta', 'socket:unix:/caminho'."""
+    tipo, _, alvo = spec.partition(":")
+    cls = _TIPOS_SINK.get(tipo)
+    if cls is None or not alvo:
+        raise ValueError(f"sink inválido: {spec!r} (use {', '.join(t + ':...' for t in _TIPOS_SINK)})")
+    if cls is SinkWebhook and not alvo.startswith(("http://", "https://")):
+        raise ValueError(f"webhook precisa de URL http(s): {alvo!r}")
+    return cls(alvo, **kw)
+
+
+def sink_de_runtime(spec: str, **kw) -> Sink:
+    """
+    Como `sink_de_spec`, pra sinks pedidos pela API: o destino tem que estar dentro de
+    VIPER_ALERTAS_DIR / VIPER_ALERTAS_HOSTS. Fora disso => PermissionError.
+    """
+    tipo, _, alvo = spec.partition(":")
+    if tipo == "jsonl" or (tipo == "socket" and alvo.startswith("unix:")):
+        caminho = alvo[5:] if tipo == "socket" else alvo
+        spec = f"{tipo}:{'unix:' if tipo == 'socket' else ''}{_dentro_do_dir(caminho)}"
+    elif tipo == "webhook":
+        from urllib.parse import urlsplit
+
+        url = urlsplit(alvo)
+        _exigir_host(url.hostname or "", url.port or (443 if url.scheme == "https" else 80))
+    elif tipo == "socket":
+        host, _, porta = alvo.rpartition(":")
+        _exigir_host(host or "127.0.0.1", int(porta) if porta.isdigit() else 0)
+    return sink_de_spec(spec, **kw)
+
+
+def _dentro_do_dir(caminho: str) -> str:
+    if not ALERTAS_DIR:
+        raise PermissionError("destino em arquivo/socket unix por API desligado (configure VIPER_ALERTAS_DIR)")
+    base = os.path.realpath(ALERTAS_DIR)
+    final = os.path.realpath(os.path.join(base, caminho))
+    if os.path.commonpath([base, final]) != base or final == base:
+        raise PermissionError(f"destino fora de VIPER_ALERTAS_DIR: {caminho!r}")
+    return final
+
+
+def _exigir_host(host: str, porta: int) -> None:
+    liberados = {h.strip().lower() for h in ALERTAS_HOSTS.split(",") if h.strip()}
+    if not liberados:
+        raise PermissionError("destino de rede por API desligado (configure VIPER_ALERTAS_HOSTS)")
+    host = host.lower()
+    if host not in liberados and f"{host}:{porta}" not in liberados:
+        raise PermissionError(f"host fora de VIPER_ALERTAS_HOSTS: {host}:{porta}")
+
+
+# ==============================
+# DESPACHANTE
+# ==============================
+class Despachante:
+    """
+    Ponte worker (thread) -> loop asyncio da API + uma task por sink.
+    `publicar` só agenda no loop (call_soon_threadsafe): nunca espera destino nenhum.
+    """
+
+    def __init__(self):
+        self.sinks: Dict[str, Sink] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.publicados = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self._loop is not None and bool(self.sinks)
+
+    async def iniciar(self, specs: Sequence[str] = ()) -> None:
+        import asyncio
+
+        self._loop = asyncio.get_running_loop()
+        for spec in specs:
+            self.adicionar(sink_de_spec(spec))
+
+    def adicionar(self, sink: Sink) -> Sink:
+        """Registra (ou substitui, pelo nome) um sink; precisa rodar no loop."""
+        if self._loop is None:
+            raise RuntimeError("despachante não iniciado")
+        antigo = self.sinks.get(sink.nome)
+        if antigo is not None:
+            self._loop.create_task(self._encerrar(antigo))
+        sink.task = self._loop.create_task(self._rodar(sink))
+        self.sinks = {**self.sinks, sink.nome: sink}     # cópia: `_distribuir` itera sem lock
+        return sink
+
+    async def remover(self, nome: str) -> bool:
+        sink = self.sinks.get(nome)
+        if sink is None:
+            return False
+        self.sinks = {k: s for k, s in self.sinks.items() if k != nome}
+        await self._encerrar(sink)
+        return True
+
+    async def parar(self, timeout: float = 2.0) -> None:
+        """Dá até `timeout` s pras filas esvaziarem e encerra todos os sinks."""
+        import asyncio
+
+        sinks = list(self.sinks.values())
+        fim = time.monotonic() + timeout
+        while any(s.fila.qsize() for s in sinks) and time.monotonic() < fim:
+            await asyncio.sleep(0.05)
+        self.sinks = {}
+        await asyncio.gather(*(self._encerrar(s) for s in sinks), return_exceptions=True)
+        self._loop = None
+
+    # ------------------------------
+    # entrada (thread do worker)
+    # ------------------------------
+    def publicar(self, evento: Dict) -> None:
+        loop = self._loop
+        if loop is None or not self.sinks:
+            return
+        self.publicados += 1
+        try:
+            loop.call_soon_threadsafe(self._distribuir, evento)
+        except RuntimeError:     # loop já fechado (shutdown)
+            pass
+
+    def _distribuir(self, evento: Dict) -> None:
+        import asyncio
+
+        for s in self.sinks.values():
+            if not s.aceita(evento):
+                continue
+            try:
+                s.fila.put_nowait(evento)
+                s.enfileirados += 1
+            except asyncio.QueueFull:
+                s.descartados_fila += 1
+
+    # ------------------------------
+    # task de cada sink
+    # ------------------------------
+    async def _rodar(self, s: Sink) -> None:
+        import asyncio
+
+        fila = s.fila
+        while True:
+            lote = [await fila.get()]
+            await s.limite.esperar()
+            # o que chegou enquanto esperava ficha entra no mesmo envio
+            if s.lote_ms > 0 and len(lote) + fila.qsize() < s.lote_max:
+                await asyncio.sleep(s.lote_ms / 1000)
+            while len(lote) < s.lote_max and not fila.empty():
+                lote.append(fila.get_nowait())
+            await self._entregar(s, lote)
+
+    async def _entregar(self, s: Sink, lote: List[Dict]) -> None:
+        import asyncio
+
+        for tentativa in range(s.tentativas):
+            if tentativa:
+                s.retries += 1
+                espera = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (tentativa - 1))
+                await asyncio.sleep(espera * (0.5 + random.random() / 2))
+            try:
+                await s.enviar(lote)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                s.erros += 1
+                s.ultimo_erro = f"{type(e).__name__}: {e}"
+                continue
+            agora = time.time()
+            s.enviados += len(lote)
+            s.lotes += 1
+            s.ultimo_envio = agora
+            for e in lote:
+                if e.get("ts") is not None:
+                    s.latencia_ms_ewma += LATENCIA_EWMA_ALFA * ((agora - e["ts"]) * 1000 - s.latencia_ms_ewma)
+            return
+        s.descartados_erro += len(lote)
+
+    @staticmethod
+    async def _encerrar(s: Sink) -> None:
+        import asyncio
+
+        if s.task is not None:
+            s.task.cancel()
+            await asyncio.gather(s.task, return_exceptions=True)
+        await s.fechar()
+
+    def info(self) -> Dict:
+        return {
+            "ativo": self.ativo,
+            "publicados": self.publicados,
+            "sinks": [s.info() for s in self.sinks.values()],
+        }
+
+
+despachante = Despachante()
+
+
+# ==============================
+# STUB (destino de teste)
+# ==============================
+def stub(endereco: str, falhar: float = 0.0, lento: float = 0.0) -> None:
+    """Servidor HTTP que imprime cada lote recebido; falha/atrasa aleatoriamente se pedido."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    host, _, porta = endereco.rpartition(":")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if lento:
+                time.sleep(random.uniform(0, 2 * lento))
+            if random.random() < falhar:
+                self.send_response(503)
+                self.end_headers()
+                return
+            lote = json.loads(corpo or b"[]")
+            print(json.dumps({"recebidos": len(lote), "ids": [e.get("id") for e in lote]}), flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer((host or "127.0.0.1", int(porta)), Handler)
+    print(f"stub de webhook em http://{host or '127.0.0.1'}:{srv.server_address[1]}/", file=sys.stderr, flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Alertas: stub de webhook pra testes")
+    ap.add_argument("--stub", required=True, metavar="HOST:PORTA")
+    ap.add_argument("--falhar", type=float, default=0.0, help="fração de requests respondidos com 503")
+    ap.add_argument("--lento", type=float, default=0.0, help="atraso médio (s) por request")
+    args = ap.parse_args(argv)
+    stub(args.stub, args.falhar, args.lento)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend/bench_import.py
+"""
+Benchmark de cold start: tempo de import (python -X importtime) por caminho.
+
+    python -m backend.bench_import                 # engine, ingestão, API, réplica
+    python -m backend.bench_import --repeticoes 9 --checar
+
+- total = tempo cumulativo do módulo alvo (mediana de N processos novos)
+- terceiros = pacotes fora da stdlib carregados pelo import (além do que o
+  `site` do ambiente já carrega sozinho)
+- --checar: falha se o caminho do engine puxar qualquer pacote de terceiros
+"""
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ALVOS: Dict[str, str] = {
+    "logic": "backend.logic",
+    "engine": "backend.engine",
+    "ingestao": "backend.ingestao",
+    "api": "backend.main",
+    "api_leitura": "backend.main_leitura",
+}
+# caminhos que têm que importar só com a stdlib
+SO_STDLIB = ("logic", "engine", "ingestao")
+
+_SONDA = (
+    "import sys, json\n"
+    "{imp}"
+    "print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}})))\n"
+)
+
+
+def _rodar(modulo: Optional[str]) -> Tuple[int, List[str]]:
+    """(µs cumulativos do módulo, pacotes de topo carregados) num processo novo."""
+    imp = f"import {modulo}\n" if modulo else ""
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [raiz, os.getenv("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SONDA.format(imp=imp)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    total = 0
+    if modulo:
+        for linha in proc.stderr.splitlines():
+            # "import time:  self [us] | cumulative | imported package"
+            partes = linha.split("|")
+            if len(partes) == 3 and partes[2].rstrip() == f" {modulo}":
+                total = int(partes[1])
+    return total, json.loads(proc.stdout)
+
+
+def medir(repeticoes: int = 5) -> Dict[str, Dict]:
+    _, base = _rodar(None)
+    stdlib = set(sys.stdlib_module_names) | set(base) | {"backend"}
+    out: Dict[str, Dict] = {}
+    for nome, modulo in ALVOS.items():
+        tempos = []
+        terceiros: List[str] = []
+        for _ in range(repeticoes):
+            us, mods = _rodar(modulo)
+            tempos.append(us)
+            terceiros = [m for m in mods if m not in stdlib and not m.startswith("_")]
+        out[nome] = {
+            "modulo": modulo,
+            "total_ms": round(statistics.median(tempos) / 1000, 1),
+            "min_ms": round(min(tempos) / 1000, 1),
+            "terceiros": terceiros,
+        }
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Tempo de import por caminho (cold start)")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    ap.add_argument("--checar", action="store_true", help="falha se o engine puxar pacotes de terceiros")
+    args = ap.parse_args(argv)
+
+    res = medir(args.repeticoes)
+    if args.json:
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'caminho':<12} {'módulo':<22} {'mediana':>9} {'mín':>9}  terceiros")
+        for nome, r in res.items():
+            terceiros = ", ".join(r["terceiros"][:8]) + (" ..." if len(r["terceiros"]) > 8 else "")
+            print(f"{nome:<12} {r['modulo']:<22} {r['total_ms']:>7.1f}ms {r['min_ms']:>7.1f}ms  {terceiros or '-'}")
+
+    if args.checar:
+        sujos = {n: res[n]["terceiros"] for n in SO_STDLIB if res[n]["terceiros"]}
+        if sujos:
+            raise SystemExit(f"caminho do engine importa pacotes de terceiros: {sujos}")
+
+
+if __name__ == "__main__":
+    main()
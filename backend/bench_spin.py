@@ -0,0 +1,233 @@
+# backend/bench_spin.py
+"""
+Benchmark do overhead do servidor por spin (POST /spin ponta a ponta vs engine pura).
+
+    python -m backend.bench_spin                       # 20000 spins, 8 mesas, 1 conexão
+    python -m backend.bench_spin --spins 50000 --conexoes 4 --json
+
+- engine = `MesaEngine.receber` chamado direto, no mesmo processo (mesma sequência de números)
+- asgi = o app chamado direto pelo protocolo ASGI (sem socket nem parser HTTP):
+  roteamento, leitura/validação do corpo, despacho, serialização da resposta
+- http = latência vista pelo cliente (http.client, keep-alive) contra um uvicorn novo;
+  inclui o parser HTTP do uvicorn (h11 puro Python sem httptools) e o próprio cliente
+- overhead = asgi - engine (o que é do app) e http - engine (ponta a ponta)
+
+O servidor sobe num processo separado; as conexões ficam em threads do cliente,
+cada uma com suas mesas. Em máquina com 1 núcleo cliente e servidor dividem a CPU.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+MESAS = 8
+SPINS = 20000
+AQUECIMENTO = 500          # spins por conexão fora da medição (JIT de caches, imports tardios)
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentis(xs: List[float]) -> Dict[str, float]:
+    xs = sorted(xs)
+    n = len(xs)
+    return {
+        "media_us": round(statistics.fmean(xs), 1),
+        "p50_us": round(xs[n // 2], 1),
+        "p99_us": round(xs[min(n - 1, int(n * 0.99))], 1),
+    }
+
+
+def _sequencia(spins: int, mesas: int, seed: int) -> List[tuple]:
+    rng = random.Random(seed)
+    return [(f"bench{k % mesas}", rng.randrange(37)) for k in range(spins)]
+
+
+def _deslocar(seq: List[tuple], base: int) -> List[tuple]:
+    """bench0..benchN -> bench{base}..bench{base+N} (mesas exclusivas de uma conexão)."""
+    return [(f"bench{base + int(m[5:])}", n) for m, n in seq]
+
+
+def medir_engine(spins: int = SPINS, mesas: int = MESAS, seed: int = 7) -> Dict[str, float]:
+    """µs por spin chamando a engine direto (sem HTTP)."""
+    from backend.engine import MesaEngine
+    from backend.worker import worker
+
+    engines = {f"bench{k}": MesaEngine(f"bench{k}") for k in range(mesas)}
+    for mesa, numero in _sequencia(AQUECIMENTO, mesas, seed + 1):
+        engines[mesa].receber(numero)
+    worker.drenar()
+    tempos = []
+    for mesa, numero in _sequencia(spins, mesas, seed):
+        t0 = time.perf_counter_ns()
+        engines[mesa].receber(numero)
+        tempos.append((time.perf_counter_ns() - t0) / 1000)
+    worker.drenar()
+    return _percentis(tempos)
+
+
+def medir_asgi(spins: int = SPINS, mesas: int = MESAS, seed: int = 7) -> Dict[str, float]:
+    """µs por spin chamando `backend.main.app` direto (scope/receive/send mínimos)."""
+    import asyncio
+
+    from backend.main import app
+    from backend.worker import worker
+
+    async def _post(mesa: str, numero: int) -> int:
+        corpo = json.dumps({"numero": numero, "mesa": mesa}).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/spin", "raw_path": b"/spin",
+            "root_path": "", "query_string": b"", "server": ("127.0.0.1", 8000),
+            "client": ("127.0.0.1", 1), "headers": [
+                (b"host", b"127.0.0.1"), (b"content-type", b"application/json"),
+                (b"content-length", str(len(corpo)).encode()),
+            ],
+        }
+        recebido = False
+        status = 0
+
+        async def receive() -> Dict:
+            nonlocal recebido
+            if recebido:
+                return {"type": "http.disconnect"}
+            recebido = True
+            return {"type": "http.request", "body": corpo, "more_body": False}
+
+        async def send(msg: Dict) -> None:
+            nonlocal status
+            if msg["type"] == "http.response.start":
+                status = msg["status"]
+
+        await app(scope, receive, send)
+        return status
+
+    async def _rodar() -> List[float]:
+        for mesa, numero in _sequencia(AQUECIMENTO, mesas, seed + 1):
+            await _post(mesa, numero)
+        tempos = []
+        for mesa, numero in _sequencia(spins, mesas, seed):
+            t0 = time.perf_counter_ns()
+            if await _post(mesa, numero) != 200:
+                raise RuntimeError("POST /spin falhou")
+            tempos.append((time.perf_counter_ns() - t0) / 1000)
+        return tempos
+
+    tempos = asyncio.run(_rodar())
+    worker.drenar()
+    return _percentis(tempos)
+
+
+def _cliente(porta: int, seq: List[tuple], aquecer: List[tuple], tempos: List[float], erros: List[str]) -> None:
+    con = http.client.HTTPConnection("127.0.0.1", porta)
+    cab = {"Content-Type": "application/json"}
+    try:
+        for k, (mesa, numero) in enumerate(aquecer + seq):
+            corpo = json.dumps({"numero": numero, "mesa": mesa})
+            t0 = time.perf_counter_ns()
+            con.request("POST", "/spin", corpo, cab)
+            resp = con.getresponse()
+            resp.read()
+            if k >= len(aquecer):
+                tempos.append((time.perf_counter_ns() - t0) / 1000)
+            if resp.status != 200:
+                erros.append(f"{resp.status}")
+    except Exception as e:       # pragma: no cover - só relata
+        erros.append(repr(e))
+    finally:
+        con.close()
+
+
+def medir_http(spins: int = SPINS, mesas: int = MESAS, conexoes: int = 1, seed: int = 7) -> Dict:
+    """µs por spin via POST /spin num uvicorn novo; `conexoes` clientes em paralelo."""
+    porta = _porta_livre()
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [raiz, os.getenv("PYTHONPATH")])))
+    env.pop("VIPER_PROFILE", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(porta),
+         "--log-level", "warning", "--no-access-log"],
+        env=env, cwd=raiz,
+    )
+    try:
+        fim = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", porta), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > fim or proc.poll() is not None:
+                    raise RuntimeError("uvicorn não subiu")
+                time.sleep(0.05)
+
+        # cada conexão fica com as suas mesas (ordem por mesa preservada)
+        por_conexao = max(1, mesas // conexoes)
+        tempos: List[float] = []
+        erros: List[str] = []
+        threads = []
+        for c in range(conexoes):
+            base = c * por_conexao
+            seq = _deslocar(_sequencia(spins // conexoes, por_conexao, seed + c), base)
+            aquecer = _deslocar(_sequencia(AQUECIMENTO, por_conexao, seed + 100 + c), base)
+            threads.append(threading.Thread(target=_cliente, args=(porta, seq, aquecer, tempos, erros)))
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - t0
+    finally:
+        proc.terminate()
+        proc.wait(10)
+    res = _percentis(tempos) if tempos else {}
+    res["spins_s"] = round(len(tempos) / duracao, 1) if duracao else None
+    res["erros"] = len(erros)
+    return res
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    p = argparse.ArgumentParser(description="Overhead do servidor por spin (POST /spin vs engine)")
+    p.add_argument("--spins", type=int, default=SPINS)
+    p.add_argument("--mesas", type=int, default=MESAS)
+    p.add_argument("--conexoes", type=int, default=1)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    args = p.parse_args(argv)
+
+    engine = medir_engine(args.spins, args.mesas, args.seed)
+    asgi = medir_asgi(args.spins, args.mesas, args.seed)
+    http_ = medir_http(args.spins, args.mesas, args.conexoes, args.seed)
+    res = {
+        "engine": engine,
+        "asgi": asgi,
+        "http": http_,
+        "overhead_app_media_us": round(asgi["media_us"] - engine["media_us"], 1),
+        "overhead_media_us": round(http_.get("media_us", 0) - engine["media_us"], 1),
+    }
+    if args.json:
+        print(json.dumps(res, indent=2))
+        return 0
+    print(f"engine    média {engine['media_us']:8.1f} µs   p50 {engine['p50_us']:8.1f}   p99 {engine['p99_us']:8.1f}")
+    print(f"asgi      média {asgi['media_us']:8.1f} µs   p50 {asgi['p50_us']:8.1f}   p99 {asgi['p99_us']:8.1f}")
+    print(f"http      média {http_.get('media_us', 0):8.1f} µs   p50 {http_.get('p50_us', 0):8.1f}   "
+          f"p99 {http_.get('p99_us', 0):8.1f}   {http_['spins_s']} spins/s   erros {http_['erros']}")
+    print(f"overhead  média app {res['overhead_app_media_us']:8.1f} µs   ponta a ponta {res['overhead_media_us']:8.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+# backend/broadcast.py
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncio
+
+Assinante = Callable[[Dict], None]
+
+
+class Broadcast:
+    """
+    Fan-out dos sinais já emitidos pra quem assinou (painel, bots, streams).
+    Roda no worker de segundo plano; assinante lento/quebrado não afeta os outros.
+    """
+
+    def __init__(self):
+        self._assinantes: List[Assinante] = []
+        self._lock = threading.Lock()
+        self.erros = 0
+
+    def assinar(self, fn: Assinante) -> Assinante:
+        with self._lock:
+            self._assinantes = self._assinantes + [fn]
+        return fn
+
+    def cancelar(self, fn: Assinante) -> None:
+        with self._lock:
+            self._assinantes = [a for a in self._assinantes if a is not fn]
+
+    def assinar_async(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        maxsize: int = 1000,
+        mesa: Optional[str] = None,
+    ) -> Tuple["asyncio.Queue[Dict]", Assinante]:
+        """
+        Assinante pra código asyncio (streams): entrega numa asyncio.Queue do loop.
+        Fila cheia => descarta a mensagem (cliente lento não segura ninguém).
+        """
+        import asyncio   # só quem usa stream paga o import (engine puro não precisa)
+
+        fila: "asyncio.Queue[Dict]" = asyncio.Queue(maxsize=maxsize)
+
+        def _por(msg: Dict) -> None:
+            try:
+                fila.put_nowait(msg)
+            except asyncio.QueueFull:
+                pass
+
+        def fn(msg: Dict) -> None:
+            if mesa is None or msg.get("mesa") == mesa:
+                loop.call_soon_threadsafe(_por, msg)
+
+        return fila, self.assinar(fn)
+
+    def publicar(self, msg: Dict) -> None:
+        for fn in self._assinantes:
+            try:
+                fn(msg)
+            except Exception:
+                self.erros += 1
+
+
+broadcast = Broadcast()
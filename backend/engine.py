@@ -0,0 +1,598 @@
+# backend/engine.py
+from __future__ import annotations
+
+from collections import defaultdict, deque
+import threading
+import time
+import uuid
+from typing import Deque, Dict, List, Optional, Tuple
+
+from backend.alertas import TIPOS as TIPOS_ALERTA, despachante, evento_alerta
+from backend.broadcast import broadcast
+from backend.features import COL, FeatureStore
+from backend.livro_entradas import LivroEntradas, empacotar
+from backend.logic import CONFIG_PADRAO, MAX_HISTORY, STATUS, WHEEL_EU, ConfigEngine, EntradaAtiva
+from backend.markov import MarkovMesa
+from backend.memoria import bytes_aprox
+# `executar` é trocado por profiler.executar_medido enquanto uma sessão de profile está aberta
+from backend.pipeline import EMISSORES, EMISSORES_ISOLADOS, SpinEvento, executar
+from backend.ranking import RankingScores
+from backend.retencao import RetencaoMesa
+from backend.replica import SHM_ATIVO, publicador
+from backend.score_mercado import ScoreMercadoEngine
+from backend.score_padroes import ScorePadroesEngine
+from backend.sequencia import OrdenadorSpins
+from backend.stats_store import StatsStore
+from backend.storage import storage
+from backend.vies import DetectorVies
+from backend.visao_global import visao_global
+
+# id deste processo: versões recomeçam do zero num restart, então ETag/caches usam (BOOT_ID, versão)
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class MesaEngine:
+    """
+    Estado de uma mesa + pipeline do spin.
+    - caminho crítico (/spin): ingest -> features -> detectores -> scorers -> resolver -> sinal
+    - no worker: `persistir` (livro de entradas, storage; nunca descartado) e `pos_spin`
+      (scorers de mercado/padrões, réplica, broadcast, alertas; descartável com a fila cheia)
+    - `isolada=True`: só o caminho crítico (sem worker/storage/broadcast) — replay/backtest
+    """
+
+    def __init__(self, mesa_id: str = "default", config: Optional[ConfigEngine] = None, isolada: bool = False):
+        self.mesa_id = mesa_id
+        self.config = config or CONFIG_PADRAO
+        self.isolada = isolada
+        self.emissores = EMISSORES_ISOLADOS if isolada else EMISSORES
+        self.lock = threading.Lock()
+
+        self.historico: Deque[Dict] = deque(maxlen=MAX_HISTORY)
+        # camadas além do ring: blocos comprimidos + agregados por bloco/hora/dia
+        self.retencao = RetencaoMesa()
+        self.stats = {
+            "spins": 0,
+            "entradas": 0,   # entradas SUGERIDAS (liberadas)
+            "greens": 0,
+            "reds": 0,
+            "gales": 0,
+            "padroes": 0,
+        }
+
+        # scores (hit/miss) — arrays densos [terminal, padrão, hit/miss] com padrões internados
+        self.score_store = StatsStore(meia_vida=self.config.meia_vida)
+
+        # rankings incrementais (só a chave resolvida é reposicionada)
+        self.ranking_padrao = RankingScores("padrao")
+        self.ranking_terminal_padrao = RankingScores("terminal_padrao")
+
+        self.entrada_ativa: Optional[EntradaAtiva] = None
+
+        # features por spin (número + transição + agregados por janela), lidas por detectores/scorers
+        self.features = FeatureStore()
+
+        # transições terminal/distância/cor/dúzia (1ª e 2ª ordem, brutas e decaídas)
+        self.markov = MarkovMesa()
+
+        # testes de viés da roda (qui²/G por janela + CUSUM), atualizados a cada spin
+        self.vies = DetectorVies()
+
+        # versão do estado: sobe a cada spin/reset (ETag / 304 nos endpoints GET)
+        self.versao = 0
+        # geração: sobe a cada reset (o seq recomeça; id dos alertas = boot:mesa:geracao:seq)
+        self.geracao = 0
+
+        # dedup/reordenação por seq/spin_id (retries do scraper); o timer pula lacunas
+        # vencidas mesmo sem spin novo (só armado enquanto há pendentes)
+        self.ordenador = OrdenadorSpins()
+        self._timer_lacunas: Optional[threading.Timer] = None
+
+        # snapshot do painel (refeito só quando a versão muda)
+        self._snapshot_painel: Optional[Dict] = None
+
+        # consumidores de segundo plano (só o worker mexe neles)
+        self.score_mercado = ScoreMercadoEngine()
+        self.score_padroes = ScorePadroesEngine()
+        # entradas resolvidas com a cadeia de gale (id dado na abertura, registro pelo worker)
+        self.livro = LivroEntradas(
+            arquivo=None if isolada or not storage.ativo else str(storage.caminho_entradas(mesa_id))
+        )
+
+        # residência (backend.mesas): último acesso pro LRU; hibernada = estado já foi pro disco
+        self.ultimo_uso = time.monotonic()
+        self.hibernada = False
+        self._memoria: Optional[Tuple[int, Dict]] = None     # (versao, estimativa)
+
+    # estado que vai pro disco quando a mesa hiberna (lock/caches/config são refeitos ao voltar)
+    _FORA_DO_DISCO = ("lock", "config", "emissores", "_snapshot_painel", "_memoria", "_timer_lacunas")
+
+    def __getstate__(self) -> Dict:
+        return {k: v for k, v in self.__dict__.items() if k not in self._FORA_DO_DISCO}
+
+    def __setstate__(self, estado: Dict) -> None:
+        self.__dict__.update(estado)
+        self.lock = threading.Lock()
+        self.config = CONFIG_PADRAO       # quem reidrata aplica a config do perfil da mesa
+        self.emissores = EMISSORES_ISOLADOS if self.isolada else EMISSORES
+        self._snapshot_painel = None
+        self._memoria = None
+        self._timer_lacunas = None
+        self.hibernada = False
+
+    # ==============================
+    # SPIN
+    # ==============================
+    def processar(self, numero: int, modo: str = "agressivo", source: str = "manual") -> Dict:
+        """
+        Retorna um dict pronto pro painel.
+        - Não promete acerto; é análise estatística + gatilhos.
+        """
+        with self.lock:
+            if not self.hibernada:
+                return self._processar(numero, modo, source)
+        return self._reidratada().processar(numero, modo, source)
+
+    def receber(
+        self,
+        numero: int,
+        modo: str = "agressivo",
+        source: str = "manual",
+        seq: Optional[int] = None,
+        spin_id: Optional[str] = None,
+    ) -> Dict:
+        """Igual a `processar`, mas idempotente/ordenado quando vem `seq`/`spin_id`."""
+        with self.lock:
+            if not self.hibernada:
+                return self._ordenar(numero, modo, source, seq, spin_id)
+        return self._reidratada().receber(numero, modo, source, seq, spin_id)
+
+    def tentar_receber(
+        self,
+        numero: int,
+        modo: str = "agressivo",
+        source: str = "manual",
+        seq: Optional[int] = None,
+        spin_id: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """`receber` sem esperar: None se o lock está ocupado ou a mesa hibernou (quem chama espera fora)."""
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            if self.hibernada:
+                return None
+            return self._ordenar(numero, modo, source, seq, spin_id)
+        finally:
+            self.lock.release()
+
+    def _ordenar(self, numero: int, modo: str, source: str, seq: Optional[int], spin_id: Optional[str]) -> Dict:
+        """Chamado com o lock: passa pelo ordenador e arma o timer se ficou spin pendente."""
+        sinal = self.ordenador.receber(
+            self._processar, (numero, modo, source, seq, spin_id), seq, spin_id, time.monotonic()
+        )
+        if self.ordenador.pendentes and self._timer_lacunas is None and not self.isolada:
+            self._agendar_lacunas()
+        return sinal
+
+    def _agendar_lacunas(self) -> None:
+        prazo = self.ordenador.prazo()
+        if prazo is None:
+            return
+        t = threading.Timer(max(0.0, prazo - time.monotonic()), self._expirar_lacunas)
+        t.daemon = True
+        self._timer_lacunas = t
+        t.start()
+
+    def _expirar_lacunas(self) -> None:
+        """Timer: seq que não veio não segura os pendentes além de `espera_max`."""
+        with self.lock:
+            self._timer_lacunas = None
+            if self.hibernada:
+                return
+            self.ordenador.expirar(self._processar, time.monotonic())
+            self._agendar_lacunas()
+
+    def _reidratada(self) -> MesaEngine:
+        """Referência antiga (a mesa hibernou depois de quem chamou pegar a instância): a nova."""
+        from backend.mesas import get_mesa
+
+        return get_mesa(self.mesa_id)
+
+    def _processar(
+        self,
+        numero: int,
+        modo: str,
+        source: str,
+        seq_externo: Optional[int] = None,
+        spin_id: Optional[str] = None,
+    ) -> Dict:
+        self.ultimo_uso = time.monotonic()
+        ev = SpinEvento(
+            mesa=self.mesa_id,
+            seq=self.stats["spins"] + 1,
+            geracao=self.geracao,
+            numero=int(numero),
+            modo=modo,
+            source=source,
+            ts=time.time(),
+            seq_externo=seq_externo,
+            spin_id=spin_id,
+        )
+        return executar(self, ev, self.emissores)
+
+    def persistir(self, ev: SpinEvento) -> None:
+        """Livro de entradas + storage (worker, `enviar_duravel`: nunca descartado)."""
+        if ev.entrada is not None and ev.status in ("GREEN", "RED"):
+            green = ev.status == "GREEN"
+            self.livro.registrar(ev.entrada, ev.ts, green)
+            if storage.ativo:
+                storage.gravar_entrada(self.mesa_id, empacotar(ev.entrada, ev.ts, green))
+
+        if storage.ativo:
+            storage.gravar(self.mesa_id, {
+                "mesa": ev.mesa,
+                "seq": ev.seq,
+                "seq_externo": ev.seq_externo,
+                "spin_id": ev.spin_id,
+                "ts": ev.ts,
+                "numero": ev.numero,
+                "modo": ev.modo,
+                "source": ev.source,
+                "status": ev.status,
+                "padrao": ev.entrada.padrao if ev.entrada is not None else ev.padrao,
+                "terminal_previsto": ev.entrada.terminal_previsto if ev.entrada is not None else None,
+                "gale": ev.gale if ev.entrada is not None else None,
+            })
+
+    def pos_spin(self, ev: SpinEvento) -> None:
+        """Consumidores fora do caminho crítico (executado pelo worker, em ordem; descartável)."""
+        if ev.entrada is not None and ev.status in ("GREEN", "RED"):
+            green = ev.status == "GREEN"
+            self.score_padroes.registrar(ev.features, green)
+            if green:
+                self.score_mercado.registrar_pagamento(ev.entrada.padrao, ev.features, ev.tendencia)
+            visao_global.registrar(self.mesa_id, ev.entrada.terminal_previsto, ev.entrada.padrao, green)
+
+        if SHM_ATIVO:
+            publicador.publicar(self, BOOT_ID)
+
+        broadcast.publicar({"mesa": ev.mesa, "seq": ev.seq, **ev.registro})
+        if despachante.ativo and ev.status in TIPOS_ALERTA:
+            despachante.publicar(evento_alerta(ev, BOOT_ID))
+
+    # ==============================
+    # SCORES
+    # ==============================
+    def calcular_score_terminal(self, t: int) -> float:
+        hits, miss = self.score_store.terminal_efetivo(t, self.stats["spins"])
+        return self.config.score(hits, miss, self.config.prior_terminal[t])
+
+    def calcular_score_padrao(self, p: str) -> float:
+        hits, miss = self.score_store.padrao_efetivo(self.score_store.id_de(p), self.stats["spins"])
+        return self.config.score(hits, miss, self.config.prior_padrao)
+
+    def calcular_score_combinado(self, t: int, p: str) -> float:
+        """Score combinado terminal+padrao também é registrado (para ranking)."""
+        hits, miss = self.score_store.combinado_efetivo(t, self.score_store.id_de(p), self.stats["spins"])
+        return self.config.score(hits, miss, self.config.prior_terminal[t])
+
+    # ==============================
+    # RESOLVER ENTRADA (GREEN/GALE/RED)
+    # ==============================
+    def _registrar_resultado(self, t: int, padrao: str, hit: bool) -> None:
+        store = self.score_store
+        pid = store.internar(padrao)
+        store.registrar(t, pid, hit, tick=self.stats["spins"])
+        if hit:
+            self.stats["greens"] += 1
+        if pid < 0:
+            return
+
+        # ranking guarda o score do momento da resolução (com decaimento ele envelhece até a próxima)
+        hits, miss = store.padrao(pid)
+        self.ranking_padrao.atualizar(pid, hits, miss, self.calcular_score_padrao(padrao), rotulo=padrao)
+        hits, miss = store.combinado(t, pid)
+        self.ranking_terminal_padrao.atualizar(
+            t * store.max_padroes + pid, hits, miss, self.calcular_score_combinado(t, padrao),
+            rotulo=store.rotulo_combinado(t, pid),
+        )
+
+    def resolver_entrada_ativa(self, numero: int) -> Tuple[str, str]:
+        """
+        Retorna (status, mensagem)
+        status: GREEN | GALE | RED
+        """
+        entrada = self.entrada_ativa
+        assert entrada is not None
+
+        entrada.numeros.append(numero)
+        hit = numero in entrada.numeros_alvo
+        if hit:
+            self._registrar_resultado(entrada.terminal_previsto, entrada.padrao, True)
+            self.entrada_ativa = None
+            return ("GREEN", "Green confirmado (bateu no alvo)")
+
+        # miss => gale ou red final
+        gale_max = self.config.gale_max
+        if entrada.gale < gale_max:
+            entrada.gale += 1
+            self.stats["gales"] += 1
+            return ("GALE", f"Gale {entrada.gale}/{gale_max} (não bateu no alvo)")
+
+        self._registrar_resultado(entrada.terminal_previsto, entrada.padrao, False)
+        self.entrada_ativa = None
+        self.stats["reds"] += 1
+        return ("RED", "Red confirmado (fechou ciclo)")
+
+    def aplicar_config(self, config: ConfigEngine) -> None:
+        """
+        Troca a config (reload de perfil). A config nova já vem compilada; aqui é só
+        a troca do ponteiro (espera no máximo o spin em andamento desta mesa).
+
+        Se muda o que entra no score (modo, priors via gale_max/vizinhos_alvo, meia-vida),
+        os rankings (que guardam o score da resolução) são reescorados: cálculo fora do
+        lock e troca dentro dele; se uma entrada resolveu no meio, refaz com o lock.
+        """
+        if config == self.config:
+            return
+        with self.lock:
+            reescorar = config.chave_score() != self.config.chave_score()
+            if config.meia_vida != self.config.meia_vida:
+                self.score_store.definir_meia_vida(config.meia_vida, self.stats["spins"])
+            self.config = config
+            self.versao += 1          # scores expostos mudam => ETag nova
+            if not reescorar:
+                return
+            base = self._itens_rankings()
+        novos = self._rankings_reescorados(base)
+        with self.lock:
+            if self.config is not config:
+                return                # outro reload passou na frente (e reescorou)
+            if (self.ranking_padrao.versao, self.ranking_terminal_padrao.versao) != base[0]:
+                novos = self._rankings_reescorados(self._itens_rankings())
+            self._trocar_rankings(*novos)
+
+    def _itens_rankings(self) -> Tuple[Tuple[int, int], List, List]:
+        """(versões, itens do ranking de padrões, itens do combinado), com o lock da mesa."""
+        return (
+            (self.ranking_padrao.versao, self.ranking_terminal_padrao.versao),
+            self.ranking_padrao.itens(),
+            self.ranking_terminal_padrao.itens(),
+        )
+
+    def _rankings_reescorados(self, base: Tuple[Tuple[int, int], List, List]) -> Tuple[RankingScores, RankingScores]:
+        _, itens_p, itens_c = base
+        store = self.score_store
+        scores_p = {pid: self.calcular_score_padrao(rotulo) for pid, rotulo, _, _ in itens_p}
+        scores_c = {}
+        for chave, _, _, _ in itens_c:
+            t, pid = divmod(chave, store.max_padroes)
+            scores_c[chave] = self.calcular_score_combinado(t, store.padroes[pid])
+        return (
+            RankingScores.reconstruir(self.ranking_padrao.campo, itens_p, scores_p),
+            RankingScores.reconstruir(self.ranking_terminal_padrao.campo, itens_c, scores_c),
+        )
+
+    def _trocar_rankings(self, padrao: RankingScores, terminal_padrao: RankingScores) -> None:
+        # versões continuam subindo: a réplica (shm) reescreve o ranking se a versão mudou
+        padrao.versao = self.ranking_padrao.versao + 1
+        terminal_padrao.versao = self.ranking_terminal_padrao.versao + 1
+        self.ranking_padrao = padrao
+        self.ranking_terminal_padrao = terminal_padrao
+        self.versao += 1
+
+    def resetar(self) -> None:
+        with self.lock:
+            self.versao += 1
+            self.geracao += 1
+            self.historico.clear()
+            self.retencao.limpar()
+            self.vies.limpar()
+            self.features.limpar()
+            self.markov.limpar()
+            self.entrada_ativa = None
+            for k in self.stats:
+                self.stats[k] = 0
+            self.score_store.limpar()
+            self.ranking_padrao.limpar()
+            self.ranking_terminal_padrao.limpar()
+            self.score_mercado = ScoreMercadoEngine()
+            self.score_padroes = ScorePadroesEngine()
+            self.livro.limpar()
+            self.ordenador.limpar()
+            self._snapshot_painel = None
+        visao_global.esquecer_mesa(self.mesa_id)
+        if SHM_ATIVO:
+            publicador.reiniciar(self.mesa_id)
+            publicador.publicar(self, BOOT_ID)
+
+    # ==============================
+    # EXPORTS (PARA API)
+    # ==============================
+    def get_historico(self) -> List[Dict]:
+        return list(self.historico)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
+    def get_score_terminal(self) -> List[Dict]:
+        out = []
+        for t in range(10):
+            hits, miss = self.score_store.terminal(t)
+            out.append({
+                "terminal": t,
+                "hits": hits,
+                "miss": miss,
+                "score": round(self.calcular_score_terminal(t), 4),
+            })
+        return out
+
+    def get_score_padrao(self, top: Optional[int] = None) -> List[Dict]:
+        # já ordenado por score desc (ranking incremental)
+        return self.ranking_padrao.top(top)
+
+    def get_score_terminal_padrao(self, top: Optional[int] = None) -> List[Dict]:
+        return self.ranking_terminal_padrao.top(top)
+
+    def heatmap_terminal(self, window: int = 120) -> List[Dict]:
+        with self.lock:
+            return self._heatmap_terminal(window)
+
+    def heatmap_roda_eu(self, window: int = 120) -> List[Dict]:
+        with self.lock:
+            return self._heatmap_roda_eu(window)
+
+    # contagens sem lock: quem chama já está com `self.lock` (o lock não é reentrante)
+    def _heatmap_terminal(self, window: int) -> List[Dict]:
+        if window > (self.historico.maxlen or 0):
+            # além do ring quente: agregados da retenção
+            counts = dict(enumerate(self.retencao.ultimos_spins(window).terminais()))
+        else:
+            tail = list(self.historico)[-window:]
+            counts = defaultdict(int)
+            for h in tail:
+                counts[h["terminal"]] += 1
+        return [{"terminal": t, "count": counts.get(t, 0), "window": window} for t in range(10)]
+
+    def _heatmap_roda_eu(self, window: int) -> List[Dict]:
+        if window > (self.historico.maxlen or 0):
+            counts = dict(enumerate(self.retencao.ultimos_spins(window).numeros))
+        else:
+            tail = list(self.historico)[-window:]
+            counts = defaultdict(int)
+            for h in tail:
+                counts[h["numero"]] += 1
+        # retorna lista ordenada pela posição na roda
+        out = []
+        for idx, n in enumerate(WHEEL_EU):
+            out.append({
+                "wheel_index": idx,
+                "numero": n,
+                "count": counts.get(n, 0),
+                "window": window,
+            })
+        return out
+
+    def get_score_padrao_janela(self, horas: float = 24, agora: Optional[float] = None) -> List[Dict]:
+        """Hit/miss + score por padrão nas últimas `horas` (buckets de hora/dia, sem varrer spins)."""
+        with self.lock:
+            ag = self.retencao.janela_tempo(horas * 3600, agora if agora is not None else time.time())
+            nomes = list(self.score_store.padroes)
+        out = []
+        for pid, nome in enumerate(nomes):
+            hits, miss = ag.pad[2 * pid], ag.pad[2 * pid + 1]
+            if hits or miss:
+                out.append({
+                    "padrao": nome,
+                    "hits": hits,
+                    "miss": miss,
+                    "score": round(self.config.score(hits, miss, self.config.prior_padrao), 4),
+                })
+        out.sort(key=lambda x: x["score"], reverse=True)
+        return out
+
+    def get_agregados(self, nivel: str = "hora", limite: Optional[int] = None) -> List[Dict]:
+        """Buckets por hora/dia: spins, contagem por status/terminal, hit/miss por terminal."""
+        with self.lock:
+            itens = self.retencao.buckets(nivel, limite)
+            out = []
+            for chave, ag in itens:
+                out.append({
+                    "inicio": ag.inicio,
+                    "spins": ag.spins,
+                    "status": {s: ag.status[i] for i, s in enumerate(STATUS)},
+                    "terminais": ag.terminais(),
+                    "hits_terminal": list(ag.term[0::2]),
+                    "miss_terminal": list(ag.term[1::2]),
+                })
+        return out
+
+    def get_features(self, janela: int) -> Dict:
+        """Agregados da janela do FeatureStore + linha do último spin; ValueError se a janela não é mantida."""
+        with self.lock:
+            fs = self.features
+            out = fs.resumo(janela)
+            out["ultima"] = dict(zip(COL, fs.ultima)) if fs.ultima is not None else None
+            return out
+
+    def get_transicoes(
+        self, cadeias: Optional[List[str]] = None, ordem: int = 1, decaido: bool = False, normalizar: bool = False
+    ) -> Dict:
+        """Matrizes de transição (contexto x próximo estado); ValueError se cadeia/ordem inválida."""
+        with self.lock:
+            return self.markov.matrizes(cadeias, ordem, decaido, normalizar)
+
+    def get_vies(self) -> Dict:
+        """Relatório do detector de viés (qui²/G por janela e família, topo do CUSUM)."""
+        with self.lock:
+            return self.vies.relatorio()
+
+    def _stats_historico(self) -> Dict[str, int]:
+        """Métricas do painel (contadas sobre o histórico em memória)."""
+        out = {"spins": len(self.historico), "entradas": 0, "greens": 0, "reds": 0,
+               "blacks": 0, "gales": 0, "padroes": 0}
+        for h in self.historico:
+            cor = h["cor"]
+            if cor == "GREEN":
+                out["greens"] += 1
+            elif cor == "RED":
+                out["reds"] += 1
+            elif cor == "BLACK":
+                out["blacks"] += 1
+            status = h["status"]
+            if status == "ENTRADA":
+                out["entradas"] += 1
+            elif status == "GALE":
+                out["gales"] += 1
+            if h["padroes"]:
+                out["padroes"] += 1
+        return out
+
+    # ordem importa: o que é compartilhado conta no primeiro componente (registros do histórico
+    # aparecem de novo no snapshot do painel)
+    COMPONENTES = ("historico", "retencao", "score_store", "ranking_padrao", "ranking_terminal_padrao",
+                   "features", "markov", "vies", "ordenador", "score_mercado", "score_padroes",
+                   "livro", "_snapshot_painel")
+
+    def memoria(self) -> Dict:
+        """Bytes aproximados por componente (refeito só quando a versão muda)."""
+        cache = self._memoria
+        versao = self.versao
+        if cache is not None and cache[0] == versao:
+            return cache[1]
+        # com o lock só as referências (um spin não espera a medição); containers mexidos
+        # em paralelo são copiados em C pelo bytes_aprox (ver backend/memoria.py)
+        with self.lock:
+            refs = [(nome, getattr(self, nome)) for nome in self.COMPONENTES]
+        vistos: set = set()
+        comp = {nome: bytes_aprox(obj, vistos) for nome, obj in refs}
+        out = {"total": sum(comp.values()), "componentes": comp}
+        self._memoria = (versao, out)
+        return out
+
+    def get_snapshot_painel(self) -> Dict:
+        """
+        Tudo que o painel mostra, num payload só.
+        Montado uma vez por versão; dashboards parados recebem o mesmo objeto.
+        """
+        snap = self._snapshot_painel
+        if snap is not None and snap["versao"] == self.versao:
+            return snap
+        with self.lock:
+            snap = {
+                "mesa": self.mesa_id,
+                "instancia": BOOT_ID,
+                "versao": self.versao,
+                "stats": self.get_stats(),
+                "stats_painel": self._stats_historico(),
+                "historico": self.get_historico(),
+                "heatmap_terminal": self._heatmap_terminal(120),
+                "heatmap_roda": self._heatmap_roda_eu(120),
+                "scores_terminal": self.get_score_terminal(),
+                "scores_padrao": self.get_score_padrao(),
+                "scores_terminal_padrao": self.get_score_terminal_padrao(),
+            }
+            self._snapshot_painel = snap
+            return snap
+
+
+mesa_padrao = MesaEngine()
@@ -0,0 +1,303 @@
+# backend/exportacao.py
+"""
+Export colunar (Parquet / Arrow IPC) dos spins persistidos e das entradas resolvidas.
+
+Fonte: log JSONL do storage (<VIPER_DATA_DIR>/spins/<mesa>.jsonl), sem o limite
+de MAX_HISTORY e com a cadeia de gale de cada entrada.
+
+Datasets:
+- spins:    um registro por spin (número, terminal, cor, status/sinal, padrão, gale)
+- entradas: uma linha por entrada resolvida (padrão, terminal previsto,
+            gale atingido, resultado GREEN/RED, spins até resolver)
+
+Parquet particionado estilo hive por mesa e dia (UTC):
+    <destino>/<dataset>/mesa=<mesa>/dia=<AAAA-MM-DD>/part-0.parquet
+
+    python -m backend.exportacao /dados/export
+    python -m backend.exportacao /dados/export --mesa m1 --dataset entradas --ler
+
+Leitura (pandas/pyarrow/duckdb/polars leem o diretório direto):
+    pyarrow.dataset.dataset("/dados/export/spins", partitioning="hive").to_table()
+
+pyarrow é opcional: só este módulo (e o /export) precisam dele.
+"""
+from __future__ import annotations
+
+import io
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.logic import cor_numero, terminal
+from backend.storage import storage
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pq = None
+
+DATASETS = ("spins", "entradas")
+LOTE = 65536                 # linhas por RecordBatch / row group
+COMPRESSAO = "zstd"
+MIME_ARROW = "application/vnd.apache.arrow.stream"
+
+
+def _exigir_arrow() -> None:
+    if pa is None:
+        raise RuntimeError("export colunar precisa do pyarrow (pip install pyarrow)")
+
+
+def _dia(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+# ==============================
+# LINHAS (Python puro, streaming)
+# ==============================
+def iter_spins(mesa: str, desde: Optional[float] = None, ate: Optional[float] = None) -> Iterator[Dict]:
+    """Spins persistidos da mesa, já com terminal/cor, em ordem de gravação."""
+    for r in storage.ler(mesa):
+        ts = r.get("ts")
+        if ts is None or (desde is not None and ts < desde) or (ate is not None and ts >= ate):
+            continue
+        numero = r["numero"]
+        yield {
+            "seq": r.get("seq"),
+            "seq_externo": r.get("seq_externo"),
+            "spin_id": r.get("spin_id"),
+            "ts": ts,
+            "numero": numero,
+            "terminal": terminal(numero),
+            "cor": cor_numero(numero),
+            "modo": r.get("modo"),
+            "source": r.get("source"),
+            "status": r.get("status"),
+            "padrao": r.get("padrao"),
+            "terminal_previsto": r.get("terminal_previsto"),
+            "gale": r.get("gale"),
+        }
+
+
+def iter_entradas(spins: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Reconstrói as entradas a partir dos spins: ENTRADA abre, GALE aprofunda,
+    GREEN/RED fecha. Entrada que já estava aberta no começo do log sai sem os
+    campos de abertura; reset da mesa (seq volta) descarta a aberta.
+    """
+    aberta: Optional[Dict] = None
+    ultimo_seq = 0
+    for s in spins:
+        seq = s["seq"] or 0
+        if seq < ultimo_seq:
+            aberta = None
+        ultimo_seq = seq
+
+        status = s["status"]
+        if status == "ENTRADA":
+            aberta = {"seq_entrada": seq, "ts_entrada": s["ts"], "modo": s["modo"]}
+        elif status in ("GREEN", "RED"):
+            ab = aberta or {"seq_entrada": None, "ts_entrada": None, "modo": s["modo"]}
+            aberta = None
+            yield {
+                **ab,
+                "seq_resolucao": seq,
+                "ts": s["ts"],
+                "padrao": s["padrao"],
+                "terminal_previsto": s["terminal_previsto"],
+                "gale": s["gale"] or 0,
+                "resultado": status,
+                "numero_resolucao": s["numero"],
+                "spins": seq - ab["seq_entrada"] + 1 if ab["seq_entrada"] is not None else None,
+            }
+
+
+def _linhas(dataset: str, mesa: str, desde: Optional[float], ate: Optional[float]) -> Iterator[Dict]:
+    if dataset == "spins":
+        return iter_spins(mesa, desde, ate)
+    if dataset == "entradas":
+        return iter_entradas(iter_spins(mesa, desde, ate))
+    raise ValueError(f"dataset desconhecido: {dataset!r} (use {', '.join(DATASETS)})")
+
+
+# ==============================
+# ARROW
+# ==============================
+def schema(dataset: str) -> "pa.Schema":
+    _exigir_arrow()
+    texto = pa.dictionary(pa.int32(), pa.string())   # colunas de baixa cardinalidade
+    ts = pa.timestamp("ms", tz="UTC")
+    if dataset == "spins":
+        return pa.schema([
+            ("seq", pa.int64()),
+            ("seq_externo", pa.int64()),
+            ("spin_id", pa.string()),
+            ("ts", ts),
+            ("numero", pa.int8()),
+            ("terminal", pa.int8()),
+            ("cor", texto),
+            ("modo", texto),
+            ("source", texto),
+            ("status", texto),
+            ("padrao", texto),
+            ("terminal_previsto", pa.int8()),
+            ("gale", pa.int8()),
+        ])
+    if dataset == "entradas":
+        return pa.schema([
+            ("seq_entrada", pa.int64()),
+            ("ts_entrada", ts),
+            ("seq_resolucao", pa.int64()),
+            ("ts", ts),
+            ("modo", texto),
+            ("padrao", texto),
+            ("terminal_previsto", pa.int8()),
+            ("gale", pa.int8()),
+            ("resultado", texto),
+            ("numero_resolucao", pa.int8()),
+            ("spins", pa.int32()),
+        ])
+    raise ValueError(f"dataset desconhecido: {dataset!r} (use {', '.join(DATASETS)})")
+
+
+def _lote(linhas: List[Dict], sch: "pa.Schema", mesa: Optional[str] = None) -> "pa.RecordBatch":
+    colunas = []
+    for campo in sch:
+        nome = campo.name
+        if nome == "mesa":
+            valores = [mesa] * len(linhas)
+        elif pa.types.is_timestamp(campo.type):
+            valores = [int(r[nome] * 1000) if r[nome] is not None else None for r in linhas]
+        else:
+            valores = [r[nome] for r in linhas]
+        if pa.types.is_dictionary(campo.type):
+            colunas.append(pa.array(valores, pa.string()).dictionary_encode())
+        else:
+            colunas.append(pa.array(valores, campo.type))
+    return pa.RecordBatch.from_arrays(colunas, schema=sch)
+
+
+def lotes(
+    dataset: str,
+    mesa: str,
+    desde: Optional[float] = None,
+    ate: Optional[float] = None,
+    tamanho: int = LOTE,
+    com_mesa: bool = False,
+) -> Iterator[Tuple[str, "pa.RecordBatch"]]:
+    """(dia, RecordBatch) em streaming; um lote nunca mistura dias."""
+    sch = schema(dataset)
+    if com_mesa:
+        sch = sch.insert(0, pa.field("mesa", pa.dictionary(pa.int32(), pa.string())))
+    buf: List[Dict] = []
+    dia_buf = ""
+    for r in _linhas(dataset, mesa, desde, ate):
+        dia = _dia(r["ts"])
+        if buf and (dia != dia_buf or len(buf) >= tamanho):
+            yield dia_buf, _lote(buf, sch, mesa)
+            buf = []
+        dia_buf = dia
+        buf.append(r)
+    if buf:
+        yield dia_buf, _lote(buf, sch, mesa)
+
+
+def exportar_parquet(
+    destino: str,
+    mesas: Optional[List[str]] = None,
+    datasets: Iterable[str] = DATASETS,
+    desde: Optional[float] = None,
+    ate: Optional[float] = None,
+    compressao: str = COMPRESSAO,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Reescreve as partições (mesa, dia) tocadas pelo intervalo (use limites de dia
+    inteiro pra não deixar partição parcial). Retorna {dataset: {"linhas", "arquivos"}}.
+    """
+    _exigir_arrow()
+    out: Dict[str, Dict[str, int]] = {}
+    for dataset in datasets:
+        linhas = arquivos = 0
+        for mesa in mesas if mesas is not None else storage.mesas():
+            # um writer por dia da mesa, aberto até o fim: log fora de ordem (relógio que
+            # voltou) volta pro arquivo do dia em vez de reabrir e truncar o part-0
+            writers: Dict[str, "pq.ParquetWriter"] = {}
+            try:
+                for dia, lote in lotes(dataset, mesa, desde, ate):
+                    writer = writers.get(dia)
+                    if writer is None:
+                        pasta = os.path.join(destino, dataset, f"mesa={mesa}", f"dia={dia}")
+                        os.makedirs(pasta, exist_ok=True)
+                        writer = pq.ParquetWriter(os.path.join(pasta, "part-0.parquet"), lote.schema,
+                                                  compression=compressao)
+                        writers[dia] = writer
+                        arquivos += 1
+                    writer.write_batch(lote)
+                    linhas += lote.num_rows
+            finally:
+                for writer in writers.values():
+                    writer.close()
+        out[dataset] = {"linhas": linhas, "arquivos": arquivos}
+    return out
+
+
+def stream_ipc(
+    dataset: str,
+    mesas: List[str],
+    desde: Optional[float] = None,
+    ate: Optional[float] = None,
+    tamanho: int = LOTE,
+) -> Iterator[bytes]:
+    """Arrow IPC (stream format) em pedaços: schema, depois um pedaço por RecordBatch."""
+    _exigir_arrow()
+    sch = schema(dataset).insert(0, pa.field("mesa", pa.dictionary(pa.int32(), pa.string())))
+    sink = io.BytesIO()
+    # dicionários mudam de lote pra lote (e de mesa pra mesa) => delta desligado, substitui
+    opcoes = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=False, unify_dictionaries=False)
+    with pa.ipc.new_stream(sink, sch, options=opcoes) as writer:
+        for mesa in mesas:
+            for _, lote in lotes(dataset, mesa, desde, ate, tamanho, com_mesa=True):
+                writer.write_batch(lote)
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+    yield sink.getvalue()   # marcador de fim de stream
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Export Parquet dos spins/entradas persistidos")
+    ap.add_argument("destino")
+    ap.add_argument("--mesa", action="append", help="só estas mesas (default: todas com log)")
+    ap.add_argument("--dataset", action="append", choices=DATASETS)
+    ap.add_argument("--desde", type=float, help="epoch (s) inicial")
+    ap.add_argument("--ate", type=float, help="epoch (s) final (exclusivo)")
+    ap.add_argument("--compressao", default=COMPRESSAO)
+    ap.add_argument("--ler", action="store_true", help="relê o export e mede o tempo de carga")
+    args = ap.parse_args(argv)
+
+    if not storage.ativo:
+        raise SystemExit("persistência desligada (defina VIPER_DATA_DIR)")
+
+    inicio = time.perf_counter()
+    res = exportar_parquet(args.destino, args.mesa, args.dataset or DATASETS, args.desde, args.ate, args.compressao)
+    print(json.dumps({"export": res, "segundos": round(time.perf_counter() - inicio, 2)}, ensure_ascii=False))
+
+    if args.ler:
+        import pyarrow.dataset as ds
+
+        for dataset in args.dataset or DATASETS:
+            inicio = time.perf_counter()
+            tabela = ds.dataset(os.path.join(args.destino, dataset), partitioning="hive").to_table()
+            dt = time.perf_counter() - inicio
+            print(f"{dataset}: {tabela.num_rows:,} linhas em {dt:.2f}s ({tabela.num_rows / max(dt, 1e-9):,.0f} linhas/s)")
+
+
+if __name__ == "__main__":
+    main()
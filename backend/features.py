@@ -0,0 +1,254 @@
+# backend/features.py
+"""
+Features por spin (número + transição), calculadas uma vez e lidas por todos
+os detectores/scorers da mesa.
+
+Linha de largura fixa (tupla de LARGURA inteiros; uma por spin, ring de MAX_HISTORY):
+- do número (tabela estática, sem conta por spin):
+  numero, terminal, cor, paridade, duzia, coluna, altura, setor, roda (posição na roda)
+- da transição (vs spin anterior; -1 no primeiro):
+  distancia (casas no sentido horário, 0..36), salto (menor distância, 0..18),
+  direcao (0 = mesmo número, 1 = horário, 2 = anti-horário), mesmo_setor (0/1),
+  delta_terminal ((t - t_anterior) mod 10)
+
+Como a linha só depende de (número anterior, número), as 37x37 (+37 sem anterior)
+linhas possíveis são montadas uma vez no import: o ring guarda só o código da
+linha (2 bytes por spin) e o spin não calcula nem aloca nada.
+
+Agregados por janela deslizante (JANELAS): contagem por valor das colunas de
+JANELA_COLUNAS + salto médio. Toda coluna de janela é função do número, da distância
+na roda ou do mesmo_setor, então a janela conta só esses 3 "átomos": o spin que entra
+soma 3 contadores e o que sai subtrai 3, por janela. As contagens por coluna saem dos
+átomos na leitura (O(37), só API e GREEN leem).
+
+Ids das categorias (rótulos em ROTULOS):
+    cor: RED, BLACK, GREEN | paridade: par, impar, zero | duzia/coluna: zero, 1, 2, 3
+    altura: zero, baixo, alto | setor: voisins, tiers, orphelins
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.logic import MAX_HISTORY, RED_NUMBERS, SETORES, WHEEL_EU, terminal
+
+JANELAS: Tuple[int, ...] = (12, 120)
+
+_N = 37
+_IDX = {n: i for i, n in enumerate(WHEEL_EU)}
+_SETOR = {n: i for i, nome in enumerate(SETORES) for n in SETORES[nome]}
+
+# (nome, nº de valores)
+COLUNAS: Tuple[Tuple[str, int], ...] = (
+    ("numero", _N),
+    ("terminal", 10),
+    ("cor", 3),
+    ("paridade", 3),
+    ("duzia", 4),
+    ("coluna", 4),
+    ("altura", 3),
+    ("setor", 3),
+    ("roda", _N),
+    ("distancia", _N),
+    ("salto", 19),
+    ("direcao", 3),
+    ("mesmo_setor", 2),
+    ("delta_terminal", 10),
+)
+LARGURA = len(COLUNAS)
+COL: Dict[str, int] = {nome: i for i, (nome, _) in enumerate(COLUNAS)}
+(F_NUMERO, F_TERMINAL, F_COR, F_PARIDADE, F_DUZIA, F_COLUNA, F_ALTURA, F_SETOR, F_RODA,
+ F_DISTANCIA, F_SALTO, F_DIRECAO, F_MESMO_SETOR, F_DELTA_TERMINAL) = range(LARGURA)
+N_ESTATICAS = F_RODA + 1
+
+ROTULOS: Dict[str, Tuple[str, ...]] = {
+    "cor": ("RED", "BLACK", "GREEN"),
+    "paridade": ("par", "impar", "zero"),
+    "duzia": ("zero", "1", "2", "3"),
+    "coluna": ("zero", "1", "2", "3"),
+    "altura": ("zero", "baixo", "alto"),
+    "setor": tuple(SETORES),
+    "direcao": ("mesmo", "horario", "anti_horario"),
+}
+
+# colunas com contagem por janela (as de 37 valores ficam de fora: o viés/heatmap já cobre)
+JANELA_COLUNAS: Tuple[int, ...] = (F_TERMINAL, F_COR, F_PARIDADE, F_DUZIA, F_COLUNA, F_ALTURA, F_SETOR,
+                                   F_DIRECAO, F_MESMO_SETOR)
+
+
+def _estaticas(n: int) -> Tuple[int, ...]:
+    if n == 0:
+        return (0, 0, 2, 2, 0, 0, 0, _SETOR[0], _IDX[0])
+    return (
+        n,
+        terminal(n),
+        0 if n in RED_NUMBERS else 1,
+        0 if n % 2 == 0 else 1,
+        (n - 1) // 12 + 1,
+        (n - 1) % 3 + 1,
+        1 if n <= 18 else 2,
+        _SETOR[n],
+        _IDX[n],
+    )
+
+
+# features estáticas de cada número (linha parcial, colunas 0..F_RODA)
+POR_NUMERO: Tuple[Tuple[int, ...], ...] = tuple(_estaticas(n) for n in range(_N))
+_SEM_ANTERIOR = (-1,) * (LARGURA - N_ESTATICAS)
+
+
+def valores(coluna: str) -> Tuple[int, ...]:
+    """Valor de uma coluna estática pra cada número 0..36."""
+    c = COL[coluna]
+    if c >= N_ESTATICAS:
+        raise ValueError(f"{coluna!r} depende do spin anterior")
+    return tuple(linha[c] for linha in POR_NUMERO)
+
+
+def _salto_direcao(dist: int) -> Tuple[int, int]:
+    if dist == 0:
+        return 0, 0
+    if dist <= _N // 2:
+        return dist, 1
+    return _N - dist, 2
+
+
+def transicao(anterior: int, numero: int) -> Tuple[int, ...]:
+    a, b = POR_NUMERO[anterior], POR_NUMERO[numero]
+    dist = (b[F_RODA] - a[F_RODA]) % _N
+    salto, direcao = _salto_direcao(dist)
+    return (dist, salto, direcao, int(a[F_SETOR] == b[F_SETOR]), (b[F_TERMINAL] - a[F_TERMINAL]) % 10)
+
+
+# átomos contados por janela: número, distância, mesmo_setor (+1 posição descartável
+# pro spin sem anterior: toda linha toca exatamente 3 contadores)
+_A_NUMERO, _A_DISTANCIA, _A_MESMO_SETOR = 0, _N, 2 * _N
+_A_NADA = 2 * _N + 2
+_TAM_CONTAGENS = _A_NADA + 1
+
+# coluna -> (início do átomo, valor da coluna pra cada valor do átomo)
+_DE_ATOMO: Dict[int, Tuple[int, Tuple[int, ...]]] = {
+    c: (_A_NUMERO, tuple(linha[c] for linha in POR_NUMERO)) for c in range(N_ESTATICAS)
+}
+_DE_ATOMO[F_DISTANCIA] = (_A_DISTANCIA, tuple(range(_N)))
+_DE_ATOMO[F_SALTO] = (_A_DISTANCIA, tuple(_salto_direcao(d)[0] for d in range(_N)))
+_DE_ATOMO[F_DIRECAO] = (_A_DISTANCIA, tuple(_salto_direcao(d)[1] for d in range(_N)))
+_DE_ATOMO[F_MESMO_SETOR] = (_A_MESMO_SETOR, (0, 1))
+
+
+# todas as linhas possíveis pré-montadas: código = anterior*37 + número (37*37 + 37 sem anterior)
+# => por spin nada é calculado nem alocado, só o código entra no ring
+def _montar_linhas() -> Tuple[Tuple[Tuple[int, ...], ...], Tuple[Tuple[int, int, int], ...]]:
+    linhas = [POR_NUMERO[b] + transicao(a, b) for a in range(_N) for b in range(_N)]
+    linhas += [POR_NUMERO[n] + _SEM_ANTERIOR for n in range(_N)]
+    atomos = [
+        (_A_NUMERO + linha[F_NUMERO], _A_DISTANCIA + linha[F_DISTANCIA], _A_MESMO_SETOR + linha[F_MESMO_SETOR])
+        if linha[F_DISTANCIA] >= 0 else (_A_NUMERO + linha[F_NUMERO], _A_NADA, _A_NADA)
+        for linha in linhas
+    ]
+    return tuple(linhas), tuple(atomos)
+
+
+LINHAS, _ATOMOS = _montar_linhas()
+_SEM_ANT = _N * _N         # código da linha sem anterior = _SEM_ANT + número
+
+
+class FeatureStore:
+    """Ring de linhas de features + agregados por janela, de uma mesa."""
+
+    def __init__(self, capacidade: int = MAX_HISTORY, janelas: Sequence[int] = JANELAS):
+        self.janelas = tuple(sorted(janelas))
+        self.capacidade = max(capacidade, self.janelas[-1] if self.janelas else 1)
+        self.limpar()
+
+    def limpar(self) -> None:
+        self._ring = array("H", bytes(2 * self.capacidade))    # código da linha de cada spin
+        self._pos = 0                  # próxima posição a escrever
+        self.spins = 0
+        self.ultima: Optional[Tuple[int, ...]] = None
+        self._contagens = [array("q", bytes(8 * _TAM_CONTAGENS)) for _ in self.janelas]
+
+    # ------------------------------
+    # escrita (uma vez por spin)
+    # ------------------------------
+    def observar(self, numero: int) -> Tuple[int, ...]:
+        ant = self.ultima
+        codigo = ant[F_NUMERO] * _N + numero if ant is not None else _SEM_ANT + numero
+        linha = LINHAS[codigo]
+        a, b, c = _ATOMOS[codigo]
+        cap, ring, pos = self.capacidade, self._ring, self._pos
+        self.spins = spins = self.spins + 1
+
+        for janela, cont in zip(self.janelas, self._contagens):
+            if spins > janela:
+                x, y, z = _ATOMOS[ring[(pos - janela) % cap]]
+                cont[x] -= 1
+                cont[y] -= 1
+                cont[z] -= 1
+            cont[a] += 1
+            cont[b] += 1
+            cont[c] += 1
+
+        ring[pos] = codigo
+        self._pos = (pos + 1) % cap
+        self.ultima = linha
+        return linha
+
+    # ------------------------------
+    # leitura
+    # ------------------------------
+    def linha(self, atras: int = 0) -> Tuple[int, ...]:
+        """Linha de `atras` spins atrás (0 = último spin)."""
+        if atras >= min(self.spins, self.capacidade):
+            raise IndexError(atras)
+        return LINHAS[self._ring[(self._pos - 1 - atras) % self.capacidade]]
+
+    def ultimos(self, coluna: int, n: int) -> List[int]:
+        """Valores da coluna nos últimos `n` spins, do mais antigo pro mais novo."""
+        n = min(n, self.spins, self.capacidade)
+        cap, ring = self.capacidade, self._ring
+        base = self._pos - n
+        if base >= 0:          # caso comum (detectores pedem 3): fatia contínua do ring
+            return [LINHAS[k][coluna] for k in ring[base:self._pos]]
+        return [LINHAS[ring[(base + k) % cap]][coluna] for k in range(n)]
+
+    def _w(self, janela: int) -> int:
+        try:
+            return self.janelas.index(janela)
+        except ValueError:
+            raise ValueError(f"janela {janela} não mantida (use {', '.join(map(str, self.janelas))})") from None
+
+    def contagens(self, janela: int, coluna: int) -> List[int]:
+        """Contagem por valor da coluna nos últimos `janela` spins."""
+        cont = self._contagens[self._w(janela)]
+        try:
+            ini, valor = _DE_ATOMO[coluna]
+        except KeyError:
+            raise ValueError(f"coluna {COLUNAS[coluna][0]!r} sem contagem por janela") from None
+        out = [0] * COLUNAS[coluna][1]
+        for a, v in enumerate(valor):
+            out[v] += cont[ini + a]
+        return out
+
+    def moda(self, janela: int, coluna: int) -> int:
+        """Valor mais frequente na janela (empate: menor id)."""
+        cont = self.contagens(janela, coluna)
+        return max(range(len(cont)), key=cont.__getitem__)
+
+    def modas(self, janela: int, colunas: Sequence[int] = JANELA_COLUNAS) -> Dict[int, int]:
+        return {c: self.moda(janela, c) for c in colunas}
+
+    def salto_medio(self, janela: int) -> Optional[float]:
+        cont = self.contagens(janela, F_SALTO)
+        n = sum(cont)
+        return sum(s * k for s, k in enumerate(cont)) / n if n else None
+
+    def resumo(self, janela: int) -> Dict:
+        """Agregados da janela com rótulos (API/painel)."""
+        out: Dict = {"janela": janela, "spins": min(self.spins, janela), "salto_medio": self.salto_medio(janela)}
+        for c in JANELA_COLUNAS:
+            nome = COLUNAS[c][0]
+            cont = self.contagens(janela, c)
+            rot = ROTULOS.get(nome)
+            out[nome] = {(rot[v] if rot else str(v)): k for v, k in enumerate(cont)}
+        return out
@@ -0,0 +1,533 @@
+# backend/ingestao.py
+"""
+Ingestão de spins de várias mesas a partir de fontes externas (scrapers).
+
+Fontes (adapters) entregam linhas; o Ingestor faz o parse e distribui os spins
+num pool fixo de consumidores (mesa -> consumidor por hash, então a ordem por mesa
+é preservada). Filas limitadas => backpressure: se os consumidores atrasam, a
+leitura da fonte para (e o TCP segura o scraper do outro lado). O consumidor
+entrega cada spin como o /spin (`mesas.receber_sem_bloquear`): mesa fria ou lock
+ocupado vão pro threadpool, o event loop da API não espera.
+
+Formato de linha:
+- JSON: {"mesa": "m1", "numero": 17, "seq": 42, "spin_id": "...", "ts": 1700000000.1, "modo": "normal"}
+- CSV:  m1,17[,seq]
+
+Uso (processo de ingestão standalone):
+    python -m backend.ingestao --tail /var/feed/spins.log --socket 127.0.0.1:9100
+    python -m backend.ingestao --replay data/spins/m1.jsonl
+    python -m backend.ingestao --bench --mesas 50 --total 200000
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, NamedTuple, Optional
+
+from backend.logic import MODOS
+from backend.mesas import receber_sem_bloquear
+from backend.sequencia import SPIN_ID_MAX
+from backend.storage import mesa_id_valido
+
+if TYPE_CHECKING:
+    import argparse
+
+FILA_MAX = 2048            # por consumidor (backpressure)
+CONSUMIDORES = 4
+LOTE_MAX = 256             # spins por fatia antes de devolver o loop
+LAG_EWMA_ALFA = 0.05
+
+
+class SpinFeed(NamedTuple):
+    mesa: str
+    numero: int
+    seq: Optional[int]
+    spin_id: Optional[str]
+    ts: Optional[float]
+    modo: Optional[str] = None     # logs gravados (storage) trazem o modo do spin
+
+
+def parse_spin(linha: str) -> Optional[SpinFeed]:
+    """Linha da fonte -> SpinFeed. Linha vazia/comentário => None; inválida => ValueError."""
+    linha = linha.strip()
+    if not linha or linha.startswith("#"):
+        return None
+
+    if linha[0] == "{":
+        d = json.loads(linha)
+        mesa = str(d.get("mesa") or "default")
+        numero = int(d["numero"])
+        seq = d.get("seq")
+        seq = int(seq) if seq is not None else None
+        spin_id = d.get("spin_id")
+        ts = d.get("ts")
+        ts = float(ts) if ts is not None else None
+        modo = d.get("modo")
+    else:
+        partes = [p.strip() for p in linha.split(",")]
+        if len(partes) < 2:
+            raise ValueError(f"linha inválida: {linha!r}")
+        mesa = partes[0] or "default"
+        numero = int(partes[1])
+        seq = int(partes[2]) if len(partes) > 2 and partes[2] else None
+        spin_id = None
+        ts = None
+        modo = None
+
+    if not 0 <= numero <= 36:
+        raise ValueError(f"número fora de 0..36: {numero}")
+    if not mesa_id_valido(mesa):
+        raise ValueError(f"id de mesa inválido: {mesa!r}")
+    if modo is not None and modo not in MODOS:
+        raise ValueError(f"modo inválido: {modo!r} (use {', '.join(MODOS)})")
+    if spin_id is not None and not 1 <= len(str(spin_id)) <= SPIN_ID_MAX:
+        raise ValueError(f"spin_id com tamanho fora de 1..{SPIN_ID_MAX}")
+    return SpinFeed(mesa, numero, seq, str(spin_id) if spin_id is not None else None, ts, modo)
+
+
+# ==============================
+# MÉTRICAS
+# ==============================
+@dataclass
+class MetricasFonte:
+    nome: str
+    linhas: int = 0
+    spins: int = 0
+    erros_parse: int = 0
+    lag_ms_ewma: float = 0.0        # agora - ts do spin (quando a fonte manda ts)
+    lag_ms_max: float = 0.0
+    espera_fila_ms_ewma: float = 0.0
+    ultimo_spin: Optional[float] = None
+    conectada: bool = False
+    reconexoes: int = 0
+    _inicio: float = field(default_factory=time.monotonic, repr=False)
+
+    def registrar_lag(self, lag_ms: float) -> None:
+        self.lag_ms_ewma += LAG_EWMA_ALFA * (lag_ms - self.lag_ms_ewma)
+        if lag_ms > self.lag_ms_max:
+            self.lag_ms_max = lag_ms
+
+    def info(self) -> Dict:
+        dt = max(1e-9, time.monotonic() - self._inicio)
+        return {
+            "fonte": self.nome,
+            "conectada": self.conectada,
+            "linhas": self.linhas,
+            "spins": self.spins,
+            "erros_parse": self.erros_parse,
+            "spins_por_s": round(self.spins / dt, 1),
+            "lag_ms_ewma": round(self.lag_ms_ewma, 3),
+            "lag_ms_max": round(self.lag_ms_max, 3),
+            "espera_fila_ms_ewma": round(self.espera_fila_ms_ewma, 3),
+            "ultimo_spin": self.ultimo_spin,
+            "reconexoes": self.reconexoes,
+        }
+
+
+# ==============================
+# FONTES (adapters)
+# ==============================
+class FonteSpins(ABC):
+    """Interface: `linhas()` é um async iterator de linhas cruas."""
+
+    nome: str = "fonte"
+    usa_ts_lag: bool = True        # replay não mede lag pelo ts original
+
+    def __init__(self):
+        self.metricas = MetricasFonte(self.nome)
+
+    @abstractmethod
+    async def linhas(self) -> AsyncIterator[str]:
+        ...
+
+
+class FonteArquivoTail(FonteSpins):
+    """`tail -F` de um arquivo: acompanha append, truncamento e rotação (inode novo)."""
+
+    def __init__(self, path: str, desde_inicio: bool = False, intervalo: float = 0.05):
+        self.nome = f"tail:{path}"
+        super().__init__()
+        self.path = path
+        self.desde_inicio = desde_inicio
+        self.intervalo = intervalo
+
+    async def linhas(self) -> AsyncIterator[str]:
+        pos: Optional[int] = None
+        inode: Optional[int] = None
+        resto = b""
+        while True:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self.metricas.conectada = False
+                await asyncio.sleep(self.intervalo)
+                continue
+
+            self.metricas.conectada = True
+            if pos is None:
+                pos = 0 if self.desde_inicio else st.st_size
+                inode = st.st_ino
+            if st.st_ino != inode or st.st_size < pos:
+                # rotacionado/truncado: recomeça do início do arquivo novo
+                pos, inode, resto = 0, st.st_ino, b""
+                self.metricas.reconexoes += 1
+
+            if st.st_size == pos:
+                await asyncio.sleep(self.intervalo)
+                continue
+
+            with open(self.path, "rb") as f:
+                f.seek(pos)
+                data = f.read(1 << 20)
+            pos += len(data)
+            data = resto + data
+            fim = data.rfind(b"\n")
+            if fim < 0:
+                resto = data
+                continue
+            resto = data[fim + 1:]
+            for linha in data[:fim].split(b"\n"):
+                yield linha.decode("utf-8", "replace")
+
+
+class FonteStream(FonteSpins):
+    """Base pra fontes que viram um asyncio.StreamReader (socket, stdin)."""
+
+    @abstractmethod
+    async def _abrir(self) -> asyncio.StreamReader:
+        ...
+
+    reconectar: bool = True
+    backoff_max: float = 5.0
+
+    async def linhas(self) -> AsyncIterator[str]:
+        espera = 0.1
+        while True:
+            try:
+                reader = await self._abrir()
+            except OSError:
+                self.metricas.conectada = False
+                if not self.reconectar:
+                    return
+                await asyncio.sleep(espera)
+                espera = min(self.backoff_max, espera * 2)
+                continue
+
+            self.metricas.conectada = True
+            espera = 0.1
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                yield linha.decode("utf-8", "replace")
+
+            self.metricas.conectada = False
+            if not self.reconectar:
+                return
+            self.metricas.reconexoes += 1
+            await asyncio.sleep(espera)
+
+
+class FonteSocket(FonteStream):
+    """Cliente de um feed por socket local: "host:porta" (TCP) ou "unix:/caminho"."""
+
+    def __init__(self, endereco: str, reconectar: bool = True):
+        self.nome = f"socket:{endereco}"
+        super().__init__()
+        self.endereco = endereco
+        self.reconectar = reconectar
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _abrir(self) -> asyncio.StreamReader:
+        if self._writer is not None:
+            self._writer.close()
+        if self.endereco.startswith("unix:"):
+            reader, writer = await asyncio.open_unix_connection(self.endereco[5:], limit=1 << 20)
+        else:
+            host, _, porta = self.endereco.rpartition(":")
+            reader, writer = await asyncio.open_connection(host or "127.0.0.1", int(porta), limit=1 << 20)
+        # o writer precisa ficar vivo: se for coletado, o transporte fecha junto
+        self._writer = writer
+        return reader
+
+
+class FonteStdin(FonteStream):
+    nome = "stdin"
+    reconectar = False
+
+    async def _abrir(self) -> asyncio.StreamReader:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=1 << 20)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        return reader
+
+
+class FonteReplay(FonteSpins):
+    """
+    Reproduz um log gravado (JSONL do storage ou do scraper).
+    velocidade=0 => o mais rápido possível; 1.0 => tempo real pelo `ts`; 10 => 10x.
+    """
+
+    usa_ts_lag = False
+
+    def __init__(self, path: str, velocidade: float = 0.0):
+        self.nome = f"replay:{path}"
+        super().__init__()
+        self.path = path
+        self.velocidade = velocidade
+
+    async def linhas(self) -> AsyncIterator[str]:
+        self.metricas.conectada = True
+        ts_anterior: Optional[float] = None
+        with open(self.path, encoding="utf-8") as f:
+            for i, linha in enumerate(f):
+                if self.velocidade > 0 and linha.startswith("{"):
+                    ts = json.loads(linha).get("ts")
+                    if ts is not None and ts_anterior is not None and ts > ts_anterior:
+                        await asyncio.sleep((ts - ts_anterior) / self.velocidade)
+                    ts_anterior = ts if ts is not None else ts_anterior
+                elif i % LOTE_MAX == 0:
+                    await asyncio.sleep(0)
+                yield linha
+        self.metricas.conectada = False
+
+
+# ==============================
+# FEED MOCK (testes / benchmark)
+# ==============================
+class MockFeedServer:
+    """
+    Servidor TCP que imita o scraper: N mesas, seq por mesa, linhas JSON.
+    taxa=0 => o mais rápido que o cliente conseguir ler (backpressure do TCP).
+    """
+
+    def __init__(self, mesas: int = 10, taxa: float = 100.0, total: Optional[int] = None,
+                 seed: Optional[int] = None, host: str = "127.0.0.1", porta: int = 0):
+        self.mesas = [f"mesa{i:03d}" for i in range(mesas)]
+        self.taxa = taxa
+        self.total = total
+        self.seed = seed
+        self.host = host
+        self.porta = porta
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def endereco(self) -> str:
+        return f"{self.host}:{self.porta}"
+
+    async def iniciar(self) -> "MockFeedServer":
+        self._server = await asyncio.start_server(self._cliente, self.host, self.porta)
+        self.porta = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def fechar(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _cliente(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        rng = random.Random(self.seed)
+        seqs = {m: 0 for m in self.mesas}
+        enviados = 0
+        inicio = time.monotonic()
+        try:
+            while self.total is None or enviados < self.total:
+                if self.taxa > 0:
+                    devidos = int((time.monotonic() - inicio) * self.taxa) - enviados
+                    if devidos <= 0:
+                        await asyncio.sleep(0.005)
+                        continue
+                else:
+                    devidos = LOTE_MAX
+                if self.total is not None:
+                    devidos = min(devidos, self.total - enviados)
+
+                partes = []
+                agora = time.time()
+                for _ in range(devidos):
+                    mesa = self.mesas[rng.randrange(len(self.mesas))]
+                    seqs[mesa] += 1
+                    partes.append(json.dumps(
+                        {"mesa": mesa, "numero": rng.randrange(37), "seq": seqs[mesa], "ts": agora}
+                    ))
+                writer.write(("\n".join(partes) + "\n").encode())
+                enviados += devidos
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+# ==============================
+# INGESTOR
+# ==============================
+class Ingestor:
+    def __init__(self, consumidores: int = CONSUMIDORES, fila_max: int = FILA_MAX, modo: str = "agressivo"):
+        self.modo = modo           # spins sem modo próprio (logs gravados trazem o deles)
+        self.fontes: List[FonteSpins] = []
+        self._filas: List[asyncio.Queue] = [asyncio.Queue(maxsize=fila_max) for _ in range(consumidores)]
+        self._tasks: List[asyncio.Task] = []
+        self.processados = 0
+        self.erros = 0
+
+    def adicionar(self, fonte: FonteSpins) -> FonteSpins:
+        self.fontes.append(fonte)
+        if self._tasks:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._ler(fonte)))
+        return fonte
+
+    async def iniciar(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._consumir(f)) for f in self._filas]
+        self._tasks += [loop.create_task(self._ler(f)) for f in self.fontes]
+
+    async def parar(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drenar(self) -> None:
+        """Espera as fontes finitas (replay) acabarem e as filas esvaziarem."""
+        leitores = self._tasks[len(self._filas):]
+        await asyncio.gather(*leitores, return_exceptions=True)
+        for f in self._filas:
+            await f.join()
+
+    async def _ler(self, fonte: FonteSpins) -> None:
+        m = fonte.metricas
+        n = len(self._filas)
+        async for linha in fonte.linhas():
+            m.linhas += 1
+            try:
+                spin = parse_spin(linha)
+            except (ValueError, KeyError, TypeError):
+                m.erros_parse += 1
+                continue
+            if spin is None:
+                continue
+            # put bloqueante = backpressure na fonte
+            await self._filas[hash(spin.mesa) % n].put((fonte, spin, time.monotonic()))
+
+    async def _consumir(self, fila: asyncio.Queue) -> None:
+        while True:
+            item = await fila.get()
+            lote = [item]
+            while len(lote) < LOTE_MAX and not fila.empty():
+                lote.append(fila.get_nowait())
+
+            agora_mono = time.monotonic()
+            agora = time.time()
+            for fonte, spin, chegada in lote:
+                m = fonte.metricas
+                try:
+                    await receber_sem_bloquear(
+                        spin.mesa, spin.numero, spin.modo or self.modo,
+                        source=fonte.nome, seq=spin.seq, spin_id=spin.spin_id,
+                    )
+                    self.processados += 1
+                    m.spins += 1
+                except Exception:
+                    self.erros += 1
+                m.ultimo_spin = agora
+                m.espera_fila_ms_ewma += LAG_EWMA_ALFA * ((agora_mono - chegada) * 1000 - m.espera_fila_ms_ewma)
+                if spin.ts is not None and fonte.usa_ts_lag:
+                    m.registrar_lag((agora - spin.ts) * 1000)
+                fila.task_done()
+            await asyncio.sleep(0)
+
+    def info(self) -> Dict:
+        return {
+            "processados": self.processados,
+            "erros": self.erros,
+            "filas": [f.qsize() for f in self._filas],
+            "fontes": [f.metricas.info() for f in self.fontes],
+        }
+
+
+def fonte_de_spec(spec: str) -> FonteSpins:
+    """'tail:/p', 'socket:host:porta', 'socket:unix:/p', 'replay:/p', 'stdin'."""
+    tipo, _, resto = spec.partition(":")
+    if tipo == "tail":
+        return FonteArquivoTail(resto)
+    if tipo == "socket":
+        return FonteSocket(resto)
+    if tipo == "replay":
+        return FonteReplay(resto)
+    if tipo == "stdin":
+        return FonteStdin()
+    raise ValueError(f"fonte desconhecida: {spec!r}")
+
+
+# ==============================
+# CLI
+# ==============================
+async def _main(args: argparse.Namespace) -> None:
+    ing = Ingestor(consumidores=args.consumidores, modo=args.modo)
+    mock: Optional[MockFeedServer] = None
+
+    if args.bench:
+        mock = await MockFeedServer(mesas=args.mesas, taxa=args.taxa, total=args.total, seed=1).iniciar()
+        ing.adicionar(FonteSocket(mock.endereco, reconectar=False))
+    for p in args.tail:
+        ing.adicionar(FonteArquivoTail(p))
+    for e in args.socket:
+        ing.adicionar(FonteSocket(e))
+    for p in args.replay:
+        ing.adicionar(FonteReplay(p, velocidade=args.velocidade))
+    if args.stdin:
+        ing.adicionar(FonteStdin())
+    if not ing.fontes:
+        raise SystemExit("nenhuma fonte (use --tail/--socket/--replay/--stdin/--bench)")
+
+    inicio = time.perf_counter()
+    await ing.iniciar()
+    finitas = args.bench or (args.replay and not (args.tail or args.socket or args.stdin))
+    try:
+        if finitas:
+            await ing.drenar()
+        else:
+            while True:
+                await asyncio.sleep(args.intervalo)
+                print(json.dumps(ing.info(), ensure_ascii=False), flush=True)
+    finally:
+        dt = time.perf_counter() - inicio
+        await ing.parar()
+        if mock is not None:
+            await mock.fechar()
+        print(json.dumps(ing.info(), ensure_ascii=False))
+        print(f"{ing.processados} spins em {dt:.2f}s => {ing.processados / max(dt, 1e-9):,.0f} spins/s")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Ingestão de spins (multi-mesa)")
+    ap.add_argument("--tail", action="append", default=[], help="arquivo pra acompanhar (tail -F)")
+    ap.add_argument("--socket", action="append", default=[], help="host:porta ou unix:/caminho")
+    ap.add_argument("--replay", action="append", default=[], help="log JSONL pra reproduzir")
+    ap.add_argument("--velocidade", type=float, default=0.0, help="replay: 0 = máximo, 1 = tempo real")
+    ap.add_argument("--stdin", action="store_true")
+    ap.add_argument("--modo", default="agressivo")
+    ap.add_argument("--consumidores", type=int, default=CONSUMIDORES)
+    ap.add_argument("--intervalo", type=float, default=5.0, help="segundos entre prints de métricas")
+    ap.add_argument("--bench", action="store_true", help="mede throughput contra o feed mock")
+    ap.add_argument("--mesas", type=int, default=20)
+    ap.add_argument("--taxa", type=float, default=0.0, help="bench: spins/s do mock (0 = máximo)")
+    ap.add_argument("--total", type=int, default=100_000)
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
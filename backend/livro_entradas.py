@@ -0,0 +1,320 @@
+# backend/livro_entradas.py
+"""
+Livro de entradas por mesa: um registro por entrada resolvida, com a cadeia de gale.
+
+Cada entrada tem id (sequencial na mesa, dado na abertura e que vai no sinal/alerta
+da ENTRADA), seq/ts de abertura, os números dos spins que a resolveram (1 + gales),
+gale atingido e resultado. Sem isso o vínculo ENTRADA -> GALE... -> GREEN/RED só
+existe reprocessando o log de spins (exportacao.iter_entradas).
+
+Memória (colunar, ~40 bytes por entrada nas colunas, ~75 com índices e internação):
+- colunas em array (id, seq, ts abertura/fechamento, terminal, padrão internado,
+  gale, green) + números concatenados (entrada i = numeros[off[i] : off[i] + gale + 1])
+- índices por padrão e por terminal: posições (absolutas) em ordem de fechamento;
+  ts de fechamento é não decrescente => janela de tempo por bisect
+- histogramas de profundidade de gale (global, por padrão, por terminal), somados
+  a cada registro; valem desde o boot/reset, não sofrem o corte de MAX_ENTRADAS
+- acima de MAX_ENTRADAS (+25%) as mais antigas saem da memória (ficam no disco)
+
+Disco (com VIPER_DATA_DIR): <base>/entradas/<mesa>.bin, MAGICA + registros binários
+    <IqddBBBH  id, seq, ts_abertura, ts_fechamento, terminal, gale, green, len(padrão)
+    + gale+1 bytes (números) + padrão utf-8                         (~50 bytes/entrada)
+gravado pelo worker (`persistir`), como o log de spins. `ler_arquivo` devolve os dicts.
+Os ids continuam de onde o arquivo parou: no primeiro `novo_id` depois do boot o
+livro lê o id do último registro gravado (`ultimo_id_arquivo`).
+
+Registro/consulta rodam em threads diferentes (worker x API): lock próprio, curto.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional
+
+from backend.logic import EntradaAtiva
+
+MAX_ENTRADAS = int(os.getenv("VIPER_LIVRO_MAX", "50000"))     # por mesa, em memória
+LIMITE_CONSULTA = 100
+
+MAGICA = b"VPL1"
+_CABECALHO = struct.Struct("<IqddBBBH")
+
+
+def _hist() -> List[List[int]]:
+    return [[], []]      # [green por gale, red por gale]
+
+
+def _somar_hist(h: List[List[int]], gale: int, green: bool) -> None:
+    lado = h[0 if green else 1]
+    if len(lado) <= gale:
+        lado.extend([0] * (gale + 1 - len(lado)))
+    lado[gale] += 1
+
+
+def _info_hist(h: List[List[int]]) -> Dict:
+    greens, reds = h
+    largura = max(len(greens), len(reds))
+    greens = greens + [0] * (largura - len(greens))
+    reds = reds + [0] * (largura - len(reds))
+    n_green = sum(greens)
+    total = n_green + sum(reds)
+    return {
+        "entradas": total,
+        "green_por_gale": greens,
+        "red_por_gale": reds,
+        "taxa_green": round(n_green / total, 4) if total else None,
+        "gale_medio": round(sum(g * (a + b) for g, (a, b) in enumerate(zip(greens, reds))) / total, 4)
+        if total else None,
+    }
+
+
+class LivroEntradas:
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, arquivo: Optional[str] = None):
+        self.max_entradas = max_entradas
+        self.ultimo_id = 0          # não volta no reset: ids únicos no arquivo da mesa
+        self.arquivo = arquivo      # livro gravado ainda não lido (semente do ultimo_id)
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def __getstate__(self) -> Dict:
+        return {k: v for k, v in self.__dict__.items() if k != "_lock"}
+
+    def __setstate__(self, estado: Dict) -> None:
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def limpar(self) -> None:
+        with self._lock:
+            self.base = 0                       # posição absoluta da 1ª entrada em memória
+            self.ids = array("I")
+            self.seqs = array("q")
+            self.ts_abertura = array("d")
+            self.ts_fechamento = array("d")
+            self.terminais = array("B")
+            self.pids = array("H")
+            self.gales = array("B")
+            self.greens = array("B")
+            self.off = array("I")
+            self.numeros = array("B")
+            self.padroes: List[str] = []
+            self._pid: Dict[str, int] = {}
+            self.por_padrao: Dict[int, array] = {}
+            self.por_terminal: List[array] = [array("I") for _ in range(10)]
+            self.hist = _hist()
+            self.hist_padrao: Dict[int, List[List[int]]] = {}
+            self.hist_terminal: List[List[List[int]]] = [_hist() for _ in range(10)]
+
+    # ------------------------------
+    # escrita
+    # ------------------------------
+    def novo_id(self) -> int:
+        """Id da entrada que está abrindo (caminho crítico, com o lock da mesa)."""
+        if self.arquivo is not None:          # 1ª entrada desde o boot: continua do disco
+            self.ultimo_id = max(self.ultimo_id, ultimo_id_arquivo(self.arquivo))
+            self.arquivo = None
+        self.ultimo_id += 1
+        return self.ultimo_id
+
+    def registrar(self, e: EntradaAtiva, ts_fechamento: float, green: bool) -> None:
+        """Entrada resolvida (worker). `e.numeros` = spins que resolveram, em ordem."""
+        with self._lock:
+            pid = self._pid.get(e.padrao)
+            if pid is None:
+                pid = self._pid[e.padrao] = len(self.padroes)
+                self.padroes.append(e.padrao)
+                self.por_padrao[pid] = array("I")
+                self.hist_padrao[pid] = _hist()
+            pos = self.base + len(self.ids)
+            self.ids.append(e.id)
+            self.seqs.append(e.seq)
+            self.ts_abertura.append(e.ts)
+            self.ts_fechamento.append(ts_fechamento)
+            self.terminais.append(e.terminal_previsto)
+            self.pids.append(pid)
+            self.gales.append(e.gale)
+            self.greens.append(green)
+            self.off.append(len(self.numeros))
+            self.numeros.extend(e.numeros)
+            self.por_padrao[pid].append(pos)
+            self.por_terminal[e.terminal_previsto].append(pos)
+            _somar_hist(self.hist, e.gale, green)
+            _somar_hist(self.hist_padrao[pid], e.gale, green)
+            _somar_hist(self.hist_terminal[e.terminal_previsto], e.gale, green)
+            if len(self.ids) > self.max_entradas + self.max_entradas // 4:
+                self._cortar(len(self.ids) - self.max_entradas)
+
+    def _cortar(self, k: int) -> None:
+        """Tira as k entradas mais antigas da memória (amortizado: só a cada 25% de folga)."""
+        for nome in ("ids", "seqs", "ts_abertura", "ts_fechamento", "terminais", "pids", "gales", "greens"):
+            setattr(self, nome, getattr(self, nome)[k:])
+        corte = self.off[k]
+        self.off = array("I", (o - corte for o in self.off[k:]))
+        self.numeros = self.numeros[corte:]
+        self.base += k
+        self.por_padrao = {pid: p[bisect_left(p, self.base):] for pid, p in self.por_padrao.items()}
+        self.por_terminal = [p[bisect_left(p, self.base):] for p in self.por_terminal]
+
+    # ------------------------------
+    # leitura
+    # ------------------------------
+    def _registro(self, i: int) -> Dict:
+        gale = self.gales[i]
+        o = self.off[i]
+        return {
+            "id": self.ids[i],
+            "seq": self.seqs[i],
+            "ts_abertura": self.ts_abertura[i],
+            "ts_fechamento": self.ts_fechamento[i],
+            "padrao": self.padroes[self.pids[i]],
+            "terminal_previsto": self.terminais[i],
+            "gale": gale,
+            "resultado": "GREEN" if self.greens[i] else "RED",
+            "numeros": self.numeros[o:o + gale + 1].tolist(),
+        }
+
+    def _posicoes(
+        self, padrao: Optional[str], terminal: Optional[int], desde: Optional[float], ate: Optional[float]
+    ) -> List[int]:
+        """Índices (relativos às colunas) que casam com os filtros, em ordem de fechamento."""
+        ts = self.ts_fechamento
+        if padrao is not None:
+            pid = self._pid.get(padrao)
+            if pid is None:
+                return []
+            cand = [p - self.base for p in self.por_padrao[pid]]
+            if terminal is not None:
+                cand = [i for i in cand if self.terminais[i] == terminal]
+        elif terminal is not None:
+            cand = [p - self.base for p in self.por_terminal[terminal]]
+        else:
+            ini = bisect_left(ts, desde) if desde is not None else 0
+            fim = bisect_left(ts, ate) if ate is not None else len(ts)
+            return list(range(ini, fim))
+        if desde is not None:
+            cand = cand[bisect_left(cand, desde, key=ts.__getitem__):]
+        if ate is not None:
+            cand = cand[:bisect_left(cand, ate, key=ts.__getitem__)]
+        return cand
+
+    def consultar(
+        self,
+        padrao: Optional[str] = None,
+        terminal: Optional[int] = None,
+        desde: Optional[float] = None,
+        ate: Optional[float] = None,
+        limite: int = LIMITE_CONSULTA,
+    ) -> List[Dict]:
+        """Entradas resolvidas (mais recentes primeiro) por padrão/terminal/janela [desde, ate)."""
+        with self._lock:
+            posicoes = self._posicoes(padrao, terminal, desde, ate)
+            return [self._registro(i) for i in reversed(posicoes[-limite:] if limite else [])]
+
+    def histograma(
+        self,
+        padrao: Optional[str] = None,
+        terminal: Optional[int] = None,
+        desde: Optional[float] = None,
+        ate: Optional[float] = None,
+    ) -> Dict:
+        """
+        Profundidade de gale atingida (GREEN/RED por gale). Sem janela de tempo (e sem
+        padrão+terminal juntos) sai dos acumulados, O(gale_max); senão conta as entradas
+        em memória que casam.
+        """
+        with self._lock:
+            if desde is None and ate is None and (padrao is None or terminal is None):
+                if padrao is not None:
+                    pid = self._pid.get(padrao)
+                    return _info_hist(self.hist_padrao[pid] if pid is not None else _hist())
+                if terminal is not None:
+                    return _info_hist(self.hist_terminal[terminal])
+                return _info_hist(self.hist)
+            h = _hist()
+            for i in self._posicoes(padrao, terminal, desde, ate):
+                _somar_hist(h, self.gales[i], self.greens[i])
+            return _info_hist(h)
+
+    def histogramas_por(self, chave: str) -> Dict[str, Dict]:
+        """Acumulados de todos os padrões (`chave="padrao"`) ou terminais (`"terminal"`)."""
+        with self._lock:
+            if chave == "padrao":
+                return {self.padroes[pid]: _info_hist(h) for pid, h in self.hist_padrao.items()}
+            if chave == "terminal":
+                return {str(t): _info_hist(h) for t, h in enumerate(self.hist_terminal) if h[0] or h[1]}
+        raise ValueError(f"chave desconhecida: {chave!r} (use padrao ou terminal)")
+
+    def info(self) -> Dict:
+        with self._lock:
+            return {
+                "em_memoria": len(self.ids),
+                "descartadas_memoria": self.base,
+                "ultimo_id": self.ultimo_id,
+                "padroes": len(self.padroes),
+                "max_entradas": self.max_entradas,
+                "resumo": _info_hist(self.hist),
+            }
+
+
+# ==============================
+# DISCO
+# ==============================
+def empacotar(e: EntradaAtiva, ts_fechamento: float, green: bool) -> bytes:
+    padrao = e.padrao.encode("utf-8")
+    return (
+        _CABECALHO.pack(e.id, e.seq, e.ts, ts_fechamento, e.terminal_previsto, e.gale, green, len(padrao))
+        + bytes(e.numeros) + padrao
+    )
+
+
+def ultimo_id_arquivo(caminho: str) -> int:
+    """Id do último registro completo do livro gravado (0 se não existe)."""
+    if not os.path.exists(caminho):
+        return 0
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    if dados[:len(MAGICA)] != MAGICA:
+        raise ValueError(f"{caminho}: livro de entradas em formato desconhecido")
+    pos = len(MAGICA)
+    tam = _CABECALHO.size
+    ultimo = 0
+    while pos + tam <= len(dados):
+        id_, _, _, _, _, gale, _, n_pad = _CABECALHO.unpack_from(dados, pos)
+        fim = pos + tam + gale + 1 + n_pad
+        if fim > len(dados):
+            break
+        ultimo = id_
+        pos = fim
+    return ultimo
+
+
+def ler_arquivo(caminho: str) -> Iterator[Dict]:
+    """Registros do livro gravado (para no primeiro registro incompleto: worker escrevendo)."""
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    if dados[:len(MAGICA)] != MAGICA:
+        raise ValueError(f"{caminho}: livro de entradas em formato desconhecido")
+    pos = len(MAGICA)
+    tam = _CABECALHO.size
+    while pos + tam <= len(dados):
+        id_, seq, ts_ab, ts_fe, terminal, gale, green, n_pad = _CABECALHO.unpack_from(dados, pos)
+        fim = pos + tam + gale + 1 + n_pad
+        if fim > len(dados):
+            break
+        numeros = list(dados[pos + tam:pos + tam + gale + 1])
+        yield {
+            "id": id_,
+            "seq": seq,
+            "ts_abertura": ts_ab,
+            "ts_fechamento": ts_fe,
+            "padrao": dados[pos + tam + gale + 1:fim].decode("utf-8"),
+            "terminal_previsto": terminal,
+            "gale": gale,
+            "resultado": "GREEN" if green else "RED",
+            "numeros": numeros,
+        }
+        pos = fim
@@ -1,23 +1,52 @@
 # backend/logic.py
 from __future__ import annotations
 
-from collections import defaultdict, deque
-from dataclasses import dataclass
-import time
-from typing import Deque, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field, fields
+import math
+import os
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Set, Tuple
 
 
 # ==============================
 # CONFIG
 # ==============================
-MAX_HISTORY = 500
+MAX_HISTORY = int(os.getenv("VIPER_MAX_HISTORY", "500"))   # ring quente (detalhe completo) por mesa
 
 MIN_SPINS_AQUECIMENTO = 12          # depois disso começa a detectar padrões
 GALE_MAX = 2                        # até gale 2
-SCORE_THRESHOLD = 0.62              # limiar para liberar ENTRADA (ajustável)
+SCORE_THRESHOLD = 0.62              # limiar para liberar ENTRADA no modo "bruto" (ajustável)
 SCORE_TERMINAL_WEIGHT = 0.55
 SCORE_PADRAO_WEIGHT = 0.45
 
+# modo de score:
+# - "bruto":     hits / total (1/1 => 1.0, padrão novo => 0.0)
+# - "bayes":     média a posteriori Beta (encolhe amostras pequenas pro prior)
+# - "bayes_lcb": limite inferior (média - z * desvio) da posteriori
+SCORE_MODOS = ("bruto", "bayes", "bayes_lcb")
+SCORE_MODO = "bayes"
+BAYES_PRIOR_PESO = 10.0             # força do prior (pseudo-observações)
+BAYES_LCB_Z = 1.0                   # desvios abaixo da média no modo "bayes_lcb"
+# limiar nos modos bayes: relativo à linha de base de cada terminal (o score combinado
+# dos priors = chance da roda, 0.57-0.69 conforme o terminal), não absoluto. Margem 0:
+# o agressivo entra no empate com a roda (padrão sem histórico entra, em qualquer
+# terminal, e os misses derrubam o score pra baixo da linha); normal/conservador somam
+# o offset e só entram com vantagem medida. Sem isso uma mesa nova nunca resolve entrada.
+BAYES_MARGEM = 0.0
+SCORE_MEIA_VIDA = 0                 # decaimento (meia-vida em spins); 0 = desligado
+
+# ajuste do limiar por modo (o "agressivo" usa o limiar puro)
+MODOS = ("conservador", "normal", "agressivo")
+THRESHOLD_OFFSET_NORMAL = 0.03
+THRESHOLD_OFFSET_CONSERVADOR = 0.08
+
+# detectores ligados, em ordem de prioridade (o primeiro que dispara ganha)
+DETECTORES = ("escadinha", "terminal_vizinhos")
+VIZINHOS_ALVO = 1                   # formato da aposta: terminal + k vizinhos pela roda
+PESO_MARKOV = 0.0                   # peso do scorer de transições (Markov) no combinado; 0 = desligado
+
+STATUS = ("ANALISE", "ENTRADA", "GREEN", "GALE", "RED")
+STATUS_ID = {s: i for i, s in enumerate(STATUS)}
+
 # vizinhos pela RODA europeia (race)
 # Ordem padrão da roleta europeia (0-36)
 WHEEL_EU = [
@@ -35,60 +64,33 @@ BLACK_NUMBERS = {
     20, 22, 24, 26, 28, 29, 31, 33, 35
 }
 
+# setores clássicos da roda europeia
+VOISINS = {22, 18, 29, 7, 28, 12, 35, 3, 26, 0, 32, 15, 19, 4, 21, 2, 25}
+TIERS = {27, 13, 36, 11, 30, 8, 23, 10, 5, 24, 16, 33}
+ORPHELINS = {1, 20, 14, 31, 9, 17, 34, 6}
+SETORES = {"voisins": VOISINS, "tiers": TIERS, "orphelins": ORPHELINS}
+
 
 # ==============================
-# ESTADO
+# ENTRADA
 # ==============================
-historico: Deque[Dict] = deque(maxlen=MAX_HISTORY)
-
-stats = {
-    "spins": 0,
-    "entradas": 0,   # entradas SUGERIDAS (liberadas)
-    "greens": 0,
-    "reds": 0,
-    "gales": 0,
-    "padroes": 0,
-}
-
-# scores (hit/miss)
-terminal_stats = defaultdict(lambda: {"hits": 0, "miss": 0})
-padrao_stats = defaultdict(lambda: {"hits": 0, "miss": 0})
-terminal_padrao_stats = defaultdict(lambda: {"hits": 0, "miss": 0})
-
-
 @dataclass
 class EntradaAtiva:
     estrategia: str                # "terminal_vizinhos" | "escadinha"
     terminal_previsto: int
-    numeros_alvo: Set[int]         # conjunto completo para cobrir
+    numeros_alvo: AbstractSet[int]  # conjunto completo para cobrir (frozenset compartilhado da config)
     padrao: str
     gale: int = 0                  # 0 = entrada base, 1 = gale1, 2 = gale2
-
-
-entrada_ativa: Optional[EntradaAtiva] = None
+    # livro de entradas (backend/livro_entradas.py)
+    id: int = 0                    # sequencial na mesa
+    seq: int = 0                   # seq do spin que abriu a entrada
+    ts: float = 0.0
+    numeros: List[int] = field(default_factory=list)   # spins que resolveram (base + gales)
 
 
 # ==============================
 # HELPERS
 # ==============================
-def resetar_estado() -> None:
-    global historico, stats, terminal_stats, padrao_stats, terminal_padrao_stats, entrada_ativa
-
-    historico.clear()
-    entrada_ativa = None
-
-    stats["spins"] = 0
-    stats["entradas"] = 0
-    stats["greens"] = 0
-    stats["reds"] = 0
-    stats["gales"] = 0
-    stats["padroes"] = 0
-
-    terminal_stats.clear()
-    padrao_stats.clear()
-    terminal_padrao_stats.clear()
-
-
 def cor_numero(n: int) -> str:
     if n == 0:
         return "GREEN"
@@ -109,6 +111,12 @@ def wheel_index(n: int) -> int:
 
 def wheel_neighbors(n: int, k: int = 1) -> List[int]:
     """Retorna os vizinhos pela RODA (race), k para cada lado."""
+    if k == 1:
+        return list(_VIZINHOS_K1[n])
+    return _wheel_neighbors(n, k)
+
+
+def _wheel_neighbors(n: int, k: int) -> List[int]:
     idx = wheel_index(n)
     res = []
     for d in range(1, k + 1):
@@ -126,7 +134,12 @@ def wheel_neighbors(n: int, k: int = 1) -> List[int]:
 
 def grupo_terminal(t: int) -> List[int]:
     """Números 0..36 com terminal t (ex: 6 -> 6,16,26,36)."""
-    return [n for n in range(0, 37) if n % 10 == t]
+    return list(_GRUPOS_TERMINAL[t])
+
+
+# tabelas fixas da roda (chamadas a cada spin no pipeline)
+_VIZINHOS_K1 = [tuple(_wheel_neighbors(n, 1)) for n in range(37)]
+_GRUPOS_TERMINAL = [tuple(n for n in range(0, 37) if n % 10 == t) for t in range(10)]
 
 
 def grupo_terminal_com_vizinhos_roda(t: int, k: int = 1) -> List[int]:
@@ -149,53 +162,188 @@ def score_from_counts(hits: int, miss: int) -> float:
     return hits / total
 
 
-def calcular_score_terminal(t: int) -> float:
-    d = terminal_stats[t]
-    return score_from_counts(d["hits"], d["miss"])
+def _prior_terminal(t: int, gale_max: int = GALE_MAX, k: int = VIZINHOS_ALVO) -> float:
+    """Chance 'de roda' do alvo do terminal bater em até gale_max+1 giros."""
+    p1 = len(grupo_terminal_com_vizinhos_roda(t, k=k)) / len(WHEEL_EU)
+    return 1.0 - (1.0 - p1) ** (gale_max + 1)
+
+
+# prior (média) por terminal; padrão usa a média dos terminais
+PRIOR_TERMINAL = [_prior_terminal(t) for t in range(10)]
+PRIOR_PADRAO = sum(PRIOR_TERMINAL) / len(PRIOR_TERMINAL)
+
+
+def score_bayes(
+    hits: float,
+    miss: float,
+    prior: float,
+    peso: float = BAYES_PRIOR_PESO,
+    modo: str = SCORE_MODO,
+    z: float = BAYES_LCB_Z,
+) -> float:
+    """
+    Beta(prior * peso, (1 - prior) * peso) + observações, forma fechada:
+    - "bayes":     média a posteriori
+    - "bayes_lcb": média - z * desvio padrão da posteriori
+    """
+    a = hits + prior * peso
+    b = miss + (1.0 - prior) * peso
+    n = a + b
+    media = a / n
+    if modo == "bayes_lcb":
+        return max(0.0, media - z * math.sqrt(a * b / (n * n * (n + 1.0))))
+    return media
+
+
+def score_por_modo(hits: float, miss: float, prior: float) -> float:
+    return CONFIG_PADRAO.score(hits, miss, prior)
+
+
+def threshold_do_modo(modo: str, terminal: int = 0) -> float:
+    """Modo altera agressividade."""
+    return CONFIG_PADRAO.threshold(modo, terminal)
+
+
+# ==============================
+# CONFIG POR ENGINE
+# ==============================
+@dataclass(frozen=True)
+class ConfigEngine:
+    """
+    Parâmetros de decisão de um MesaEngine (default = constantes do topo).
+    Imutável: engines diferentes (replay A/B, perfis por mesa) não se afetam.
+    """
+    min_spins_aquecimento: int = MIN_SPINS_AQUECIMENTO
+    gale_max: int = GALE_MAX
+    score_threshold: float = SCORE_THRESHOLD
+    peso_terminal: float = SCORE_TERMINAL_WEIGHT
+    peso_padrao: float = SCORE_PADRAO_WEIGHT
+    score_modo: str = SCORE_MODO
+    bayes_prior_peso: float = BAYES_PRIOR_PESO
+    bayes_lcb_z: float = BAYES_LCB_Z
+    bayes_margem: float = BAYES_MARGEM
+    meia_vida: float = SCORE_MEIA_VIDA
+    offset_normal: float = THRESHOLD_OFFSET_NORMAL
+    offset_conservador: float = THRESHOLD_OFFSET_CONSERVADOR
+    detectores: Tuple[str, ...] = DETECTORES
+    vizinhos_alvo: int = VIZINHOS_ALVO
+    peso_markov: float = PESO_MARKOV
+
+    # derivados: compilados uma vez aqui, nunca por spin
+    prior_terminal: Tuple[float, ...] = field(init=False, repr=False, compare=False)
+    prior_padrao: float = field(init=False, repr=False, compare=False)
+    thresholds: Dict[str, Tuple[float, ...]] = field(init=False, repr=False, compare=False)
+    alvos: Tuple[frozenset, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.score_modo not in SCORE_MODOS:
+            raise ValueError(f"score_modo inválido: {self.score_modo!r} (use {', '.join(SCORE_MODOS)})")
+        if self.gale_max < 0 or self.min_spins_aquecimento < 0:
+            raise ValueError("gale_max/min_spins_aquecimento não podem ser negativos")
+        if not 0 <= self.vizinhos_alvo <= 18:
+            raise ValueError("vizinhos_alvo deve estar entre 0 e 18")
+        if not 0.0 <= self.peso_markov <= 1.0:
+            raise ValueError("peso_markov deve estar entre 0 e 1")
+        desconhecidos = [d for d in self.detectores if d not in DETECTORES]
+        if desconhecidos:
+            raise ValueError(f"detectores desconhecidos: {', '.join(desconhecidos)} (use {', '.join(DETECTORES)})")
+        object.__setattr__(self, "detectores", tuple(self.detectores))
+
+        priors = tuple(_prior_terminal(t, self.gale_max, self.vizinhos_alvo) for t in range(10))
+        object.__setattr__(self, "prior_terminal", priors)
+        object.__setattr__(self, "prior_padrao", sum(priors) / len(priors))
+        if self.score_modo == "bruto":
+            base = (self.score_threshold,) * 10
+        else:
+            # score combinado sem histórico na média "bayes" (mesma conta do pontuar: no modo
+            # "bayes" um padrão novo fica exatamente na linha; o "bayes_lcb" começa abaixo)
+            p = score_bayes(0.0, 0.0, self.prior_padrao, self.bayes_prior_peso, "bayes")
+            base = tuple(
+                self.peso_terminal * score_bayes(0.0, 0.0, pt, self.bayes_prior_peso, "bayes")
+                + self.peso_padrao * p + self.bayes_margem
+                for pt in priors
+            )
+        object.__setattr__(self, "thresholds", {
+            "agressivo": base,
+            "normal": tuple(b + self.offset_normal for b in base),
+            "conservador": tuple(b + self.offset_conservador for b in base),
+        })
+        object.__setattr__(self, "alvos", tuple(
+            frozenset(grupo_terminal_com_vizinhos_roda(t, k=self.vizinhos_alvo)) for t in range(10)
+        ))
+
+    def score(self, hits: float, miss: float, prior: float) -> float:
+        if self.score_modo == "bruto":
+            return score_from_counts(hits, miss)
+        return score_bayes(hits, miss, prior, self.bayes_prior_peso, self.score_modo, self.bayes_lcb_z)
+
+    def chave_score(self) -> Tuple:
+        """O que entra no score de um (hits, miss): configs com a mesma chave dão os mesmos rankings."""
+        return (self.score_modo, self.bayes_prior_peso, self.bayes_lcb_z, self.meia_vida,
+                self.prior_terminal, self.prior_padrao)
+
+    def threshold(self, modo: str, terminal: int) -> float:
+        return self.thresholds.get(modo, self.thresholds["agressivo"])[terminal]
+
+    @classmethod
+    def de_dict(cls, d: Dict[str, Any]) -> "ConfigEngine":
+        """Monta a partir de um dict (JSON/CLI), convertendo tipos; chave desconhecida => ValueError."""
+        campos = {f.name: f for f in fields(cls) if f.init}
+        desconhecidas = set(d) - set(campos)
+        if desconhecidas:
+            raise ValueError(f"parâmetros desconhecidos: {', '.join(sorted(desconhecidas))}")
+        tipos = {"int": int, "float": float, "str": str, "Tuple[str, ...]": _tupla_str}
+        return cls(**{k: tipos[str(campos[k].type)](v) for k, v in d.items()})
+
+    def com(self, **mudancas: Any) -> "ConfigEngine":
+        """Cópia com alguns parâmetros trocados (derivados recompilados)."""
+        return ConfigEngine.de_dict({**self.para_dict(), **mudancas})
+
+    def para_dict(self) -> Dict[str, Any]:
+        out = {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+        out["detectores"] = list(self.detectores)
+        return out
 
 
-def calcular_score_padrao(p: str) -> float:
-    d = padrao_stats[p]
-    return score_from_counts(d["hits"], d["miss"])
+def _tupla_str(v: Any) -> Tuple[str, ...]:
+    """Lista JSON ou texto "a|b" (CLI) -> tupla."""
+    if isinstance(v, str):
+        return tuple(x.strip() for x in v.split("|") if x.strip())
+    return tuple(str(x) for x in v)
 
 
-def calcular_score_combinado(t: int, p: str) -> float:
-    """Score combinado terminal+padrao também é registrado (para ranking)."""
-    d = terminal_padrao_stats[f"{t}|{p}"]
-    return score_from_counts(d["hits"], d["miss"])
+CONFIG_PADRAO = ConfigEngine()
 
 
 # ==============================
 # DETECÇÃO DE PADRÕES
 # ==============================
-def detectar_terminal_vizinhos() -> Optional[Tuple[str, int]]:
+def detectar_terminal_vizinhos(terminais: Sequence[int]) -> Optional[Tuple[str, int]]:
     """
     Gatilho simples pro "terminal + vizinhos":
     - se os últimos 3 terminais forem iguais -> sugere esse terminal
+    `terminais`: últimos terminais da mesa, do mais antigo pro mais novo.
     """
-    if len(historico) < 3:
+    if len(terminais) < 3:
         return None
-    t3 = [historico[-i]["terminal"] for i in range(1, 4)]
-    if t3[0] == t3[1] == t3[2]:
-        t = t3[0]
-        return ("repeticao_terminal", t)
+    t1, t2, t3 = terminais[-3:]
+    if t1 == t2 == t3:
+        return ("repeticao_terminal", t3)
     return None
 
 
-def detectar_escadinha() -> Optional[Tuple[str, int, int, str]]:
+def detectar_escadinha(terminais: Sequence[int]) -> Optional[Tuple[str, int, int, str]]:
     """
     Escadinha completa (2 a 9):
-    - lê os últimos 3 terminais
+    - lê os últimos 3 terminais (do mais antigo pro mais novo)
     - se a diferença (mod 10) for constante e estiver em {2..9}
       considera escadinha e prevê o próximo terminal
     Retorna: (padrao, terminal_previsto, passo, direcao)
     """
-    if len(historico) < 3:
+    if len(terminais) < 3:
         return None
 
-    t1 = historico[-3]["terminal"]
-    t2 = historico[-2]["terminal"]
-    t3 = historico[-1]["terminal"]
+    t1, t2, t3 = terminais[-3:]
 
     d1 = (t2 - t1) % 10
     d2 = (t3 - t2) % 10
@@ -216,262 +364,3 @@ def detectar_escadinha() -> Optional[Tuple[str, int, int, str]]:
         return (padrao, previsto, passo, "down")
 
     return None
-
-
-# ==============================
-# RESOLVER ENTRADA (GREEN/GALE/RED)
-# ==============================
-def _registrar_resultado(t: int, padrao: str, hit: bool) -> None:
-    if hit:
-        terminal_stats[t]["hits"] += 1
-        padrao_stats[padrao]["hits"] += 1
-        terminal_padrao_stats[f"{t}|{padrao}"]["hits"] += 1
-        stats["greens"] += 1
-    else:
-        terminal_stats[t]["miss"] += 1
-        padrao_stats[padrao]["miss"] += 1
-        terminal_padrao_stats[f"{t}|{padrao}"]["miss"] += 1
-
-
-def _resolver_entrada_ativa(numero: int, term_atual: int) -> Tuple[str, str]:
-    """
-    Retorna (status, mensagem)
-    status: GREEN | GALE | RED
-    """
-    global entrada_ativa
-
-    assert entrada_ativa is not None
-
-    hit = numero in entrada_ativa.numeros_alvo
-    if hit:
-        _registrar_resultado(entrada_ativa.terminal_previsto, entrada_ativa.padrao, True)
-        entrada_ativa = None
-        return ("GREEN", "Green confirmado (bateu no alvo)")
-    else:
-        # miss => gale ou red final
-        if entrada_ativa.gale < GALE_MAX:
-            entrada_ativa.gale += 1
-            stats["gales"] += 1
-            return ("GALE", f"Gale {entrada_ativa.gale}/{GALE_MAX} (não bateu no alvo)")
-        else:
-            _registrar_resultado(entrada_ativa.terminal_previsto, entrada_ativa.padrao, False)
-            entrada_ativa = None
-            stats["reds"] += 1
-            return ("RED", "Red confirmado (fechou ciclo)")
-
-
-# ==============================
-# GERAÇÃO DE SINAL
-# ==============================
-def gerar_sinal(numero: int, modo: str = "agressivo", source: str = "manual") -> Dict:
-    """
-    Retorna um dict pronto pro painel.
-    - Não promete acerto; é análise estatística + gatilhos.
-    """
-    global entrada_ativa
-
-    stats["spins"] += 1
-
-    term = terminal(numero)
-    cor = cor_numero(numero)
-
-    registro = {
-        "time": time.strftime("%H:%M:%S"),
-        "source": source,
-        "numero": int(numero),
-        "cor": cor,
-        "terminal": int(term),
-        "status": "ANALISE",
-        "padroes": None,                 # string ou None
-        "score_terminal": 0.0,
-        "score_padrao": 0.0,
-        "score_combinado": 0.0,
-        "grupo_terminal": grupo_terminal(term),
-        "vizinhos_roda": wheel_neighbors(numero, k=1),
-        "mensagem": "",
-        "entrada": None,                 # dict quando ENTRADA ativa
-        "debug": {},
-    }
-
-    # salva no histórico primeiro
-    historico.append(registro)
-
-    # aquecimento
-    if len(historico) < MIN_SPINS_AQUECIMENTO:
-        registro["mensagem"] = f"Aquecendo histórico ({len(historico)}/{MIN_SPINS_AQUECIMENTO})"
-        return registro
-
-    # Se existe entrada ativa, resolve (GREEN/GALE/RED)
-    if entrada_ativa is not None:
-        status, msg = _resolver_entrada_ativa(numero, term)
-        registro["status"] = status
-        registro["mensagem"] = msg
-        registro["padroes"] = entrada_ativa.padrao if entrada_ativa else None
-        return registro
-
-    # ==============================
-    # DETECTAR PADRÕES (prioridade: escadinha -> repetição terminal)
-    # ==============================
-    padrao_detectado = None
-    entrada_terminal_previsto = None
-    estrategia = None
-
-    esc = detectar_escadinha()
-    if esc:
-        padrao, previsto, passo, direcao = esc
-        padrao_detectado = padrao
-        entrada_terminal_previsto = previsto
-        estrategia = "escadinha"
-        stats["padroes"] += 1
-        registro["debug"]["escadinha"] = {"passo": passo, "direcao": direcao, "previsto": previsto}
-
-    if padrao_detectado is None:
-        rep = detectar_terminal_vizinhos()
-        if rep:
-            padrao, previsto = rep
-            padrao_detectado = padrao
-            entrada_terminal_previsto = previsto
-            estrategia = "terminal_vizinhos"
-            stats["padroes"] += 1
-
-    # se não detectou nada, apenas calcula score terminal e retorna
-    if padrao_detectado is None or entrada_terminal_previsto is None:
-        st_score = calcular_score_terminal(term)
-        registro["score_terminal"] = round(st_score, 6)
-        registro["mensagem"] = f"Sem padrão detectado | Score terminal: {round(st_score, 2)}"
-        return registro
-
-    # ==============================
-    # SCORE (terminal previsto + padrão)
-    # ==============================
-    score_t = calcular_score_terminal(entrada_terminal_previsto)
-    score_p = calcular_score_padrao(padrao_detectado)
-    score_c = (SCORE_TERMINAL_WEIGHT * score_t) + (SCORE_PADRAO_WEIGHT * score_p)
-
-    # modo altera agressividade
-    if modo == "conservador":
-        threshold = SCORE_THRESHOLD + 0.08
-    elif modo == "normal":
-        threshold = SCORE_THRESHOLD + 0.03
-    else:
-        threshold = SCORE_THRESHOLD
-
-    registro["padroes"] = padrao_detectado
-    registro["score_terminal"] = round(score_t, 6)
-    registro["score_padrao"] = round(score_p, 6)
-    registro["score_combinado"] = round(score_c, 6)
-
-    registro["mensagem"] = (
-        f"Padrão detectado: {padrao_detectado} | "
-        f"Prev terminal: {entrada_terminal_previsto} | "
-        f"Score: {round(score_c, 2)} (T:{round(score_t,2)} P:{round(score_p,2)})"
-    )
-
-    # ==============================
-    # LIBERAR ENTRADA
-    # ==============================
-    if score_c >= threshold:
-        # entrada sempre = terminal previsto + vizinhos pela roda para cada número do terminal (k=1)
-        alvo = set(grupo_terminal_com_vizinhos_roda(entrada_terminal_previsto, k=1))
-
-        entrada_ativa = EntradaAtiva(
-            estrategia=strategia,
-            terminal_previsto=entrada_terminal_previsto,
-            numeros_alvo=alvo,
-            padrao=padrao_detectado,
-            gale=0,
-        )
-
-        stats["entradas"] += 1
-
-        registro["status"] = "ENTRADA"
-        registro["entrada"] = {
-            "estrategia": estrategia,
-            "terminal_previsto": entrada_terminal_previsto,
-            "numeros_terminal": grupo_terminal(entrada_terminal_previsto),
-            "numeros_alvo": sorted(list(alvo)),
-            "gale_max": GALE_MAX,
-            "padrao": padrao_detectado,
-        }
-        registro["mensagem"] = f"ENTRADA LIBERADA ✅ | {registro['mensagem']}"
-        return registro
-
-    # não liberou entrada
-    registro["mensagem"] = f"Score abaixo do limiar ({round(score_c,2)} < {round(threshold,2)}) | {registro['mensagem']}"
-    return registro
-
-
-# ==============================
-# EXPORTS (PARA API)
-# ==============================
-def get_historico() -> List[Dict]:
-    return list(historico)
-
-
-def get_stats() -> Dict:
-    return dict(stats)
-
-
-def get_score_terminal() -> List[Dict]:
-    out = []
-    for t in range(10):
-        d = terminal_stats[t]
-        out.append({
-            "terminal": t,
-            "hits": d["hits"],
-            "miss": d["miss"],
-            "score": round(score_from_counts(d["hits"], d["miss"]), 4),
-        })
-    return out
-
-
-def get_score_padrao() -> List[Dict]:
-    out = []
-    for p, d in padrao_stats.items():
-        out.append({
-            "padrao": p,
-            "hits": d["hits"],
-            "miss": d["miss"],
-            "score": round(score_from_counts(d["hits"], d["miss"]), 4),
-        })
-    # ordena por score desc
-    out.sort(key=lambda x: x["score"], reverse=True)
-    return out
-
-
-def get_score_terminal_padrao() -> List[Dict]:
-    out = []
-    for k, d in terminal_padrao_stats.items():
-        out.append({
-            "terminal_padrao": k,
-            "hits": d["hits"],
-            "miss": d["miss"],
-            "score": round(score_from_counts(d["hits"], d["miss"]), 4),
-        })
-    out.sort(key=lambda x: x["score"], reverse=True)
-    return out
-
-
-def heatmap_terminal(window: int = 120) -> List[Dict]:
-    tail = list(historico)[-window:]
-    counts = defaultdict(int)
-    for h in tail:
-        counts[h["terminal"]] += 1
-    return [{"terminal": t, "count": counts.get(t, 0), "window": window} for t in range(10)]
-
-
-def heatmap_roda_eu(window: int = 120) -> List[Dict]:
-    tail = list(historico)[-window:]
-    counts = defaultdict(int)
-    for h in tail:
-        counts[h["numero"]] += 1
-    # retorna lista ordenada pela posição na roda
-    out = []
-    for idx, n in enumerate(WHEEL_EU):
-        out.append({
-            "wheel_index": idx,
-            "numero": n,
-            "count": counts.get(n, 0),
-            "window": window,
-        })
-    return out
@@ -1,30 +1,96 @@
 # backend/main.py
-from fastapi import FastAPI
-from pydantic import BaseModel, Field
-from typing import Literal, Optional
-
-from backend.logic import (
-    gerar_sinal,
-    get_historico,
-    get_stats,
-    get_score_terminal,
-    get_score_padrao,
-    get_score_terminal_padrao,
-    heatmap_terminal,
-    heatmap_roda_eu,
-    resetar_estado,
+import asyncio
+import json
+import os
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+
+from backend.alertas import despachante, sink_de_runtime
+from backend.broadcast import broadcast
+from backend.engine import BOOT_ID, MesaEngine
+from backend.ingestao import Ingestor, fonte_de_spec
+from backend.mesas import MESA_PADRAO, get_mesa, listar_mesas, receber_sem_bloquear, residencia
+from backend.perfis import perfis
+from backend.profiler import perfil
+from backend.schemas import (
+    CORPO_SPIN, RESPOSTAS_SPIN, MesaId, SimulacaoRequest, SinalResponse, SinkRequest, SpinAviso, dumps, ler_spin,
 )
+from backend.simulacao import ConfigSimulacao, simulacoes
+from backend.storage import MESA_ID_PADRAO, mesa_id_valido, storage
+from backend.visao_global import visao_global
+from backend.worker import worker
 
-Modo = Literal["conservador", "normal", "agressivo"]
+app = FastAPI(title="Viper Vegas Engine", version="1.0.0")
 
+# fontes de feed ligadas junto com a API, ex.: VIPER_FONTES="tail:/feed/spins.log;socket:127.0.0.1:9100"
+VIPER_FONTES = os.getenv("VIPER_FONTES", "")
+# destinos de alertas, ex.: VIPER_ALERTAS="webhook:http://127.0.0.1:9300/;jsonl:/var/log/alertas.jsonl"
+# (POST /alertas/sinks só aceita destinos em VIPER_ALERTAS_DIR / VIPER_ALERTAS_HOSTS: ver alertas.py)
+VIPER_ALERTAS = os.getenv("VIPER_ALERTAS", "")
+# profile aberto do startup ao shutdown (ver backend/profiler.py)
+VIPER_PROFILE = os.getenv("VIPER_PROFILE", "") == "1"
+VIPER_PROFILE_MEMORIA = os.getenv("VIPER_PROFILE_MEMORIA", "") == "1"
+# valida cada sinal do /spin contra SinalResponse antes de responder (teste/dev; custa ~30 µs por spin)
+VIPER_VALIDAR_RESPOSTAS = os.getenv("VIPER_VALIDAR_RESPOSTAS", "") == "1"
+ingestor: Optional[Ingestor] = None
 
-class SpinRequest(BaseModel):
-    numero: int = Field(..., ge=0, le=36)
-    modo: Modo = "agressivo"
-    source: Optional[str] = "manual"
 
+@app.on_event("startup")
+async def _startup():
+    global ingestor
+    perfis.observar()
+    residencia.observar()
+    if VIPER_PROFILE:
+        perfil.ligar(memoria=VIPER_PROFILE_MEMORIA)
+    await despachante.iniciar([x.strip() for x in VIPER_ALERTAS.split(";") if x.strip()])
+    specs = [x.strip() for x in VIPER_FONTES.split(";") if x.strip()]
+    if specs:
+        ingestor = Ingestor()
+        for spec in specs:
+            ingestor.adicionar(fonte_de_spec(spec))
+        await ingestor.iniciar()
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    perfis.parar()
+    residencia.parar()
+    simulacoes.parar_todas()
+    if ingestor is not None:
+        await ingestor.parar()
+    await despachante.parar()
+    if VIPER_PROFILE and perfil.ativo:
+        perfil.desligar()
+
+
+def _mesa(mesa_id: str) -> MesaEngine:
+    """Mesa de uma rota de leitura: não cria mesa nova (404), só reidrata."""
+    try:
+        return get_mesa(mesa_id, criar=False)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Mesa desconhecida: {mesa_id}")
+
+
+def _get_condicional(request: Request, response: Response, mesa: MesaEngine, gerar: Callable[[], Any]) -> Any:
+    """
+    GET com ETag = versão do estado da mesa.
+    Se o cliente já tem a versão atual, responde 304 sem montar nada.
+    """
+    return _condicional(request, response, mesa.mesa_id, mesa.versao, gerar)
 
-app = FastAPI(title="Viper Vegas Engine", version="1.0.0")
+
+def _condicional(request: Request, response: Response, chave: str, versao: int, gerar: Callable[[], Any]) -> Any:
+    etag = f'"{BOOT_ID}-{chave}-v{versao}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return gerar()
+
+
+# snapshot do painel já serializado, por mesa: mesa -> (versao, bytes)
+_snapshot_json: Dict[str, Tuple[int, bytes]] = {}
 
 
 @app.get("/")
@@ -34,50 +100,355 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"ok": True}
+    return {"ok": True, "worker": worker.info()}
+
+
+@app.get("/mesas")
+def api_mesas():
+    return listar_mesas()
 
 
 @app.post("/reset")
-def reset():
-    resetar_estado()
+def reset(mesa: MesaId = MESA_PADRAO):
+    _mesa(mesa).resetar()
     return {"ok": True}
 
 
-@app.post("/spin")
-def spin(req: SpinRequest):
-    return gerar_sinal(req.numero, req.modo, source=req.source or "manual")
+@app.post("/spin", responses=RESPOSTAS_SPIN, openapi_extra=CORPO_SPIN)
+async def spin(request: Request) -> Response:
+    """
+    Caminho rápido (ver backend/schemas.py): corpo validado por `ler_spin`, sinal
+    serializado direto, sem response_model. Despacho como o do Ingestor: no event
+    loop se a mesa está em memória com o lock livre, senão threadpool
+    (`receber_sem_bloquear`).
+    """
+    req = ler_spin(await request.body())
+    sinal = await receber_sem_bloquear(
+        req.mesa, req.numero, req.modo, source=req.source or "manual", seq=req.seq, spin_id=req.spin_id
+    )
+    status = sinal.get("status")
+    codigo = 202 if status == "PENDENTE" else 409 if status == "DESCARTADO" else 200
+    if VIPER_VALIDAR_RESPOSTAS:
+        (SinalResponse if codigo == 200 else SpinAviso).model_validate(sinal)
+    return Response(dumps(sinal), status_code=codigo, media_type="application/json")
+
+
+@app.get("/perfis")
+def api_perfis():
+    return perfis.info()
+
+
+@app.post("/perfis/recarregar")
+def api_perfis_recarregar():
+    if not perfis.caminho:
+        raise HTTPException(status_code=409, detail="Sem arquivo de perfis (VIPER_PERFIS)")
+    if not perfis.recarregar():
+        raise HTTPException(status_code=422, detail=f"Perfis inválidos (mantida a versão anterior): {perfis.erro}")
+    return perfis.info()
+
+
+@app.get("/ingestao")
+def api_ingestao(mesa: MesaId = MESA_PADRAO):
+    return _mesa(mesa).ordenador.info()
+
+
+@app.get("/ingestao/fontes")
+def api_ingestao_fontes():
+    return ingestor.info() if ingestor is not None else {"fontes": []}
 
 
 @app.get("/stats")
-def api_stats():
-    return get_stats()
+def api_stats(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, m.get_stats)
 
 
 @app.get("/historico")
-def api_historico():
-    return get_historico()
+def api_historico(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, m.get_historico)
 
 
 @app.get("/scores/terminal")
-def api_scores_terminal():
-    return get_score_terminal()
+def api_scores_terminal(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, m.get_score_terminal)
 
 
 @app.get("/scores/padrao")
-def api_scores_padrao():
-    return get_score_padrao()
+def api_scores_padrao(request: Request, response: Response, top: Optional[int] = None, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, lambda: m.get_score_padrao(top))
 
 
 @app.get("/scores/terminal-padrao")
-def api_scores_terminal_padrao():
-    return get_score_terminal_padrao()
+def api_scores_terminal_padrao(
+    request: Request, response: Response, top: Optional[int] = None, mesa: MesaId = MESA_PADRAO
+):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, lambda: m.get_score_terminal_padrao(top))
+
+
+@app.get("/scores/padrao/janela")
+def api_scores_padrao_janela(horas: float = 24, mesa: MesaId = MESA_PADRAO):
+    if horas <= 0:
+        raise HTTPException(status_code=400, detail="horas deve ser > 0")
+    # janela por tempo muda sem spin novo (buckets saem da janela) => sem ETag
+    return _mesa(mesa).get_score_padrao_janela(horas)
+
+
+@app.get("/agregados")
+def api_agregados(
+    request: Request, response: Response, nivel: Literal["hora", "dia"] = "hora",
+    limite: Optional[int] = None, mesa: MesaId = MESA_PADRAO,
+):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, lambda: m.get_agregados(nivel, limite))
+
+
+@app.get("/retencao")
+def api_retencao(mesa: MesaId = MESA_PADRAO):
+    return _mesa(mesa).retencao.info()
+
+
+@app.get("/features")
+def api_features(request: Request, response: Response, janela: int = 12, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    try:
+        return _get_condicional(request, response, m, lambda: m.get_features(janela))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/transitions")
+def api_transitions(
+    request: Request, response: Response, cadeia: Optional[List[str]] = Query(None),
+    ordem: int = Query(1, ge=1, le=2), decaido: bool = False, normalizar: bool = False, mesa: MesaId = MESA_PADRAO,
+):
+    m = _mesa(mesa)
+    try:
+        return _get_condicional(request, response, m, lambda: m.get_transicoes(cadeia, ordem, decaido, normalizar))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ==============================
+# LIVRO DE ENTRADAS (registro feito pelo worker, atrás da versão da mesa => sem ETag)
+# ==============================
+@app.get("/entradas")
+def api_entradas(
+    padrao: Optional[str] = None, terminal: Optional[int] = Query(None, ge=0, le=9),
+    desde: Optional[float] = None, ate: Optional[float] = None,
+    limite: int = Query(100, ge=1, le=5000), mesa: MesaId = MESA_PADRAO,
+):
+    livro = _mesa(mesa).livro
+    return {"livro": livro.info(), "entradas": livro.consultar(padrao, terminal, desde, ate, limite)}
+
+
+@app.get("/entradas/gales")
+def api_entradas_gales(
+    padrao: Optional[str] = None, terminal: Optional[int] = Query(None, ge=0, le=9),
+    desde: Optional[float] = None, ate: Optional[float] = None,
+    por: Optional[Literal["padrao", "terminal"]] = None, mesa: MesaId = MESA_PADRAO,
+):
+    livro = _mesa(mesa).livro
+    if por is not None:
+        return livro.histogramas_por(por)
+    return livro.histograma(padrao, terminal, desde, ate)
+
+
+# ==============================
+# GLOBAL (todas as mesas; rollups incrementais, nada varre mesa por request)
+# ==============================
+@app.get("/global")
+def api_global():
+    return visao_global.info()
+
+
+@app.get("/global/padroes")
+def api_global_padroes(request: Request, response: Response, top: Optional[int] = None):
+    return _condicional(request, response, "*global", visao_global.versao, lambda: visao_global.padroes(top))
+
+
+@app.get("/global/terminal-padrao")
+def api_global_terminal_padrao(request: Request, response: Response, top: Optional[int] = None):
+    return _condicional(request, response, "*global", visao_global.versao, lambda: visao_global.terminal_padrao(top))
+
+
+@app.get("/global/terminais")
+def api_global_terminais(request: Request, response: Response):
+    return _condicional(request, response, "*global", visao_global.versao, visao_global.terminais)
+
+
+@app.get("/global/mesas")
+def api_global_mesas(request: Request, response: Response, top: Optional[int] = None):
+    return _condicional(request, response, "*global", visao_global.versao, lambda: visao_global.mesas(top))
+
+
+@app.get("/vies")
+def api_vies(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, m.get_vies)
 
 
 @app.get("/heatmap/terminal")
-def api_heatmap_terminal(window: int = 120):
-    return heatmap_terminal(window=window)
+def api_heatmap_terminal(request: Request, response: Response, window: int = 120, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, lambda: m.heatmap_terminal(window=window))
 
 
 @app.get("/heatmap/roda-eu")
-def api_heatmap_roda(window: int = 120):
-    return heatmap_roda_eu(window=window)
+def api_heatmap_roda(request: Request, response: Response, window: int = 120, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+    return _get_condicional(request, response, m, lambda: m.heatmap_roda_eu(window=window))
+
+
+@app.get("/export")
+def api_export(
+    dataset: str = "spins",
+    mesa: Optional[List[str]] = Query(None),
+    desde: Optional[float] = None,
+    ate: Optional[float] = None,
+):
+    """Spins/entradas persistidos em Arrow IPC (stream), lote a lote; sem `mesa` => todas."""
+    from backend import exportacao   # pyarrow só é carregado por quem exporta
+
+    if exportacao.pa is None:
+        raise HTTPException(status_code=501, detail="Export colunar indisponível (pyarrow não instalado)")
+    if dataset not in exportacao.DATASETS:
+        raise HTTPException(status_code=400, detail=f"dataset inválido (use {', '.join(exportacao.DATASETS)})")
+    if not storage.ativo:
+        raise HTTPException(status_code=409, detail="Persistência desligada (VIPER_DATA_DIR)")
+    if mesa and not all(mesa_id_valido(x) for x in mesa):
+        raise HTTPException(status_code=400, detail=f"id de mesa inválido (use {MESA_ID_PADRAO})")
+    mesas = mesa or storage.mesas()
+    return StreamingResponse(
+        exportacao.stream_ipc(dataset, mesas, desde, ate),
+        media_type=exportacao.MIME_ARROW,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.arrows"'},
+    )
+
+
+@app.get("/painel/snapshot")
+def api_painel_snapshot(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    m = _mesa(mesa)
+
+    def gerar() -> Response:
+        snap = m.get_snapshot_painel()
+        cache = _snapshot_json.get(m.mesa_id)
+        if cache is None or cache[0] != snap["versao"]:
+            cache = (snap["versao"], dumps(snap))
+            _snapshot_json[m.mesa_id] = cache
+        return Response(content=cache[1], media_type="application/json", headers=dict(response.headers))
+
+    return _get_condicional(request, response, m, gerar)
+
+
+# ==============================
+# SIMULAÇÃO (no servidor) + STREAM
+# ==============================
+@app.post("/simulacao/iniciar")
+async def api_simulacao_iniciar(req: SimulacaoRequest):
+    try:
+        sim = simulacoes.iniciar(ConfigSimulacao(**req.model_dump()))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return sim.info()
+
+
+@app.post("/simulacao/parar")
+async def api_simulacao_parar(mesa: MesaId = MESA_PADRAO):
+    return {"ok": simulacoes.parar(mesa)}
+
+
+@app.get("/simulacao")
+async def api_simulacao(mesa: Optional[str] = None):
+    return simulacoes.info(mesa)
+
+
+@app.get("/alertas")
+async def api_alertas():
+    return despachante.info()
+
+
+@app.post("/alertas/sinks")
+async def api_alertas_adicionar(req: SinkRequest):
+    try:
+        sink = sink_de_runtime(req.spec, **req.model_dump(exclude={"spec"}))
+        despachante.adicionar(sink)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return sink.info()
+
+
+@app.delete("/alertas/sinks")
+async def api_alertas_remover(nome: str):
+    if not await despachante.remover(nome):
+        raise HTTPException(status_code=404, detail=f"Sink não encontrado: {nome}")
+    return {"ok": True}
+
+
+@app.get("/admin/tables")
+def api_admin_tables():
+    """Memória aproximada por mesa/componente, limites e mesas hibernadas."""
+    return residencia.tabelas()
+
+
+@app.post("/admin/tables/hibernar")
+def api_admin_hibernar(mesa: MesaId):
+    if not residencia.hibernar(mesa):
+        raise HTTPException(status_code=404, detail=f"Mesa não residente (ou é a padrão): {mesa}")
+    return {"ok": True, "agendada": True}
+
+
+@app.get("/debug/profile")
+async def api_debug_profile(
+    segundos: float = Query(0, ge=0, le=600),
+    intervalo_ms: float = Query(2.0, ge=0.5, le=100),
+    memoria: bool = False,
+    formato: Literal["json", "collapsed"] = "json",
+):
+    """
+    segundos > 0: abre uma sessão, espera e devolve o resultado. Só essas sessões baixam o
+    switch interval do processo (amostragem fina, custo pra todas as threads enquanto durar).
+    segundos = 0: parcial da sessão aberta (VIPER_PROFILE=1) ou a última encerrada.
+    formato=collapsed => texto pronto pro flamegraph.pl/speedscope.
+    """
+    if segundos > 0:
+        if not perfil.ligar(intervalo_ms, memoria, switch_rapido=True):
+            raise HTTPException(status_code=409, detail="Já existe uma sessão de profile aberta")
+        try:
+            await asyncio.sleep(segundos)
+        finally:
+            res = perfil.desligar()
+    elif perfil.ativo:
+        res = perfil.parcial()
+    elif perfil.ultimo is not None:
+        res = perfil.ultimo
+    else:
+        raise HTTPException(status_code=404, detail="Nenhum profile ainda (use ?segundos=N ou VIPER_PROFILE=1)")
+    if formato == "collapsed":
+        return PlainTextResponse(perfil.collapsed())
+    return res
+
+
+@app.get("/stream")
+async def api_stream(request: Request, mesa: Optional[str] = None):
+    """Server-Sent Events com cada sinal emitido (todas as mesas ou só `mesa`)."""
+    fila, assinante = broadcast.assinar_async(asyncio.get_running_loop(), mesa=mesa)
+
+    async def eventos():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    msg = await asyncio.wait_for(fila.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {json.dumps(msg, ensure_ascii=False)}\n\n"
+        finally:
+            broadcast.cancelar(assinante)
+
+    return StreamingResponse(eventos(), media_type="text/event-stream")
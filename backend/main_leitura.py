@@ -0,0 +1,136 @@
+# backend/main_leitura.py
+"""
+API só-leitura servida das réplicas em memória compartilhada.
+
+O processo de escrita roda `backend.main:app` com VIPER_SHM=1; os leitores rodam
+em processos separados (mesmo host), ex.:
+
+    uvicorn backend.main_leitura:app --port 8001 --workers 4
+
+Mesmos GETs da API principal, sem disputar GIL com o /spin. O histórico da réplica
+é compacto (sem `mensagem`/`debug`/`entrada`), então as ETags são próprias ("ro-...")
+e não valem na API principal (nem as de lá aqui).
+
+Escritor reiniciado publica um segmento novo: o leitor em cache é trocado quando o
+segmento anexado deixa de ser o atual (`LeitorReplica.atual`, checado a cada request).
+Escritor que morreu no meio de uma publicação deixa o segmento sem leitura consistente:
+503 com Retry-After (o leitor não fica girando no seqlock).
+
+Não importa a engine (backend.mesas/engine): o processo leitor só carrega a réplica.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+
+from backend.replica import LeitorReplica, ReplicaIndisponivel
+from backend.schemas import MesaId, dumps
+from backend.storage import MESA_PADRAO
+
+app = FastAPI(title="Viper Vegas Engine (leitura)", version="1.0.0")
+
+# mesa -> leitor anexado (segmentos são criados pelo escritor sob demanda)
+_leitores: Dict[str, LeitorReplica] = {}
+# snapshot do painel já serializado, por mesa: mesa -> (boot, versao, bytes)
+_snapshot_json: Dict[str, Tuple[str, int, bytes]] = {}
+
+
+def _leitor(mesa: str) -> LeitorReplica:
+    leitor = _leitores.get(mesa)
+    if leitor is not None and not leitor.atual():
+        # segmento velho (escritor reiniciou/saiu): sem fechar aqui, outra thread pode
+        # estar lendo dele; o mapeamento sai quando o último uso soltar a referência
+        _leitores.pop(mesa, None)
+        leitor = None
+    if leitor is None:
+        try:
+            leitor = LeitorReplica(mesa)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Mesa '{mesa}' sem réplica publicada")
+        _leitores[mesa] = leitor
+    return leitor
+
+
+def _get_condicional(request: Request, response: Response, leitor: LeitorReplica, gerar: Callable[[], Any]) -> Any:
+    """ETag da réplica ("ro-boot-mesa-vN"): corpo compacto, diferente do da API principal."""
+    etag = f'"ro-{leitor.boot}-{leitor.mesa_id}-v{leitor.versao}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return gerar()
+
+
+@app.exception_handler(ReplicaIndisponivel)
+def _replica_indisponivel(request: Request, exc: ReplicaIndisponivel):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.on_event("shutdown")
+def _shutdown():
+    for leitor in _leitores.values():
+        leitor.fechar()
+    _leitores.clear()
+
+
+@app.get("/")
+def root():
+    return {"status": "online", "engine": "Viper Vegas", "modo": "leitura"}
+
+
+@app.get("/stats")
+def api_stats(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    r = _leitor(mesa)
+    return _get_condicional(request, response, r, r.get_stats)
+
+
+@app.get("/historico")
+def api_historico(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    r = _leitor(mesa)
+    return _get_condicional(request, response, r, r.get_historico)
+
+
+@app.get("/scores/terminal")
+def api_scores_terminal(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    r = _leitor(mesa)
+    return _get_condicional(request, response, r, r.get_score_terminal)
+
+
+@app.get("/scores/padrao")
+def api_scores_padrao(request: Request, response: Response, top: Optional[int] = None, mesa: MesaId = MESA_PADRAO):
+    r = _leitor(mesa)
+    return _get_condicional(request, response, r, lambda: r.get_score_padrao(top))
+
+
+@app.get("/scores/terminal-padrao")
+def api_scores_terminal_padrao(
+    request: Request, response: Response, top: Optional[int] = None, mesa: MesaId = MESA_PADRAO
+):
+    r = _leitor(mesa)
+    return _get_condicional(request, response, r, lambda: r.get_score_terminal_padrao(top))
+
+
+@app.get("/heatmap/terminal")
+def api_heatmap_terminal(request: Request, response: Response, window: int = 120, mesa: MesaId = MESA_PADRAO):
+    r = _leitor(mesa)
+    return _get_condicional(request, response, r, lambda: r.heatmap_terminal(window=window))
+
+
+@app.get("/heatmap/roda-eu")
+def api_heatmap_roda(request: Request, response: Response, window: int = 120, mesa: MesaId = MESA_PADRAO):
+    r = _leitor(mesa)
+    return _get_condicional(request, response, r, lambda: r.heatmap_roda_eu(window=window))
+
+
+@app.get("/painel/snapshot")
+def api_painel_snapshot(request: Request, response: Response, mesa: MesaId = MESA_PADRAO):
+    r = _leitor(mesa)
+
+    def gerar() -> Response:
+        snap = r.get_snapshot_painel()
+        cache = _snapshot_json.get(r.mesa_id)
+        if cache is None or cache[:2] != (snap["instancia"], snap["versao"]):
+            cache = (snap["instancia"], snap["versao"], dumps(snap))
+            _snapshot_json[r.mesa_id] = cache
+        return Response(content=cache[2], media_type="application/json", headers=dict(response.headers))
+
+    return _get_condicional(request, response, r, gerar)
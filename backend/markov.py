@@ -0,0 +1,237 @@
+# backend/markov.py
+"""
+Matrizes de transição (Markov de 1ª e 2ª ordem) por mesa, mantidas online.
+
+Cadeias:
+- terminal:  terminal -> terminal          (1ª: 10x10,   2ª: 100x10)
+- distancia: casas andadas na roda          (1ª: 1x37 = número -> número pela distância,
+                                              2ª: 37x37 = distância anterior -> distância)
+- cor:       RED/BLACK/GREEN                (1ª: 3x3,     2ª: 9x3)
+- duzia:     zero, 1ª, 2ª, 3ª dúzia         (1ª: 4x4,     2ª: 16x4)
+
+Contagens em arrays densos (linha = contexto, coluna = próximo estado), O(1)
+por spin: cada cadeia soma 1 célula por ordem. Variante decaída (meia-vida
+MEIA_VIDA em spins) por linha com escala preguiçosa: valor = bruto x escala x
+f^(spins desde a última escrita da linha); somar 1 => bruto += 1/escala.
+Nada é multiplicado célula a célula por spin (só a renormalização rara da linha).
+
+Probabilidade do próximo estado com backoff Dirichlet:
+    P1(x|b)  = (n1[b,x]  + ALFA·p0(x))    / (N1[b]  + ALFA)
+    P2(x|ab) = (n2[ab,x] + ALFA·P1(x|b))  / (N2[ab] + ALFA)
+"""
+from __future__ import annotations
+
+from array import array
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.features import ROTULOS, valores
+from backend.logic import WHEEL_EU
+
+MEIA_VIDA = float(os.getenv("VIPER_MARKOV_MEIA_VIDA", "1000"))
+ALFA = 10.0                 # pseudo-observações do backoff
+_ESCALA_MIN = 1e-150        # abaixo disso a linha decaída é renormalizada
+
+_N = 37
+_IDX = {n: i for i, n in enumerate(WHEEL_EU)}
+CORES = ROTULOS["cor"]
+DUZIAS = ("zero", "1-12", "13-24", "25-36")
+
+# estado de cada número por cadeia = coluna estática do FeatureStore (a distância vem da linha do spin)
+_TERMINAL = valores("terminal")
+_COR = valores("cor")
+_DUZIA = valores("duzia")
+# nº de números por estado
+_TAM_TERMINAL = tuple(_TERMINAL.count(x) for x in range(10))
+_TAM_COR = tuple(_COR.count(x) for x in range(3))
+_TAM_DUZIA = tuple(_DUZIA.count(x) for x in range(4))
+
+
+def _p0(estado_de: Sequence[int], k: int) -> Tuple[float, ...]:
+    return tuple(estado_de.count(x) / _N for x in range(k))
+
+
+def _pares(rotulos: Sequence[str]) -> List[str]:
+    """Contextos de 2ª ordem (penúltimo>último), na ordem das linhas: a·k + b."""
+    return [f"{a}>{b}" for a in rotulos for b in rotulos]
+
+
+class Cadeia:
+    """Uma cadeia: contagens brutas + decaídas, 1ª e 2ª ordem."""
+
+    def __init__(self, nome: str, rotulos: Sequence[str], p0: Sequence[float],
+                 contextos1: Sequence[str], contextos2: Sequence[str], meia_vida: float = MEIA_VIDA):
+        self.nome = nome
+        self.rotulos = tuple(rotulos)
+        self.k = k = len(rotulos)
+        self.p0 = tuple(p0)
+        self.contextos = (tuple(contextos1), tuple(contextos2))   # rótulo de cada linha, por ordem
+        self.linhas = (len(contextos1), len(contextos2))
+        self.meia_vida = meia_vida
+        self.fator = 0.5 ** (1.0 / meia_vida)
+        self.cont = tuple(array("q", bytes(8 * n * k)) for n in self.linhas)
+        self.total = tuple(array("q", bytes(8 * n)) for n in self.linhas)
+        self.dec = tuple(array("d", bytes(8 * n * k)) for n in self.linhas)
+        self.dec_total = tuple(array("d", bytes(8 * n)) for n in self.linhas)
+        self.escala = tuple(array("d", [1.0]) * n for n in self.linhas)
+        self.tick = tuple(array("q", bytes(8 * n)) for n in self.linhas)
+
+    def limpar(self) -> None:
+        for grupo in (self.cont, self.total, self.tick):
+            for a in grupo:
+                a[:] = array("q", bytes(8 * len(a)))
+        for grupo in (self.dec, self.dec_total):
+            for a in grupo:
+                a[:] = array("d", bytes(8 * len(a)))
+        for a in self.escala:
+            a[:] = array("d", [1.0]) * len(a)
+
+    def somar(self, ordem: int, linha: int, x: int, tick: int) -> None:
+        o = ordem - 1
+        i = linha * self.k + x
+        self.cont[o][i] += 1
+        self.total[o][linha] += 1
+
+        escala, ticks = self.escala[o], self.tick[o]
+        e = escala[linha]
+        dt = tick - ticks[linha]
+        if dt:
+            e *= self.fator ** dt
+            ticks[linha] = tick
+        if e < _ESCALA_MIN:
+            self._renormalizar(o, linha, e)
+            e = 1.0
+        escala[linha] = e
+        inc = 1.0 / e
+        self.dec[o][i] += inc
+        self.dec_total[o][linha] += inc
+
+    def _renormalizar(self, o: int, linha: int, e: float) -> None:
+        dec, k = self.dec[o], self.k
+        for i in range(linha * k, (linha + 1) * k):
+            dec[i] *= e
+        self.dec_total[o][linha] *= e
+
+    # ------------------------------
+    # leitura
+    # ------------------------------
+    def linha(self, ordem: int, linha: int, tick: int, decaido: bool = False) -> Tuple[List[float], float]:
+        """(contagens da linha, total da linha) — decaídas já trazidas pro `tick`."""
+        o = ordem - 1
+        ini = linha * self.k
+        if not decaido:
+            return list(self.cont[o][ini:ini + self.k]), float(self.total[o][linha])
+        e = self.escala[o][linha] * self.fator ** (tick - self.tick[o][linha])
+        return [v * e for v in self.dec[o][ini:ini + self.k]], self.dec_total[o][linha] * e
+
+    def prob(self, linha1: int, linha2: int, tick: int, decaido: bool = False, alfa: float = ALFA) -> List[float]:
+        """Distribuição do próximo estado (2ª ordem com backoff na 1ª e no p0)."""
+        c1, n1 = self.linha(1, linha1, tick, decaido)
+        p1 = [(c + alfa * p) / (n1 + alfa) for c, p in zip(c1, self.p0)]
+        c2, n2 = self.linha(2, linha2, tick, decaido)
+        return [(c + alfa * p) / (n2 + alfa) for c, p in zip(c2, p1)]
+
+    def matriz(self, ordem: int, tick: int, decaido: bool = False, normalizar: bool = False) -> Dict:
+        linhas = []
+        for r in range(self.linhas[ordem - 1]):
+            cont, total = self.linha(ordem, r, tick, decaido)
+            if normalizar:
+                cont = [c / total for c in cont] if total else [0.0] * self.k
+            linhas.append([round(c, 4) for c in cont] if decaido or normalizar else [int(c) for c in cont])
+        return {"colunas": list(self.rotulos), "contextos": list(self.contextos[ordem - 1]), "linhas": linhas}
+
+
+class MarkovMesa:
+    """As quatro cadeias de uma mesa + contexto (últimos dois números)."""
+
+    def __init__(self, meia_vida: float = MEIA_VIDA):
+        terminais = [str(t) for t in range(10)]
+        distancias = [str(d) for d in range(_N)]
+        self.terminal = Cadeia("terminal", terminais, _p0(_TERMINAL, 10), terminais, _pares(terminais), meia_vida)
+        self.distancia = Cadeia("distancia", distancias, [1 / _N] * _N, ["*"], distancias, meia_vida)
+        self.cor = Cadeia("cor", CORES, _p0(_COR, len(CORES)), CORES, _pares(CORES), meia_vida)
+        self.duzia = Cadeia("duzia", DUZIAS, _p0(_DUZIA, len(DUZIAS)), DUZIAS, _pares(DUZIAS), meia_vida)
+        self.cadeias = {c.nome: c for c in (self.terminal, self.distancia, self.cor, self.duzia)}
+        self.limpar()
+
+    def limpar(self) -> None:
+        for c in self.cadeias.values():
+            c.limpar()
+        self.spins = 0
+        self._ult: Tuple[Optional[int], Optional[int]] = (None, None)   # (penúltimo, último)
+        self._dist: int = -1                                           # distância do último spin
+
+    def observar(self, numero: int, dist: int) -> None:
+        """`dist` = casas no sentido horário desde o spin anterior (feature `distancia`; -1 no 1º)."""
+        self.spins += 1
+        tick = self.spins
+        a, b = self._ult
+        if b is not None:
+            self._estados(self.terminal, _TERMINAL, a, b, numero, tick)
+            self._estados(self.cor, _COR, a, b, numero, tick)
+            self._estados(self.duzia, _DUZIA, a, b, numero, tick)
+            self.distancia.somar(1, 0, dist, tick)
+            if self._dist >= 0:
+                self.distancia.somar(2, self._dist, dist, tick)
+            self._dist = dist
+        self._ult = (b, numero)
+
+    @staticmethod
+    def _estados(cadeia: Cadeia, estado_de: Tuple[int, ...], a: Optional[int], b: int, x: int, tick: int) -> None:
+        sb, sx = estado_de[b], estado_de[x]
+        cadeia.somar(1, sb, sx, tick)
+        if a is not None:
+            cadeia.somar(2, estado_de[a] * cadeia.k + sb, sx, tick)
+
+    # ------------------------------
+    # scorer
+    # ------------------------------
+    def prob_numeros(self, numeros: Sequence[int] = tuple(range(_N)), decaido: bool = True) -> Optional[List[float]]:
+        """
+        P(próximo número) pra cada um de `numeros` = média das quatro cadeias, cada
+        uma espalhando a probabilidade do estado pelos números dele. None sem contexto ainda.
+        """
+        a, b = self._ult
+        if a is None or b is None:
+            return None
+        tick = self.spins
+        out = [0.0] * len(numeros)
+        for cadeia, estado_de, tam in ((self.terminal, _TERMINAL, _TAM_TERMINAL), (self.cor, _COR, _TAM_COR),
+                                       (self.duzia, _DUZIA, _TAM_DUZIA)):
+            sb = estado_de[b]
+            p = cadeia.prob(sb, estado_de[a] * cadeia.k + sb, tick, decaido)
+            for i, n in enumerate(numeros):
+                s = estado_de[n]
+                out[i] += p[s] / tam[s]
+        pd = self.distancia.prob(0, max(self._dist, 0), tick, decaido)
+        ib = _IDX[b]
+        for i, n in enumerate(numeros):
+            out[i] += pd[(_IDX[n] - ib) % _N]
+        return [v / 4.0 for v in out]
+
+    def prob_alvo(self, alvo: Iterable[int], gale_max: int, decaido: bool = True) -> Optional[float]:
+        """P(bater no alvo em até gale_max+1 spins), tratando os spins como independentes."""
+        p = self.prob_numeros(tuple(alvo), decaido)
+        if p is None:
+            return None
+        um = min(1.0, sum(p))
+        return 1.0 - (1.0 - um) ** (gale_max + 1)
+
+    # ------------------------------
+    # API
+    # ------------------------------
+    def matrizes(self, cadeias: Optional[Sequence[str]] = None, ordem: int = 1,
+                 decaido: bool = False, normalizar: bool = False) -> Dict:
+        nomes = cadeias or list(self.cadeias)
+        desconhecidas = [n for n in nomes if n not in self.cadeias]
+        if desconhecidas:
+            raise ValueError(f"cadeias desconhecidas: {', '.join(desconhecidas)} (use {', '.join(self.cadeias)})")
+        if ordem not in (1, 2):
+            raise ValueError("ordem deve ser 1 ou 2")
+        return {
+            "spins": self.spins,
+            "ordem": ordem,
+            "decaido": decaido,
+            "meia_vida": self.terminal.meia_vida if decaido else None,
+            "cadeias": {n: self.cadeias[n].matriz(ordem, self.spins, decaido, normalizar) for n in nomes},
+        }
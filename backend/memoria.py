@@ -0,0 +1,62 @@
+# backend/memoria.py
+"""
+Estimativa de memória (bytes aproximados) de estruturas da engine.
+
+sys.getsizeof recursivo sobre dict/list/tuple/set/deque/array e objetos com
+__dict__/__slots__, contando cada objeto uma vez (`vistos` pode ser compartilhado
+entre componentes pra não contar duas vezes o que é dividido, ex.: o snapshot do
+painel aponta pros mesmos registros do histórico).
+
+Containers grandes (> AMOSTRA itens) são estimados por amostra: mede AMOSTRA itens
+espaçados e extrapola => custo O(AMOSTRA) por container, não O(n). Funções, classes
+e módulos não entram (são do processo, não da mesa).
+
+Cópias de containers são feitas com list(...) (C, segura o GIL): o worker pode
+estar mexendo nos scorers enquanto a estimativa roda.
+"""
+from __future__ import annotations
+
+import sys
+import types
+from array import array
+from collections import deque
+from typing import Any, Optional, Set
+
+AMOSTRA = 64
+
+_ATOMICOS = (str, bytes, bytearray, int, float, complex, bool, type(None), array, range)
+_FORA = (types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.ModuleType, type)
+_SEQUENCIAS = (list, tuple, set, frozenset, deque)
+
+
+def bytes_aprox(obj: Any, vistos: Optional[Set[int]] = None) -> int:
+    return _tam(obj, set() if vistos is None else vistos)
+
+
+def _tam(o: Any, vistos: Set[int]) -> int:
+    i = id(o)
+    if i in vistos or isinstance(o, _FORA):
+        return 0
+    vistos.add(i)
+    total = sys.getsizeof(o)
+    if isinstance(o, _ATOMICOS):
+        return total
+    if isinstance(o, dict):
+        return total + _itens(list(o), vistos) + _itens(list(o.values()), vistos)
+    if isinstance(o, _SEQUENCIAS):
+        return total + _itens(list(o), vistos)
+    d = getattr(o, "__dict__", None)
+    if d is not None:
+        total += _tam(d, vistos)
+    for nome in getattr(type(o), "__slots__", ()):
+        total += _tam(getattr(o, nome, None), vistos)
+    return total
+
+
+def _itens(itens: list, vistos: Set[int]) -> int:
+    n = len(itens)
+    if n <= AMOSTRA:
+        return sum(_tam(x, vistos) for x in itens)
+    passo = n / AMOSTRA
+    amostra = sum(_tam(itens[int(k * passo)], vistos) for k in range(AMOSTRA))
+    return int(amostra * n / AMOSTRA)
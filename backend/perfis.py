@@ -0,0 +1,192 @@
+# backend/perfis.py
+"""
+Perfis de configuração por mesa, lidos de um JSON (VIPER_PERFIS) com reload a quente.
+
+    {
+      "padrao": "base",
+      "perfis": {
+        "base":       {"bayes_margem": 0.02, "gale_max": 2},
+        "agressivo":  {"herda": "base", "bayes_margem": 0.0, "detectores": ["escadinha"]},
+        "curto":      {"herda": "base", "gale_max": 1, "vizinhos_alvo": 2, "min_spins_aquecimento": 6}
+      },
+      "mesas": {"m1": "agressivo", "m7": "curto"}
+    }
+
+Chaves de perfil = campos de ConfigEngine (+ "herda"). Mesa fora de "mesas" usa "padrao".
+
+Reload: o arquivo inteiro é lido, validado e compilado (ConfigEngine calcula
+thresholds/alvos/priors) fora de qualquer lock; só então a tabela nova entra
+numa troca atômica de referência e cada mesa troca o ponteiro da config.
+Arquivo inválido (JSON ou formato) => fica a tabela anterior e o erro aparece em
+`info()`; a vigia segue olhando o arquivo.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.logic import CONFIG_PADRAO, ConfigEngine
+
+VIPER_PERFIS = os.getenv("VIPER_PERFIS", "")
+INTERVALO_OBSERVAR_S = float(os.getenv("VIPER_PERFIS_INTERVALO", "2.0"))
+PERFIL_PADRAO = "padrao"
+
+
+class TabelaPerfis:
+    """Perfis já compilados + mapeamento mesa -> perfil. Imutável depois de montada."""
+
+    def __init__(self, perfis: Dict[str, ConfigEngine], mesas: Dict[str, str], padrao: str):
+        self.perfis = perfis
+        self.mesas = mesas
+        self.padrao = padrao
+
+    @classmethod
+    def vazia(cls) -> "TabelaPerfis":
+        return cls({PERFIL_PADRAO: CONFIG_PADRAO}, {}, PERFIL_PADRAO)
+
+    @classmethod
+    def de_dict(cls, d: Dict[str, Any]) -> "TabelaPerfis":
+        if not isinstance(d, dict):
+            raise ValueError("o arquivo de perfis deve ser um objeto JSON")
+        brutos: Dict[str, Dict[str, Any]] = d.get("perfis") or {}
+        if not isinstance(brutos, dict):
+            raise ValueError("'perfis' deve ser um objeto nome -> parâmetros")
+        for nome, params in brutos.items():
+            if not isinstance(params, dict):
+                raise ValueError(f"perfil {nome!r}: deve ser um objeto parâmetro -> valor")
+            if not isinstance(params.get("herda", ""), str):
+                raise ValueError(f"perfil {nome!r}: 'herda' deve ser o nome de um perfil")
+
+        resolvidos: Dict[str, Dict[str, Any]] = {}
+
+        def resolver(nome: str, cadeia: tuple = ()) -> Dict[str, Any]:
+            if nome in resolvidos:
+                return resolvidos[nome]
+            if nome in cadeia:
+                raise ValueError(f"herança circular: {' -> '.join(cadeia + (nome,))}")
+            if nome not in brutos:
+                raise ValueError(f"perfil desconhecido: {nome!r}")
+            params = dict(brutos[nome])
+            pai = params.pop("herda", None)
+            base = resolver(pai, cadeia + (nome,)) if pai else {}
+            resolvidos[nome] = {**base, **params}
+            return resolvidos[nome]
+
+        perfis: Dict[str, ConfigEngine] = {}
+        for nome in brutos:
+            try:
+                perfis[nome] = ConfigEngine.de_dict(resolver(nome))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"perfil {nome!r}: {e}") from None
+
+        padrao = d.get("padrao") or PERFIL_PADRAO
+        if padrao not in perfis:
+            if padrao != PERFIL_PADRAO:
+                raise ValueError(f"perfil padrão {padrao!r} não definido")
+            perfis[PERFIL_PADRAO] = CONFIG_PADRAO
+
+        brutas = d.get("mesas") or {}
+        if not isinstance(brutas, dict):
+            raise ValueError("'mesas' deve ser um objeto mesa -> perfil")
+        mesas = {str(k): str(v) for k, v in brutas.items()}
+        for mesa, nome in mesas.items():
+            if nome not in perfis:
+                raise ValueError(f"mesa {mesa!r} aponta pra perfil desconhecido {nome!r}")
+        return cls(perfis, mesas, padrao)
+
+    def perfil_de(self, mesa: str) -> str:
+        return self.mesas.get(mesa, self.padrao)
+
+    def config_de(self, mesa: str) -> ConfigEngine:
+        return self.perfis[self.perfil_de(mesa)]
+
+
+Ouvinte = Callable[[TabelaPerfis], None]
+
+
+class GerenciadorPerfis:
+    def __init__(self, caminho: str = VIPER_PERFIS):
+        self.caminho = caminho
+        self.tabela = TabelaPerfis.vazia()
+        self.versao = 0
+        self.mtime: Optional[float] = None
+        self.recarregado_em: Optional[float] = None
+        self.erro: Optional[str] = None
+        self._ouvintes: List[Ouvinte] = []
+        self._lock = threading.Lock()          # serializa reloads (leitura não usa)
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if caminho:
+            self.recarregar()
+
+    def assinar(self, fn: Ouvinte) -> None:
+        self._ouvintes.append(fn)
+
+    def config_de(self, mesa: str) -> ConfigEngine:
+        return self.tabela.config_de(mesa)
+
+    def recarregar(self) -> bool:
+        """Lê/compila o arquivo e troca a tabela. False (e `erro`) se o arquivo é inválido."""
+        if not self.caminho:
+            return False
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.caminho)
+                with open(self.caminho, "r", encoding="utf-8") as f:
+                    nova = TabelaPerfis.de_dict(json.load(f))
+            except (OSError, ValueError) as e:
+                self.erro = str(e)
+                return False
+            self.tabela = nova                  # troca atômica da referência
+            self.versao += 1
+            self.mtime = mtime
+            self.recarregado_em = time.time()
+            self.erro = None
+            for fn in self._ouvintes:
+                fn(nova)
+            return True
+
+    # ------------------------------
+    # observar o arquivo (reload quando muda)
+    # ------------------------------
+    def observar(self, intervalo: float = INTERVALO_OBSERVAR_S) -> None:
+        if not self.caminho or self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, args=(intervalo,), name="perfis", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self, intervalo: float) -> None:
+        while not self._parar.wait(intervalo):
+            try:
+                if os.path.getmtime(self.caminho) != self.mtime:
+                    self.recarregar()
+            except OSError:
+                continue
+            except Exception as e:
+                # um arquivo (ou ouvinte) com problema não pode matar o reload a quente
+                self.erro = repr(e)
+
+    def info(self) -> Dict:
+        t = self.tabela
+        return {
+            "arquivo": self.caminho or None,
+            "versao": self.versao,
+            "recarregado_em": self.recarregado_em,
+            "erro": self.erro,
+            "padrao": t.padrao,
+            "mesas": dict(t.mesas),
+            "perfis": {nome: cfg.para_dict() for nome, cfg in t.perfis.items()},
+        }
+
+
+perfis = GerenciadorPerfis()
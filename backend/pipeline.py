@@ -0,0 +1,315 @@
+# backend/pipeline.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence, Tuple
+
+from backend.features import F_COR, F_DISTANCIA, F_TERMINAL, ROTULOS
+from backend.logic import (
+    STATUS_ID,
+    EntradaAtiva,
+    detectar_escadinha,
+    detectar_terminal_vizinhos,
+    grupo_terminal,
+    wheel_neighbors,
+)
+from backend.storage import storage
+from backend.worker import worker
+
+if TYPE_CHECKING:
+    from backend.engine import MesaEngine
+
+
+# ==============================
+# EVENTO (passa de etapa em etapa)
+# ==============================
+@dataclass
+class SpinEvento:
+    mesa: str
+    seq: int                                # nº do spin na mesa (1, 2, ...)
+    numero: int
+    modo: str
+    source: str
+    ts: float
+    seq_externo: Optional[int] = None       # seq informado pela fonte (scraper)
+    spin_id: Optional[str] = None
+    geracao: int = 0                        # MesaEngine.geracao (resets) quando o spin entrou
+
+    # features (linha do FeatureStore da mesa; `terminal`/`cor` saem dela)
+    features: Tuple[int, ...] = ()
+    terminal: int = 0
+    cor: str = ""
+    tendencia: Optional[Dict[int, int]] = None   # modas da janela de mercado (só em GREEN, pro worker)
+
+    # detectores
+    terminais: Sequence[int] = ()           # últimos 3 terminais (lidos uma vez em `detectar`)
+    padrao: Optional[str] = None
+    terminal_previsto: Optional[int] = None
+    estrategia: Optional[str] = None
+
+    # scorers
+    score_terminal: float = 0.0
+    score_padrao: float = 0.0
+    score_combinado: float = 0.0
+    threshold: float = 0.0
+
+    # resolver
+    status: str = "ANALISE"                 # ANALISE | ENTRADA | GREEN | GALE | RED
+    entrada: Optional[EntradaAtiva] = None  # entrada aberta ou resolvida neste spin
+    gale: int = 0                           # gale da entrada neste spin (a entrada segue mudando)
+
+    fim: bool = False                       # etapas críticas seguintes não rodam
+    registro: Dict = field(default_factory=dict)   # sinal devolvido pro /spin
+
+
+_CORES = ROTULOS["cor"]
+
+Etapa = Callable[["MesaEngine", SpinEvento], None]
+Detector = Callable[["MesaEngine", SpinEvento], bool]
+
+# "HH:MM:SS" do último segundo visto (spins do mesmo segundo não refazem o strftime)
+_hora_cache: Tuple[int, str] = (-1, "")
+
+
+def _hora(ts: float) -> str:
+    global _hora_cache
+    seg = int(ts)
+    if _hora_cache[0] != seg:
+        _hora_cache = (seg, time.strftime("%H:%M:%S", time.localtime(seg)))
+    return _hora_cache[1]
+
+
+# ==============================
+# ETAPAS CRÍTICAS (bloqueiam o /spin)
+# ==============================
+def ingerir(mesa: MesaEngine, ev: SpinEvento) -> None:
+    mesa.versao += 1
+    mesa.stats["spins"] += 1
+
+
+def extrair_features(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """Features do número/transição calculadas uma vez (FeatureStore); o resto da mesa só lê."""
+    ev.features = f = mesa.features.observar(ev.numero)
+    ev.terminal = f[F_TERMINAL]
+    ev.cor = _CORES[f[F_COR]]
+
+    ev.registro = {
+        "time": _hora(ev.ts),
+        "source": ev.source,
+        "numero": int(ev.numero),
+        "cor": ev.cor,
+        "terminal": int(ev.terminal),
+        "status": "ANALISE",
+        "padroes": None,                 # string ou None
+        "score_terminal": 0.0,
+        "score_padrao": 0.0,
+        "score_combinado": 0.0,
+        "grupo_terminal": grupo_terminal(ev.terminal),
+        "vizinhos_roda": wheel_neighbors(ev.numero, k=1),
+        "mensagem": "",
+        "entrada": None,                 # dict quando ENTRADA ativa
+        "vies": None,                    # dict quando algum teste de viés dispara neste spin
+        "debug": {},
+    }
+
+    # histórico já com este spin (painel/API)
+    mesa.historico.append(ev.registro)
+
+
+def transicoes(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """Matrizes de transição (1 célula por cadeia/ordem); roda também no aquecimento."""
+    if mesa.isolada and not mesa.config.peso_markov:
+        return      # replay/backtest sem o scorer de Markov: ninguém lê as matrizes
+    mesa.markov.observar(ev.numero, ev.features[F_DISTANCIA])
+
+
+def aquecer(mesa: MesaEngine, ev: SpinEvento) -> None:
+    aquecimento = mesa.config.min_spins_aquecimento
+    if len(mesa.historico) < aquecimento:
+        ev.registro["mensagem"] = f"Aquecendo histórico ({len(mesa.historico)}/{aquecimento})"
+        ev.fim = True
+
+
+def _det_escadinha(mesa: MesaEngine, ev: SpinEvento) -> bool:
+    esc = detectar_escadinha(ev.terminais)
+    if not esc:
+        return False
+    padrao, previsto, passo, direcao = esc
+    ev.padrao = padrao
+    ev.terminal_previsto = previsto
+    ev.registro["debug"]["escadinha"] = {"passo": passo, "direcao": direcao, "previsto": previsto}
+    return True
+
+
+def _det_terminal_vizinhos(mesa: MesaEngine, ev: SpinEvento) -> bool:
+    rep = detectar_terminal_vizinhos(ev.terminais)
+    if not rep:
+        return False
+    ev.padrao, ev.terminal_previsto = rep
+    return True
+
+
+# nome (ConfigEngine.detectores) -> detector; True = disparou (preencheu padrão/previsto)
+DETECTORES_POR_NOME: Dict[str, Detector] = {
+    "escadinha": _det_escadinha,
+    "terminal_vizinhos": _det_terminal_vizinhos,
+}
+
+
+def detectar(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """Detectores ligados na config, em ordem de prioridade. Com entrada aberta, não detecta."""
+    if mesa.entrada_ativa is not None:
+        return
+
+    ev.terminais = mesa.features.ultimos(F_TERMINAL, 3)
+    for nome in mesa.config.detectores:
+        if DETECTORES_POR_NOME[nome](mesa, ev):
+            ev.estrategia = nome
+            mesa.stats["padroes"] += 1
+            return
+
+
+def pontuar(mesa: MesaEngine, ev: SpinEvento) -> None:
+    if mesa.entrada_ativa is not None:
+        return
+
+    # sem padrão: só o score do terminal atual
+    if ev.padrao is None or ev.terminal_previsto is None:
+        ev.score_terminal = mesa.calcular_score_terminal(ev.terminal)
+        ev.registro["score_terminal"] = round(ev.score_terminal, 6)
+        return
+
+    ev.score_terminal = mesa.calcular_score_terminal(ev.terminal_previsto)
+    ev.score_padrao = mesa.calcular_score_padrao(ev.padrao)
+    cfg = mesa.config
+    ev.score_combinado = (cfg.peso_terminal * ev.score_terminal) + (cfg.peso_padrao * ev.score_padrao)
+    if cfg.peso_markov > 0:
+        # P(bater no alvo até o último gale) pelas transições da mesa, na mesma escala dos scores
+        p = mesa.markov.prob_alvo(cfg.alvos[ev.terminal_previsto], cfg.gale_max)
+        if p is not None:
+            ev.registro["debug"]["markov"] = round(p, 6)
+            ev.score_combinado = (1.0 - cfg.peso_markov) * ev.score_combinado + cfg.peso_markov * p
+    ev.threshold = cfg.threshold(ev.modo, ev.terminal_previsto)
+
+    r = ev.registro
+    r["padroes"] = ev.padrao
+    r["score_terminal"] = round(ev.score_terminal, 6)
+    r["score_padrao"] = round(ev.score_padrao, 6)
+    r["score_combinado"] = round(ev.score_combinado, 6)
+
+
+def resolver(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """Resolve a entrada aberta (GREEN/GALE/RED) ou decide se libera uma nova."""
+    if mesa.entrada_ativa is not None:
+        ev.entrada = mesa.entrada_ativa
+        status, msg = mesa.resolver_entrada_ativa(ev.numero)
+        ev.gale = ev.entrada.gale
+        ev.status = status
+        ev.registro["status"] = status
+        ev.registro["mensagem"] = msg
+        ev.registro["padroes"] = mesa.entrada_ativa.padrao if mesa.entrada_ativa else None
+        ev.fim = True
+        return
+
+    if ev.padrao is None or ev.terminal_previsto is None:
+        return
+
+    if ev.score_combinado >= ev.threshold:
+        # entrada = terminal previsto + k vizinhos pela roda de cada número (alvos pré-compilados na config)
+        ev.entrada = EntradaAtiva(
+            estrategia=ev.estrategia or "",
+            terminal_previsto=ev.terminal_previsto,
+            numeros_alvo=mesa.config.alvos[ev.terminal_previsto],
+            padrao=ev.padrao,
+            gale=0,
+            id=mesa.livro.novo_id(),
+            seq=ev.seq,
+            ts=ev.ts,
+        )
+        mesa.entrada_ativa = ev.entrada
+        mesa.stats["entradas"] += 1
+        ev.status = "ENTRADA"
+        ev.registro["status"] = "ENTRADA"
+
+
+# ==============================
+# EMISSORES
+# ==============================
+def montar_sinal(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """Mensagem + payload da entrada (aquecimento/resolução já vêm com mensagem)."""
+    r = ev.registro
+    if r["mensagem"]:
+        return
+
+    if ev.padrao is None:
+        r["mensagem"] = f"Sem padrão detectado | Score terminal: {round(ev.score_terminal, 2)}"
+        return
+
+    base = (
+        f"Padrão detectado: {ev.padrao} | "
+        f"Prev terminal: {ev.terminal_previsto} | "
+        f"Score: {round(ev.score_combinado, 2)} "
+        f"(T:{round(ev.score_terminal,2)} P:{round(ev.score_padrao,2)})"
+    )
+
+    if ev.status == "ENTRADA" and ev.entrada is not None:
+        r["entrada"] = {
+            "id": ev.entrada.id,
+            "estrategia": ev.entrada.estrategia,
+            "terminal_previsto": ev.entrada.terminal_previsto,
+            "numeros_terminal": grupo_terminal(ev.entrada.terminal_previsto),
+            "numeros_alvo": sorted(ev.entrada.numeros_alvo),
+            "gale_max": mesa.config.gale_max,
+            "padrao": ev.entrada.padrao,
+        }
+        r["mensagem"] = f"ENTRADA LIBERADA ✅ | {base}"
+        return
+
+    r["mensagem"] = (
+        f"Score abaixo do limiar ({round(ev.score_combinado,2)} < {round(ev.threshold,2)}) | {base}"
+    )
+
+
+def reter(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """Camadas morna/agregados (barato: contadores + append em arrays)."""
+    ret = mesa.retencao
+    store = mesa.score_store
+    p = ev.registro["padroes"]
+    ret.registrar_spin(ev.ts, ev.numero, STATUS_ID[ev.status], store.id_de(p) if p else -1)
+    if ev.entrada is not None and ev.status in ("GREEN", "RED"):
+        ret.registrar_resultado(ev.ts, ev.entrada.terminal_previsto, store.id_de(ev.entrada.padrao),
+                                ev.status == "GREEN")
+
+
+def vigiar_vies(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """Testes de viés da roda (estatísticas acumuladas, O(1) por spin); alarmes vão no sinal."""
+    ev.registro["vies"] = mesa.vies.observar(ev.numero, ev.features[F_DISTANCIA])
+
+
+def publicar(mesa: MesaEngine, ev: SpinEvento) -> None:
+    """
+    Consumidores pesados/opcionais rodam no worker, fora do caminho crítico. A
+    persistência vai antes e por `enviar_duravel` (fila cheia não perde dado gravado).
+    """
+    if ev.status == "GREEN":
+        # o worker roda atrasado: a tendência do mercado vai congelada no evento
+        ev.tendencia = mesa.features.modas(mesa.score_mercado.janela_mercado)
+    if storage.ativo or (ev.entrada is not None and ev.status in ("GREEN", "RED")):
+        worker.enviar_duravel(mesa.persistir, ev)
+    worker.enviar(mesa.pos_spin, ev)
+
+
+ETAPAS_CRITICAS: Tuple[Etapa, ...] = (ingerir, extrair_features, transicoes, aquecer, detectar, pontuar, resolver)
+EMISSORES: Tuple[Etapa, ...] = (montar_sinal, reter, vigiar_vies, publicar)
+EMISSORES_ISOLADOS: Tuple[Etapa, ...] = (montar_sinal,)   # replay/backtest: nada sai do processo
+
+
+def executar(mesa: MesaEngine, ev: SpinEvento, emissores: Tuple[Etapa, ...] = EMISSORES) -> Dict:
+    for etapa in ETAPAS_CRITICAS:
+        etapa(mesa, ev)
+        if ev.fim:
+            break
+    for emissor in emissores:
+        emissor(mesa, ev)
+    return ev.registro
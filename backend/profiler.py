@@ -0,0 +1,309 @@
+# backend/profiler.py
+"""
+Modo profiling da engine (opt-in), pra investigar regressão de latência sob carga real.
+
+Ligado por:
+- GET /debug/profile?segundos=N   sessão de N s; devolve o resumo (ou `formato=collapsed`)
+- VIPER_PROFILE=1                  sessão aberta do startup ao shutdown (arquivos gravados no fim;
+                                   GET /debug/profile sem `segundos` mostra/grava o parcial)
+
+O que uma sessão coleta:
+- timers por etapa do spin (ingerir, extrair_features, ..., resolver, emissores) + serializacao
+  + total: n, média, máx, participação. `serializacao` = um json.dumps extra do sinal feito só
+  pra medir (a resposta HTTP serializa de novo), então aparece também no flamegraph
+- amostragem de pilhas (thread que lê sys._current_frames a cada `intervalo_ms`), só pilhas
+  que passam pelo backend e não estão paradas esperando => arquivo .folded no formato
+  "collapsed stacks" (flamegraph.pl, speedscope, inferno):
+      viper-worker;_loop (worker.py:41);pos_spin (engine.py:135) 17
+- alocações (opcional, `memoria=true` / VIPER_PROFILE_MEMORIA=1): tracemalloc, top linhas do
+  backend por bytes alocados durante a sessão (tracemalloc deixa o spin ~2-3x mais lento)
+
+Desligado o custo é zero: o caminho do spin não testa flag nenhuma. Ligar troca o
+`executar` que a engine chama por `executar_medido`; desligar põe o original de volta.
+
+Custo ligado: sessões curtas (`?segundos=N`) baixam o sys.setswitchinterval do processo
+inteiro pra 20 µs enquanto duram (troca de GIL ~250x mais frequente: throughput cai e o
+p99 de todas as threads sobe, não só da engine). A sessão de VIPER_PROFILE=1 dura o
+processo todo e por isso mantém o intervalo padrão: timers exatos, mas o flamegraph só
+vê a engine quando as outras threads soltam o GIL (sub-amostra spins curtos).
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from backend import engine as _engine
+from backend import pipeline
+
+if TYPE_CHECKING:
+    from backend.engine import MesaEngine
+    from backend.pipeline import SpinEvento
+
+PROFILE_DIR = os.getenv("VIPER_PROFILE_DIR", "profile")
+INTERVALO_MS = 2.0
+# só em sessões curtas (`switch_rapido`): sem isso o amostrador só pega o GIL quando as outras
+# threads bloqueiam (o switch forçado padrão é 5 ms, muito mais que um spin) e pouco vê a engine
+SWITCH_INTERVAL = 0.00002
+MAX_PROFUNDIDADE = 64
+TOP_ALOCACOES = 25
+
+_PACOTE = os.path.dirname(os.path.abspath(__file__))
+_ESTE = os.path.abspath(__file__)
+# folha da pilha nessas funções = thread parada esperando (fora do flamegraph)
+_ESPERAS = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"), ("selectors.py", "select"), ("socket.py", "accept"),
+}
+
+
+# ==============================
+# TIMERS POR ETAPA
+# ==============================
+# etapa -> [n, total_ns, max_ns]; sem lock: perder uma amostra rara sob concorrência é aceitável num profile
+_timers: Dict[str, List[int]] = {}
+
+
+def _somar(nome: str, dt: int) -> None:
+    a = _timers.get(nome)
+    if a is None:
+        a = _timers[nome] = [0, 0, 0]
+    a[0] += 1
+    a[1] += dt
+    if dt > a[2]:
+        a[2] = dt
+
+
+def executar_medido(mesa: MesaEngine, ev: SpinEvento, emissores: Tuple[pipeline.Etapa, ...]) -> Dict:
+    """Mesmo fluxo de `pipeline.executar`, cronometrando cada etapa."""
+    agora = time.perf_counter_ns
+    ini = t0 = agora()
+    for etapa in pipeline.ETAPAS_CRITICAS:
+        etapa(mesa, ev)
+        t1 = agora()
+        _somar(etapa.__name__, t1 - t0)
+        t0 = t1
+        if ev.fim:
+            break
+    for emissor in emissores:
+        emissor(mesa, ev)
+        t1 = agora()
+        _somar(emissor.__name__, t1 - t0)
+        t0 = t1
+    json.dumps(ev.registro, ensure_ascii=False)
+    t1 = agora()
+    _somar("serializacao", t1 - t0)
+    _somar("total", t1 - ini)
+    return ev.registro
+
+
+def _resumo_timers() -> List[Dict]:
+    total = _timers.get("total", [0, 0, 0])[1] or 1
+    out = []
+    for nome, (n, soma, maximo) in list(_timers.items()):
+        out.append({
+            "etapa": nome,
+            "n": n,
+            "media_us": round(soma / n / 1000, 3) if n else None,
+            "max_us": round(maximo / 1000, 3),
+            "participacao": round(soma / total, 4),
+        })
+    return out
+
+
+# ==============================
+# AMOSTRAGEM DE PILHAS
+# ==============================
+# code object -> (rótulo, é do backend?); co_filename pode ser relativo (PYTHONPATH=.)
+_codigos: Dict[object, Tuple[str, bool]] = {}
+
+
+def _rotulo(code) -> Tuple[str, bool]:
+    r = _codigos.get(code)
+    if r is None:
+        arquivo = os.path.abspath(code.co_filename)
+        r = _codigos[code] = (
+            f"{code.co_name} ({os.path.basename(arquivo)}:{code.co_firstlineno})",
+            arquivo.startswith(_PACOTE + os.sep) and arquivo != _ESTE,
+        )
+    return r
+
+
+class _Amostrador(threading.Thread):
+    def __init__(self, intervalo_ms: float):
+        super().__init__(name="viper-profiler", daemon=True)
+        self.intervalo = intervalo_ms / 1000
+        self.pilhas: Counter = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+
+    def parar(self) -> None:
+        self._parar.set()
+        self.join()
+
+    def run(self) -> None:
+        eu = threading.get_ident()
+        nomes: Dict[int, str] = {}
+        proxima_lista = 0.0
+        while not self._parar.wait(self.intervalo):
+            agora = time.monotonic()
+            if agora >= proxima_lista:
+                nomes = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+                proxima_lista = agora + 1.0
+            for tid, frame in sys._current_frames().items():
+                if tid == eu:
+                    continue
+                folha = frame.f_code
+                if (os.path.basename(folha.co_filename), folha.co_name) in _ESPERAS:
+                    continue
+                pilha: List[str] = []
+                nosso = False
+                f = frame
+                while f is not None and len(pilha) < MAX_PROFUNDIDADE:
+                    rotulo, do_backend = _rotulo(f.f_code)
+                    nosso = nosso or do_backend
+                    pilha.append(rotulo)
+                    f = f.f_back
+                if not nosso:
+                    continue
+                pilha.append(nomes.get(tid, str(tid)))
+                self.pilhas[";".join(reversed(pilha))] += 1
+            self.amostras += 1
+
+
+# ==============================
+# SESSÃO
+# ==============================
+class Perfilador:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._amostrador: Optional[_Amostrador] = None
+        self._memoria = False
+        self._snap_ini = None
+        self._switch_original = sys.getswitchinterval()
+        self.inicio: Optional[float] = None
+        self.ultimo: Optional[Dict] = None      # resumo da última sessão encerrada
+
+    @property
+    def ativo(self) -> bool:
+        return self._amostrador is not None
+
+    def ligar(self, intervalo_ms: float = INTERVALO_MS, memoria: bool = False, switch_rapido: bool = False) -> bool:
+        """Abre uma sessão. False se já há uma aberta. `switch_rapido`: só pra sessões com prazo."""
+        with self._lock:
+            if self._amostrador is not None:
+                return False
+            _timers.clear()
+            if memoria:
+                import tracemalloc
+
+                tracemalloc.start(1)
+                self._snap_ini = tracemalloc.take_snapshot()
+            self._memoria = memoria
+            self.inicio = time.time()
+            self._switch_original = sys.getswitchinterval()
+            if switch_rapido:
+                sys.setswitchinterval(min(self._switch_original, SWITCH_INTERVAL))
+            self._amostrador = _Amostrador(intervalo_ms)
+            self._amostrador.start()
+            _engine.executar = executar_medido
+            return True
+
+    def parcial(self, top: int = TOP_ALOCACOES) -> Dict:
+        """Resumo da sessão aberta, sem encerrar."""
+        with self._lock:
+            if self._amostrador is None:
+                raise RuntimeError("nenhuma sessão de profile aberta")
+            return self._resumo(self._amostrador, top)
+
+    def desligar(self, top: int = TOP_ALOCACOES) -> Dict:
+        """Encerra a sessão, grava os arquivos e devolve o resumo."""
+        with self._lock:
+            amostrador = self._amostrador
+            if amostrador is None:
+                raise RuntimeError("nenhuma sessão de profile aberta")
+            _engine.executar = pipeline.executar
+            amostrador.parar()
+            sys.setswitchinterval(self._switch_original)
+            res = self._resumo(amostrador, top)
+            if self._memoria:
+                import tracemalloc
+
+                tracemalloc.stop()
+                self._snap_ini = None
+            self._amostrador = None
+            self.ultimo = res
+            return res
+
+    def collapsed(self) -> str:
+        """Pilhas da sessão aberta (ou da última gravada) no formato collapsed."""
+        with self._lock:
+            if self._amostrador is not None:
+                return _texto_collapsed(self._amostrador.pilhas)
+        if self.ultimo is None:
+            return ""
+        with open(self.ultimo["arquivo_folded"], encoding="utf-8") as f:
+            return f.read()
+
+    def _resumo(self, amostrador: _Amostrador, top: int) -> Dict:
+        pilhas = Counter(amostrador.pilhas)
+        fim = time.time()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, time.strftime("viper-%Y%m%d-%H%M%S", time.localtime(self.inicio)))
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            f.write(_texto_collapsed(pilhas))
+
+        # funções mais vistas no topo da pilha (self time) e em qualquer nível (inclusive)
+        proprias: Counter = Counter()
+        inclusivas: Counter = Counter()
+        for pilha, n in pilhas.items():
+            frames = pilha.split(";")[1:]
+            proprias[frames[-1]] += n
+            for fr in set(frames):
+                inclusivas[fr] += n
+        total = sum(pilhas.values()) or 1
+        res = {
+            "inicio": self.inicio,
+            "segundos": round(fim - (self.inicio or fim), 3),
+            "amostras": amostrador.amostras,
+            "pilhas_engine": sum(pilhas.values()),
+            "intervalo_ms": amostrador.intervalo * 1000,
+            "etapas": _resumo_timers(),
+            "top_proprio": [{"funcao": k, "fracao": round(v / total, 4)} for k, v in proprias.most_common(top)],
+            "top_inclusivo": [{"funcao": k, "fracao": round(v / total, 4)} for k, v in inclusivas.most_common(top)],
+            "alocacoes": _alocacoes(self._snap_ini, top) if self._memoria else None,
+            "arquivo_folded": base + ".folded",
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(res, f, ensure_ascii=False, indent=2)
+        return res
+
+
+def _texto_collapsed(pilhas: Counter) -> str:
+    return "".join(f"{p} {n}\n" for p, n in pilhas.most_common())
+
+
+def _alocacoes(snap_ini, top: int) -> List[Dict]:
+    """Top linhas do backend por bytes alocados (e ainda vivos) desde o início da sessão."""
+    import tracemalloc
+
+    filtro = [tracemalloc.Filter(True, os.path.join(_PACOTE, "*")), tracemalloc.Filter(False, _ESTE)]
+    snap = tracemalloc.take_snapshot().filter_traces(filtro)
+    diffs = snap.compare_to(snap_ini.filter_traces(filtro), "lineno")
+    out = []
+    for d in diffs[:top]:
+        fr = d.traceback[0]
+        out.append({
+            "local": f"{os.path.relpath(fr.filename, os.path.dirname(_PACOTE))}:{fr.lineno}",
+            "kb": round(d.size_diff / 1024, 1),
+            "blocos": d.count_diff,
+            "kb_total": round(d.size / 1024, 1),
+        })
+    return out
+
+
+perfil = Perfilador()
@@ -0,0 +1,98 @@
+# backend/ranking.py
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class RankingScores:
+    """
+    Ranking mantido de forma incremental (score desc).
+    - cada atualização reposiciona só a chave tocada (bisect), O(log n) + memmove
+    - empate no score mantém a ordem de chegada (igual ao sort estável antigo)
+    - a lista de saída é montada uma vez e reaproveitada até a próxima atualização
+    """
+
+    def __init__(self, campo: str):
+        self.campo = campo
+        self._ordem: List[Tuple[float, int, Hashable]] = []      # (-score, chegada, chave)
+        self._pos: Dict[Hashable, Tuple[float, int, Hashable]] = {}
+        self._linhas: Dict[Hashable, Dict] = {}
+        self._chegada = 0
+        self._saida: Optional[List[Dict]] = None
+        self.versao = 0          # sobe a cada mudança (quem replica o ranking só reescreve se mudou)
+
+    def __len__(self) -> int:
+        return len(self._ordem)
+
+    def limpar(self) -> None:
+        self._ordem.clear()
+        self._pos.clear()
+        self._linhas.clear()
+        self._chegada = 0
+        self._saida = None
+        self.versao += 1
+
+    def atualizar(
+        self,
+        chave: Hashable,
+        hits: int,
+        miss: int,
+        score: float,
+        rotulo: Optional[str] = None,
+    ) -> None:
+        """`rotulo` é o valor exibido no campo (default: a própria chave); só é usado na 1ª vez."""
+        score = round(score, 4)
+        antigo = self._pos.get(chave)
+        if antigo is not None:
+            i = bisect_left(self._ordem, antigo)
+            del self._ordem[i]
+            chegada = antigo[1]
+            rotulo = self._linhas[chave][self.campo]
+        else:
+            chegada = self._chegada
+            self._chegada += 1
+            if rotulo is None:
+                rotulo = chave
+
+        novo = (-score, chegada, chave)
+        insort(self._ordem, novo)
+        self._pos[chave] = novo
+        self._linhas[chave] = {self.campo: rotulo, "hits": hits, "miss": miss, "score": score}
+        self._saida = None
+        self.versao += 1
+
+    def remover(self, chave: Hashable) -> None:
+        antigo = self._pos.pop(chave, None)
+        if antigo is None:
+            return
+        del self._ordem[bisect_left(self._ordem, antigo)]
+        del self._linhas[chave]
+        self._saida = None
+        self.versao += 1
+
+    def itens(self) -> List[Tuple[Hashable, Any, int, int]]:
+        """(chave, rótulo, hits, miss) em ordem de chegada (base pra `reconstruir`)."""
+        campo = self.campo
+        return [(k, linha[campo], linha["hits"], linha["miss"]) for k, linha in self._linhas.items()]
+
+    @classmethod
+    def reconstruir(
+        cls, campo: str, itens: List[Tuple[Hashable, Any, int, int]], scores: Dict[Hashable, float]
+    ) -> RankingScores:
+        """Ranking novo com as mesmas chaves/rótulos/chegada e outros scores (troca de config)."""
+        novo = cls(campo)
+        for chave, rotulo, hits, miss in itens:
+            novo.atualizar(chave, hits, miss, scores[chave], rotulo=rotulo)
+        return novo
+
+    def ordem(self) -> List[Tuple[Hashable, float]]:
+        """(chave, score) em ordem de ranking."""
+        return [(k, -neg) for neg, _, k in self._ordem]
+
+    def top(self, n: Optional[int] = None) -> List[Dict]:
+        if self._saida is None:
+            self._saida = [self._linhas[k] for _, _, k in self._ordem]
+        if n is None:
+            return list(self._saida)
+        return self._saida[:max(0, n)]
@@ -0,0 +1,454 @@
+# backend/replica.py
+"""
+Réplicas de leitura em memória compartilhada.
+
+O processo escritor (API com /spin, VIPER_SHM=1) publica o estado compacto de
+cada mesa num segmento `multiprocessing.shared_memory` próprio:
+histórico (anel), contadores, scores por terminal e rankings.
+
+Processos leitores (backend/main_leitura.py) anexam os segmentos e respondem os
+GETs lendo direto do buffer (struct.unpack_from, sem cópia intermediária).
+
+Consistência por seqlock: o escritor deixa `seq` ímpar enquanto escreve e par
+quando termina; o leitor repete a leitura se `seq` estava ímpar ou mudou, por até
+LEITURA_MAX_S (escritor que morreu no meio deixa o seq ímpar: ReplicaIndisponivel).
+
+Escritor reiniciado cria um segmento novo com o mesmo nome (o velho é desligado e
+para de ser atualizado). O leitor confere a identidade do segmento a cada request
+(`atual`: inode em /dev/shm) e quem o usa reanexa quando ela muda.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import struct
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from backend.logic import MAX_HISTORY, STATUS, STATUS_ID, WHEEL_EU, cor_numero
+from backend.stats_store import MAX_PADROES, N_TERMINAIS
+
+if TYPE_CHECKING:
+    from backend.engine import MesaEngine
+
+SHM_ATIVO = os.getenv("VIPER_SHM", "") not in ("", "0")
+SHM_PREFIXO = os.getenv("VIPER_SHM_PREFIXO", "vv")
+
+STATS_CHAVES = ("spins", "entradas", "greens", "reds", "gales", "padroes")
+NOME_MAX = 32
+
+# POSIX shm no Linux: um arquivo por segmento (identidade = inode). Sem o diretório,
+# o leitor reanexa por tempo.
+DIR_SHM = "/dev/shm"
+REANEXAR_S = 1.0
+# prazo de uma leitura consistente (o escritor publica em µs; mais que isso = escritor travado/morto)
+LEITURA_MAX_S = 0.25
+
+# ==============================
+# LAYOUT
+# ==============================
+# seq, versao, boot, n_hist, pos_hist, n_padroes, stats[6]
+HEADER = struct.Struct("<QQ8sIII6Q")
+# tempo (s desde meia-noite), numero, terminal, status, padrao_id, scores t/p/c
+REG = struct.Struct("<IBBBhfff")
+
+_N_PAD = MAX_PADROES
+_N_COMB = N_TERMINAIS * MAX_PADROES
+
+OFF_HIST = HEADER.size
+OFF_NOMES = OFF_HIST + REG.size * MAX_HISTORY
+OFF_TERM = OFF_NOMES + NOME_MAX * _N_PAD                 # q[10][2]
+OFF_PAD = OFF_TERM + 8 * 2 * N_TERMINAIS                 # q[P][2]
+OFF_COMB = OFF_PAD + 8 * 2 * _N_PAD                      # q[10][P][2]
+OFF_SCORE_TERM = OFF_COMB + 8 * 2 * _N_COMB              # d[10]
+OFF_RANK_P = OFF_SCORE_TERM + 8 * N_TERMINAIS            # I n + (i, d)[P]
+OFF_RANK_C = OFF_RANK_P + 4 + 12 * _N_PAD                # I n + (i, d)[10*P]
+TAMANHO = OFF_RANK_C + 4 + 12 * _N_COMB
+
+RANK_ITEM = struct.Struct("<id")
+
+
+def nome_segmento(mesa: str) -> str:
+    import hashlib
+
+    # nomes de shm são curtos/limitados => hash do id da mesa
+    return f"{SHM_PREFIXO}_{hashlib.sha1(mesa.encode()).hexdigest()[:16]}"
+
+
+# ==============================
+# ESCRITOR
+# ==============================
+class _SegmentoEscrita:
+    def __init__(self, mesa: str, boot: str):
+        from multiprocessing import shared_memory   # só com VIPER_SHM ligado
+
+        nome = nome_segmento(mesa)
+        try:
+            self.shm = shared_memory.SharedMemory(name=nome, create=True, size=TAMANHO)
+        except FileExistsError:
+            # sobra de um escritor anterior: reaproveita o nome
+            velho = shared_memory.SharedMemory(name=nome)
+            velho.close()
+            velho.unlink()
+            self.shm = shared_memory.SharedMemory(name=nome, create=True, size=TAMANHO)
+        self.buf = self.shm.buf
+        self.boot = boot.encode()[:8]
+        self.spins_publicados = 0
+        self.n_hist = 0
+        self.pos_hist = 0
+        self.n_padroes = 0
+        self.versao_rank_p = -1
+        self.versao_rank_c = -1
+        self.buf[:HEADER.size] = bytes(HEADER.size)
+
+    def fechar(self) -> None:
+        self.buf = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _segundos_do_dia(hhmmss: str) -> int:
+    try:
+        h, m, s = hhmmss.split(":")
+        return int(h) * 3600 + int(m) * 60 + int(s)
+    except ValueError:
+        return 0
+
+
+class PublicadorReplicas:
+    """Lado escritor: um segmento por mesa, atualizado pelo worker após cada spin."""
+
+    def __init__(self):
+        self._segmentos: Dict[str, _SegmentoEscrita] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.fechar)
+
+    def _segmento(self, mesa_id: str, boot: str) -> _SegmentoEscrita:
+        seg = self._segmentos.get(mesa_id)
+        if seg is None:
+            with self._lock:
+                seg = self._segmentos.get(mesa_id)
+                if seg is None:
+                    seg = _SegmentoEscrita(mesa_id, boot)
+                    self._segmentos[mesa_id] = seg
+        return seg
+
+    def publicar(self, mesa: MesaEngine, boot: str) -> None:
+        seg = self._segmento(mesa.mesa_id, boot)
+        with mesa.lock:
+            buf = seg.buf
+            (seq,) = struct.unpack_from("<Q", buf, 0)
+            struct.pack_into("<Q", buf, 0, seq + 1)       # ímpar: escrevendo
+            try:
+                self._escrever(seg, mesa)
+            finally:
+                struct.pack_into("<Q", buf, 0, seq + 2)   # par: consistente
+
+    def reiniciar(self, mesa_id: str) -> None:
+        """Depois de um reset da mesa: a próxima publicação reescreve tudo."""
+        seg = self._segmentos.get(mesa_id)
+        if seg is not None:
+            seg.spins_publicados = seg.n_hist = seg.pos_hist = seg.n_padroes = 0
+            seg.versao_rank_p = seg.versao_rank_c = -1
+
+    def _escrever(self, seg: _SegmentoEscrita, mesa: MesaEngine) -> None:
+        buf = seg.buf
+        store = mesa.score_store
+        spins = mesa.stats["spins"]
+
+        # histórico: só os registros novos desde a última publicação
+        novos = min(spins - seg.spins_publicados, len(mesa.historico))
+        if novos:
+            hist = mesa.historico
+            for i in range(len(hist) - novos, len(hist)):
+                r = hist[i]
+                p = r["padroes"]
+                REG.pack_into(
+                    buf, OFF_HIST + REG.size * seg.pos_hist,
+                    _segundos_do_dia(r["time"]), r["numero"], r["terminal"],
+                    STATUS_ID.get(r["status"], 0), store.id_de(p) if p else -1,
+                    r["score_terminal"], r["score_padrao"], r["score_combinado"],
+                )
+                seg.pos_hist = (seg.pos_hist + 1) % MAX_HISTORY
+            seg.n_hist = min(MAX_HISTORY, seg.n_hist + novos)
+        seg.spins_publicados = spins
+
+        # nomes dos padrões internados (só os novos)
+        for pid in range(seg.n_padroes, len(store.padroes)):
+            nome = store.padroes[pid].encode()[:NOME_MAX]
+            buf[OFF_NOMES + NOME_MAX * pid:OFF_NOMES + NOME_MAX * (pid + 1)] = nome.ljust(NOME_MAX, b"\0")
+        seg.n_padroes = len(store.padroes)
+
+        # contadores: cópia direta dos arrays
+        buf[OFF_TERM:OFF_PAD] = memoryview(store.term).cast("B")
+        buf[OFF_PAD:OFF_COMB] = memoryview(store.pad).cast("B")
+        buf[OFF_COMB:OFF_SCORE_TERM] = memoryview(store.comb).cast("B")
+        struct.pack_into(f"<{N_TERMINAIS}d", buf, OFF_SCORE_TERM,
+                         *(mesa.calcular_score_terminal(t) for t in range(N_TERMINAIS)))
+
+        # rankings: só se mudaram
+        if mesa.ranking_padrao.versao != seg.versao_rank_p:
+            self._escrever_ranking(buf, OFF_RANK_P, mesa.ranking_padrao.ordem())
+            seg.versao_rank_p = mesa.ranking_padrao.versao
+        if mesa.ranking_terminal_padrao.versao != seg.versao_rank_c:
+            self._escrever_ranking(buf, OFF_RANK_C, mesa.ranking_terminal_padrao.ordem())
+            seg.versao_rank_c = mesa.ranking_terminal_padrao.versao
+
+        HEADER.pack_into(
+            buf, 0, struct.unpack_from("<Q", buf, 0)[0], mesa.versao, seg.boot,
+            seg.n_hist, seg.pos_hist, seg.n_padroes, *(mesa.stats[k] for k in STATS_CHAVES),
+        )
+
+    @staticmethod
+    def _escrever_ranking(buf, off: int, ordem) -> None:
+        struct.pack_into("<I", buf, off, len(ordem))
+        off += 4
+        for chave, score in ordem:
+            RANK_ITEM.pack_into(buf, off, chave, score)
+            off += RANK_ITEM.size
+
+    def fechar(self) -> None:
+        with self._lock:
+            for seg in self._segmentos.values():
+                seg.fechar()
+            self._segmentos.clear()
+
+
+publicador = PublicadorReplicas()
+
+
+# ==============================
+# LEITOR
+# ==============================
+T = TypeVar("T")
+
+
+def _identidade(nome: str) -> Optional[Tuple[int, int]]:
+    """(dev, inode) do segmento em /dev/shm; None se o nome não existe mais."""
+    try:
+        st = os.stat(os.path.join(DIR_SHM, nome))
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class ReplicaIndisponivel(RuntimeError):
+    """Segmento sem leitura consistente dentro do prazo (escritor morreu no meio de uma escrita)."""
+
+
+class LeitorReplica:
+    """Lado leitor: anexa o segmento da mesa e lê com seqlock."""
+
+    def __init__(self, mesa: str):
+        from multiprocessing import resource_tracker, shared_memory
+
+        self.mesa_id = mesa
+        self.nome = nome_segmento(mesa)
+        self.shm = shared_memory.SharedMemory(name=self.nome)
+        # o resource_tracker do leitor apagaria o segmento do escritor ao sair
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.buf = self.shm.buf
+        self.por_inode = os.path.isdir(DIR_SHM)
+        self.identidade = _identidade(self.nome) if self.por_inode else None
+        self.anexado_em = time.monotonic()
+
+    def atual(self) -> bool:
+        """
+        False se o segmento anexado não é mais o publicado com esse nome (escritor
+        reiniciou ou saiu): quem usa o leitor deve anexar de novo.
+        """
+        if self.por_inode:
+            return _identidade(self.nome) == self.identidade
+        return time.monotonic() - self.anexado_em < REANEXAR_S
+
+    def _ler(self, fn: Callable[[], T]) -> T:
+        """
+        Seqlock: repete enquanto o escritor está no meio (seq ímpar) ou mexeu durante a
+        leitura. Uma publicação leva µs; passou de LEITURA_MAX_S => ReplicaIndisponivel
+        (escritor morto com seq ímpar não trava o leitor).
+        """
+        buf = self.buf
+        prazo = None
+        while True:
+            (s1,) = struct.unpack_from("<Q", buf, 0)
+            if not s1 & 1:
+                try:
+                    out = fn()
+                except (IndexError, struct.error, UnicodeDecodeError):
+                    # leitura rasgada (escritor mexeu no meio): só vale se o seq mudou
+                    if struct.unpack_from("<Q", buf, 0)[0] == s1:
+                        raise
+                else:
+                    if struct.unpack_from("<Q", buf, 0)[0] == s1:
+                        return out
+            agora = time.monotonic()
+            if prazo is None:
+                prazo = agora + LEITURA_MAX_S
+            elif agora > prazo:
+                raise ReplicaIndisponivel(f"réplica da mesa {self.mesa_id!r} sem leitura consistente")
+            time.sleep(0)
+
+    def _header(self):
+        return HEADER.unpack_from(self.buf, 0)
+
+    @property
+    def versao(self) -> int:
+        return self._ler(lambda: self._header()[1])
+
+    @property
+    def boot(self) -> str:
+        return self._ler(lambda: self._header()[2]).decode(errors="replace")
+
+    def _nome(self, pid: int) -> str:
+        off = OFF_NOMES + NOME_MAX * pid
+        return bytes(self.buf[off:off + NOME_MAX]).rstrip(b"\0").decode(errors="replace")
+
+    # ------------------------------
+    # mesmos exports do MesaEngine (cada um = uma leitura consistente)
+    # ------------------------------
+    def get_stats(self) -> Dict:
+        return self._ler(self._stats)
+
+    def get_historico(self) -> List[Dict]:
+        """Histórico compacto (sem mensagem/debug)."""
+        return self._ler(self._historico)
+
+    def get_score_terminal(self) -> List[Dict]:
+        return self._ler(self._score_terminal)
+
+    def get_score_padrao(self, top: Optional[int] = None) -> List[Dict]:
+        return self._ler(lambda: self._score_padrao(top))
+
+    def get_score_terminal_padrao(self, top: Optional[int] = None) -> List[Dict]:
+        return self._ler(lambda: self._score_terminal_padrao(top))
+
+    def heatmap_terminal(self, window: int = 120) -> List[Dict]:
+        return self._ler(lambda: self._heatmap_terminal(window))
+
+    def heatmap_roda_eu(self, window: int = 120) -> List[Dict]:
+        return self._ler(lambda: self._heatmap_roda_eu(window))
+
+    def get_snapshot_painel(self) -> Dict:
+        """Mesmo payload do MesaEngine.get_snapshot_painel (histórico compacto), numa leitura só."""
+        def ler():
+            h = self._header()
+            historico = self._historico()
+            return {
+                "mesa": self.mesa_id,
+                "instancia": h[2].decode(errors="replace"),
+                "versao": h[1],
+                "stats": dict(zip(STATS_CHAVES, h[6:])),
+                "stats_painel": _stats_painel(historico),
+                "historico": historico,
+                "heatmap_terminal": self._heatmap_terminal(120),
+                "heatmap_roda": self._heatmap_roda_eu(120),
+                "scores_terminal": self._score_terminal(),
+                "scores_padrao": self._score_padrao(None),
+                "scores_terminal_padrao": self._score_terminal_padrao(None),
+            }
+        return self._ler(ler)
+
+    # ------------------------------
+    # leituras cruas (sem seqlock; só dentro de `_ler`)
+    # ------------------------------
+    def _stats(self) -> Dict:
+        return dict(zip(STATS_CHAVES, self._header()[6:]))
+
+    def _registros(self, window: Optional[int] = None) -> List[tuple]:
+        _, _, _, n, pos, _, *_ = self._header()
+        k = n if window is None else max(0, min(n, window))
+        inicio = (pos - k) % MAX_HISTORY
+        return [REG.unpack_from(self.buf, OFF_HIST + REG.size * ((inicio + i) % MAX_HISTORY)) for i in range(k)]
+
+    def _historico(self) -> List[Dict]:
+        out = []
+        for seg_dia, numero, term, status, pid, st, sp, sc in self._registros():
+            out.append({
+                "time": f"{seg_dia // 3600:02d}:{seg_dia // 60 % 60:02d}:{seg_dia % 60:02d}",
+                "numero": numero,
+                "cor": cor_numero(numero),
+                "terminal": term,
+                "status": STATUS[status],
+                "padroes": self._nome(pid) if pid >= 0 else None,
+                "score_terminal": round(st, 6),
+                "score_padrao": round(sp, 6),
+                "score_combinado": round(sc, 6),
+            })
+        return out
+
+    def _score_terminal(self) -> List[Dict]:
+        cont = struct.unpack_from(f"<{2 * N_TERMINAIS}q", self.buf, OFF_TERM)
+        scores = struct.unpack_from(f"<{N_TERMINAIS}d", self.buf, OFF_SCORE_TERM)
+        return [
+            {"terminal": t, "hits": cont[2 * t], "miss": cont[2 * t + 1], "score": round(scores[t], 4)}
+            for t in range(N_TERMINAIS)
+        ]
+
+    def _ranking(self, off: int, top: Optional[int]):
+        (n,) = struct.unpack_from("<I", self.buf, off)
+        if top is not None:
+            n = max(0, min(n, top))
+        return [RANK_ITEM.unpack_from(self.buf, off + 4 + RANK_ITEM.size * i) for i in range(n)]
+
+    def _score_padrao(self, top: Optional[int]) -> List[Dict]:
+        out = []
+        for pid, score in self._ranking(OFF_RANK_P, top):
+            hits, miss = struct.unpack_from("<2q", self.buf, OFF_PAD + 16 * pid)
+            out.append({"padrao": self._nome(pid), "hits": hits, "miss": miss, "score": round(score, 4)})
+        return out
+
+    def _score_terminal_padrao(self, top: Optional[int]) -> List[Dict]:
+        out = []
+        for chave, score in self._ranking(OFF_RANK_C, top):
+            t, pid = divmod(chave, MAX_PADROES)
+            hits, miss = struct.unpack_from("<2q", self.buf, OFF_COMB + 16 * chave)
+            out.append({
+                "terminal_padrao": f"{t}|{self._nome(pid)}",
+                "hits": hits, "miss": miss, "score": round(score, 4),
+            })
+        return out
+
+    def _heatmap_terminal(self, window: int) -> List[Dict]:
+        counts = [0] * N_TERMINAIS
+        for r in self._registros(window):
+            counts[r[2]] += 1
+        return [{"terminal": t, "count": counts[t], "window": window} for t in range(N_TERMINAIS)]
+
+    def _heatmap_roda_eu(self, window: int) -> List[Dict]:
+        counts = [0] * 37
+        for r in self._registros(window):
+            counts[r[1]] += 1
+        return [
+            {"wheel_index": idx, "numero": n, "count": counts[n], "window": window}
+            for idx, n in enumerate(WHEEL_EU)
+        ]
+
+    def fechar(self) -> None:
+        self.buf = None
+        self.shm.close()
+
+
+def _stats_painel(historico: List[Dict]) -> Dict[str, int]:
+    """Mesma conta do MesaEngine._stats_historico, sobre o histórico compacto."""
+    out = {"spins": len(historico), "entradas": 0, "greens": 0, "reds": 0,
+           "blacks": 0, "gales": 0, "padroes": 0}
+    for h in historico:
+        cor = h["cor"]
+        if cor == "GREEN":
+            out["greens"] += 1
+        elif cor == "RED":
+            out["reds"] += 1
+        elif cor == "BLACK":
+            out["blacks"] += 1
+        status = h["status"]
+        if status == "ENTRADA":
+            out["entradas"] += 1
+        elif status == "GALE":
+            out["gales"] += 1
+        if h["padroes"]:
+            out["padroes"] += 1
+    return out
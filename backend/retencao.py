@@ -0,0 +1,254 @@
+# backend/retencao.py
+"""
+Retenção em camadas por mesa.
+
+- quente: ring `historico` do MesaEngine (detalhe completo, MAX_HISTORY spins)
+- morna:  blocos de TAM_BLOCO spins comprimidos (zlib) — número, status, padrão, ts
+- agregados: por bloco, por hora e por dia (contagem por número/status,
+  hit/miss por terminal e por padrão), com validade limitada
+
+Consultas por janela somam agregados (O(buckets)): "heatmap dos últimos 10k spins"
+soma ~10 blocos (+ no máximo um bloco descomprimido pra fechar a conta exata);
+"score do padrão nas últimas 24h" soma 24-25 buckets de hora.
+"""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+import os
+import zlib
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from backend.logic import STATUS
+from backend.stats_store import MAX_PADROES, N_TERMINAIS
+
+TAM_BLOCO = int(os.getenv("VIPER_TAM_BLOCO", "1024"))            # spins por bloco morno
+MAX_BLOCOS = int(os.getenv("VIPER_MAX_BLOCOS", "1024"))          # ~1M spins mornos por mesa
+HORAS_RETIDAS = int(os.getenv("VIPER_HORAS_RETIDAS", "72"))
+DIAS_RETIDOS = int(os.getenv("VIPER_DIAS_RETIDOS", "90"))
+
+_N_NUMEROS = 37
+_N_STATUS = len(STATUS)
+
+
+class Agregado:
+    """Contadores de um bucket (bloco, hora ou dia)."""
+
+    __slots__ = ("inicio", "fim", "spins", "numeros", "status", "term", "pad")
+
+    def __init__(self, inicio: float = 0.0):
+        self.inicio = inicio
+        self.fim = inicio
+        self.spins = 0
+        self.numeros = array("q", bytes(8 * _N_NUMEROS))
+        self.status = array("q", bytes(8 * _N_STATUS))
+        self.term = array("q", bytes(8 * 2 * N_TERMINAIS))       # [t][hit, miss]
+        self.pad = array("q", bytes(8 * 2 * MAX_PADROES))        # [pid][hit, miss]
+
+    def spin(self, ts: float, numero: int, status: int) -> None:
+        self.fim = ts
+        self.spins += 1
+        self.numeros[numero] += 1
+        self.status[status] += 1
+
+    def resultado(self, t: int, pid: int, hit: bool) -> None:
+        k = 0 if hit else 1
+        self.term[2 * t + k] += 1
+        if pid >= 0:
+            self.pad[2 * pid + k] += 1
+
+    def somar_em(self, acc: "Agregado") -> None:
+        acc.spins += self.spins
+        for destino, origem in ((acc.numeros, self.numeros), (acc.status, self.status),
+                                (acc.term, self.term), (acc.pad, self.pad)):
+            for i, v in enumerate(origem):
+                if v:
+                    destino[i] += v
+        if not acc.inicio or self.inicio < acc.inicio:
+            acc.inicio = self.inicio
+        acc.fim = max(acc.fim, self.fim)
+
+    def terminais(self) -> List[int]:
+        out = [0] * N_TERMINAIS
+        for n, c in enumerate(self.numeros):
+            out[n % 10] += c
+        return out
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.numeros, self.status, self.term, self.pad))
+
+
+class BlocoMorno:
+    """TAM_BLOCO spins comprimidos + agregado do bloco."""
+
+    __slots__ = ("dados", "n", "agregado")
+
+    def __init__(self, dados: bytes, n: int, agregado: Agregado):
+        self.dados = dados
+        self.n = n
+        self.agregado = agregado
+
+    def spins(self) -> Tuple[array, array, array, array]:
+        """(numeros 'B', status 'B', padrao_id 'b', ts 'd')."""
+        raw = zlib.decompress(self.dados)
+        n = self.n
+        numeros, status, pids, ts = array("B"), array("B"), array("b"), array("d")
+        numeros.frombytes(raw[:n])
+        status.frombytes(raw[n:2 * n])
+        pids.frombytes(raw[2 * n:3 * n])
+        ts.frombytes(raw[3 * n:])
+        return numeros, status, pids, ts
+
+
+class RetencaoMesa:
+    def __init__(
+        self,
+        tam_bloco: int = TAM_BLOCO,
+        max_blocos: int = MAX_BLOCOS,
+        horas: int = HORAS_RETIDAS,
+        dias: int = DIAS_RETIDOS,
+    ):
+        self.tam_bloco = tam_bloco
+        self.horas = horas
+        self.dias = dias
+        self.blocos: Deque[BlocoMorno] = deque(maxlen=max_blocos)
+        self.por_hora: Dict[int, Agregado] = {}
+        self.por_dia: Dict[int, Agregado] = {}
+        self._novo_bloco()
+
+    def _novo_bloco(self) -> None:
+        self._numeros = array("B")
+        self._status = array("B")
+        self._pids = array("b")
+        self._ts = array("d")
+        self._agregado = Agregado()
+
+    def limpar(self) -> None:
+        self.blocos.clear()
+        self.por_hora.clear()
+        self.por_dia.clear()
+        self._novo_bloco()
+
+    # ------------------------------
+    # escrita
+    # ------------------------------
+    def _bucket(self, tabela: Dict[int, Agregado], chave: int, tamanho: int, retidos: int) -> Agregado:
+        ag = tabela.get(chave)
+        if ag is None:
+            ag = tabela[chave] = Agregado(float(chave * tamanho))
+            # novo bucket => hora de expirar os velhos (dict mantém ordem de criação)
+            limite = chave - retidos
+            for velho in [k for k in tabela if k <= limite]:
+                del tabela[velho]
+        return ag
+
+    def registrar_spin(self, ts: float, numero: int, status: int, pid: int) -> None:
+        if not self._ts:
+            self._agregado.inicio = ts
+        self._numeros.append(numero)
+        self._status.append(status)
+        self._pids.append(pid)
+        self._ts.append(ts)
+        self._agregado.spin(ts, numero, status)
+        self._bucket(self.por_hora, int(ts // 3600), 3600, self.horas).spin(ts, numero, status)
+        self._bucket(self.por_dia, int(ts // 86400), 86400, self.dias).spin(ts, numero, status)
+        if len(self._numeros) >= self.tam_bloco:
+            self._fechar_bloco()
+
+    def registrar_resultado(self, ts: float, t: int, pid: int, hit: bool) -> None:
+        self._agregado.resultado(t, pid, hit)
+        self._bucket(self.por_hora, int(ts // 3600), 3600, self.horas).resultado(t, pid, hit)
+        self._bucket(self.por_dia, int(ts // 86400), 86400, self.dias).resultado(t, pid, hit)
+
+    def _fechar_bloco(self) -> None:
+        n = len(self._numeros)
+        raw = self._numeros.tobytes() + self._status.tobytes() + self._pids.tobytes() + self._ts.tobytes()
+        self.blocos.append(BlocoMorno(zlib.compress(raw, 1), n, self._agregado))
+        self._novo_bloco()
+
+    # ------------------------------
+    # consultas
+    # ------------------------------
+    @property
+    def total_spins(self) -> int:
+        return len(self._numeros) + sum(b.n for b in self.blocos)
+
+    def ultimos_spins(self, n: int) -> Agregado:
+        """
+        Agregado exato dos últimos `n` spins retidos (spins/numeros/status).
+        Blocos inteiros entram pelo agregado; só o bloco da borda é aberto.
+        Hit/miss não é por spin: use `janela_tempo` pra scores.
+        """
+        acc = Agregado()
+        falta = n
+        aberto = len(self._numeros)
+        if falta <= aberto:
+            self._contar(acc, self._numeros[aberto - falta:], self._status[aberto - falta:], self._ts[aberto - falta:])
+            return acc
+        self._contar(acc, self._numeros, self._status, self._ts)
+        falta -= aberto
+        for bloco in reversed(self.blocos):
+            if falta <= 0:
+                break
+            if bloco.n <= falta:
+                ag = bloco.agregado
+                acc.spins += ag.spins
+                for i, v in enumerate(ag.numeros):
+                    acc.numeros[i] += v
+                for i, v in enumerate(ag.status):
+                    acc.status[i] += v
+                acc.inicio = ag.inicio
+                falta -= bloco.n
+            else:
+                numeros, status, _, ts = bloco.spins()
+                self._contar(acc, numeros[-falta:], status[-falta:], ts[-falta:])
+                falta = 0
+        return acc
+
+    @staticmethod
+    def _contar(acc: Agregado, numeros, status, ts) -> None:
+        if not numeros:
+            return
+        for x in numeros:
+            acc.numeros[x] += 1
+        for s in status:
+            acc.status[s] += 1
+        acc.spins += len(numeros)
+        acc.inicio = ts[0]
+        acc.fim = max(acc.fim, ts[-1])
+
+    def janela_tempo(self, segundos: float, agora: float) -> Agregado:
+        """Soma dos buckets de hora (ou de dia, se a janela passa da retenção horária)."""
+        acc = Agregado()
+        if segundos <= self.horas * 3600:
+            tabela, tamanho = self.por_hora, 3600
+        else:
+            tabela, tamanho = self.por_dia, 86400
+        desde = int((agora - segundos) // tamanho)
+        for chave, ag in tabela.items():
+            if chave >= desde:
+                ag.somar_em(acc)
+        return acc
+
+    def buckets(self, nivel: str = "hora", limite: Optional[int] = None) -> List[Tuple[int, Agregado]]:
+        tabela = self.por_hora if nivel == "hora" else self.por_dia
+        itens = sorted(tabela.items())
+        return itens[-limite:] if limite else itens
+
+    def spins_mornos(self) -> Iterator[Tuple[float, int, int, int]]:
+        """(ts, numero, status, padrao_id) de tudo que está retido, do mais antigo pro mais novo."""
+        for bloco in list(self.blocos):
+            numeros, status, pids, ts = bloco.spins()
+            yield from zip(ts, numeros, status, pids)
+        yield from zip(self._ts, self._numeros, self._status, self._pids)
+
+    def info(self) -> Dict:
+        return {
+            "spins_retidos": self.total_spins,
+            "blocos": len(self.blocos),
+            "max_blocos": self.blocos.maxlen,
+            "tam_bloco": self.tam_bloco,
+            "bytes_comprimidos": sum(len(b.dados) for b in self.blocos),
+            "buckets_hora": len(self.por_hora),
+            "buckets_dia": len(self.por_dia),
+        }
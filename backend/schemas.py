@@ -1,25 +1,181 @@
 # backend/schemas.py
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+"""
+Modelos da API (entrada e saída) e o caminho rápido do /spin.
 
+Entrada: SpinRequest, SinkRequest, SimulacaoRequest.
+Saída: SinalResponse (o dict que `pipeline.executar` monta em `ev.registro`) e
+SpinAviso (PENDENTE/DESCARTADO do ordenador). Os modelos de saída documentam o
+contrato (OpenAPI) e servem pra checagem em teste/dev; em produção o sinal NÃO é
+validado na saída: ele já sai da engine com os tipos certos.
 
+Caminho rápido do /spin (overhead do app por spin ~440 µs -> ~110 µs; ver bench_spin):
+- `ler_spin`: corpo decodificado com orjson e checado na mão no caso comum (tipos
+  exatos); qualquer coisa fora disso cai no `SpinRequest.model_validate_json`, que
+  dá os mesmos erros 422 da validação do FastAPI
+- `dumps`: sinal serializado direto (orjson, ~2 µs) em vez de
+  jsonable_encoder + json.dumps (~85 µs por sinal)
+
+orjson é opcional: sem ele, json da stdlib (mesma saída, só mais lento).
+"""
+from __future__ import annotations
+
+import json
+from typing import Annotated, Any, Dict, List, Literal, Optional
+
+from fastapi import Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
+
+from backend.logic import MODOS
+from backend.sequencia import SPIN_ID_MAX
+from backend.storage import MESA_ID_PADRAO, MESA_PADRAO, mesa_id_valido
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+Modo = Literal["conservador", "normal", "agressivo"]
+Status = Literal["ANALISE", "ENTRADA", "GREEN", "GALE", "RED"]
+# `?mesa=` das rotas: o id vira nome de arquivo (storage), então só [A-Za-z0-9_-]{1,64}
+MesaId = Annotated[str, Query(pattern=MESA_ID_PADRAO)]
+
+
+# ==============================
+# ENTRADA
+# ==============================
 class SpinRequest(BaseModel):
-    numero: int = Field(ge=0, le=36)
-    modo: str = Field(default="conservador")  # conservador | agressivo
-    source: str = Field(default="manual")     # manual | auto
+    numero: int = Field(..., ge=0, le=36)
+    modo: Modo = "agressivo"
+    source: Optional[str] = "manual"
+    mesa: str = Field(MESA_PADRAO, pattern=MESA_ID_PADRAO)
+    # opcionais: tornam o /spin idempotente e ordenado (retries do scraper)
+    seq: Optional[int] = Field(None, ge=0)
+    spin_id: Optional[str] = Field(None, min_length=1, max_length=SPIN_ID_MAX)
+
+
+class SinkRequest(BaseModel):
+    spec: str = Field(..., min_length=3)          # webhook:http://... | jsonl:/caminho | socket:host:porta
+    nome: Optional[str] = Field(None, min_length=1, max_length=128)
+    tipos: Optional[List[Literal["ENTRADA", "GREEN", "RED"]]] = None
+    mesas: Optional[List[str]] = None
+    lote_max: int = Field(50, ge=1, le=1000)
+    lote_ms: float = Field(50.0, ge=0, le=10000)
+    taxa: float = Field(5.0, ge=0)                # envios/s (0 = sem limite)
+    rajada: float = Field(10.0, ge=1)
+    tentativas: int = Field(5, ge=1, le=20)
+
+
+class SimulacaoRequest(BaseModel):
+    mesa: str = Field(MESA_PADRAO, pattern=MESA_ID_PADRAO)
+    taxa: float = Field(5.0, gt=0, le=5000)          # spins/s
+    seed: Optional[int] = None
+    distribuicao: Literal["uniforme", "setor", "pesos"] = "uniforme"
+    setor: Literal["voisins", "tiers", "orphelins"] = "voisins"
+    vies: float = Field(1.5, gt=0)
+    pesos: Optional[List[float]] = None
+    modo: Modo = "agressivo"
+    total: Optional[int] = Field(None, gt=0)
+
 
+# ==============================
+# SAÍDA
+# ==============================
+class EntradaSinal(BaseModel):
+    id: int                                       # id no livro de entradas da mesa
+    estrategia: str
+    terminal_previsto: int
+    numeros_terminal: List[int]
+    numeros_alvo: List[int]
+    gale_max: int
+    padrao: str
 
-class SignalResponse(BaseModel):
+
+class SinalResponse(BaseModel):
     time: str
     source: str
     numero: int
     cor: str
     terminal: int
-    status: str
-    padroes: List[str] = []
+    status: Status
+    padroes: Optional[str] = None                 # padrão detectado / da entrada aberta
     score_terminal: float = 0.0
     score_padrao: float = 0.0
     score_combinado: float = 0.0
-    numeros_analise: List[int] = []  # apenas “conjunto de observação”
-    mensagem: Optional[str] = None
+    grupo_terminal: List[int]
+    vizinhos_roda: List[int]
+    mensagem: str = ""
+    entrada: Optional[EntradaSinal] = None        # só no spin que libera a ENTRADA
+    vies: Optional[Dict[str, Any]] = None         # {"testes": [...], "cusum": [...]} quando dispara
     debug: Dict[str, Any] = {}
+
+
+class SpinAviso(BaseModel):
+    """Resposta do ordenador quando o spin não foi processado agora (202 PENDENTE / 409 DESCARTADO)."""
+    status: Literal["PENDENTE", "DESCARTADO"]
+    seq: int
+    mensagem: str
+
+
+# documentação das respostas do /spin (o endpoint devolve bytes prontos, sem response_model)
+RESPOSTAS_SPIN: Dict[int, Dict[str, Any]] = {
+    200: {"model": SinalResponse, "description": "Sinal do spin"},
+    202: {"model": SpinAviso, "description": "Spin adiantado aguardando a lacuna de seq fechar"},
+    409: {"model": SpinAviso, "description": "Seq atrasado (lacuna já pulada)"},
+}
+CORPO_SPIN: Dict[str, Any] = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": SpinRequest.model_json_schema()}},
+    }
+}
+
+
+# ==============================
+# CAMINHO RÁPIDO
+# ==============================
+_CAMPOS_SPIN = frozenset(SpinRequest.model_fields)
+
+
+def ler_spin(corpo: bytes) -> SpinRequest:
+    """
+    Corpo do POST /spin -> SpinRequest. Caso comum (tipos exatos, campos conhecidos)
+    checado na mão; o resto vai pro pydantic. Erro => RequestValidationError (422).
+    """
+    try:
+        d = orjson.loads(corpo) if orjson is not None else json.loads(corpo)
+    except ValueError:
+        d = None
+    if type(d) is dict and d.keys() <= _CAMPOS_SPIN:
+        numero = d.get("numero")
+        modo = d.get("modo", "agressivo")
+        source = d.get("source", "manual")
+        mesa = d.get("mesa", MESA_PADRAO)
+        seq = d.get("seq")
+        spin_id = d.get("spin_id")
+        if (
+            type(numero) is int and 0 <= numero <= 36
+            and modo in MODOS
+            and (source is None or type(source) is str)
+            and mesa_id_valido(mesa)
+            and (seq is None or (type(seq) is int and seq >= 0))
+            and (spin_id is None or (type(spin_id) is str and 1 <= len(spin_id) <= SPIN_ID_MAX))
+        ):
+            return SpinRequest.model_construct(
+                numero=numero, modo=modo, source=source, mesa=mesa, seq=seq, spin_id=spin_id
+            )
+    try:
+        return SpinRequest.model_validate_json(corpo)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)], body=corpo
+        )
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+else:  # pragma: no cover - depende do ambiente
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
@@ -1,56 +1,35 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
-from collections import deque
-
-# Mapa simples de cores da roleta europeia
-RED = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
-BLACK = {2,4,6,8,10,11,13,15,17,20,22,24,26,28,29,31,33,35}
-
-def cor(n: int) -> str:
-    if n == 0:
-        return "green"
-    return "red" if n in RED else "black"
-
-def paridade(n: int) -> str:
-    if n == 0:
-        return "zero"
-    return "par" if (n % 2 == 0) else "impar"
-
-def alto_baixo(n: int) -> str:
-    if n == 0:
-        return "zero"
-    return "alto" if n >= 19 else "baixo"
-
-def duzia(n: int) -> str:
-    if n == 0:
-        return "zero"
-    if 1 <= n <= 12:
-        return "d1"
-    if 13 <= n <= 24:
-        return "d2"
-    return "d3"
-
-def coluna(n: int) -> str:
-    if n == 0:
-        return "zero"
-    r = n % 3
-    if r == 1:
-        return "c1"
-    if r == 2:
-        return "c2"
-    return "c3"
+from typing import Any, Dict, Optional, Sequence
+
+from backend.features import F_ALTURA, F_COLUNA, F_COR, F_DIRECAO, F_DUZIA, F_PARIDADE, F_SETOR
+
+# rótulos deste scorer por id de feature (features vêm prontas do FeatureStore da mesa)
+_ROTULOS = {
+    "cor": (F_COR, ("red", "black", "green")),
+    "paridade": (F_PARIDADE, ("par", "impar", "zero")),
+    "duzia": (F_DUZIA, ("zero", "d1", "d2", "d3")),
+    "coluna": (F_COLUNA, ("zero", "c1", "c2", "c3")),
+    "altura": (F_ALTURA, ("zero", "baixo", "alto")),
+    "setor": (F_SETOR, ("voisins", "tiers", "orphelins")),
+    "direcao": (F_DIRECAO, ("mesmo", "horario", "anti_horario")),
+}
+# chave da tendência -> feature
+_TENDENCIAS = (("t_cor", "cor"), ("t_par", "paridade"), ("t_duzia", "duzia"),
+               ("t_coluna", "coluna"), ("t_altura", "altura"), ("t_setor", "setor"), ("t_direcao", "direcao"))
+
 
 @dataclass
 class AssocStats:
     hit: int = 0
     total: int = 0
 
+
 class ScoreMercadoEngine:
     """
     Ideia:
-    - Observa o 'mercado' (últimos spins) e extrai features:
-      cor, paridade, duzia, coluna, alto/baixo.
+    - Lê o 'mercado' (últimos spins) do FeatureStore da mesa:
+      cor, paridade, duzia, coluna, alto/baixo, setor da roda e direção do salto.
     - Quando um padrão "paga" (GREEN), registra quais features estavam presentes,
       criando co-ocorrência: padrão X costuma pagar quando mercado mostra (ex.: red+par+d2).
     - Na hora de liberar entrada, calcula score 0..100 baseado na compatibilidade
@@ -58,53 +37,27 @@ class ScoreMercadoEngine:
     """
 
     def __init__(self, janela_mercado: int = 12):
-        self.historico = deque(maxlen=2000)
         self.janela_mercado = janela_mercado
 
         # assocs[padrao][feature_value] -> AssocStats
         self.assocs: Dict[str, Dict[str, AssocStats]] = {}
 
-    def observar_spin(self, numero: int) -> None:
-        self.historico.append(numero)
+    def _features_de_numero(self, linha: Sequence[int]) -> Dict[str, str]:
+        """Rótulos das features do número (linha do FeatureStore)."""
+        return {nome: rot[linha[c]] for nome, (c, rot) in _ROTULOS.items() if linha[c] >= 0}
 
-    def _features_de_numero(self, n: int) -> Dict[str, str]:
-        return {
-            "cor": cor(n),
-            "paridade": paridade(n),
-            "duzia": duzia(n),
-            "coluna": coluna(n),
-            "altura": alto_baixo(n),
-        }
-
-    def _snapshot_mercado(self) -> Dict[str, Any]:
-        ult = list(self.historico)[-self.janela_mercado:]
-        if not ult:
-            return {"ultimos": []}
-
-        feats = [self._features_de_numero(n) for n in ult]
-        # simples: "tendência" = moda por feature
-        def moda(chave: str) -> str:
-            freq: Dict[str, int] = {}
-            for f in feats:
-                v = f[chave]
-                freq[v] = freq.get(v, 0) + 1
-            return sorted(freq.items(), key=lambda x: x[1], reverse=True)[0][0]
-
-        return {
-            "ultimos": ult,
-            "t_cor": moda("cor"),
-            "t_par": moda("paridade"),
-            "t_duzia": moda("duzia"),
-            "t_coluna": moda("coluna"),
-            "t_altura": moda("altura"),
-        }
+    def _snapshot_mercado(self, modas: Optional[Dict[int, int]]) -> Dict[str, Any]:
+        """Tendência = moda por feature na janela (`modas` = FeatureStore.modas(janela_mercado))."""
+        if not modas:
+            return {}
+        return {chave: _ROTULOS[nome][1][modas[_ROTULOS[nome][0]]] for chave, nome in _TENDENCIAS}
 
-    def registrar_pagamento(self, padrao: str, numero_que_pagou: int) -> None:
+    def registrar_pagamento(self, padrao: str, linha_pagou: Sequence[int], modas: Optional[Dict[int, int]]) -> None:
         if padrao not in self.assocs:
             self.assocs[padrao] = {}
 
-        snap = self._snapshot_mercado()
-        feats_num = self._features_de_numero(numero_que_pagou)
+        snap = self._snapshot_mercado(modas)
+        feats_num = self._features_de_numero(linha_pagou)
 
         # Co-ocorrência: junta tendência do mercado + features do número que pagou
         lista_features = [
@@ -113,11 +66,14 @@ class ScoreMercadoEngine:
             f"t_duzia={snap.get('t_duzia')}",
             f"t_coluna={snap.get('t_coluna')}",
             f"t_altura={snap.get('t_altura')}",
+            f"t_setor={snap.get('t_setor')}",
+            f"t_direcao={snap.get('t_direcao')}",
             f"hit_cor={feats_num['cor']}",
             f"hit_par={feats_num['paridade']}",
             f"hit_duzia={feats_num['duzia']}",
             f"hit_coluna={feats_num['coluna']}",
             f"hit_altura={feats_num['altura']}",
+            f"hit_setor={feats_num['setor']}",
         ]
 
         for key in lista_features:
@@ -129,17 +85,20 @@ class ScoreMercadoEngine:
         for k in list(self.assocs[padrao].keys()):
             self.assocs[padrao][k].total += 1
 
-    def score(self, padrao: str) -> float:
-        if len(self.historico) < self.janela_mercado:
+    def score(self, padrao: str, modas: Optional[Dict[int, int]], spins: int) -> float:
+        """`modas`/`spins` vêm do FeatureStore da mesa (nada é recontado aqui)."""
+        if spins < self.janela_mercado:
             return 0.0
 
-        snap = self._snapshot_mercado()
+        snap = self._snapshot_mercado(modas)
         atual = {
             f"t_cor={snap.get('t_cor')}",
             f"t_par={snap.get('t_par')}",
             f"t_duzia={snap.get('t_duzia')}",
             f"t_coluna={snap.get('t_coluna')}",
             f"t_altura={snap.get('t_altura')}",
+            f"t_setor={snap.get('t_setor')}",
+            f"t_direcao={snap.get('t_direcao')}",
         }
 
         data = self.assocs.get(padrao)
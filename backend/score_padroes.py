@@ -1,51 +1,45 @@
 from collections import defaultdict, deque
 
+from backend.features import F_COLUNA, F_COR, F_DUZIA, F_NUMERO, F_PARIDADE, F_SETOR
+
+# rótulos por id de feature (linha do FeatureStore da mesa)
+_COR = ("vermelho", "preto")
+_PARIDADE = ("par", "impar")
+_DUZIA = (None, "duzia1", "duzia2", "duzia3")
+_COLUNA = (None, "coluna1", "coluna2", "coluna3")
+_SETOR = ("voisins", "tiers", "orphelins")
+
+
+def _placar():
+    return {"green": 0, "red": 0}
+
+
 class ScorePadroesEngine:
     def __init__(self, max_hist=500):
         self.historico = deque(maxlen=max_hist)
-        self.combinacoes = defaultdict(lambda: {"green": 0, "red": 0})
+        self.combinacoes = defaultdict(_placar)      # função de módulo: a mesa hibernada vai pro disco em pickle
 
     # ==========================
     # EXTRAIR PADRÕES DO NÚMERO
     # ==========================
-    def extrair(self, n: int):
-        if n == 0:
+    def extrair(self, linha):
+        """Rótulos a partir da linha de features do número (nada é recalculado aqui)."""
+        if linha[F_NUMERO] == 0:
             return ["zero"]
 
-        padroes = []
-
-        # cor
-        vermelhos = {
-            1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36
-        }
-        padroes.append("vermelho" if n in vermelhos else "preto")
-
-        # par/impar
-        padroes.append("par" if n % 2 == 0 else "impar")
-
-        # dúzia
-        if n <= 12:
-            padroes.append("duzia1")
-        elif n <= 24:
-            padroes.append("duzia2")
-        else:
-            padroes.append("duzia3")
-
-        # coluna
-        if n % 3 == 1:
-            padroes.append("coluna1")
-        elif n % 3 == 2:
-            padroes.append("coluna2")
-        else:
-            padroes.append("coluna3")
-
-        return padroes
+        return [
+            _COR[linha[F_COR]],
+            _PARIDADE[linha[F_PARIDADE]],
+            _DUZIA[linha[F_DUZIA]],
+            _COLUNA[linha[F_COLUNA]],
+            _SETOR[linha[F_SETOR]],
+        ]
 
     # ==========================
     # REGISTRAR RESULTADO
     # ==========================
-    def registrar(self, numero: int, green: bool):
-        padroes = self.extrair(numero)
+    def registrar(self, linha, green: bool):
+        padroes = self.extrair(linha)
         self.historico.append(padroes)
 
         # todas combinações 2 a 2
@@ -60,8 +54,8 @@ class ScorePadroesEngine:
     # ==========================
     # SCORE DE MERCADO
     # ==========================
-    def score(self, numero: int):
-        padroes = self.extrair(numero)
+    def score(self, linha):
+        padroes = self.extrair(linha)
         scores = []
 
         for i in range(len(padroes)):
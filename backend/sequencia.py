@@ -0,0 +1,154 @@
+# backend/sequencia.py
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+JANELA_DEDUP = 1024          # quantos sinais recentes ficam guardados pra retry
+JANELA_REORDENACAO = 64      # máx. spins adiantados esperando a lacuna fechar
+ESPERA_MAX_S = 2.0           # tempo máx. esperando um seq que faltou
+SPIN_ID_MAX = 128            # spin_id vira chave da janela de dedup
+
+Processar = Callable[..., Dict]
+
+
+class OrdenadorSpins:
+    """
+    Ingestão idempotente e ordenada de uma mesa.
+    - `spin_id` (ou `seq`) já visto => devolve o sinal guardado, não reprocessa
+    - `seq` adiantado => fica pendente até a lacuna fechar (ou estourar espera/janela,
+      aí a lacuna é pulada e os pendentes são processados em ordem)
+    - sem `seq`/`spin_id` => comportamento antigo (processa na hora)
+    - `expirar`: pula as lacunas vencidas sem esperar o próximo spin (a mesa chama
+      por timer em `prazo()`, senão um seq perdido no fim da rajada segura os pendentes)
+    """
+
+    def __init__(
+        self,
+        janela_dedup: int = JANELA_DEDUP,
+        janela_reordenacao: int = JANELA_REORDENACAO,
+        espera_max: float = ESPERA_MAX_S,
+    ):
+        self.janela_dedup = janela_dedup
+        self.janela_reordenacao = janela_reordenacao
+        self.espera_max = espera_max
+
+        self.vistos: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self.pendentes: Dict[int, Tuple[Optional[Hashable], Tuple[Any, ...], float]] = {}
+        self.proximo_seq: Optional[int] = None
+
+        self.duplicados = 0
+        self.reordenados = 0
+        self.atrasados = 0
+        self.lacunas_puladas = 0
+
+    def limpar(self) -> None:
+        self.vistos.clear()
+        self.pendentes.clear()
+        self.proximo_seq = None
+
+    @staticmethod
+    def _chave(seq: Optional[int], spin_id: Optional[str]) -> Optional[Hashable]:
+        if spin_id is not None:
+            return spin_id
+        if seq is not None:
+            return ("seq", seq)
+        return None
+
+    def _lembrar(self, chave: Optional[Hashable], sinal: Dict) -> None:
+        if chave is None:
+            return
+        self.vistos[chave] = sinal
+        if len(self.vistos) > self.janela_dedup:
+            self.vistos.popitem(last=False)
+
+    def _drenar(self, processar: Processar) -> None:
+        while self.proximo_seq in self.pendentes:
+            chave, args, _ = self.pendentes.pop(self.proximo_seq)
+            self._lembrar(chave, processar(*args))
+            self.proximo_seq += 1
+
+    def _pular_lacunas(self, processar: Processar, agora: float) -> None:
+        while self.pendentes:
+            mais_antigo = min(chegada for _, _, chegada in self.pendentes.values())
+            if len(self.pendentes) <= self.janela_reordenacao and agora - mais_antigo < self.espera_max:
+                return
+            menor = min(self.pendentes)
+            self.lacunas_puladas += menor - self.proximo_seq
+            self.proximo_seq = menor
+            self._drenar(processar)
+
+    def prazo(self) -> Optional[float]:
+        """Quando o pendente mais antigo vence (mesmo relógio de `agora`); None sem pendentes."""
+        if not self.pendentes:
+            return None
+        return min(chegada for _, _, chegada in self.pendentes.values()) + self.espera_max
+
+    def expirar(self, processar: Processar, agora: float) -> int:
+        """Processa os pendentes cuja espera venceu; devolve quantos saíram."""
+        antes = len(self.pendentes)
+        self._pular_lacunas(processar, agora)
+        return antes - len(self.pendentes)
+
+    def receber(
+        self,
+        processar: Processar,
+        args: Tuple[Any, ...],
+        seq: Optional[int],
+        spin_id: Optional[str],
+        agora: float,
+    ) -> Dict:
+        chave = self._chave(seq, spin_id)
+        if chave is not None and chave in self.vistos:
+            self.duplicados += 1
+            return self.vistos[chave]
+
+        if seq is None:
+            sinal = processar(*args)
+            self._lembrar(chave, sinal)
+            return sinal
+
+        if self.proximo_seq is None:
+            self.proximo_seq = seq
+
+        if seq < self.proximo_seq:
+            # lacuna já pulada / fora da janela de dedup: não dá pra encaixar mais
+            self.atrasados += 1
+            return {
+                "status": "DESCARTADO",
+                "seq": seq,
+                "mensagem": f"Seq {seq} chegou atrasado (próximo esperado: {self.proximo_seq})",
+            }
+
+        if seq > self.proximo_seq:
+            if seq in self.pendentes:
+                self.duplicados += 1
+            else:
+                self.pendentes[seq] = (chave, args, agora)
+                self.reordenados += 1
+                self._pular_lacunas(processar, agora)
+                if chave is not None and chave in self.vistos:
+                    return self.vistos[chave]
+            return {
+                "status": "PENDENTE",
+                "seq": seq,
+                "mensagem": f"Aguardando seq {self.proximo_seq} (spin fora de ordem)",
+            }
+
+        sinal = processar(*args)
+        self._lembrar(chave, sinal)
+        self.proximo_seq = seq + 1
+        self._drenar(processar)
+        self._pular_lacunas(processar, agora)
+        return sinal
+
+    def info(self) -> Dict:
+        return {
+            "proximo_seq": self.proximo_seq,
+            "pendentes": len(self.pendentes),
+            "janela_dedup": len(self.vistos),
+            "duplicados": self.duplicados,
+            "reordenados": self.reordenados,
+            "atrasados": self.atrasados,
+            "lacunas_puladas": self.lacunas_puladas,
+        }
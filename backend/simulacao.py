@@ -0,0 +1,130 @@
+# backend/simulacao.py
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass, field
+from itertools import accumulate
+import random
+from typing import Dict, List, Optional
+
+from backend.logic import SETORES
+from backend.mesas import receber_sem_bloquear
+
+TICK_S = 0.01          # granularidade do agendador
+LOTE_MAX = 200         # máx. spins por tick (se atrasar mais que isso, não tenta "recuperar")
+
+DISTRIBUICOES = ("uniforme", "setor", "pesos")
+
+
+@dataclass
+class ConfigSimulacao:
+    mesa: str = "default"
+    taxa: float = 5.0                    # spins por segundo
+    seed: Optional[int] = None
+    distribuicao: str = "uniforme"       # uniforme | setor | pesos
+    setor: str = "voisins"               # distribuicao="setor": voisins | tiers | orphelins
+    vies: float = 1.5                    # peso dos números do setor (1.0 = sem viés)
+    pesos: Optional[List[float]] = None  # distribuicao="pesos": 37 pesos (0..36)
+    modo: str = "agressivo"
+    total: Optional[int] = None          # None = roda até parar
+
+    def pesos_acumulados(self) -> Optional[List[float]]:
+        if self.distribuicao == "uniforme":
+            return None
+        if self.distribuicao == "setor":
+            nums = SETORES[self.setor]
+            pesos = [self.vies if n in nums else 1.0 for n in range(37)]
+        else:
+            if not self.pesos or len(self.pesos) != 37:
+                raise ValueError("distribuicao 'pesos' precisa de 37 pesos (0..36)")
+            pesos = list(self.pesos)
+        return list(accumulate(pesos))
+
+
+@dataclass
+class Simulacao:
+    config: ConfigSimulacao
+    spins: int = 0
+    ativa: bool = False
+    erro: Optional[str] = None
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    async def _rodar(self) -> None:
+        cfg = self.config
+        rng = random.Random(cfg.seed)
+        acumulados = cfg.pesos_acumulados()
+        populacao = range(37)
+        loop = asyncio.get_running_loop()
+
+        def sortear() -> int:
+            if acumulados is None:
+                return rng.randrange(37)
+            return rng.choices(populacao, cum_weights=acumulados)[0]
+
+        inicio = loop.time()
+        feitos = 0
+        try:
+            while cfg.total is None or self.spins < cfg.total:
+                devidos = int((loop.time() - inicio) * cfg.taxa) - feitos
+                if devidos > LOTE_MAX:
+                    # ficou pra trás: descarta o atraso em vez de rajada infinita
+                    feitos += devidos - LOTE_MAX
+                    devidos = LOTE_MAX
+                for _ in range(devidos):
+                    # como o /spin: mesa fria ou lock ocupado não seguram o event loop
+                    await receber_sem_bloquear(cfg.mesa, sortear(), cfg.modo, source="auto")
+                    feitos += 1
+                    self.spins += 1
+                    if cfg.total is not None and self.spins >= cfg.total:
+                        break
+                await asyncio.sleep(min(TICK_S, 1.0 / cfg.taxa))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.erro = repr(e)
+        finally:
+            self.ativa = False
+
+    def info(self) -> Dict:
+        d = asdict(self.config)
+        d.update({"ativa": self.ativa, "spins": self.spins, "erro": self.erro})
+        return d
+
+
+class GerenciadorSimulacoes:
+    """Uma simulação (asyncio task) por mesa, independente de quem está olhando."""
+
+    def __init__(self):
+        self._sims: Dict[str, Simulacao] = {}
+
+    def iniciar(self, cfg: ConfigSimulacao) -> Simulacao:
+        if cfg.taxa <= 0:
+            raise ValueError("taxa precisa ser > 0")
+        if cfg.distribuicao not in DISTRIBUICOES:
+            raise ValueError(f"distribuicao deve ser uma de {DISTRIBUICOES}")
+        if cfg.distribuicao == "setor" and cfg.setor not in SETORES:
+            raise ValueError(f"setor deve ser um de {tuple(SETORES)}")
+        cfg.pesos_acumulados()   # valida pesos antes de subir a task
+
+        self.parar(cfg.mesa)
+        sim = Simulacao(config=cfg, ativa=True)
+        sim._task = asyncio.get_running_loop().create_task(sim._rodar())
+        self._sims[cfg.mesa] = sim
+        return sim
+
+    def parar(self, mesa: str) -> bool:
+        sim = self._sims.get(mesa)
+        if sim is None or sim._task is None or sim._task.done():
+            return False
+        sim._task.cancel()
+        return True
+
+    def parar_todas(self) -> None:
+        for mesa in list(self._sims):
+            self.parar(mesa)
+
+    def info(self, mesa: Optional[str] = None) -> List[Dict]:
+        return [s.info() for m, s in self._sims.items() if mesa is None or m == mesa]
+
+
+simulacoes = GerenciadorSimulacoes()
@@ -0,0 +1,180 @@
+# backend/stats_store.py
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Tuple
+
+# Padrões que os detectores conseguem emitir hoje.
+# Ficam internados de saída => ids estáveis entre mesas/processos.
+PADROES_CONHECIDOS: List[str] = ["repeticao_terminal"] + [
+    f"escadinha_p{passo}_{direcao}"
+    for passo in range(2, 10)
+    for direcao in ("up", "down")
+]
+
+MAX_PADROES = 64        # capacidade fixa por mesa (memória previsível)
+N_TERMINAIS = 10
+
+HIT = 0
+MISS = 1
+
+
+class StatsStore:
+    """
+    Contadores hit/miss em arrays densos de inteiros:
+    - terminal:          [terminal, hit/miss]
+    - padrão:            [padrao_id, hit/miss]
+    - terminal x padrão: [terminal, padrao_id, hit/miss]
+
+    Padrões viram ids (internados); `padroes[id]` é o mapa reverso pra API e os
+    rótulos "terminal|padrão" do ranking saem prontos na internação (a resolução
+    de entrada não monta string).
+    Leitura nunca cria entrada nova (id desconhecido => 0/0).
+
+    Com `meia_vida > 0` mantém também contadores decaídos (float) por célula:
+    o decaimento é aplicado de forma preguiçosa (só na escrita da célula e na
+    leitura), usando o `tick` (nº do spin) da última atualização.
+    """
+
+    def __init__(self, max_padroes: int = MAX_PADROES, meia_vida: float = 0):
+        self.max_padroes = max_padroes
+        self.meia_vida = float(meia_vida)
+        self.padrao_id: Dict[str, int] = {}
+        self.padroes: List[str] = []
+        self.rotulos: List[Tuple[str, ...]] = []    # [pid][terminal] -> "terminal|padrão"
+        self.descartados = 0   # resultados de padrões além da capacidade
+
+        self.term = array("q", bytes(8 * N_TERMINAIS * 2))
+        self.pad = array("q", bytes(8 * max_padroes * 2))
+        self.comb = array("q", bytes(8 * N_TERMINAIS * max_padroes * 2))
+
+        # decaídos: mesmo layout em float + tick da última escrita por célula
+        self.dterm = self.dpad = self.dcomb = None
+        self.tterm = self.tpad = self.tcomb = None
+        if self.meia_vida > 0:
+            self._criar_decaidos(0)
+
+        for p in PADROES_CONHECIDOS:
+            self.internar(p)
+
+    def _criar_decaidos(self, tick: int) -> None:
+        """Decaídos partem das contagens brutas atuais, como se escritos em `tick`."""
+        self.dterm = array("d", self.term)
+        self.dpad = array("d", self.pad)
+        self.dcomb = array("d", self.comb)
+        self.tterm = array("q", [tick]) * (len(self.term) // 2)
+        self.tpad = array("q", [tick]) * (len(self.pad) // 2)
+        self.tcomb = array("q", [tick]) * (len(self.comb) // 2)
+
+    def definir_meia_vida(self, meia_vida: float, tick: int) -> None:
+        """Troca a meia-vida em execução (reload de config) sem perder contagens."""
+        meia_vida = float(meia_vida)
+        if meia_vida <= 0:
+            self.dterm = self.dpad = self.dcomb = None
+            self.tterm = self.tpad = self.tcomb = None
+        elif self.dterm is None:
+            self._criar_decaidos(tick)
+        self.meia_vida = meia_vida
+
+    # ------------------------------
+    # ids
+    # ------------------------------
+    def internar(self, padrao: str) -> int:
+        """Id do padrão (cria se ainda houver espaço). -1 se a tabela está cheia."""
+        pid = self.padrao_id.get(padrao)
+        if pid is not None:
+            return pid
+        if len(self.padroes) >= self.max_padroes:
+            return -1
+        pid = len(self.padroes)
+        self.padrao_id[padrao] = pid
+        self.padroes.append(padrao)
+        self.rotulos.append(tuple(f"{t}|{padrao}" for t in range(N_TERMINAIS)))
+        return pid
+
+    def id_de(self, padrao: str) -> int:
+        return self.padrao_id.get(padrao, -1)
+
+    # ------------------------------
+    # escrita
+    # ------------------------------
+    def registrar(self, t: int, pid: int, hit: bool, tick: int = 0) -> None:
+        k = MISS - hit
+        self.term[2 * t + k] += 1
+        if self.dterm is not None:
+            self._decair_e_somar(self.dterm, self.tterm, 2 * t, k, tick)
+        if pid < 0:
+            self.descartados += 1
+            return
+        i = 2 * (t * self.max_padroes + pid)
+        self.pad[2 * pid + k] += 1
+        self.comb[i + k] += 1
+        if self.dterm is not None:
+            self._decair_e_somar(self.dpad, self.tpad, 2 * pid, k, tick)
+            self._decair_e_somar(self.dcomb, self.tcomb, i, k, tick)
+
+    def _fator(self, desde: int, tick: int) -> float:
+        if tick <= desde:
+            return 1.0
+        return 0.5 ** ((tick - desde) / self.meia_vida)
+
+    def _decair_e_somar(self, d: array, ticks: array, i: int, k: int, tick: int) -> None:
+        f = self._fator(ticks[i >> 1], tick)
+        d[i] *= f
+        d[i + 1] *= f
+        d[i + k] += 1.0
+        ticks[i >> 1] = tick
+
+    def _decaido(self, d: array, ticks: array, i: int, tick: int):
+        f = self._fator(ticks[i >> 1], tick)
+        return d[i] * f, d[i + 1] * f
+
+    def limpar(self) -> None:
+        for a in (self.term, self.pad, self.comb, self.tterm, self.tpad, self.tcomb):
+            if a is not None:
+                a[:] = array("q", bytes(a.itemsize * len(a)))
+        for a in (self.dterm, self.dpad, self.dcomb):
+            if a is not None:
+                a[:] = array("d", bytes(a.itemsize * len(a)))
+        self.descartados = 0
+
+    # ------------------------------
+    # leitura (sem efeito colateral)
+    # ------------------------------
+    def terminal(self, t: int):
+        return self.term[2 * t], self.term[2 * t + 1]
+
+    def padrao(self, pid: int):
+        if pid < 0:
+            return 0, 0
+        return self.pad[2 * pid], self.pad[2 * pid + 1]
+
+    def combinado(self, t: int, pid: int):
+        if pid < 0:
+            return 0, 0
+        i = 2 * (t * self.max_padroes + pid)
+        return self.comb[i], self.comb[i + 1]
+
+    # contagens "efetivas": decaídas até `tick` se houver meia-vida, senão as brutas
+    def terminal_efetivo(self, t: int, tick: int):
+        if self.dterm is None:
+            return self.terminal(t)
+        return self._decaido(self.dterm, self.tterm, 2 * t, tick)
+
+    def padrao_efetivo(self, pid: int, tick: int):
+        if self.dterm is None or pid < 0:
+            return self.padrao(pid)
+        return self._decaido(self.dpad, self.tpad, 2 * pid, tick)
+
+    def combinado_efetivo(self, t: int, pid: int, tick: int):
+        if self.dterm is None or pid < 0:
+            return self.combinado(t, pid)
+        return self._decaido(self.dcomb, self.tcomb, 2 * (t * self.max_padroes + pid), tick)
+
+    def rotulo_combinado(self, t: int, pid: int) -> str:
+        return self.rotulos[pid][t]
+
+    def nbytes(self) -> int:
+        arrays = (self.term, self.pad, self.comb, self.dterm, self.dpad, self.dcomb,
+                  self.tterm, self.tpad, self.tcomb)
+        return sum(a.itemsize * len(a) for a in arrays if a is not None)
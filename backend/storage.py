@@ -0,0 +1,112 @@
+# backend/storage.py
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, IO, Iterator, List
+
+# sem VIPER_DATA_DIR a persistência fica desligada
+DATA_DIR = os.getenv("VIPER_DATA_DIR", "")
+
+# mesa das rotas sem `?mesa=` (aqui pra quem só precisa do id não carregar a engine)
+MESA_PADRAO = "default"
+
+# id de mesa vira nome de arquivo (aqui, hibernação, livro de entradas): só isso é aceito
+MESA_ID_PADRAO = r"^[A-Za-z0-9_-]{1,64}$"
+_MESA_ID = re.compile(MESA_ID_PADRAO)
+
+
+def mesa_id_valido(mesa_id: object) -> bool:
+    return type(mesa_id) is str and _MESA_ID.fullmatch(mesa_id) is not None
+
+
+def _exigir_mesa_id(mesa_id: str) -> str:
+    if not mesa_id_valido(mesa_id):
+        raise ValueError(f"id de mesa inválido: {mesa_id!r} (use {MESA_ID_PADRAO})")
+    return mesa_id
+
+
+class SpinStorage:
+    """
+    Log append-only de spins por mesa (JSONL): <base>/spins/<mesa>.jsonl
+    - uma linha por spin, já com seq/ts/status (base pra replay/export)
+    - escrito só pelo worker de segundo plano, fora do caminho do /spin
+    Livro de entradas (binário, formato em backend/livro_entradas.py): <base>/entradas/<mesa>.bin
+    """
+
+    def __init__(self, base_dir: str = DATA_DIR):
+        self.base_dir = base_dir
+        self._arquivos: Dict[str, IO[str]] = {}
+        self._livros: Dict[str, BinaryIO] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.base_dir)
+
+    def caminho(self, mesa: str) -> Path:
+        return Path(self.base_dir) / "spins" / f"{_exigir_mesa_id(mesa)}.jsonl"
+
+    def gravar(self, mesa: str, linha: Dict) -> None:
+        if not self.ativo:
+            return
+        with self._lock:
+            f = self._arquivos.get(mesa)
+            if f is None:
+                path = self.caminho(mesa)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                f = open(path, "a", encoding="utf-8")
+                self._arquivos[mesa] = f
+            f.write(json.dumps(linha, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+
+    def caminho_entradas(self, mesa: str) -> Path:
+        return Path(self.base_dir) / "entradas" / f"{_exigir_mesa_id(mesa)}.bin"
+
+    def gravar_entrada(self, mesa: str, registro: bytes) -> None:
+        if not self.ativo:
+            return
+        from backend.livro_entradas import MAGICA
+
+        with self._lock:
+            f = self._livros.get(mesa)
+            if f is None:
+                path = self.caminho_entradas(mesa)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                f = open(path, "ab")
+                if f.tell() == 0:
+                    f.write(MAGICA)
+                self._livros[mesa] = f
+            f.write(registro)
+            f.flush()
+
+    def ler(self, mesa: str) -> Iterator[Dict]:
+        path = self.caminho(mesa)
+        if not path.exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            for linha in f:
+                if not linha.endswith("\n"):
+                    break           # última linha ainda sendo escrita pelo worker
+                linha = linha.strip()
+                if linha:
+                    yield json.loads(linha)
+
+    def mesas(self) -> List[str]:
+        """Mesas com log persistido."""
+        if not self.ativo:
+            return []
+        return sorted(p.stem for p in (Path(self.base_dir) / "spins").glob("*.jsonl") if mesa_id_valido(p.stem))
+
+    def fechar(self) -> None:
+        with self._lock:
+            for f in (*self._arquivos.values(), *self._livros.values()):
+                f.close()
+            self._arquivos.clear()
+            self._livros.clear()
+
+
+storage = SpinStorage()
@@ -0,0 +1,346 @@
+# backend/vies.py
+"""
+Detector de viés da roda por mesa (streaming): a distribuição dos resultados
+ainda é compatível com uma roda honesta?
+
+Famílias de categorias (H0 = probabilidade proporcional ao nº de casas):
+- numero:    37 números
+- terminal:  10 terminais (0-6 têm 4 números, 7-9 têm 3)
+- setor:     voisins / tiers / orphelins
+- arco:      N_ARCOS arcos contíguos da roda (viés mecânico/inclinação)
+- distancia: casas andadas na roda desde o número anterior (assinatura do dealer)
+
+Testes por janela deslizante (JANELAS, em spins), O(1) por spin:
+- qui-quadrado: X² = Σ c²/(N·p) - N  => mantém Σ c²/p
+- G-test:       G  = 2·(Σ c·ln c - N·ln N - Σ c·ln p)  => mantém Σ c·ln c e Σ c·ln p
+  (o spin que entra soma e o que sai da janela subtrai; nada é recontado)
+- alerta quando X² passa do valor crítico de ALFA (Wilson–Hilferty, calculado
+  uma vez por grau de liberdade); janela só é testada com N·p_min >= 5
+
+CUSUM de Bernoulli por categoria (mudança de taxa p0 -> p0·(1+CUSUM_DELTA)):
+S = max(0, S + llr), llr = ln(p1/p0) quando a categoria sai e ln((1-p1)/(1-p0))
+quando não sai. O passo "não saiu" é constante => aplicado de forma preguiçosa
+(só quando a categoria sai ou na leitura), então cada spin mexe em uma célula
+por família. Alarme em S > CUSUM_H (e S volta a 0).
+"""
+from __future__ import annotations
+
+from array import array
+import math
+import os
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.features import ROTULOS, valores
+from backend.logic import WHEEL_EU
+
+JANELAS: Tuple[int, ...] = tuple(
+    int(x) for x in os.getenv("VIPER_VIES_JANELAS", "370,1850,7400").split(",") if x.strip()
+)
+ALFA = float(os.getenv("VIPER_VIES_ALFA", "0.001"))
+CUSUM_DELTA = float(os.getenv("VIPER_VIES_CUSUM_DELTA", "0.5"))    # +50% na taxa da categoria
+CUSUM_H = float(os.getenv("VIPER_VIES_CUSUM_H", "8.0"))
+N_ARCOS = 8
+MIN_ESPERADO = 5          # regra usual do qui-quadrado: contagem esperada >= 5 por célula
+
+_N = 37
+
+
+def _familia_de_numero() -> Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]]:
+    """família -> (categoria de cada número 0..36, rótulos das categorias); colunas do FeatureStore."""
+    return {
+        "numero": (tuple(range(_N)), tuple(str(n) for n in range(_N))),
+        "terminal": (valores("terminal"), tuple(str(t) for t in range(10))),
+        "setor": (valores("setor"), ROTULOS["setor"]),
+        "arco": (
+            tuple(i * N_ARCOS // _N for i in valores("roda")),
+            tuple(
+                f"{WHEEL_EU[-(-a * _N // N_ARCOS)]}..{WHEEL_EU[-(-(a + 1) * _N // N_ARCOS) - 1]}"
+                for a in range(N_ARCOS)
+            ),
+        ),
+    }
+
+
+_POR_NUMERO = _familia_de_numero()
+FAMILIAS: Tuple[str, ...] = tuple(_POR_NUMERO) + ("distancia",)
+
+# probabilidades sob H0 por família
+_PROBS: Dict[str, Tuple[float, ...]] = {}
+for _nome, (_mapa, _rotulos) in _POR_NUMERO.items():
+    _PROBS[_nome] = tuple(_mapa.count(c) / _N for c in range(len(_rotulos)))
+_PROBS["distancia"] = tuple(1 / _N for _ in range(_N))
+_ROTULOS: Dict[str, Tuple[str, ...]] = {k: v[1] for k, v in _POR_NUMERO.items()}
+_ROTULOS["distancia"] = tuple(str(d) for d in range(_N))
+
+# categoria de cada número por família (a distância vem à parte, depende do anterior)
+_MAPAS: Tuple[Tuple[int, ...], ...] = tuple(_POR_NUMERO[f][0] for f in FAMILIAS[:-1])
+# categorias de cada número (todas as famílias menos a distância, que é a última)
+_CATS: Tuple[Tuple[int, ...], ...] = tuple(tuple(m[n] for m in _MAPAS) for n in range(_N))
+
+
+def valor_critico(gl: int, alfa: float = ALFA) -> float:
+    """X² crítico (cauda superior) por Wilson–Hilferty."""
+    z = NormalDist().inv_cdf(1.0 - alfa)
+    a = 2.0 / (9.0 * gl)
+    return gl * (1.0 - a + z * math.sqrt(a)) ** 3
+
+
+def p_valor(x2: float, gl: int) -> float:
+    """P(X² >= x2) aproximado (Wilson–Hilferty)."""
+    if x2 <= 0:
+        return 1.0
+    a = 2.0 / (9.0 * gl)
+    z = ((x2 / gl) ** (1.0 / 3.0) - (1.0 - a)) / math.sqrt(a)
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+class _Teste:
+    """Estatísticas suficientes de uma família numa janela."""
+
+    __slots__ = ("n", "cont", "soma_q", "soma_xlogx", "soma_logp", "inv_p", "log_p", "n_min", "critico")
+
+    def __init__(self, probs: Sequence[float], alfa: float):
+        self.n = 0
+        self.cont = [0] * len(probs)
+        self.soma_q = 0.0          # Σ c²/p
+        self.soma_xlogx = 0.0      # Σ c·ln c
+        self.soma_logp = 0.0       # Σ c·ln p
+        self.inv_p = tuple(1.0 / p for p in probs)
+        self.log_p = tuple(math.log(p) for p in probs)
+        self.n_min = math.ceil(MIN_ESPERADO / min(probs))
+        self.critico = valor_critico(len(probs) - 1, alfa)
+
+    def somar(self, c: int) -> None:
+        k = self.cont[c]
+        self.cont[c] = k + 1
+        self.n += 1
+        self.soma_q += (2 * k + 1) * self.inv_p[c]
+        self.soma_xlogx += _DXLOGX[k]
+        self.soma_logp += self.log_p[c]
+
+    def tirar(self, c: int) -> None:
+        k = self.cont[c] - 1
+        self.cont[c] = k
+        self.n -= 1
+        self.soma_q -= (2 * k + 1) * self.inv_p[c]
+        self.soma_xlogx -= _DXLOGX[k]
+        self.soma_logp -= self.log_p[c]
+
+    def trocar(self, velha: int, nova: int) -> None:
+        """Janela cheia: `velha` sai e `nova` entra (N fica igual)."""
+        if velha == nova:
+            return
+        cont = self.cont
+        k = cont[velha] - 1
+        cont[velha] = k
+        j = cont[nova]
+        cont[nova] = j + 1
+        self.soma_q += (2 * j + 1) * self.inv_p[nova] - (2 * k + 1) * self.inv_p[velha]
+        self.soma_xlogx += _DXLOGX[j] - _DXLOGX[k]
+        self.soma_logp += self.log_p[nova] - self.log_p[velha]
+
+    def qui2(self) -> float:
+        return self.soma_q / self.n - self.n if self.n else 0.0
+
+    def g(self) -> float:
+        if not self.n:
+            return 0.0
+        return max(0.0, 2.0 * (self.soma_xlogx - self.n * math.log(self.n) - self.soma_logp))
+
+    def alerta(self) -> bool:
+        # X² > crítico  <=>  Σ c²/p > N·(N + crítico)  (sem divisão no caminho do spin)
+        n = self.n
+        return n >= self.n_min and self.soma_q > n * (n + self.critico)
+
+
+# (k+1)·ln(k+1) - k·ln k: variação de Σ c·ln c quando uma contagem vai de k pra k+1
+_DXLOGX: List[float] = []
+
+
+def _garantir_dxlogx(k_max: int) -> None:
+    while len(_DXLOGX) <= k_max:
+        k = len(_DXLOGX)
+        _DXLOGX.append((k + 1) * math.log(k + 1) - (k * math.log(k) if k else 0.0))
+
+
+class _Cusum:
+    """CUSUM de Bernoulli por categoria de uma família, com o decremento preguiçoso."""
+
+    __slots__ = ("s", "tick", "sobe", "desce", "alarmes", "ultimo_alarme")
+
+    def __init__(self, probs: Sequence[float], delta: float):
+        k = len(probs)
+        self.s = [0.0] * k
+        self.tick = [0] * k
+        self.sobe = tuple(math.log(1.0 + delta) for _ in probs)
+        self.desce = tuple(math.log((1.0 - p * (1.0 + delta)) / (1.0 - p)) for p in probs)  # < 0
+        self.alarmes = [0] * k
+        self.ultimo_alarme: List[Optional[int]] = [None] * k
+
+    def valor(self, c: int, tick: int) -> float:
+        return max(0.0, self.s[c] + self.desce[c] * (tick - self.tick[c]))
+
+    def saiu(self, c: int, tick: int, h: float) -> Optional[float]:
+        """Categoria `c` saiu no spin `tick`. Retorna o S do alarme (ou None)."""
+        # spins entre a última saída e este (exclusive) são "não saiu"
+        s = max(0.0, self.s[c] + self.desce[c] * (tick - 1 - self.tick[c])) + self.sobe[c]
+        self.tick[c] = tick
+        if s > h:
+            self.s[c] = 0.0
+            self.alarmes[c] += 1
+            self.ultimo_alarme[c] = tick
+            return s
+        self.s[c] = s
+        return None
+
+
+class DetectorVies:
+    """
+    Estado do detector de uma mesa. Escrita só pelo pipeline (lock da mesa);
+    `relatorio()` também deve ser chamado com o lock (o engine cuida disso).
+    """
+
+    def __init__(
+        self,
+        janelas: Sequence[int] = JANELAS,
+        alfa: float = ALFA,
+        cusum_delta: float = CUSUM_DELTA,
+        cusum_h: float = CUSUM_H,
+    ):
+        self.janelas = tuple(sorted(janelas))
+        self.alfa = alfa
+        self.cusum_delta = cusum_delta
+        self.cusum_h = cusum_h
+        self.limpar()
+
+    def limpar(self) -> None:
+        tam = self.janelas[-1] if self.janelas else 1
+        _garantir_dxlogx(tam)
+        # anel com os últimos spins: número e distância (-1 = sem anterior)
+        self._numeros = array("b", bytes(tam))
+        self._dists = array("b", [-1]) * tam
+        self._pos = 0
+        self.spins = 0
+        self.testes: List[List[_Teste]] = [
+            [_Teste(_PROBS[f], self.alfa) for f in FAMILIAS] for _ in self.janelas
+        ]
+        self.cusums: List[_Cusum] = [_Cusum(_PROBS[f], self.cusum_delta) for f in FAMILIAS]
+
+    def observar(self, numero: int, dist: int) -> Optional[Dict]:
+        """
+        Atualiza tudo com o spin (O(janelas x famílias)); `dist` = feature `distancia`
+        do spin (-1 sem anterior). Retorna None se nada disparou, senão
+        {"testes": [...], "cusum": [...]} pro payload do sinal.
+        """
+        self.spins += 1
+        tick = self.spins
+        tam = len(self._numeros)
+        pos = self._pos
+
+        # categoria por família (sem a distância no 1º spin: zip para antes dela)
+        cats = _CATS[numero] + (dist,) if dist >= 0 else _CATS[numero]
+
+        alertas = None
+        for janela, testes in zip(self.janelas, self.testes):
+            # spin que sai desta janela (se ela já está cheia)
+            if tick > janela:
+                j = (pos - janela) % tam
+                dvelho = self._dists[j]
+                velhos = _CATS[self._numeros[j]] + (dvelho,) if dvelho >= 0 else _CATS[self._numeros[j]]
+                if len(velhos) == len(cats):
+                    for v, c, teste in zip(velhos, cats, testes):
+                        teste.trocar(v, c)
+                else:
+                    for c, teste in zip(velhos, testes):
+                        teste.tirar(c)
+                    for c, teste in zip(cats, testes):
+                        teste.somar(c)
+            else:
+                for c, teste in zip(cats, testes):
+                    teste.somar(c)
+            for f, teste in enumerate(testes):
+                if teste.alerta():
+                    if alertas is None:
+                        alertas = {"testes": [], "cusum": []}
+                    alertas["testes"].append({
+                        "familia": FAMILIAS[f],
+                        "janela": janela,
+                        "qui2": round(teste.qui2(), 2),
+                        "critico": round(teste.critico, 2),
+                    })
+
+        self._numeros[pos] = numero
+        self._dists[pos] = dist
+        self._pos = (pos + 1) % tam
+
+        for f, c in enumerate(cats):
+            s = self.cusums[f].saiu(c, tick, self.cusum_h)
+            if s is not None:
+                if alertas is None:
+                    alertas = {"testes": [], "cusum": []}
+                alertas["cusum"].append({"familia": FAMILIAS[f], "categoria": _ROTULOS[FAMILIAS[f]][c],
+                                         "s": round(s, 2)})
+        return alertas
+
+    # ------------------------------
+    # leitura
+    # ------------------------------
+    def relatorio(self) -> Dict:
+        janelas = []
+        for janela, testes in zip(self.janelas, self.testes):
+            fams = {}
+            for f, teste in enumerate(testes):
+                gl = len(teste.cont) - 1
+                x2 = teste.qui2()
+                g = teste.g()
+                fams[FAMILIAS[f]] = {
+                    "n": teste.n,
+                    "qui2": round(x2, 3),
+                    "p_qui2": round(p_valor(x2, gl), 6),
+                    "g": round(g, 3),
+                    "p_g": round(p_valor(g, gl), 6),
+                    "gl": gl,
+                    "critico": round(teste.critico, 3),
+                    "testavel": teste.n >= teste.n_min,
+                    "alerta": teste.alerta(),
+                    "mais_frequentes": _top(teste, FAMILIAS[f]),
+                }
+            janelas.append({"janela": janela, "familias": fams})
+
+        tick = self.spins
+        cusum = {}
+        for f, cs in enumerate(self.cusums):
+            rotulos = _ROTULOS[FAMILIAS[f]]
+            itens = [
+                {"categoria": rotulos[c], "s": round(cs.valor(c, tick), 3), "alarmes": cs.alarmes[c],
+                 "ultimo_alarme": cs.ultimo_alarme[c]}
+                for c in range(len(rotulos))
+            ]
+            itens.sort(key=lambda x: x["s"], reverse=True)
+            cusum[FAMILIAS[f]] = itens[:5]
+        return {
+            "spins": self.spins,
+            "alfa": self.alfa,
+            "cusum_h": self.cusum_h,
+            "cusum_delta": self.cusum_delta,
+            "janelas": janelas,
+            "cusum": cusum,
+        }
+
+
+def _top(teste: _Teste, familia: str, k: int = 3) -> List[Dict]:
+    """Categorias mais acima do esperado (resíduo padronizado)."""
+    n = teste.n
+    if not n:
+        return []
+    rotulos = _ROTULOS[familia]
+    out = []
+    for c, k_obs in enumerate(teste.cont):
+        esperado = n / teste.inv_p[c]
+        out.append((
+            (k_obs - esperado) / math.sqrt(esperado),
+            {"categoria": rotulos[c], "observado": k_obs, "esperado": round(esperado, 1)},
+        ))
+    out.sort(key=lambda x: x[0], reverse=True)
+    return [dict(d, residuo=round(r, 2)) for r, d in out[:k]]
@@ -0,0 +1,122 @@
+# backend/visao_global.py
+"""
+Visão global (todas as mesas), mantida de forma incremental.
+
+Cada entrada resolvida (GREEN/RED) de qualquer mesa entra aqui uma vez, pelo
+worker (fora do caminho crítico, mesas isoladas de replay não entram):
+- hit/miss por padrão, por terminal e por terminal x padrão somados entre mesas
+  (StatsStore global, padrões internados por nome)
+- rankings incrementais de padrão e terminal x padrão (só a chave tocada anda)
+- ranking de mesas pela taxa de green recente (contagens decaídas por entrada
+  resolvida da mesa, meia-vida MEIA_VIDA_MESA)
+
+Consultas não varrem mesas: ranking já ordenado (top N = fatia) e terminais
+são 10 linhas => O(tamanho da resposta).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+from backend.logic import CONFIG_PADRAO
+from backend.ranking import RankingScores
+from backend.stats_store import StatsStore
+
+MEIA_VIDA_MESA = float(os.getenv("VIPER_GLOBAL_MEIA_VIDA", "50"))   # em entradas resolvidas da mesa
+
+
+class VisaoGlobal:
+    def __init__(self, meia_vida_mesa: float = MEIA_VIDA_MESA):
+        self.fator = 0.5 ** (1.0 / meia_vida_mesa)
+        self.meia_vida_mesa = meia_vida_mesa
+        self._lock = threading.Lock()     # escrita vem do worker; leitura das rotas
+        self.limpar()
+
+    def limpar(self) -> None:
+        self.store = StatsStore()
+        self.ranking_padrao = RankingScores("padrao")
+        self.ranking_terminal_padrao = RankingScores("terminal_padrao")
+        self.ranking_mesas = RankingScores("mesa")
+        self._mesas: Dict[str, List[float]] = {}     # mesa -> [greens decaídos, reds decaídos, greens, reds]
+        self.resolvidas = 0
+        self.versao = 0
+
+    # ------------------------------
+    # escrita
+    # ------------------------------
+    def registrar(self, mesa: str, t: int, padrao: str, green: bool) -> None:
+        cfg = CONFIG_PADRAO
+        with self._lock:
+            store = self.store
+            pid = store.internar(padrao)
+            store.registrar(t, pid, green)
+            if pid >= 0:
+                hits, miss = store.padrao(pid)
+                self.ranking_padrao.atualizar(pid, hits, miss, cfg.score(hits, miss, cfg.prior_padrao), rotulo=padrao)
+                hits, miss = store.combinado(t, pid)
+                self.ranking_terminal_padrao.atualizar(
+                    t * store.max_padroes + pid, hits, miss, cfg.score(hits, miss, cfg.prior_terminal[t]),
+                    rotulo=store.rotulo_combinado(t, pid),
+                )
+
+            m = self._mesas.get(mesa)
+            if m is None:
+                m = self._mesas[mesa] = [0.0, 0.0, 0, 0]
+            m[0] = m[0] * self.fator + green
+            m[1] = m[1] * self.fator + (not green)
+            m[2 if green else 3] += 1
+            self.ranking_mesas.atualizar(
+                mesa, round(m[0], 2), round(m[1], 2), cfg.score(m[0], m[1], cfg.prior_padrao)
+            )
+            self.resolvidas += 1
+            self.versao += 1
+
+    def esquecer_mesa(self, mesa: str) -> None:
+        """Reset da mesa: sai do ranking de mesas (o histórico global de padrões fica)."""
+        with self._lock:
+            if self._mesas.pop(mesa, None) is not None:
+                self.ranking_mesas.remover(mesa)
+                self.versao += 1
+
+    # ------------------------------
+    # leitura
+    # ------------------------------
+    def padroes(self, top: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            return self.ranking_padrao.top(top)
+
+    def terminal_padrao(self, top: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            return self.ranking_terminal_padrao.top(top)
+
+    def mesas(self, top: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            return self.ranking_mesas.top(top)
+
+    def terminais(self) -> List[Dict]:
+        cfg = CONFIG_PADRAO
+        with self._lock:
+            out = []
+            for t in range(10):
+                hits, miss = self.store.terminal(t)
+                out.append({
+                    "terminal": t,
+                    "hits": hits,
+                    "miss": miss,
+                    "score": round(cfg.score(hits, miss, cfg.prior_terminal[t]), 4),
+                })
+            return out
+
+    def info(self) -> Dict:
+        with self._lock:
+            return {
+                "versao": self.versao,
+                "resolvidas": self.resolvidas,
+                "mesas": len(self._mesas),
+                "padroes": len(self.ranking_padrao),
+                "meia_vida_mesa": self.meia_vida_mesa,
+            }
+
+
+visao_global = VisaoGlobal()
@@ -0,0 +1,292 @@
+# backend/walkforward.py
+"""
+Walk-forward: escolhe parâmetros numa janela de treino e mede na janela seguinte.
+
+    python -m backend.walkforward data/spins/ --treino 20000 --teste 5000 \\
+        --margem 0,0.02,0.04 --peso-terminal 0.45,0.55,0.65 --gale 1,2 \\
+        --processos 4 --saida folds.jsonl
+
+Como funciona:
+- o log (multi-mesa, mesclado por ts) é cortado em segmentos de `--teste` spins
+- cada config candidata (grade limiar x peso x gale) roda UMA vez pelo log
+  inteiro, com engines por mesa que carregam o estado de janela pra janela
+  (nada é recomputado por fold); de cada segmento sai o placar da config
+- fold k: treino = `--treino` spins antes do segmento de teste k; a melhor config
+  no treino (pelo `--objetivo`) é avaliada no segmento de teste (fora da amostra)
+- limiar: `--margem` (bayes_margem, sobre a linha de base de cada terminal) nos modos
+  bayes; `--threshold` (score_threshold absoluto) só com score_modo "bruto"
+- configs rodam em paralelo (`--processos`); os folds são só somas de segmentos
+
+Objetivos:
+- lucro:      unidades com gale dobrando a aposta (alvo = números do terminal+vizinhos, paga 36)
+- taxa_green: greens / (greens + reds)
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.logic import BAYES_MARGEM, SCORE_MODO, ConfigEngine
+from backend.replay import LadoEngine, ler_spins
+
+OBJETIVOS = ("lucro", "taxa_green")
+MULT_GALE = 2              # aposta do gale = anterior x 2
+PAGAMENTO = 36             # número pleno paga 35:1 (+ a ficha)
+MIN_ENTRADAS = 20          # treino com menos entradas que isso não conta como candidato
+
+CAMPOS_FOLD = ("score_threshold", "bayes_margem", "peso_terminal", "gale_max")
+
+# placar por segmento: entradas, greens, reds, gales, lucro
+_ENT, _GREEN, _RED, _GALE, _LUCRO = range(5)
+Placar = List[float]
+
+
+def _novo_placar() -> Placar:
+    return [0, 0, 0, 0, 0.0]
+
+
+def lucro_entrada(n_alvo: int, gale: int, green: bool, gale_max: int) -> float:
+    """Resultado em unidades de uma entrada resolvida (1 unidade por número no 1º giro)."""
+    if green:
+        custo = sum(n_alvo * MULT_GALE ** i for i in range(gale + 1))
+        return PAGAMENTO * MULT_GALE ** gale - custo
+    return -float(sum(n_alvo * MULT_GALE ** i for i in range(gale_max + 1)))
+
+
+def grade(thresholds: Sequence[float], pesos_terminal: Sequence[float], gales: Sequence[int],
+          base: Optional[Dict] = None, margens: Sequence[float] = (BAYES_MARGEM,)) -> List[Dict]:
+    """
+    Configs candidatas (dicts de ConfigEngine); peso_padrao = 1 - peso_terminal. O limiar
+    varia pelo que vale no score_modo da base: score_threshold no "bruto", bayes_margem
+    nos bayes (o outro não muda nada e só repetiria configs).
+    """
+    if (base or {}).get("score_modo", SCORE_MODO) == "bruto":
+        limiares = [("score_threshold", th) for th in thresholds]
+    else:
+        limiares = [("bayes_margem", m) for m in margens]
+    out = []
+    for (campo, limiar), pt, g in product(limiares, pesos_terminal, gales):
+        d = dict(base or {})
+        d.update({campo: limiar}, peso_terminal=pt, peso_padrao=round(1.0 - pt, 6), gale_max=g)
+        ConfigEngine.de_dict(d)    # valida já aqui (erro antes de subir processos)
+        out.append(d)
+    return out
+
+
+# ==============================
+# AVALIAÇÃO (um processo = um lote de configs, log lido uma vez)
+# ==============================
+def avaliar_configs(args: Tuple) -> List[List[Placar]]:
+    """Placar por segmento de cada config do lote: [config][segmento] -> placar."""
+    logs, configs, tam_segmento, modo = args
+    cfgs = [ConfigEngine.de_dict(c) for c in configs]
+    lados = [LadoEngine(str(i), c) for i, c in enumerate(cfgs)]
+    n_alvo = [[len(a) for a in c.alvos] for c in cfgs]
+    placares: List[List[Placar]] = [[] for _ in cfgs]
+
+    for i, spin in enumerate(ler_spins(logs)):
+        seg = i // tam_segmento
+        m = spin.modo or modo
+        for k, lado in enumerate(lados):
+            segs = placares[k]
+            while len(segs) <= seg:
+                segs.append(_novo_placar())
+            p = segs[seg]
+            status, _, t, gale = lado.processar(spin, m)
+            if status == "ENTRADA":
+                p[_ENT] += 1
+            elif status == "GALE":
+                p[_GALE] += 1
+            elif status in ("GREEN", "RED"):
+                green = status == "GREEN"
+                p[_GREEN if green else _RED] += 1
+                p[_LUCRO] += lucro_entrada(n_alvo[k][t], gale, green, cfgs[k].gale_max)
+    return placares
+
+
+def _somar(segs: Iterable[Placar]) -> Placar:
+    acc = _novo_placar()
+    for p in segs:
+        for i, v in enumerate(p):
+            acc[i] += v
+    return acc
+
+
+def _metricas(p: Placar) -> Dict:
+    resolvidas = p[_GREEN] + p[_RED]
+    return {
+        "entradas": int(p[_ENT]),
+        "greens": int(p[_GREEN]),
+        "reds": int(p[_RED]),
+        "gales": int(p[_GALE]),
+        "taxa_green": round(p[_GREEN] / resolvidas, 4) if resolvidas else None,
+        "lucro": round(p[_LUCRO], 2),
+        "lucro_por_entrada": round(p[_LUCRO] / resolvidas, 3) if resolvidas else None,
+    }
+
+
+def _objetivo(p: Placar, objetivo: str) -> float:
+    if objetivo == "taxa_green":
+        resolvidas = p[_GREEN] + p[_RED]
+        return p[_GREEN] / resolvidas if resolvidas else float("-inf")
+    return p[_LUCRO]
+
+
+# ==============================
+# FOLDS
+# ==============================
+def folds(
+    placares: List[List[Placar]],
+    configs: List[Dict],
+    segs_treino: int,
+    objetivo: str = "lucro",
+    min_entradas: int = MIN_ENTRADAS,
+    base: int = 0,
+) -> List[Dict]:
+    """
+    Um fold por segmento de teste com treino completo antes dele.
+    `base` = índice da config de referência (sem otimização) pra comparar.
+    """
+    n_segs = min(len(s) for s in placares) if placares else 0
+    out = []
+    for teste in range(segs_treino, n_segs):
+        melhor, melhor_val = None, float("-inf")
+        for k, segs in enumerate(placares):
+            treino = _somar(segs[teste - segs_treino:teste])
+            if treino[_GREEN] + treino[_RED] < min_entradas:
+                continue
+            val = _objetivo(treino, objetivo)
+            if val > melhor_val:
+                melhor, melhor_val = k, val
+        fold = {
+            "fold": teste - segs_treino,
+            "segmento_teste": teste,
+            "config": None,
+            "treino": None,
+            "teste": None,
+            "referencia_teste": _metricas(placares[base][teste]),
+        }
+        if melhor is not None:
+            fold["config"] = {k: configs[melhor].get(k) for k in CAMPOS_FOLD}
+            fold["treino"] = _metricas(_somar(placares[melhor][teste - segs_treino:teste]))
+            fold["teste"] = _metricas(placares[melhor][teste])
+        out.append(fold)
+    return out
+
+
+def resumo(
+    lista: List[Dict],
+    placares: List[List[Placar]],
+    configs: List[Dict],
+    base: int = 0,
+    objetivo: str = "lucro",
+    min_entradas: int = MIN_ENTRADAS,
+) -> Dict:
+    """Fora da amostra (concatenação dos testes) vs referência e vs o melhor 'em retrospecto'."""
+    oos = _novo_placar()
+    ref = _novo_placar()
+    trocas = 0
+    anterior = None
+    for f in lista:
+        t = f["segmento_teste"]
+        ref = _somar([ref, placares[base][t]])
+        if f["config"] is None:
+            continue
+        k = _achar(configs, f["config"])
+        oos = _somar([oos, placares[k][t]])
+        if anterior is not None and f["config"] != anterior:
+            trocas += 1
+        anterior = f["config"]
+
+    # "fantasia": melhor config escolhida olhando os próprios segmentos de teste
+    testes = [f["segmento_teste"] for f in lista]
+    candidatos = [_somar([segs[t] for t in testes]) for segs in placares]
+    candidatos = [p for p in candidatos if p[_GREEN] + p[_RED] >= min_entradas] or [_novo_placar()]
+    fantasia = max(candidatos, key=lambda p: _objetivo(p, objetivo))
+    return {
+        "folds": len(lista),
+        "fora_da_amostra": _metricas(oos),
+        "referencia": _metricas(ref),
+        "retrospectivo_in_sample": _metricas(fantasia),
+        "trocas_de_config": trocas,
+    }
+
+
+def _achar(configs: List[Dict], escolhida: Dict) -> int:
+    for k, c in enumerate(configs):
+        if all(c[chave] == v for chave, v in escolhida.items()):
+            return k
+    raise KeyError(escolhida)
+
+
+# ==============================
+# CLI
+# ==============================
+def _lista(tipo, texto: str) -> List:
+    return [tipo(x) for x in texto.split(",") if x.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Walk-forward de threshold/pesos/gale sobre logs gravados")
+    ap.add_argument("logs", nargs="+", help="arquivos ou diretórios (JSONL do storage / CSV)")
+    ap.add_argument("--treino", type=int, default=20000, help="spins na janela de treino")
+    ap.add_argument("--teste", type=int, default=5000, help="spins na janela de teste (= passo)")
+    ap.add_argument("--threshold", default="0.56,0.60,0.62,0.64,0.68", help="score_modo bruto")
+    ap.add_argument("--margem", default="0,0.02,0.04", help="modos bayes: margem sobre a linha de base")
+    ap.add_argument("--peso-terminal", default="0.45,0.55,0.65")
+    ap.add_argument("--gale", default="1,2")
+    ap.add_argument("--objetivo", choices=OBJETIVOS, default="lucro")
+    ap.add_argument("--min-entradas", type=int, default=MIN_ENTRADAS)
+    ap.add_argument("--modo", default="agressivo", help="modo dos spins sem modo no log")
+    ap.add_argument("--processos", type=int, default=1)
+    ap.add_argument("--saida", help="relatório por fold (JSONL); default: stdout")
+    args = ap.parse_args(argv)
+
+    if args.treino % args.teste:
+        ap.error("--treino precisa ser múltiplo de --teste")
+
+    # referência (config atual) entra na grade na posição 0
+    configs = [ConfigEngine().para_dict()] + grade(
+        _lista(float, args.threshold), _lista(float, args.peso_terminal), _lista(int, args.gale),
+        margens=_lista(float, args.margem),
+    )
+    inicio = time.perf_counter()
+    n = max(1, min(args.processos, len(configs)))
+    lotes = [configs[i::n] for i in range(n)]
+    tarefas = [(args.logs, lote, args.teste, args.modo) for lote in lotes]
+    if n == 1:
+        partes = [avaliar_configs(tarefas[0])]
+    else:
+        from multiprocessing import Pool
+
+        with Pool(n) as pool:
+            partes = pool.map(avaliar_configs, tarefas)
+
+    # desfaz o round-robin dos lotes => placares na ordem de `configs`
+    placares: List[List[Placar]] = [[] for _ in configs]
+    for i, parte in enumerate(partes):
+        for j, segs in enumerate(parte):
+            placares[i + j * n] = segs
+
+    lista = folds(placares, configs, args.treino // args.teste, args.objetivo, args.min_entradas, base=0)
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    try:
+        for f in lista:
+            saida.write(json.dumps(f, ensure_ascii=False) + "\n")
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    res = resumo(lista, placares, configs, 0, args.objetivo, args.min_entradas)
+    res["configs"] = len(configs)
+    res["segundos"] = round(time.perf_counter() - inicio, 1)
+    print(json.dumps(res, ensure_ascii=False, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
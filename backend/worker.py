@@ -0,0 +1,88 @@
+# backend/worker.py
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+class WorkerSegundoPlano:
+    """
+    Thread única que executa o que não precisa bloquear o /spin
+    (scorers de mercado/padrões, persistência, broadcast).
+    - `enviar`: fila limitada; se lotar, o job é descartado (o /spin nunca espera)
+    - `enviar_duravel`: persistência (storage, livro de entradas); nunca é descartado
+      nem bloqueia (quem envia segura o lock da mesa e o worker pode estar esperando
+      esse lock), então passa do limite: a fila cresce e o excesso aparece em `info()`
+    - jobs executam em ordem de chegada => consumidores veem os spins em ordem
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._fila: "queue.Queue" = queue.Queue()     # o limite é aplicado por `enviar`
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.processados = 0
+        self.descartados = 0
+        self.duraveis_acima_do_limite = 0
+        self.erros = 0
+        self.ultimo_erro: Optional[str] = None
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="viper-worker", daemon=True)
+                self._thread.start()
+
+    def enviar(self, fn: Callable[..., Any], *args: Any) -> bool:
+        if self._thread is None:
+            self._iniciar()
+        if self._fila.qsize() >= self.maxsize:
+            self.descartados += 1
+            return False
+        self._fila.put_nowait((fn, args))
+        return True
+
+    def enviar_duravel(self, fn: Callable[..., Any], *args: Any) -> None:
+        if self._thread is None:
+            self._iniciar()
+        if self._fila.qsize() >= self.maxsize:
+            if not self.duraveis_acima_do_limite:
+                log.warning("fila do worker cheia (%d): persistência segue enfileirando acima do limite", self.maxsize)
+            self.duraveis_acima_do_limite += 1
+        self._fila.put_nowait((fn, args))
+
+    def _loop(self) -> None:
+        while True:
+            fn, args = self._fila.get()
+            try:
+                fn(*args)
+                self.processados += 1
+            except Exception as e:
+                self.erros += 1
+                self.ultimo_erro = repr(e)
+                log.exception("job do worker falhou: %s", getattr(fn, "__qualname__", fn))
+            finally:
+                self._fila.task_done()
+
+    def drenar(self) -> None:
+        """Bloqueia até a fila esvaziar (testes, shutdown, backtests)."""
+        if self._thread is not None:
+            self._fila.join()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "pendentes": self._fila.qsize(),
+            "limite": self.maxsize,
+            "processados": self.processados,
+            "descartados": self.descartados,
+            "duraveis_acima_do_limite": self.duraveis_acima_do_limite,
+            "erros": self.erros,
+            "ultimo_erro": self.ultimo_erro,
+        }
+
+
+worker = WorkerSegundoPlano()
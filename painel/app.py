@@ -1,12 +1,14 @@
 # app.py (Streamlit SaaS Panel) — FINAL
 import os
 import time
-import random
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import pandas as pd
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # =========================
 # CONFIG
@@ -152,9 +154,18 @@ st.markdown(CSS, unsafe_allow_html=True)
 # =========================
 # HELPERS (API)
 # =========================
+@st.cache_resource
+def http() -> requests.Session:
+    # sessão única (keep-alive) reaproveitada entre reruns
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
 def api_get(path: str, timeout: float = 4.0) -> Optional[Any]:
     try:
-        r = requests.get(f"{BACKEND_URL}{path}", timeout=timeout)
+        r = http().get(f"{BACKEND_URL}{path}", timeout=timeout)
         if r.status_code >= 400:
             return None
         return r.json()
@@ -163,13 +174,35 @@ def api_get(path: str, timeout: float = 4.0) -> Optional[Any]:
 
 def api_post(path: str, payload: Dict[str, Any], timeout: float = 7.0) -> Optional[Any]:
     try:
-        r = requests.post(f"{BACKEND_URL}{path}", json=payload, timeout=timeout)
+        r = http().post(f"{BACKEND_URL}{path}", json=payload, timeout=timeout)
         if r.status_code >= 400:
             return None
         return r.json()
     except Exception:
         return None
 
+def fetch_snapshot(mesa: str, timeout: float = 4.0) -> Optional[Dict[str, Any]]:
+    """
+    GET /painel/snapshot condicional (ETag).
+    Se nada mudou no backend vem 304 e reaproveita o snapshot da sessão.
+    """
+    cache = st.session_state.snapshot
+    headers = {}
+    if cache and cache.get("mesa") == mesa and st.session_state.snapshot_etag:
+        headers["If-None-Match"] = st.session_state.snapshot_etag
+    try:
+        r = http().get(f"{BACKEND_URL}/painel/snapshot", params={"mesa": mesa}, headers=headers, timeout=timeout)
+    except Exception:
+        return None
+    if r.status_code == 304:
+        return cache
+    if r.status_code >= 400:
+        return None
+    snap = r.json()
+    st.session_state.snapshot = snap
+    st.session_state.snapshot_etag = r.headers.get("ETag")
+    return snap
+
 def parse_int(s: str) -> Optional[int]:
     s = (s or "").strip()
     if s == "":
@@ -212,26 +245,20 @@ def normalize_history_item(x: Dict[str, Any]) -> Dict[str, Any]:
         "entradas": entradas,
     }
 
-def compute_stats_from_history(df: pd.DataFrame) -> Dict[str, int]:
-    out = {"spins": 0, "entradas": 0, "greens": 0, "reds": 0, "blacks": 0, "gales": 0, "padroes": 0}
-    if df is None or df.empty:
-        return out
-
-    out["spins"] = int(len(df))
+@st.cache_data(max_entries=32, show_spinner=False)
+def tabelas_snapshot(mesa: str, instancia: str, versao: int, _snap: Dict[str, Any]) -> Dict[str, "pd.DataFrame"]:
+    """DataFrames do snapshot; cache por (mesa, instância, versão) => rerun sem spin novo não refaz nada."""
+    import pandas as pd   # só quando há snapshot pra montar (cold start do painel mais curto)
 
-    if "cor" in df.columns:
-        out["greens"] = int((df["cor"] == "GREEN").sum())
-        out["reds"] = int((df["cor"] == "RED").sum())
-        out["blacks"] = int((df["cor"] == "BLACK").sum())
-
-    if "status" in df.columns:
-        out["gales"] = int((df["status"] == "GALE").sum())
-        out["entradas"] = int((df["status"] == "ENTRADA").sum())
-
-    if "padroes" in df.columns:
-        out["padroes"] = int(df["padroes"].fillna("").astype(str).str.strip().ne("").sum())
-
-    return out
+    hist = [normalize_history_item(x if isinstance(x, dict) else {}) for x in _snap.get("historico") or []]
+    return {
+        "hist": pd.DataFrame(hist),
+        "heat_t": pd.DataFrame(_snap.get("heatmap_terminal") or []),
+        "heat_r": pd.DataFrame(_snap.get("heatmap_roda") or []),
+        "sc_term": pd.DataFrame(_snap.get("scores_terminal") or []),
+        "sc_pad": pd.DataFrame(_snap.get("scores_padrao") or []),
+        "sc_combo": pd.DataFrame(_snap.get("scores_terminal_padrao") or []),
+    }
 
 def is_entry_payload(payload: Dict[str, Any]) -> bool:
     if not isinstance(payload, dict):
@@ -275,10 +302,12 @@ if "last_payload" not in st.session_state:
     st.session_state.last_payload = None
 if "auto_running" not in st.session_state:
     st.session_state.auto_running = False
-if "auto_last_sent_at" not in st.session_state:
-    st.session_state.auto_last_sent_at = 0.0
-if "auto_last_num" not in st.session_state:
-    st.session_state.auto_last_num = None
+if "auto_config" not in st.session_state:
+    st.session_state.auto_config = None
+if "snapshot" not in st.session_state:
+    st.session_state.snapshot = None
+if "snapshot_etag" not in st.session_state:
+    st.session_state.snapshot_etag = None
 
 # =========================
 # SIDEBAR
@@ -286,23 +315,26 @@ if "auto_last_num" not in st.session_state:
 with st.sidebar:
     st.markdown("## 🎰 Viper Vegas")
     modo = st.selectbox("Modo de operação", ["conservador", "normal", "agressivo"], index=1)
+    mesa = (st.text_input("Mesa", value="default") or "default").strip()
 
     st.markdown("---")
-    auto = st.checkbox("Simulação automática", value=False)
-    speed = st.slider("Velocidade (segundos)", 0.10, 3.00, 0.55, 0.05)
+    auto = st.checkbox("Simulação automática (no servidor)", value=False)
+    taxa = st.slider("Spins por segundo", 1, 500, 2, 1)
+    seed_raw = st.text_input("Seed (opcional)", value="")
+    refresh = st.slider("Atualizar painel (segundos)", 0.5, 5.0, 1.0, 0.5)
 
     st.markdown("---")
     st.caption("Backend URL")
     st.code(BACKEND_URL, language="")
 
 # =========================
-# HEADER
+# HEADER (preenchido depois do snapshot: online = snapshot respondeu)
 # =========================
-health = api_get("/health")
-online = bool(health and health.get("ok") is True)
+header_slot = st.empty()
 
-st.markdown(
-    f"""
+def render_header(online: bool) -> None:
+    header_slot.markdown(
+        f"""
 <div class="vv-card">
   <div class="vv-header">
     <div>
@@ -316,8 +348,8 @@ st.markdown(
   </div>
 </div>
 """,
-    unsafe_allow_html=True,
-)
+        unsafe_allow_html=True,
+    )
 
 # =========================
 # INPUT (ENTER) + ACTIONS
@@ -354,7 +386,7 @@ if submitted:
     if n is None:
         st.warning("Digite um número válido entre 0 e 36.")
     else:
-        payload = {"numero": n, "modo": modo}
+        payload = {"numero": n, "modo": modo, "mesa": mesa}
         data = api_post("/spin", payload)
         if not data:
             st.error("Falha ao enviar /spin. Verifique o backend.")
@@ -362,37 +394,42 @@ if submitted:
             st.session_state.last_payload = data
 
 # =========================
-# AUTO SIM (no duplicar / sem travar)
+# AUTO SIM (roda no backend; o painel só liga/desliga e observa)
 # =========================
-st.session_state.auto_running = bool(auto)
+seed_txt = (seed_raw or "").strip()
+auto_config = {
+    "mesa": mesa,
+    "taxa": float(taxa),
+    "modo": modo,
+    "seed": int(seed_txt) if seed_txt.lstrip("-").isdigit() else None,
+}
 
-if st.session_state.auto_running:
-    now = time.time()
-    # envia só se já passou "speed" desde o último envio
-    if (now - float(st.session_state.auto_last_sent_at)) >= float(speed):
-        n = random.randint(0, 36)
-        # evita repetir o mesmo número seguido (ajuda no visual)
-        if st.session_state.auto_last_num is not None and n == st.session_state.auto_last_num:
-            n = (n + random.randint(1, 7)) % 37
-
-        data = api_post("/spin", {"numero": int(n), "modo": modo})
-        st.session_state.auto_last_sent_at = now
-        st.session_state.auto_last_num = n
-        if isinstance(data, dict):
-            st.session_state.last_payload = data
-        st.rerun()
+if auto and st.session_state.auto_config != auto_config:
+    # liga (ou reinicia com a config nova)
+    if st.session_state.auto_config and st.session_state.auto_config["mesa"] != mesa:
+        api_post(f"/simulacao/parar?mesa={st.session_state.auto_config['mesa']}", {})
+    if api_post("/simulacao/iniciar", auto_config) is not None:
+        st.session_state.auto_config = auto_config
+    else:
+        st.error("Falha ao iniciar a simulação no backend.")
+elif not auto and st.session_state.auto_config:
+    api_post(f"/simulacao/parar?mesa={st.session_state.auto_config['mesa']}", {})
+    st.session_state.auto_config = None
+
+st.session_state.auto_running = bool(st.session_state.auto_config)
 
 # =========================
-# FETCH HISTORY (always)
+# SNAPSHOT (1 request por rerun; 304 quando nada mudou)
 # =========================
-hist_raw = api_get("/historico") or []
-if isinstance(hist_raw, dict) and "items" in hist_raw:
-    hist_raw = hist_raw["items"]
-if not isinstance(hist_raw, list):
-    hist_raw = []
+snapshot = fetch_snapshot(mesa) or {}
+tabelas = tabelas_snapshot(mesa, str(snapshot.get("instancia", "")), int(snapshot.get("versao", -1)), snapshot)
+df_hist = tabelas["hist"]
+stats = snapshot.get("stats_painel") or {}
+render_header(bool(snapshot))
 
-df_hist = pd.DataFrame([normalize_history_item(x if isinstance(x, dict) else {}) for x in hist_raw])
-stats = compute_stats_from_history(df_hist)
+# com simulação rodando, o "último spin" é o último do histórico
+if st.session_state.auto_running and snapshot.get("historico"):
+    st.session_state.last_payload = snapshot["historico"][-1]
 
 # =========================
 # LAST STATUS CARD + ALERT
@@ -505,23 +542,14 @@ with tab_heat:
     st.markdown('<div class="vv-section-title">Heatmaps</div>', unsafe_allow_html=True)
     col1, col2 = st.columns(2, gap="large")
 
-    heat_t = api_get("/heatmap/terminal") or api_get("/heatmap_terminal") or []
-    if isinstance(heat_t, dict) and "items" in heat_t:
-        heat_t = heat_t["items"]
-    if not isinstance(heat_t, list):
-        heat_t = []
-
-    heat_r = api_get("/heatmap/roda") or api_get("/heatmap_roda") or []
-    if isinstance(heat_r, dict) and "items" in heat_r:
-        heat_r = heat_r["items"]
-    if not isinstance(heat_r, list):
-        heat_r = []
+    heat_t = tabelas["heat_t"]
+    heat_r = tabelas["heat_r"]
 
     with col1:
         st.markdown('<div class="vv-card">', unsafe_allow_html=True)
         st.markdown("#### Heatmap (Terminal)")
-        if heat_t:
-            st.dataframe(pd.DataFrame(heat_t), use_container_width=True, height=380)
+        if not heat_t.empty:
+            st.dataframe(heat_t, use_container_width=True, height=380)
         else:
             st.caption("Sem dados do endpoint de heatmap terminal.")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -529,8 +557,8 @@ with tab_heat:
     with col2:
         st.markdown('<div class="vv-card">', unsafe_allow_html=True)
         st.markdown("#### Heatmap (Roda EU)")
-        if heat_r:
-            st.dataframe(pd.DataFrame(heat_r), use_container_width=True, height=380)
+        if not heat_r.empty:
+            st.dataframe(heat_r, use_container_width=True, height=380)
         else:
             st.caption("Sem dados do endpoint de heatmap roda.")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -541,29 +569,15 @@ with tab_scores:
 
     c1, c2, c3 = st.columns(3, gap="large")
 
-    sc_term = api_get("/scores/terminal") or []
-    if isinstance(sc_term, dict) and "items" in sc_term:
-        sc_term = sc_term["items"]
-    if not isinstance(sc_term, list):
-        sc_term = []
-
-    sc_pad = api_get("/scores/padrao") or []
-    if isinstance(sc_pad, dict) and "items" in sc_pad:
-        sc_pad = sc_pad["items"]
-    if not isinstance(sc_pad, list):
-        sc_pad = []
-
-    sc_combo = api_get("/scores/terminal-padrao") or api_get("/scores/terminal_padrao") or []
-    if isinstance(sc_combo, dict) and "items" in sc_combo:
-        sc_combo = sc_combo["items"]
-    if not isinstance(sc_combo, list):
-        sc_combo = []
+    sc_term = tabelas["sc_term"]
+    sc_pad = tabelas["sc_pad"]
+    sc_combo = tabelas["sc_combo"]
 
     with c1:
         st.markdown('<div class="vv-card">', unsafe_allow_html=True)
         st.markdown("#### Score Terminal")
-        if sc_term:
-            st.dataframe(pd.DataFrame(sc_term), use_container_width=True, height=340)
+        if not sc_term.empty:
+            st.dataframe(sc_term, use_container_width=True, height=340)
         else:
             st.caption("Sem dados / endpoint não disponível.")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -571,8 +585,8 @@ with tab_scores:
     with c2:
         st.markdown('<div class="vv-card">', unsafe_allow_html=True)
         st.markdown("#### Score Padrão")
-        if sc_pad:
-            st.dataframe(pd.DataFrame(sc_pad), use_container_width=True, height=340)
+        if not sc_pad.empty:
+            st.dataframe(sc_pad, use_container_width=True, height=340)
         else:
             st.caption("Sem dados / endpoint não disponível.")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -580,8 +594,8 @@ with tab_scores:
     with c3:
         st.markdown('<div class="vv-card">', unsafe_allow_html=True)
         st.markdown("#### Terminal + Padrão")
-        if sc_combo:
-            st.dataframe(pd.DataFrame(sc_combo), use_container_width=True, height=340)
+        if not sc_combo.empty:
+            st.dataframe(sc_combo, use_container_width=True, height=340)
         else:
             st.caption("Sem dados / endpoint não disponível.")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -589,8 +603,15 @@ with tab_scores:
 with tab_debug:
     st.markdown('<div class="vv-section-title">Debug</div>', unsafe_allow_html=True)
     st.markdown('<div class="vv-card">', unsafe_allow_html=True)
-    st.write("**Health**:", health)
+    st.write("**Snapshot**:", {"mesa": snapshot.get("mesa"), "versao": snapshot.get("versao"), "etag": st.session_state.snapshot_etag})
     st.write("**Last payload**:", st.session_state.last_payload)
     st.write("**Hist rows**:", len(df_hist))
     st.write("**Auto running**:", st.session_state.auto_running)
     st.markdown("</div>", unsafe_allow_html=True)
+
+# =========================
+# AUTO REFRESH (só a visualização; a simulação não depende do painel)
+# =========================
+if st.session_state.auto_running:
+    time.sleep(float(refresh))
+    st.rerun()
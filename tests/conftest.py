@@ -0,0 +1,5 @@
+import os
+import sys
+
+# `pytest` direto (sem python -m) também enxerga o pacote backend
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import alertas
+from backend import engine as engine_mod
+from backend.alertas import Sink, SinkJsonl, evento_alerta, sink_de_runtime
+from backend.main import app
+from backend.pipeline import SpinEvento
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def liberado(tmp_path, monkeypatch):
+    monkeypatch.setattr(alertas, "ALERTAS_DIR", str(tmp_path))
+    monkeypatch.setattr(alertas, "ALERTAS_HOSTS", "hooks.local, 127.0.0.1:9300")
+    return tmp_path
+
+
+def test_id_do_alerta_leva_o_boot():
+    ev = SpinEvento(mesa="m1", seq=7, numero=3, modo="agressivo", source="t", ts=1.0)
+    ev.status = "GREEN"
+    a, b = evento_alerta(ev, "boot0001"), evento_alerta(ev, "boot0002")
+    assert a["id"] == "boot0001:m1:0:7"
+    assert a["id"] != b["id"]        # mesmo mesa:seq depois de um restart não colide
+
+
+def test_id_do_alerta_muda_depois_do_reset(monkeypatch):
+    eventos = []
+    original = engine_mod.executar
+    monkeypatch.setattr(engine_mod, "executar", lambda m, ev, em: eventos.append(ev) or original(m, ev, em))
+    m = engine_mod.MesaEngine("alertas_reset", isolada=True)
+    m.receber(5)
+    m.resetar()
+    m.receber(5)
+    antes, depois = (evento_alerta(ev, "boot0001") for ev in eventos)
+    assert antes["seq"] == depois["seq"] == 1
+    assert antes["id"] != depois["id"] and depois["geracao"] == 1
+
+
+def test_engine_nao_importa_asyncio():
+    codigo = "import sys, backend.engine; print('asyncio' in sys.modules)"
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_sink_abstrato():
+    with pytest.raises(TypeError):
+        Sink("x")
+
+
+def test_runtime_desligado_sem_configuracao(monkeypatch):
+    monkeypatch.setattr(alertas, "ALERTAS_DIR", "")
+    monkeypatch.setattr(alertas, "ALERTAS_HOSTS", "")
+    for spec in ("jsonl:/tmp/x.jsonl", "webhook:http://127.0.0.1:9300/", "socket:127.0.0.1:9301"):
+        with pytest.raises(PermissionError):
+            sink_de_runtime(spec)
+
+
+def test_runtime_jsonl_dentro_do_dir(liberado):
+    sink = sink_de_runtime("jsonl:sub/alertas.jsonl")
+    assert isinstance(sink, SinkJsonl)
+    assert sink.alvo == os.path.join(os.path.realpath(liberado), "sub", "alertas.jsonl")
+    for fora in ("jsonl:../fora.jsonl", "jsonl:/etc/passwd", f"jsonl:{liberado}", "socket:unix:/tmp/s"):
+        with pytest.raises(PermissionError):
+            sink_de_runtime(fora)
+
+
+def test_runtime_hosts_liberados(liberado):
+    sink_de_runtime("webhook:http://hooks.local/x")
+    sink_de_runtime("webhook:http://127.0.0.1:9300/")
+    sink_de_runtime("socket:127.0.0.1:9300")
+    for fora in ("webhook:http://169.254.169.254/latest", "webhook:http://127.0.0.1:8000/reset",
+                 "socket:10.0.0.1:9300"):
+        with pytest.raises(PermissionError):
+            sink_de_runtime(fora)
+
+
+def test_api_recusa_destino_fora_com_403(cliente, monkeypatch):
+    monkeypatch.setattr(alertas, "ALERTAS_DIR", "")
+    r = cliente.post("/alertas/sinks", json={"spec": "jsonl:/tmp/qualquer.jsonl"})
+    assert r.status_code == 403
+    assert cliente.get("/alertas").json()["sinks"] == []
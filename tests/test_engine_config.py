@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from backend.engine import MesaEngine
+from backend.logic import CONFIG_PADRAO
+
+
+@pytest.fixture(scope="module")
+def jogada():
+    """Números que resolvem várias entradas (rankings com padrões e combinados)."""
+    rng = random.Random(11)
+    return [rng.randrange(37) for _ in range(4000)]
+
+
+def _mesa(numeros):
+    m = MesaEngine("cfg", isolada=True)
+    for n in numeros:
+        m.receber(n)
+    assert len(m.ranking_padrao) and len(m.ranking_terminal_padrao)
+    return m
+
+
+def _scores_esperados(m):
+    store = m.score_store
+    esperado_p = {r["padrao"]: round(m.calcular_score_padrao(r["padrao"]), 4) for r in m.get_score_padrao()}
+    esperado_c = {}
+    for r in m.get_score_terminal_padrao():
+        t, p = r["terminal_padrao"].split("|", 1)
+        esperado_c[r["terminal_padrao"]] = round(m.calcular_score_combinado(int(t), p), 4)
+    assert all(store.id_de(p) >= 0 for p in esperado_p)
+    return esperado_p, esperado_c
+
+
+@pytest.mark.parametrize("mudanca", [{"score_modo": "bruto"}, {"gale_max": 0}, {"vizinhos_alvo": 4}])
+def test_reload_que_muda_o_score_reescora_rankings(jogada, mudanca):
+    m = _mesa(jogada)
+    antes = m.get_score_padrao()
+    versao_ranking = m.ranking_padrao.versao
+    m.aplicar_config(CONFIG_PADRAO.com(**mudanca))
+
+    esperado_p, esperado_c = _scores_esperados(m)
+    depois = m.get_score_padrao()
+    assert {r["padrao"]: r["score"] for r in depois} == esperado_p
+    assert {r["terminal_padrao"]: r["score"] for r in m.get_score_terminal_padrao()} == esperado_c
+    assert [r["score"] for r in depois] == sorted((r["score"] for r in depois), reverse=True)
+    # mesmas chaves, hits/miss intactos
+    assert {(r["padrao"], r["hits"], r["miss"]) for r in depois} == {(r["padrao"], r["hits"], r["miss"]) for r in antes}
+    assert m.ranking_padrao.versao > versao_ranking
+
+
+def test_reload_sem_mudar_score_mantem_rankings(jogada):
+    m = _mesa(jogada)
+    ranking = m.ranking_padrao
+    versao = m.versao
+    m.aplicar_config(CONFIG_PADRAO.com(score_threshold=CONFIG_PADRAO.score_threshold + 0.05))
+    assert m.ranking_padrao is ranking
+    assert m.versao == versao + 1
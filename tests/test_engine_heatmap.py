@@ -0,0 +1,50 @@
+import random
+import threading
+from collections import deque
+
+from backend.engine import MesaEngine
+from backend.worker import worker
+
+
+def _mesa_ring_pequeno(maxlen: int = 50, spins: int = 300) -> MesaEngine:
+    # equivale a VIPER_MAX_HISTORY < 120: a janela padrão dos heatmaps cai na retenção
+    m = MesaEngine("heatmap-ring-pequeno")
+    m.historico = deque(maxlen=maxlen)
+    rng = random.Random(11)
+    for _ in range(spins):
+        m.receber(rng.randrange(37))
+    worker.drenar()
+    return m
+
+
+def _em_thread(fn, timeout: float = 5.0):
+    saida = {}
+    t = threading.Thread(target=lambda: saida.setdefault("r", fn()), daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), "deadlock: a chamada não voltou"
+    return saida["r"]
+
+
+def test_snapshot_com_ring_menor_que_janela_nao_trava():
+    m = _mesa_ring_pequeno()
+    snap = _em_thread(m.get_snapshot_painel)
+    assert sum(x["count"] for x in snap["heatmap_terminal"]) == 120
+    assert sum(x["count"] for x in snap["heatmap_roda"]) == 120
+
+
+def test_heatmaps_publicos_usam_retencao_alem_do_ring():
+    m = _mesa_ring_pequeno()
+    terminais = _em_thread(lambda: m.heatmap_terminal(200))
+    roda = _em_thread(lambda: m.heatmap_roda_eu(200))
+    assert sum(x["count"] for x in terminais) == 200
+    assert sum(x["count"] for x in roda) == 200
+    assert m.lock.acquire(blocking=False)
+    m.lock.release()
+
+
+def test_heatmap_dentro_do_ring_conta_o_historico():
+    m = _mesa_ring_pequeno()
+    ultimos = [h["terminal"] for h in list(m.historico)[-30:]]
+    contagem = {x["terminal"]: x["count"] for x in m.heatmap_terminal(30)}
+    assert contagem == {t: ultimos.count(t) for t in range(10)}
@@ -0,0 +1,78 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+from fastapi.testclient import TestClient
+
+from backend import exportacao
+from backend.main import app
+from backend.storage import storage
+
+DIA = 86400.0
+T0 = 1_700_000_000.0 - 1_700_000_000.0 % DIA + 3600     # 01:00 UTC de um dia qualquer
+
+
+def _spin(seq, ts, numero, status="ANALISE", padrao=None, previsto=None, gale=None):
+    return {
+        "mesa": "exp1", "seq": seq, "seq_externo": None, "spin_id": None, "ts": ts, "numero": numero,
+        "modo": "agressivo", "source": "manual", "status": status, "padrao": padrao,
+        "terminal_previsto": previsto, "gale": gale,
+    }
+
+
+# relógio voltou: dia 2, depois de novo o dia 1, depois o dia 2
+SPINS = [
+    _spin(1, T0, 5),
+    _spin(2, T0 + 60, 15, "ENTRADA", "p|x", 5, 0),
+    _spin(3, T0 + DIA, 7, "GALE", "p|x", 5, 1),
+    _spin(4, T0 + 120, 25, "GREEN", "p|x", 5, 1),
+    _spin(5, T0 + DIA + 60, 0),
+    _spin(6, T0 + DIA + 120, 36, "ENTRADA", "q|y", 6, 0),
+    _spin(7, T0 + DIA + 180, 1, "RED", "q|y", 6, 0),
+]
+
+
+@pytest.fixture
+def disco(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "base_dir", str(tmp_path / "dados"))
+    for s in SPINS:
+        storage.gravar("exp1", s)
+    yield storage
+    storage.fechar()
+
+
+def test_parquet_ida_e_volta_com_dia_fora_de_ordem(disco, tmp_path):
+    destino = str(tmp_path / "export")
+    res = exportacao.exportar_parquet(destino, ["exp1"])
+    assert res["spins"] == {"linhas": 7, "arquivos": 2}
+    assert res["entradas"] == {"linhas": 2, "arquivos": 2}
+
+    tabela = ds.dataset(f"{destino}/spins", partitioning="hive").to_table().sort_by("seq")
+    assert tabela.column("seq").to_pylist() == [s["seq"] for s in SPINS]
+    assert tabela.column("numero").to_pylist() == [s["numero"] for s in SPINS]
+    assert tabela.column("status").to_pylist() == [s["status"] for s in SPINS]
+    assert [str(d) for d in tabela.column("dia").to_pylist()] == [exportacao._dia(s["ts"]) for s in SPINS]
+
+    entradas = ds.dataset(f"{destino}/entradas", partitioning="hive").to_table().sort_by("seq_resolucao")
+    assert entradas.column("resultado").to_pylist() == ["GREEN", "RED"]
+    assert entradas.column("gale").to_pylist() == [1, 0]
+    assert entradas.column("spins").to_pylist() == [3, 2]
+
+
+def test_export_ipc_ida_e_volta(disco):
+    with TestClient(app) as c:
+        r = c.get("/export", params={"dataset": "spins", "mesa": "exp1"})
+        assert r.status_code == 200
+        assert r.headers["content-type"] == exportacao.MIME_ARROW
+        tabela = pa.ipc.open_stream(r.content).read_all()
+        assert tabela.column("mesa").to_pylist() == ["exp1"] * len(SPINS)
+        assert tabela.column("seq").to_pylist() == [s["seq"] for s in SPINS]
+        assert tabela.column("ts").cast(pa.int64()).to_pylist() == [int(s["ts"] * 1000) for s in SPINS]
+
+        r = c.get("/export", params={"dataset": "entradas", "mesa": "exp1", "desde": T0 + DIA})
+        tabela = pa.ipc.open_stream(r.content).read_all()
+        assert tabela.column("resultado").to_pylist() == ["RED"]
+
+        assert c.get("/export", params={"dataset": "x"}).status_code == 400
+        assert c.get("/export", params={"mesa": "../x"}).status_code == 400
@@ -0,0 +1,52 @@
+import random
+from collections import Counter
+
+import pytest
+
+from backend.features import COLUNAS, F_SALTO, F_TERMINAL, JANELA_COLUNAS, LINHAS, FeatureStore, transicao
+from backend.logic import terminal
+
+
+def _linhas_brutas(numeros):
+    """Linhas de features montadas spin a spin, sem o store."""
+    out = []
+    for k, n in enumerate(numeros):
+        estatica = LINHAS[37 * 37 + n][:9]
+        out.append(estatica + (transicao(numeros[k - 1], n) if k else (-1,) * 5))
+    return out
+
+
+@pytest.mark.parametrize("janela", [12, 120])
+def test_contagens_por_janela_batem_com_a_conta_direta(janela):
+    rng = random.Random(21)
+    numeros = [rng.randrange(37) for _ in range(700)]
+    fs = FeatureStore(capacidade=150)
+    brutas = _linhas_brutas(numeros)
+    for k, n in enumerate(numeros):
+        assert fs.observar(n) == brutas[k]
+        if k % 37 and k not in (0, janela - 1, janela, janela + 1):
+            continue
+        na_janela = brutas[max(0, k + 1 - janela):k + 1]
+        for c in JANELA_COLUNAS:
+            esperado = Counter(linha[c] for linha in na_janela if linha[c] >= 0)
+            assert fs.contagens(janela, c) == [esperado[v] for v in range(COLUNAS[c][1])]
+        saltos = [linha[F_SALTO] for linha in na_janela if linha[F_SALTO] >= 0]
+        assert fs.salto_medio(janela) == (sum(saltos) / len(saltos) if saltos else None)
+
+
+def test_ultimos_e_limpar():
+    fs = FeatureStore(capacidade=130)
+    numeros = list(range(37)) * 5
+    for n in numeros:
+        fs.observar(n)
+    assert fs.ultimos(F_TERMINAL, 3) == [terminal(n) for n in numeros[-3:]]
+    assert len(fs.ultimos(F_TERMINAL, 1000)) == 130
+    fs.limpar()
+    assert fs.ultimos(F_TERMINAL, 3) == []
+    assert fs.contagens(12, F_TERMINAL) == [0] * 10
+    assert fs.salto_medio(12) is None
+
+
+def test_janela_nao_mantida():
+    with pytest.raises(ValueError):
+        FeatureStore().contagens(50, F_TERMINAL)
@@ -0,0 +1,89 @@
+import os
+import random
+
+import pytest
+
+from backend import mesas as mesas_mod
+from backend.mesas import MAGICA, Residencia, desserializar, get_mesa, serializar
+from backend.worker import worker
+
+
+def _sem_hora(itens):
+    return [{k: v for k, v in d.items() if k != "time"} for d in itens]
+
+
+def _estado(m):
+    worker.drenar()
+    return {
+        "stats": m.get_stats(),
+        "historico": _sem_hora(m.get_historico()),
+        "terminal": m.get_score_terminal(),
+        "padrao": m.get_score_padrao(),
+        "vies": m.get_vies(),
+        "ordenador": m.ordenador.info(),
+    }
+
+
+@pytest.fixture
+def residencia(tmp_path, monkeypatch):
+    r = Residencia(base_dir=str(tmp_path))
+    monkeypatch.setattr(mesas_mod, "residencia", r)
+    return r
+
+
+def test_hibernar_e_reidratar_preserva_o_estado(residencia):
+    rng = random.Random(48)
+    numeros = [rng.randrange(37) for _ in range(400)]
+    a, gemea = get_mesa("hib_rt_a"), get_mesa("hib_rt_b")
+    for seq, n in enumerate(numeros):
+        a.receber(n, seq=seq)
+        gemea.receber(n, seq=seq)
+    antes = _estado(a)
+    assert antes == _estado(gemea)
+
+    residencia._hibernar(a, None)
+    assert a.hibernada and "hib_rt_a" in residencia.hibernadas
+    assert "hib_rt_a" not in mesas_mod._mesas
+    assert os.path.getsize(residencia._caminho("hib_rt_a")) > 0
+
+    nova = get_mesa("hib_rt_a")
+    assert nova is not a and not nova.hibernada
+    assert "hib_rt_a" not in residencia.hibernadas
+    assert not os.path.exists(residencia._caminho("hib_rt_a"))
+    assert _estado(nova) == antes
+
+    # segue igual à gêmea que nunca saiu da memória (incl. dedup por seq)
+    assert nova.receber(numeros[-1], seq=len(numeros) - 1) == gemea.receber(numeros[-1], seq=len(numeros) - 1)
+    for seq, n in enumerate(numeros[:60], start=len(numeros)):
+        assert _sem_hora([nova.receber(n, seq=seq)]) == _sem_hora([gemea.receber(n, seq=seq)])
+    assert _estado(nova) == _estado(gemea)
+
+
+def test_referencia_antiga_redireciona_o_spin(residencia):
+    velha = get_mesa("hib_rt_velha")
+    velha.receber(3)
+    residencia._hibernar(velha, None)
+    velha.receber(4)                                # quem guardou a instância antiga
+    nova = get_mesa("hib_rt_velha")
+    assert nova is not velha
+    assert [h["numero"] for h in nova.get_historico()] == [3, 4]
+    assert [h["numero"] for h in velha.get_historico()] == [3]
+
+
+def test_uso_depois_de_agendar_aborta(residencia):
+    m = get_mesa("hib_rt_uso")
+    uso = m.ultimo_uso
+    get_mesa("hib_rt_uso")
+    m.ultimo_uso = uso + 1
+    residencia._hibernar(m, uso)
+    assert residencia.abortadas == 1 and not m.hibernada
+    assert mesas_mod._mesas["hib_rt_uso"] is m
+
+
+def test_snapshot_de_formato_desconhecido():
+    m = get_mesa("hib_rt_fmt")
+    dados = serializar(m)
+    assert dados.startswith(MAGICA)
+    assert desserializar(dados).mesa_id == "hib_rt_fmt"
+    with pytest.raises(ValueError):
+        desserializar(b"XXXX" + dados[len(MAGICA):])
@@ -0,0 +1,32 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from backend import bench_import
+
+
+def _carregados(codigo):
+    sonda = f"import sys, json\n{codigo}\nprint(json.dumps(sorted(sys.modules)))\n"
+    return set(json.loads(subprocess.run([sys.executable, "-c", sonda], capture_output=True, text=True,
+                                         check=True).stdout))
+
+
+@pytest.mark.parametrize("nome", bench_import.SO_STDLIB)
+def test_caminho_do_engine_so_com_stdlib(nome):
+    _, base = bench_import._rodar(None)
+    stdlib = set(sys.stdlib_module_names) | set(base) | {"backend"}
+    _, mods = bench_import._rodar(bench_import.ALVOS[nome])
+    assert [m for m in mods if m not in stdlib and not m.startswith("_")] == []
+
+
+def test_engine_adia_o_que_so_a_api_usa():
+    mods = _carregados("import backend.engine")
+    for adiado in ("asyncio", "multiprocessing.shared_memory", "argparse", "fastapi", "pydantic", "pyarrow"):
+        assert adiado not in mods, adiado
+
+
+def test_bench_mede_o_tempo_do_modulo():
+    us, mods = bench_import._rodar("backend.logic")
+    assert us > 0 and "backend" in mods
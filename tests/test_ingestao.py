@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import pytest
+
+from backend import ingestao
+from backend.ingestao import FonteReplay, FonteSpins, FonteStream, Ingestor, parse_spin
+from backend.mesas import get_mesa
+
+
+def _receber_falso(recebidos):
+    async def receber(mesa, numero, modo="agressivo", source="manual", seq=None, spin_id=None):
+        recebidos.append((numero, modo, seq))
+        return {}
+    return receber
+
+
+def test_interfaces_abstratas():
+    with pytest.raises(TypeError):
+        FonteSpins()
+    with pytest.raises(TypeError):
+        FonteStream()
+
+
+def test_parse_json_e_csv():
+    assert parse_spin('{"mesa": "m1", "numero": 17, "seq": 4, "modo": "normal"}') == (
+        "m1", 17, 4, None, None, "normal"
+    )
+    assert parse_spin("m2,5,9") == ("m2", 5, 9, None, None, None)
+    assert parse_spin("  # comentário") is None
+    with pytest.raises(ValueError):
+        parse_spin("m1,37")
+    with pytest.raises(ValueError):
+        parse_spin('{"mesa": "m1", "numero": 3, "modo": "turbo"}')
+    with pytest.raises(ValueError):
+        parse_spin(json.dumps({"mesa": "m1", "numero": 3, "spin_id": "x" * 129}))
+
+
+def test_replay_usa_o_modo_gravado(tmp_path, monkeypatch):
+    recebidos = []
+    monkeypatch.setattr(ingestao, "receber_sem_bloquear", _receber_falso(recebidos))
+    log = tmp_path / "m1.jsonl"
+    log.write_text("\n".join(json.dumps(d) for d in [
+        {"mesa": "m1", "numero": 3, "seq": 1, "modo": "conservador"},
+        {"mesa": "m1", "numero": 4, "seq": 2},
+        {"mesa": "m1", "numero": 5, "seq": 3, "modo": "normal"},
+    ]) + "\n")
+
+    async def rodar():
+        ing = Ingestor(consumidores=1, modo="agressivo")
+        ing.adicionar(FonteReplay(str(log)))
+        await ing.iniciar()
+        await ing.drenar()
+        await ing.parar()
+
+    asyncio.run(rodar())
+    assert recebidos == [(3, "conservador", 1), (4, "agressivo", 2), (5, "normal", 3)]
+
+
+def test_lock_ocupado_nao_trava_o_loop(tmp_path):
+    m = get_mesa("ing_ocupada")
+    spins = m.stats["spins"]
+    log = tmp_path / "ing.jsonl"
+    log.write_text("".join(json.dumps({"mesa": "ing_ocupada", "numero": n}) + "\n" for n in (1, 2, 3)))
+
+    async def rodar():
+        ticks = 0
+        ing = Ingestor(consumidores=1)
+        ing.adicionar(FonteReplay(str(log)))
+        await ing.iniciar()
+        drenar = asyncio.ensure_future(ing.drenar())
+        while not drenar.done():
+            ticks += 1
+            if ticks == 20:
+                m.lock.release()
+            await asyncio.sleep(0.01)
+        await ing.parar()
+        return ticks
+
+    m.lock.acquire()
+    try:
+        assert asyncio.run(asyncio.wait_for(rodar(), 10)) >= 20     # o loop seguiu rodando com o lock preso
+    finally:
+        if m.lock.locked():                  # falhou antes de soltar
+            m.lock.release()
+    assert m.stats["spins"] == spins + 3
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from backend.engine import MesaEngine
+from backend.livro_entradas import LivroEntradas, empacotar, ler_arquivo, ultimo_id_arquivo
+from backend.logic import EntradaAtiva
+from backend.storage import SpinStorage, storage
+from backend.worker import worker
+
+
+def _entrada(id_, gale, padrao="p1", terminal=3):
+    return EntradaAtiva(
+        estrategia="terminal_vizinhos", terminal_previsto=terminal, numeros_alvo=frozenset({3, 13}),
+        padrao=padrao, gale=gale, id=id_, seq=10 * id_, ts=float(id_), numeros=[5] * gale + [13],
+    )
+
+
+def test_arquivo_ida_e_volta(tmp_path):
+    st = SpinStorage(str(tmp_path))
+    entradas = [_entrada(1, 0), _entrada(2, 2, padrao="pádrão"), _entrada(3, 1, terminal=0)]
+    for e in entradas:
+        st.gravar_entrada("m1", empacotar(e, e.ts + 0.5, e.gale != 2))
+    st.fechar()
+    caminho = str(st.caminho_entradas("m1"))
+    lidos = list(ler_arquivo(caminho))
+    assert [r["id"] for r in lidos] == [1, 2, 3]
+    assert lidos[1] == {
+        "id": 2, "seq": 20, "ts_abertura": 2.0, "ts_fechamento": 2.5, "padrao": "pádrão",
+        "terminal_previsto": 3, "gale": 2, "resultado": "RED", "numeros": [5, 5, 13],
+    }
+    assert ultimo_id_arquivo(caminho) == 3
+
+    # registro pela metade (worker escrevendo) não conta
+    with open(caminho, "ab") as f:
+        f.write(empacotar(_entrada(4, 0), 4.5, True)[:-2])
+    assert [r["id"] for r in ler_arquivo(caminho)] == [1, 2, 3]
+    assert ultimo_id_arquivo(caminho) == 3
+
+
+def test_novo_id_continua_do_arquivo(tmp_path):
+    st = SpinStorage(str(tmp_path))
+    st.gravar_entrada("m1", empacotar(_entrada(41, 0), 1.0, True))
+    st.fechar()
+    livro = LivroEntradas(arquivo=str(st.caminho_entradas("m1")))
+    assert livro.novo_id() == 42
+    assert livro.novo_id() == 43
+    assert LivroEntradas(arquivo=str(tmp_path / "nao_existe.bin")).novo_id() == 1
+
+
+def test_histogramas_e_consulta():
+    livro = LivroEntradas()
+    for i, (gale, green) in enumerate([(0, True), (1, True), (2, False), (0, True)], 1):
+        livro.registrar(_entrada(i, gale, padrao="a" if i % 2 else "b"), float(i), green)
+    h = livro.histograma()
+    assert h["green_por_gale"] == [2, 1, 0] and h["red_por_gale"] == [0, 0, 1]
+    assert livro.histograma(padrao="a")["entradas"] == 2
+    assert [r["id"] for r in livro.consultar(desde=2.0, ate=4.0)] == [3, 2]
+
+
+def _entradas_abertas(mesa, n_spins, rng):
+    ids = []
+    for _ in range(n_spins):
+        sinal = mesa.receber(rng.randrange(37))
+        if sinal.get("entrada"):
+            ids.append(sinal["entrada"]["id"])
+    worker.drenar()
+    return ids
+
+
+@pytest.fixture
+def disco(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "base_dir", str(tmp_path))
+    yield storage
+    worker.drenar()
+    storage.fechar()
+
+
+def test_ids_unicos_depois_de_restart(disco):
+    rng = random.Random(5)
+    antes = _entradas_abertas(MesaEngine("livro_restart"), 3000, rng)
+    assert antes
+    gravados = [r["id"] for r in ler_arquivo(str(disco.caminho_entradas("livro_restart")))]
+    assert gravados
+
+    # "restart": engine nova da mesma mesa, mesmo diretório de dados
+    depois = _entradas_abertas(MesaEngine("livro_restart"), 3000, rng)
+    assert depois
+    assert min(depois) > max(gravados)
+    todos = [r["id"] for r in ler_arquivo(str(disco.caminho_entradas("livro_restart")))]
+    assert len(todos) == len(set(todos))
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from backend.engine import MesaEngine
+from backend.logic import WHEEL_EU
+from backend.markov import _COR, _DUZIA, _TERMINAL, MarkovMesa
+
+IDX = {n: i for i, n in enumerate(WHEEL_EU)}
+
+
+def _distancias(numeros):
+    return [-1] + [(IDX[b] - IDX[a]) % 37 for a, b in zip(numeros, numeros[1:])]
+
+
+def _recontar(numeros, fator=None):
+    """Contagens direto da sequência: {(cadeia, ordem): {(linha, coluna): peso}}."""
+    fim = len(numeros)
+    out = {}
+
+    def somar(chave, linha, col, tick):
+        peso = 1.0 if fator is None else fator ** (fim - tick)
+        celulas = out.setdefault(chave, {})
+        celulas[(linha, col)] = celulas.get((linha, col), 0.0) + peso
+
+    dist = _distancias(numeros)
+    for i in range(1, len(numeros)):
+        tick = i + 1
+        b, x = numeros[i - 1], numeros[i]
+        for nome, estado_de, k in (("terminal", _TERMINAL, 10), ("cor", _COR, 3), ("duzia", _DUZIA, 4)):
+            somar((nome, 1), estado_de[b], estado_de[x], tick)
+            if i >= 2:
+                somar((nome, 2), estado_de[numeros[i - 2]] * k + estado_de[b], estado_de[x], tick)
+        somar(("distancia", 1), 0, dist[i], tick)
+        if i >= 2:
+            somar(("distancia", 2), dist[i - 1], dist[i], tick)
+    return out
+
+
+def _conferir(mk, esperado, decaido):
+    for ordem in (1, 2):
+        cadeias = mk.matrizes(ordem=ordem, decaido=decaido)["cadeias"]
+        for nome, m in cadeias.items():
+            celulas = esperado.get((nome, ordem), {})
+            for r, linha in enumerate(m["linhas"]):
+                for c, v in enumerate(linha):
+                    assert v == pytest.approx(celulas.get((r, c), 0.0), abs=1e-4), (nome, ordem, r, c)
+
+
+def test_contagens_brutas_iguais_a_recontagem():
+    rng = random.Random(3)
+    numeros = [rng.randrange(37) for _ in range(2000)]
+    mk = MarkovMesa()
+    for n, d in zip(numeros, _distancias(numeros)):
+        mk.observar(n, d)
+    assert mk.spins == len(numeros)
+    _conferir(mk, _recontar(numeros), decaido=False)
+
+
+def test_decaimento_igual_a_recontagem_com_renormalizacao():
+    rng = random.Random(4)
+    numeros = [rng.randrange(37) for _ in range(1500)]
+    mk = MarkovMesa(meia_vida=2.0)          # escala passa de 1e-150 => linhas renormalizadas no caminho
+    for n, d in zip(numeros, _distancias(numeros)):
+        mk.observar(n, d)
+    fator = 0.5 ** (1 / 2.0)
+    _conferir(mk, _recontar(numeros, fator), decaido=True)
+
+
+def test_prob_numeros_soma_um():
+    rng = random.Random(5)
+    mk = MarkovMesa()
+    assert mk.prob_numeros() is None
+    numeros = [rng.randrange(37) for _ in range(300)]
+    for n, d in zip(numeros, _distancias(numeros)):
+        mk.observar(n, d)
+    assert sum(mk.prob_numeros()) == pytest.approx(1.0)
+    assert sum(mk.prob_numeros(decaido=False)) == pytest.approx(1.0)
+
+
+def test_engine_alimenta_a_markov_com_a_distancia_da_roda():
+    rng = random.Random(6)
+    numeros = [rng.randrange(37) for _ in range(500)]
+    m = MesaEngine("mk1")        # isolada só observa a Markov quando ela pesa no score
+    for n in numeros:
+        m.receber(n)
+    _conferir(m.markov, _recontar(numeros), decaido=False)
+    m.resetar()
+    assert m.markov.spins == 0
+    assert m.markov.matrizes(["terminal"])["cadeias"]["terminal"]["linhas"][0] == [0] * 10
@@ -0,0 +1,48 @@
+import random
+
+from backend import engine as engine_mod
+from backend.engine import MesaEngine
+from backend.memoria import bytes_aprox
+
+
+def _mesa(n=500):
+    rng = random.Random(8)
+    m = MesaEngine("mem", isolada=True)
+    for _ in range(n):
+        m.receber(rng.randrange(37))
+    return m
+
+
+def test_medicao_fora_do_lock(monkeypatch):
+    m = _mesa()
+    com_lock = []
+
+    def medir(obj, vistos=None):
+        com_lock.append(m.lock.locked())
+        return bytes_aprox(obj, vistos)
+
+    monkeypatch.setattr(engine_mod, "bytes_aprox", medir)
+    mem = m.memoria()
+    assert com_lock and not any(com_lock)
+    assert set(mem["componentes"]) == set(MesaEngine.COMPONENTES)
+    assert mem["total"] == sum(mem["componentes"].values()) > 0
+
+
+def test_cache_por_versao():
+    m = _mesa()
+    a = m.memoria()
+    assert m.memoria() is a
+    m.receber(5)
+    b = m.memoria()
+    assert b is not a
+    assert m.memoria() is b
+
+
+def test_amostra_extrapola_containers_grandes():
+    pequenos = [str(i) * 3 for i in range(64)]
+    grande = [str(i % 64) * 3 + " " for i in range(6400)]
+    assert bytes_aprox(grande) > 50 * bytes_aprox(pequenos)
+    compartilhado = list(range(1000, 1100))
+    vistos: set = set()
+    assert bytes_aprox(compartilhado, vistos) > 0
+    assert bytes_aprox(compartilhado, vistos) == 0      # já contado
@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import mesas
+from backend.ingestao import parse_spin
+from backend.main import app
+from backend.storage import SpinStorage, mesa_id_valido
+
+INVALIDOS = ["../../x", "a/b", "", "x" * 65, "mesa\n", "mesa 1", "..", "ç"]
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("mesa_id", INVALIDOS)
+def test_ids_invalidos(mesa_id):
+    assert not mesa_id_valido(mesa_id)
+
+
+@pytest.mark.parametrize("mesa_id", ["default", "m1", "Mesa_2-b", "x" * 64])
+def test_ids_validos(mesa_id):
+    assert mesa_id_valido(mesa_id)
+
+
+@pytest.mark.parametrize("mesa_id", ["../../x", "a/b", "mesa\n"])
+def test_spin_rejeita_id_que_vira_caminho(cliente, mesa_id):
+    r = cliente.post("/spin", json={"numero": 3, "mesa": mesa_id})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["body", "mesa"]
+    assert mesa_id not in mesas.listar_mesas()
+
+
+def test_simulacao_rejeita_id_invalido(cliente):
+    r = cliente.post("/simulacao/iniciar", json={"mesa": "../x", "total": 1})
+    assert r.status_code == 422
+
+
+def test_leitura_de_mesa_desconhecida_nao_cria(cliente):
+    antes = set(mesas.listar_mesas())
+    for rota in ("/stats", "/historico", "/painel/snapshot", "/entradas", "/heatmap/terminal"):
+        assert cliente.get(rota, params={"mesa": "nunca-vista"}).status_code == 404
+    assert cliente.post("/reset", params={"mesa": "nunca-vista"}).status_code == 404
+    assert set(mesas.listar_mesas()) == antes
+
+
+def test_leitura_com_id_invalido_e_422(cliente):
+    assert cliente.get("/stats", params={"mesa": "../.."}).status_code == 422
+
+
+def test_mesa_criada_pelo_spin_fica_legivel(cliente):
+    assert cliente.post("/spin", json={"numero": 7, "mesa": "ids-ok"}).status_code == 200
+    assert cliente.get("/stats", params={"mesa": "ids-ok"}).json()["spins"] == 1
+
+
+def test_get_mesa_valida_id_ao_criar():
+    with pytest.raises(ValueError):
+        mesas.get_mesa("../fora")
+    with pytest.raises(KeyError):
+        mesas.get_mesa("nao-existe", criar=False)
+
+
+def test_storage_nao_monta_caminho_fora_da_base(tmp_path):
+    s = SpinStorage(str(tmp_path))
+    with pytest.raises(ValueError):
+        s.caminho("../../x")
+    with pytest.raises(ValueError):
+        s.caminho_entradas("../x")
+    assert s.caminho("m1").parent == tmp_path / "spins"
+
+
+def test_ingestao_rejeita_id_invalido():
+    with pytest.raises(ValueError):
+        parse_spin('{"mesa": "../x", "numero": 4}')
+    with pytest.raises(ValueError):
+        parse_spin("a/b,4")
+    assert parse_spin("m1,4").mesa == "m1"
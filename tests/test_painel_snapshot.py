@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.engine import BOOT_ID
+from backend.main import app
+from backend.mesas import get_mesa
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as c:
+        yield c
+
+
+def _snapshot(cliente, mesa, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return cliente.get("/painel/snapshot", params={"mesa": mesa}, headers=headers)
+
+
+def test_etag_304_sem_montar_o_snapshot(cliente, monkeypatch):
+    for n in (1, 2, 3):
+        assert cliente.post("/spin", json={"numero": n, "mesa": "snap1"}).status_code == 200
+    m = get_mesa("snap1")
+    r = _snapshot(cliente, "snap1")
+    assert r.status_code == 200
+    assert r.headers["etag"] == f'"{BOOT_ID}-snap1-v{m.versao}"'
+    snap = r.json()
+    assert snap["versao"] == m.versao and snap["stats"]["spins"] == 3
+    assert [h["numero"] for h in snap["historico"]][-3:] == [1, 2, 3]
+    assert snap["stats_painel"]["spins"] == 3
+
+    def proibido():
+        raise AssertionError("304 não devia montar o snapshot")
+
+    monkeypatch.setattr(m, "get_snapshot_painel", proibido)
+    r2 = _snapshot(cliente, "snap1", r.headers["etag"])
+    assert r2.status_code == 304 and r2.content == b""
+    assert r2.headers["etag"] == r.headers["etag"]
+
+
+def test_mesma_versao_reaproveita_snapshot_e_bytes(cliente):
+    cliente.post("/spin", json={"numero": 9, "mesa": "snap2"})
+    m = get_mesa("snap2")
+    r1 = _snapshot(cliente, "snap2")
+    snap = m.get_snapshot_painel()
+    assert m.get_snapshot_painel() is snap
+    cache = main._snapshot_json["snap2"]
+    r2 = _snapshot(cliente, "snap2")
+    assert main._snapshot_json["snap2"] is cache
+    assert r1.content == r2.content == cache[1]
+
+
+def test_spin_e_reset_invalidam(cliente):
+    cliente.post("/spin", json={"numero": 4, "mesa": "snap3"})
+    r1 = _snapshot(cliente, "snap3")
+    etag = r1.headers["etag"]
+
+    cliente.post("/spin", json={"numero": 5, "mesa": "snap3"})
+    r2 = _snapshot(cliente, "snap3", etag)
+    assert r2.status_code == 200 and r2.headers["etag"] != etag
+    assert r2.json()["versao"] == r1.json()["versao"] + 1
+    assert r2.json()["stats"]["spins"] == 2
+
+    assert cliente.post("/reset", params={"mesa": "snap3"}).status_code == 200
+    r3 = _snapshot(cliente, "snap3", r2.headers["etag"])
+    assert r3.status_code == 200 and r3.headers["etag"] not in (etag, r2.headers["etag"])
+    assert r3.json()["historico"] == [] and r3.json()["stats"]["spins"] == 0
@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from backend.perfis import GerenciadorPerfis, TabelaPerfis
+
+
+@pytest.mark.parametrize("dados", [
+    [],
+    "x",
+    {"mesas": ["x"]},
+    {"perfis": ["a"]},
+    {"perfis": {"a": ["score_threshold"]}},
+    {"perfis": {"a": {"herda": 3}}},
+])
+def test_formato_errado_e_value_error(dados):
+    with pytest.raises(ValueError):
+        TabelaPerfis.de_dict(dados)
+
+
+def test_arquivo_com_formato_errado_mantem_a_tabela(tmp_path):
+    arq = tmp_path / "perfis.json"
+    arq.write_text("[]")
+    g = GerenciadorPerfis(str(arq))                 # não quebra o import/startup
+    assert g.versao == 0 and g.erro
+
+    arq.write_text(json.dumps({"perfis": {"a": {"gale_max": 1}}, "mesas": {"m1": "a"}}))
+    assert g.recarregar() and g.config_de("m1").gale_max == 1
+    arq.write_text(json.dumps({"mesas": ["m1"]}))
+    assert not g.recarregar()
+    assert g.versao == 1 and g.config_de("m1").gale_max == 1 and "mesas" in g.erro
+
+
+def test_vigia_sobrevive_a_erro(tmp_path):
+    arq = tmp_path / "perfis.json"
+    arq.write_text(json.dumps({"perfis": {}}))
+    g = GerenciadorPerfis(str(arq))
+
+    def falha(tabela):
+        raise RuntimeError("ouvinte quebrado")
+
+    g.assinar(falha)
+    g.observar(intervalo=0.01)
+    try:
+        arq.write_text(json.dumps({"perfis": {"a": {}}}))
+        os.utime(arq, (1, 1))
+        for _ in range(200):
+            if g.erro:
+                break
+            g._parar.wait(0.01)
+        assert "ouvinte quebrado" in g.erro
+        assert g._thread.is_alive()
+    finally:
+        g.parar()
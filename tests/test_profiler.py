@@ -0,0 +1,26 @@
+
+import sys
+
+import pytest
+
+from backend import engine as engine_mod
+from backend import pipeline, profiler
+from backend.profiler import SWITCH_INTERVAL, Perfilador
+
+
+def test_switch_interval_so_em_sessao_curta(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    padrao = sys.getswitchinterval()
+    p = Perfilador()
+
+    assert p.ligar()                                    # sessão longa (VIPER_PROFILE=1)
+    assert sys.getswitchinterval() == padrao
+    assert engine_mod.executar is profiler.executar_medido
+    p.desligar()
+    assert engine_mod.executar is pipeline.executar
+
+    assert p.ligar(switch_rapido=True)                  # ?segundos=N
+    assert not p.ligar(switch_rapido=True)
+    assert sys.getswitchinterval() == pytest.approx(min(padrao, SWITCH_INTERVAL))
+    p.desligar()
+    assert sys.getswitchinterval() == padrao
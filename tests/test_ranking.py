@@ -0,0 +1,82 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.engine import BOOT_ID
+from backend.main import app
+from backend.mesas import get_mesa
+from backend.ranking import RankingScores
+
+
+def _do_zero(linhas, chegada):
+    """Ranking refeito do zero: sort estável por score desc, empate na ordem de chegada."""
+    return sorted(linhas.values(), key=lambda x: (-x["score"], chegada[x["padrao"]]))
+
+
+def test_incremental_igual_ao_sort_do_zero():
+    rng = random.Random(2)
+    r = RankingScores("padrao")
+    linhas, chegada = {}, {}
+    for i in range(3000):
+        chave = f"p{rng.randrange(60)}"
+        if rng.random() < 0.05:
+            r.remover(chave)
+            linhas.pop(chave, None)
+            chegada.pop(chave, None)
+            continue
+        hits, miss = rng.randrange(50), rng.randrange(50)
+        score = rng.choice([0.5, 0.6, round(rng.random(), 4)])      # empates de propósito
+        r.atualizar(chave, hits, miss, score)
+        chegada.setdefault(chave, i)
+        linhas[chave] = {"padrao": chave, "hits": hits, "miss": miss, "score": score}
+        if i % 250 == 0:
+            assert r.top() == _do_zero(linhas, chegada)
+    assert r.top() == _do_zero(linhas, chegada)
+    assert r.top(5) == r.top()[:5] and r.top(0) == [] and r.top(-1) == []
+    assert [k for k, _ in r.ordem()] == [x["padrao"] for x in r.top()]
+
+
+def test_saida_reaproveitada_ate_mudar():
+    r = RankingScores("padrao")
+    r.atualizar("a", 1, 0, 0.7)
+    r.atualizar("b", 0, 1, 0.3, rotulo="B")
+    v = r.versao
+    top = r.top()
+    assert r._saida is not None and r.top(1)[0] is top[0]
+    assert r.versao == v
+    assert [x["padrao"] for x in top] == ["a", "B"]
+
+    r.atualizar("b", 5, 1, 0.9, rotulo="ignorado")       # rótulo só vale na 1ª vez
+    assert r._saida is None and r.versao == v + 1
+    assert [x["padrao"] for x in r.top()] == ["B", "a"]
+
+    novo = RankingScores.reconstruir("padrao", r.itens(), {"a": 0.1, "b": 0.2})
+    assert [(x["padrao"], x["score"]) for x in novo.top()] == [("B", 0.2), ("a", 0.1)]
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as c:
+        yield c
+
+
+def test_rotas_de_ranking_com_etag(cliente):
+    rng = random.Random(12)
+    m = get_mesa("rank1")
+    for _ in range(1500):
+        m.receber(rng.randrange(37))
+    assert m.get_score_padrao()
+
+    for rota, todos in (("/scores/padrao", m.get_score_padrao()),
+                        ("/scores/terminal-padrao", m.get_score_terminal_padrao())):
+        r = cliente.get(rota, params={"mesa": "rank1", "top": 3})
+        assert r.status_code == 200 and r.json() == todos[:3]
+        assert r.headers["etag"] == f'"{BOOT_ID}-rank1-v{m.versao}"'
+        r304 = cliente.get(rota, params={"mesa": "rank1"}, headers={"If-None-Match": r.headers["etag"]})
+        assert r304.status_code == 304
+
+    etag = cliente.get("/scores/padrao", params={"mesa": "rank1"}).headers["etag"]
+    m.receber(0)
+    r = cliente.get("/scores/padrao", params={"mesa": "rank1"}, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
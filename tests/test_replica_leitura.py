@@ -0,0 +1,127 @@
+import struct
+import subprocess
+import sys
+import time
+import uuid
+from multiprocessing import resource_tracker
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main_leitura, replica
+from backend.engine import MesaEngine
+from backend.replica import PublicadorReplicas
+
+
+@pytest.fixture
+def publicar(monkeypatch):
+    monkeypatch.setattr(replica, "SHM_PREFIXO", f"vt{uuid.uuid4().hex[:6]}")
+    # escritor e leitor no mesmo processo: o unregister do leitor tiraria o registro do escritor
+    monkeypatch.setattr(resource_tracker, "unregister", lambda nome, tipo: None)
+    publicadores = []
+
+    def _publicar(mesa, boot):
+        pub = PublicadorReplicas()
+        publicadores.append(pub)
+        pub.publicar(mesa, boot)
+        return pub
+
+    yield _publicar
+    main_leitura._leitores.clear()
+    for pub in publicadores:
+        pub.fechar()
+
+
+def _mesa(mesa_id, numeros):
+    m = MesaEngine(mesa_id, isolada=True)
+    for n in numeros:
+        m.receber(n)
+    return m
+
+
+def test_reanexa_quando_o_escritor_reinicia(publicar):
+    cliente = TestClient(main_leitura.app)
+    pub = publicar(_mesa("rep1", [1, 2, 3]), "boot0001")
+    r1 = cliente.get("/stats", params={"mesa": "rep1"})
+    assert r1.json()["spins"] == 3
+    assert r1.headers["etag"].startswith('"ro-boot0001-rep1-')
+
+    # escritor sai e volta (segmento novo com o mesmo nome)
+    pub.fechar()
+    publicar(_mesa("rep1", [4, 5]), "boot0002")
+    r2 = cliente.get("/stats", params={"mesa": "rep1"}, headers={"If-None-Match": r1.headers["etag"]})
+    assert r2.status_code == 200
+    assert r2.json()["spins"] == 2
+    assert r2.headers["etag"].startswith('"ro-boot0002-rep1-')
+
+
+def test_escritor_saiu_da_404(publicar):
+    cliente = TestClient(main_leitura.app)
+    pub = publicar(_mesa("rep2", [7]), "boot0001")
+    assert cliente.get("/historico", params={"mesa": "rep2"}).status_code == 200
+    pub.fechar()
+    assert cliente.get("/historico", params={"mesa": "rep2"}).status_code == 404
+
+
+def test_etag_da_replica_nao_e_a_do_escritor(publicar):
+    cliente = TestClient(main_leitura.app)
+    publicar(_mesa("rep3", [9, 9]), "boot0001")
+    etag = cliente.get("/stats", params={"mesa": "rep3"}).headers["etag"]
+    escritor = '"boot0001-rep3-v2"'
+    assert etag != escritor
+    r = cliente.get("/stats", params={"mesa": "rep3"}, headers={"If-None-Match": escritor})
+    assert r.status_code == 200
+    assert cliente.get("/stats", params={"mesa": "rep3"}, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_seq_impar_preso_da_503(publicar, monkeypatch):
+    monkeypatch.setattr(replica, "LEITURA_MAX_S", 0.05)
+    cliente = TestClient(main_leitura.app)
+    pub = publicar(_mesa("rep4", [3]), "boot0001")
+    assert cliente.get("/stats", params={"mesa": "rep4"}).status_code == 200
+
+    # escritor morreu no meio de uma publicação: seq fica ímpar pra sempre
+    buf = pub._segmentos["rep4"].buf
+    (seq,) = struct.unpack_from("<Q", buf, 0)
+    struct.pack_into("<Q", buf, 0, seq + 1)
+    inicio = time.monotonic()
+    r = cliente.get("/stats", params={"mesa": "rep4"})
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+    assert time.monotonic() - inicio < 2.0
+
+    struct.pack_into("<Q", buf, 0, seq + 2)
+    assert cliente.get("/stats", params={"mesa": "rep4"}).status_code == 200
+
+
+def test_snapshot_do_painel_igual_ao_da_engine(publicar):
+    cliente = TestClient(main_leitura.app)
+    m = _mesa("rep5", [1, 2, 3, 4, 5, 0, 36, 17, 17, 22])
+    pub = publicar(m, "boot0001")
+    r = cliente.get("/painel/snapshot", params={"mesa": "rep5"})
+    assert r.status_code == 200
+    snap = r.json()
+    esperado = m.get_snapshot_painel()
+    for chave in ("versao", "stats", "stats_painel", "heatmap_terminal", "heatmap_roda",
+                  "scores_terminal", "scores_padrao", "scores_terminal_padrao"):
+        assert snap[chave] == esperado[chave], chave
+    assert snap["instancia"] == "boot0001"
+    assert [h["numero"] for h in snap["historico"]] == [h["numero"] for h in esperado["historico"]]
+
+    etag = r.headers["etag"]
+    assert cliente.get("/painel/snapshot", params={"mesa": "rep5"},
+                       headers={"If-None-Match": etag}).status_code == 304
+
+    m.receber(8)
+    pub.publicar(m, "boot0001")
+    r2 = cliente.get("/painel/snapshot", params={"mesa": "rep5"}, headers={"If-None-Match": etag})
+    assert r2.status_code == 200 and r2.headers["etag"] != etag
+    assert r2.json()["stats"]["spins"] == 11
+
+
+def test_leitor_nao_carrega_a_engine():
+    codigo = (
+        "import sys, backend.main_leitura; "
+        "print(sorted(m for m in ('backend.engine', 'backend.mesas', 'backend.pipeline') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
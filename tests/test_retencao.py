@@ -0,0 +1,62 @@
+import random
+from collections import Counter
+
+from backend.retencao import Agregado, RetencaoMesa
+
+
+def _spins(n, seed=4, ts0=1_700_000_000.0, passo=7.0):
+    rng = random.Random(seed)
+    return [(ts0 + k * passo, rng.randrange(37), rng.randrange(3), rng.randrange(-1, 5)) for k in range(n)]
+
+
+def test_contadores_de_64_bits():
+    ag = Agregado()
+    for a in (ag.numeros, ag.status, ag.term, ag.pad):
+        assert a.typecode == "q" and a.itemsize == 8
+    ag.numeros[3] = 2 ** 40
+    acc = Agregado()
+    ag.somar_em(acc)
+    assert acc.numeros[3] == 2 ** 40
+
+
+def test_ultimos_spins_soma_exata():
+    ret = RetencaoMesa(tam_bloco=64, max_blocos=100)
+    spins = _spins(1000)
+    for ts, numero, status, pid in spins:
+        ret.registrar_spin(ts, numero, status, pid)
+    assert ret.total_spins == 1000 and len(ret.blocos) == 15
+    for n in (1, 10, 40, 64, 100, 500, 999, 1000):
+        ag = ret.ultimos_spins(n)
+        ultimos = spins[-n:]
+        assert ag.spins == n
+        assert list(ag.numeros) == [Counter(s[1] for s in ultimos)[x] for x in range(37)]
+        assert list(ag.status)[:3] == [Counter(s[2] for s in ultimos)[x] for x in range(3)]
+        assert ag.inicio == ultimos[0][0]
+        assert sum(ag.terminais()) == n
+    assert list(ret.spins_mornos()) == [(ts, n, s, p) for ts, n, s, p in spins]
+
+
+def test_buckets_por_hora_somam_janela_e_expiram():
+    ret = RetencaoMesa(tam_bloco=64, horas=3, dias=2)
+    spins = _spins(6000, passo=9.0)          # 15h de spins
+    for ts, numero, status, pid in spins:
+        ret.registrar_spin(ts, numero, status, pid)
+        if pid >= 0:
+            ret.registrar_resultado(ts, numero % 10, pid, status == 1)
+    agora = spins[-1][0]
+    assert len(ret.por_hora) <= 3
+    assert sum(ag.spins for ag in ret.por_hora.values()) < 6000
+
+    ag = ret.janela_tempo(2 * 3600, agora)
+    desde = int((agora - 2 * 3600) // 3600)
+    na_janela = [s for s in spins if int(s[0] // 3600) >= desde]
+    assert ag.spins == len(na_janela)
+    assert list(ag.numeros) == [Counter(s[1] for s in na_janela)[x] for x in range(37)]
+    com_padrao = [s for s in na_janela if s[3] >= 0]
+    assert sum(ag.term) == len(com_padrao)
+    assert sum(ag.term[0::2]) == sum(1 for s in com_padrao if s[2] == 1)
+
+    # janela além da retenção horária cai nos buckets de dia
+    assert ret.janela_tempo(10 * 3600, agora).spins == sum(
+        ag.spins for chave, ag in ret.por_dia.items() if chave >= int((agora - 10 * 3600) // 86400)
+    )
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from backend.engine import MesaEngine
+from backend.logic import CONFIG_PADRAO
+
+
+def _jogar(config, modo, n=3000, seed=28):
+    rng = random.Random(seed)
+    m = MesaEngine("score_modo", config=config, isolada=True)
+    entradas = []
+    for _ in range(n):
+        sinal = m.receber(rng.randrange(37), modo)
+        if sinal["status"] == "ENTRADA":
+            entradas.append(sinal["entrada"]["terminal_previsto"])
+    return m, entradas
+
+
+def test_limiar_bayes_e_relativo_a_linha_de_base_do_terminal():
+    cfg = CONFIG_PADRAO
+    assert cfg.score_modo == "bayes"
+    for t in range(10):
+        frio = cfg.peso_terminal * cfg.score(0, 0, cfg.prior_terminal[t]) + cfg.peso_padrao * cfg.score(0, 0, cfg.prior_padrao)
+        assert frio == cfg.threshold("agressivo", t)              # empate com a roda
+        assert frio < cfg.threshold("normal", t) < cfg.threshold("conservador", t)
+    # terminais 7-9 têm alvo menor (prior mais baixo) e limiar mais baixo na mesma proporção
+    assert cfg.threshold("agressivo", 8) < cfg.threshold("agressivo", 3)
+
+
+def test_partida_a_frio_simetrica_entre_terminais():
+    _, entradas = _jogar(CONFIG_PADRAO, "agressivo")
+    assert {t for t in entradas} & {0, 1, 2, 3, 4, 5, 6}
+    assert {t for t in entradas} & {7, 8, 9}
+
+
+@pytest.mark.parametrize("config, modo", [
+    (CONFIG_PADRAO, "normal"),
+    (CONFIG_PADRAO, "conservador"),
+    (CONFIG_PADRAO.com(score_modo="bayes_lcb"), "agressivo"),
+    (CONFIG_PADRAO.com(bayes_margem=0.01), "agressivo"),
+])
+def test_sem_historico_nao_entra_sem_vantagem(config, modo):
+    m, entradas = _jogar(config, modo, n=1000)
+    assert entradas == [] and m.stats["entradas"] == 0
+
+
+def test_resultados_movem_o_score_em_torno_da_linha():
+    cfg = CONFIG_PADRAO
+
+    def combinado(hits, miss, t):
+        return (cfg.peso_terminal * cfg.score(hits, miss, cfg.prior_terminal[t])
+                + cfg.peso_padrao * cfg.score(hits, miss, cfg.prior_padrao))
+
+    for t in (3, 8):
+        assert combinado(0, 1, t) < cfg.threshold("agressivo", t)      # um RED: para de entrar
+        assert combinado(2, 0, t) >= cfg.threshold("normal", t)        # vantagem medida: normal entra
+        assert combinado(2, 0, t) < cfg.threshold("conservador", t)
+
@@ -0,0 +1,100 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.engine import MesaEngine
+from backend.main import app
+from backend.sequencia import OrdenadorSpins
+
+
+def _processar(log):
+    def processar(numero):
+        log.append(numero)
+        return {"status": "OK", "numero": numero}
+    return processar
+
+
+def test_reordena_e_deduplica():
+    log = []
+    o = OrdenadorSpins()
+    p = _processar(log)
+    assert o.receber(p, (10,), 0, None, 0.0)["numero"] == 10
+    assert o.receber(p, (12,), 2, None, 0.1)["status"] == "PENDENTE"
+    assert o.receber(p, (12,), 2, None, 0.2)["status"] == "PENDENTE"      # retry do pendente
+    assert o.receber(p, (11,), 1, None, 0.3)["numero"] == 11              # fecha a lacuna e drena
+    assert log == [10, 11, 12]
+    assert o.receber(p, (12,), 2, None, 0.4) == {"status": "OK", "numero": 12}   # retry: sinal guardado
+    assert o.receber(p, (10,), 0, None, 0.5)["numero"] == 10
+    assert log == [10, 11, 12]
+    assert o.info()["duplicados"] == 3 and o.info()["reordenados"] == 1
+
+
+def test_spin_id_deduplica_sem_seq():
+    log = []
+    o = OrdenadorSpins()
+    p = _processar(log)
+    assert o.receber(p, (5,), None, "a", 0.0) is o.receber(p, (5,), None, "a", 0.1)
+    o.receber(p, (5,), None, None, 0.2)
+    assert log == [5, 5]
+
+
+def test_lacuna_pulada_por_tempo_e_atrasado_descartado():
+    log = []
+    o = OrdenadorSpins(espera_max=1.0)
+    p = _processar(log)
+    o.receber(p, (1,), 0, None, 0.0)
+    assert o.receber(p, (3,), 2, None, 0.0)["status"] == "PENDENTE"
+    assert o.receber(p, (4,), 3, None, 5.0)["numero"] == 4          # espera estourou: pula seq 1
+    assert log == [1, 3, 4] and o.lacunas_puladas == 1
+    assert o.receber(p, (2,), 1, None, 5.1)["status"] == "DESCARTADO"
+    assert log == [1, 3, 4]
+
+
+def test_expirar_sem_spin_novo():
+    log = []
+    o = OrdenadorSpins(espera_max=1.0)
+    p = _processar(log)
+    o.receber(p, (1,), 0, None, 0.0)
+    o.receber(p, (3,), 2, None, 0.5)
+    assert o.prazo() == 1.5
+    assert o.expirar(p, 1.0) == 0 and log == [1]
+    assert o.expirar(p, 1.5) == 1 and log == [1, 3]
+    assert o.prazo() is None and o.lacunas_puladas == 1
+
+
+def test_timer_da_mesa_pula_lacuna_no_fim_da_rajada():
+    m = MesaEngine("seq_timer")
+    m.ordenador.espera_max = 0.05
+    m.receber(1, seq=0)
+    assert m.receber(3, seq=2)["status"] == "PENDENTE"      # o seq 1 nunca vem e nada mais chega
+    limite = time.monotonic() + 2.0
+    while m.stats["spins"] < 2 and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert m.stats["spins"] == 2 and m.ordenador.lacunas_puladas == 1
+    assert m._timer_lacunas is None
+    assert m.receber(3, seq=2)["numero"] == 3                # retry: sinal guardado pelo timer
+
+
+def test_janela_de_reordenacao():
+    log = []
+    o = OrdenadorSpins(janela_reordenacao=2)
+    p = _processar(log)
+    o.receber(p, (0,), 0, None, 0.0)
+    for seq in (2, 3, 4):
+        o.receber(p, (seq,), seq, None, 0.0)
+    assert log == [0, 2, 3, 4] and o.proximo_seq == 5
+
+
+def test_spin_http_202_e_409():
+    with TestClient(app) as c:
+        def post(numero, seq):
+            return c.post("/spin", json={"numero": numero, "mesa": "seq_http", "seq": seq})
+
+        assert post(1, 100).status_code == 200
+        r = post(3, 102)
+        assert r.status_code == 202 and r.json()["status"] == "PENDENTE"
+        assert post(2, 101).status_code == 200
+        r = post(3, 102)                                   # retry depois de processado
+        assert r.status_code == 200 and r.json()["numero"] == 3
+        assert c.get("/stats", params={"mesa": "seq_http"}).json()["spins"] == 3
+        assert post(9, 50).status_code == 409
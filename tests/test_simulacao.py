@@ -0,0 +1,30 @@
+import asyncio
+
+from backend.mesas import get_mesa
+from backend.simulacao import ConfigSimulacao, Simulacao
+
+
+def test_lock_ocupado_nao_trava_o_loop():
+    m = get_mesa("sim_ocupada")
+    spins = m.stats["spins"]
+
+    async def rodar():
+        sim = Simulacao(ConfigSimulacao(mesa="sim_ocupada", taxa=1000.0, seed=1, total=5), ativa=True)
+        task = asyncio.ensure_future(sim._rodar())
+        ticks = 0
+        while not task.done():
+            ticks += 1
+            if ticks == 20:
+                m.lock.release()
+            await asyncio.sleep(0.01)
+        return sim, ticks
+
+    m.lock.acquire()
+    try:
+        sim, ticks = asyncio.run(asyncio.wait_for(rodar(), 10))
+    finally:
+        if m.lock.locked():                  # falhou antes de soltar
+            m.lock.release()
+    assert ticks >= 20 and sim.erro is None
+    assert sim.spins == 5 and m.stats["spins"] == spins + 5
+    assert [h["source"] for h in m.get_historico()[-5:]] == ["auto"] * 5
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+
+import pytest
+from fastapi import concurrency
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from backend.main import app
+from backend.mesas import get_mesa
+from backend.schemas import SpinRequest, ler_spin
+
+VALIDOS = [
+    {"numero": 0},
+    {"numero": 36, "modo": "normal", "mesa": "m_1", "seq": 0, "spin_id": "a"},
+    {"numero": 7, "source": None},
+    {"numero": 7.0},                              # pydantic aceita float inteiro
+    {"numero": "7"},                              # e string numérica (modo lax)
+]
+INVALIDOS = [
+    {"numero": 37},
+    {"numero": -1},
+    {"numero": 7, "modo": "turbo"},
+    {"numero": 7, "mesa": "../x"},
+    {"numero": 7, "seq": -1},
+    {"numero": 7, "spin_id": ""},
+    {"numero": 7, "spin_id": "x" * 129},
+    {"numero": True, "mesa": "m" * 65},
+    {},
+    [],
+]
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("corpo", VALIDOS)
+def test_ler_spin_igual_ao_pydantic(corpo):
+    bruto = json.dumps(corpo).encode()
+    assert ler_spin(bruto).model_dump() == SpinRequest.model_validate_json(bruto).model_dump()
+
+
+@pytest.mark.parametrize("corpo", [*(json.dumps(c).encode() for c in INVALIDOS), b"{", b"", b"null"])
+def test_ler_spin_erros_iguais_ao_pydantic(corpo):
+    with pytest.raises(ValidationError) as esperado:
+        SpinRequest.model_validate_json(corpo)
+    with pytest.raises(RequestValidationError) as erro:
+        ler_spin(corpo)
+    assert [(e["type"], e["loc"]) for e in erro.value.errors()] == [
+        (e["type"], ("body", *e["loc"])) for e in esperado.value.errors(include_url=False)
+    ]
+
+
+def test_spin_422(cliente):
+    r = cliente.post("/spin", content=b'{"numero": 40}', headers={"content-type": "application/json"})
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["body", "numero"]
+
+
+def test_mesa_residente_roda_no_loop(cliente, monkeypatch):
+    get_mesa("spin_loop")
+
+    async def proibido(*a, **kw):
+        raise AssertionError("mesa residente com lock livre não devia ir pro threadpool")
+
+    monkeypatch.setattr(concurrency, "run_in_threadpool", proibido)
+    r = cliente.post("/spin", json={"numero": 4, "mesa": "spin_loop"})
+    assert r.status_code == 200 and r.json()["numero"] == 4
+
+
+def test_lock_ocupado_nao_trava_o_loop(cliente):
+    m = get_mesa("spin_ocupada")
+    spins = m.stats["spins"]
+    respostas = {}
+    m.lock.acquire()
+    try:
+        t = threading.Thread(
+            target=lambda: respostas.update(spin=cliente.post("/spin", json={"numero": 9, "mesa": "spin_ocupada"})),
+            daemon=True,
+        )
+        t.start()
+        time.sleep(0.2)
+        assert "spin" not in respostas                 # esperando o lock, numa thread do pool
+        inicio = time.monotonic()
+        assert cliente.get("/health").status_code == 200
+        assert time.monotonic() - inicio < 1.0         # o event loop seguiu atendendo
+    finally:
+        m.lock.release()
+    t.join(5)
+    assert respostas["spin"].status_code == 200
+    assert m.stats["spins"] == spins + 1
+
+
+def test_mesa_nova_vai_pro_threadpool(cliente, monkeypatch):
+    chamadas = []
+    original = concurrency.run_in_threadpool
+
+    async def contar(fn, *a, **kw):
+        chamadas.append(fn)
+        return await original(fn, *a, **kw)
+
+    monkeypatch.setattr(concurrency, "run_in_threadpool", contar)
+    r = cliente.post("/spin", json={"numero": 1, "mesa": "spin_nova_mesa"})
+    assert r.status_code == 200 and len(chamadas) == 1
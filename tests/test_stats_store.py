@@ -0,0 +1,95 @@
+import random
+from collections import Counter
+
+import pytest
+
+from backend.stats_store import MAX_PADROES, PADROES_CONHECIDOS, StatsStore
+
+
+def _eventos(n, seed):
+    rng = random.Random(seed)
+    nomes = PADROES_CONHECIDOS + ["novo_a", "novo_b"]
+    return [(rng.randrange(10), rng.choice(nomes), rng.random() < 0.4) for _ in range(n)]
+
+
+def test_contagens_iguais_as_chaves_de_string():
+    store = StatsStore()
+    antigo = Counter()          # o layout antigo: "t", "p", "t|p" concatenados
+    for t, p, hit in _eventos(5000, 1):
+        store.registrar(t, store.internar(p), hit)
+        k = "hit" if hit else "miss"
+        for chave in (str(t), p, f"{t}|{p}"):
+            antigo[chave, k] += 1
+
+    for t in range(10):
+        assert store.terminal(t) == (antigo[str(t), "hit"], antigo[str(t), "miss"])
+    for pid, p in enumerate(store.padroes):
+        assert store.padrao(pid) == (antigo[p, "hit"], antigo[p, "miss"])
+        for t in range(10):
+            rotulo = store.rotulo_combinado(t, pid)
+            assert rotulo == f"{t}|{p}"
+            assert store.combinado(t, pid) == (antigo[rotulo, "hit"], antigo[rotulo, "miss"])
+    assert store.padrao(store.id_de("nunca_visto")) == (0, 0)
+    assert "nunca_visto" not in store.padrao_id           # leitura não interna
+
+
+def test_rotulo_pronto_na_internacao():
+    store = StatsStore()
+    pid = store.internar("novo")
+    assert store.rotulo_combinado(3, pid) is store.rotulo_combinado(3, pid)
+    assert store.rotulo_combinado(9, pid) == "9|novo"
+
+
+def test_capacidade_cheia_conta_so_terminal():
+    store = StatsStore(max_padroes=len(PADROES_CONHECIDOS) + 1)
+    assert store.internar("extra") == len(PADROES_CONHECIDOS)
+    assert store.internar("sem_espaco") == -1
+    store.registrar(4, -1, True)
+    assert store.terminal(4) == (1, 0) and store.descartados == 1
+    assert store.padrao(-1) == (0, 0) and store.combinado(4, -1) == (0, 0)
+
+
+def test_decaimento_igual_a_soma_direta():
+    meia_vida = 30.0
+    store = StatsStore(meia_vida=meia_vida)
+    eventos = _eventos(800, 2)
+    for tick, (t, p, hit) in enumerate(eventos, start=1):
+        store.registrar(t, store.internar(p), hit, tick=tick)
+    fim = len(eventos) + 25
+
+    def direto(filtro):
+        h = m = 0.0
+        for tick, (t, p, hit) in enumerate(eventos, start=1):
+            if filtro(t, p):
+                w = 0.5 ** ((fim - tick) / meia_vida)
+                h, m = h + w * hit, m + w * (not hit)
+        return h, m
+
+    for t in range(10):
+        assert store.terminal_efetivo(t, fim) == pytest.approx(direto(lambda tt, _: tt == t))
+    pid = store.id_de("novo_a")
+    assert store.padrao_efetivo(pid, fim) == pytest.approx(direto(lambda _, p: p == "novo_a"))
+    assert store.combinado_efetivo(2, pid, fim) == pytest.approx(direto(lambda t, p: (t, p) == (2, "novo_a")))
+
+
+def test_meia_vida_trocada_em_execucao():
+    store = StatsStore()
+    pid = store.internar("x")
+    for tick in range(1, 11):
+        store.registrar(1, pid, tick % 2 == 0, tick=tick)
+    assert store.padrao_efetivo(pid, 10) == (5, 5)
+
+    store.definir_meia_vida(10, tick=10)        # decaídos partem das brutas
+    assert store.padrao_efetivo(pid, 20) == pytest.approx((2.5, 2.5))
+    store.definir_meia_vida(0, tick=20)
+    assert store.padrao_efetivo(pid, 20) == (5, 5)
+
+
+def test_limpar_mantem_ids():
+    store = StatsStore(meia_vida=10)
+    pid = store.internar("y")
+    store.registrar(0, pid, True, tick=1)
+    store.limpar()
+    assert store.id_de("y") == pid and store.padrao(pid) == (0, 0)
+    assert store.padrao_efetivo(pid, 5) == (0.0, 0.0)
+    assert store.nbytes() > 8 * MAX_PADROES
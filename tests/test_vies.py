@@ -0,0 +1,91 @@
+import math
+import random
+
+import pytest
+
+from backend import vies
+from backend.vies import FAMILIAS, DetectorVies, p_valor, valor_critico
+
+
+def _categorias(numero, dist):
+    return list(vies._CATS[numero]) + [dist]
+
+
+def _direto(spins, familia, probs):
+    """X² e G recontados do zero sobre a janela."""
+    f = FAMILIAS.index(familia)
+    cats = [c[f] for c in spins if c[f] >= 0]
+    n = len(cats)
+    cont = [cats.count(k) for k in range(len(probs))]
+    if not n:
+        return 0, cont, 0.0, 0.0
+    x2 = sum((c - n * p) ** 2 / (n * p) for c, p in zip(cont, probs))
+    g = 2 * sum(c * math.log(c / (n * p)) for c, p in zip(cont, probs) if c)
+    return n, cont, x2, g
+
+
+@pytest.mark.parametrize("gl, alfa, tabela", [(9, 0.001, 27.877), (36, 0.001, 67.985), (2, 0.05, 5.991)])
+def test_valor_critico_e_p_valor(gl, alfa, tabela):
+    x = valor_critico(gl, alfa)
+    assert x == pytest.approx(tabela, rel=0.01)
+    assert p_valor(x, gl) == pytest.approx(alfa, rel=1e-6)
+    assert p_valor(0.0, gl) == 1.0
+
+
+def test_estatisticas_incrementais_batem_com_a_recontagem():
+    rng = random.Random(41)
+    det = DetectorVies(janelas=(50, 200), alfa=0.01)
+    spins = []
+    anterior = None
+    for k in range(700):
+        n = rng.randrange(37)
+        dist = -1 if anterior is None else rng.randrange(37)
+        anterior = n
+        det.observar(n, dist)
+        spins.append(_categorias(n, dist))
+        if k not in (0, 49, 50, 51, 199, 200, 450, 699):
+            continue
+        for janela, testes in zip(det.janelas, det.testes):
+            na_janela = spins[-janela:]
+            for familia, teste in zip(FAMILIAS, testes):
+                n_dir, cont, x2, g = _direto(na_janela, familia, vies._PROBS[familia])
+                assert teste.n == n_dir and teste.cont == cont
+                assert teste.qui2() == pytest.approx(x2, abs=1e-6)
+                assert teste.g() == pytest.approx(g, abs=1e-6)
+                assert teste.alerta() == (n_dir >= teste.n_min and x2 > teste.critico)
+
+
+def test_cusum_preguicoso_igual_ao_direto():
+    probs = vies._PROBS["terminal"]
+    cs = vies._Cusum(probs, delta=0.5)
+    rng = random.Random(7)
+    direto = [0.0] * len(probs)
+    p1 = [p * 1.5 for p in probs]
+    for tick in range(1, 3000):
+        saiu = rng.choice((3, 3, rng.randrange(10)))          # terminal 3 viciado
+        for c, p in enumerate(probs):
+            llr = math.log(p1[c] / p) if c == saiu else math.log((1 - p1[c]) / (1 - p))
+            direto[c] = max(0.0, direto[c] + llr)
+        alarme = cs.saiu(saiu, tick, h=1e9)
+        assert alarme is None
+        for c in range(len(probs)):
+            assert cs.valor(c, tick) == pytest.approx(direto[c], abs=1e-6)
+    assert max(range(10), key=lambda c: cs.valor(c, tick)) == 3
+
+
+def test_roda_viciada_dispara_e_relatorio():
+    rng = random.Random(3)
+    det = DetectorVies(janelas=(370,), alfa=0.001, cusum_h=8.0)
+    alertas = []
+    for _ in range(1500):
+        n = 17 if rng.random() < 0.1 else rng.randrange(37)
+        a = det.observar(n, rng.randrange(37))
+        if a:
+            alertas.append(a)
+    assert any(t["familia"] == "numero" for a in alertas for t in a["testes"])
+    assert any(c["familia"] == "numero" and c["categoria"] == "17" for a in alertas for c in a["cusum"])
+    rel = det.relatorio()
+    fam = rel["janelas"][0]["familias"]["numero"]
+    assert fam["n"] == 370 and fam["alerta"] and fam["p_qui2"] < 0.001
+    assert fam["mais_frequentes"][0]["categoria"] == "17"
+    assert rel["cusum"]["numero"][0]["alarmes"] > 0
@@ -0,0 +1,91 @@
+import random
+from collections import Counter
+
+import pytest
+
+from backend import engine as engine_mod
+from backend.engine import MesaEngine
+from backend.logic import CONFIG_PADRAO
+from backend.visao_global import VisaoGlobal
+from backend.worker import worker
+
+
+@pytest.fixture
+def visao(monkeypatch):
+    v = VisaoGlobal(meia_vida_mesa=5)
+    monkeypatch.setattr(engine_mod, "visao_global", v)
+    return v
+
+
+def _rodar(mesa, n, rng):
+    """Spins na mesa; devolve as entradas resolvidas [(terminal, padrão, green)]."""
+    resolvidas = []
+    for _ in range(n):
+        antes = mesa.entrada_ativa
+        status = mesa.receber(rng.randrange(37))["status"]
+        if status in ("GREEN", "RED"):
+            resolvidas.append((antes.terminal_previsto, antes.padrao, status == "GREEN"))
+    return resolvidas
+
+
+def test_rollups_de_duas_mesas(visao):
+    rng = random.Random(8)
+    por_mesa = {"vg_a": _rodar(MesaEngine("vg_a"), 4000, rng), "vg_b": _rodar(MesaEngine("vg_b"), 4000, rng)}
+    worker.drenar()
+    todas = por_mesa["vg_a"] + por_mesa["vg_b"]
+    assert por_mesa["vg_a"] and por_mesa["vg_b"]
+    assert visao.info()["resolvidas"] == len(todas) and visao.info()["mesas"] == 2
+
+    hits, miss = Counter(), Counter()
+    for t, p, green in todas:
+        for chave in (("t", t), ("p", p), ("tp", f"{t}|{p}")):
+            (hits if green else miss)[chave] += 1
+
+    terminais = visao.terminais()
+    assert [(r["hits"], r["miss"]) for r in terminais] == [(hits["t", t], miss["t", t]) for t in range(10)]
+
+    padroes = visao.padroes()
+    assert {r["padrao"]: (r["hits"], r["miss"]) for r in padroes} == {
+        p: (hits["p", p], miss["p", p]) for p in {p for _, p, _ in todas}
+    }
+    scores = [r["score"] for r in padroes]
+    assert scores == sorted(scores, reverse=True)
+    cfg = CONFIG_PADRAO
+    assert padroes[0]["score"] == round(cfg.score(padroes[0]["hits"], padroes[0]["miss"], cfg.prior_padrao), 4)
+
+    combinados = visao.terminal_padrao()
+    assert {r["terminal_padrao"]: (r["hits"], r["miss"]) for r in combinados} == {
+        f"{t}|{p}": (hits["tp", f"{t}|{p}"], miss["tp", f"{t}|{p}"]) for t, p, _ in todas
+    }
+    assert visao.padroes(top=3) == padroes[:3]
+
+    # ranking de mesas: contagens decaídas por entrada resolvida da própria mesa
+    fator = 0.5 ** (1 / 5)
+    esperado = {}
+    for mesa, resolvidas in por_mesa.items():
+        g = r = 0.0
+        for _, _, green in resolvidas:
+            g, r = g * fator + green, r * fator + (not green)
+        esperado[mesa] = (round(g, 2), round(r, 2))
+    assert {x["mesa"]: (x["hits"], x["miss"]) for x in visao.mesas()} == esperado
+
+
+def test_reset_tira_a_mesa_do_ranking_e_mantem_os_padroes(visao):
+    rng = random.Random(9)
+    a, b = MesaEngine("vg_c"), MesaEngine("vg_d")
+    _rodar(a, 3000, rng)
+    _rodar(b, 3000, rng)
+    worker.drenar()
+    padroes = visao.padroes()
+    versao = visao.versao
+
+    a.resetar()
+    assert [x["mesa"] for x in visao.mesas()] == ["vg_d"]
+    assert visao.padroes() == padroes
+    assert visao.versao == versao + 1
+
+
+def test_mesa_isolada_nao_entra(visao):
+    _rodar(MesaEngine("vg_iso", isolada=True), 2000, random.Random(10))
+    worker.drenar()
+    assert visao.info()["resolvidas"] == 0
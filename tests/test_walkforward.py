@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from backend import walkforward as wf
+from backend.engine import MesaEngine
+from backend.logic import ConfigEngine
+
+
+def _placar(greens, reds, lucro):
+    return [greens + reds, greens, reds, 0, float(lucro)]
+
+
+def test_lucro_entrada():
+    # 3 números no alvo, 1 unidade cada no 1º giro, gale dobra
+    assert wf.lucro_entrada(3, 0, True, 2) == 36 - 3
+    assert wf.lucro_entrada(3, 1, True, 2) == 72 - (3 + 6)
+    assert wf.lucro_entrada(3, 2, True, 2) == 144 - (3 + 6 + 12)
+    assert wf.lucro_entrada(3, 2, False, 2) == -(3 + 6 + 12)
+    assert wf.lucro_entrada(5, 0, False, 0) == -5
+
+
+def test_grade_varia_o_limiar_do_score_modo():
+    bruto = wf.grade([0.6, 0.7], [0.5], [1], base={"score_modo": "bruto"})
+    assert [c["score_threshold"] for c in bruto] == [0.6, 0.7]
+    assert all("bayes_margem" not in c for c in bruto)
+
+    bayes = wf.grade([0.6, 0.7], [0.4, 0.6], [1, 2], base={"score_modo": "bayes"}, margens=(0.0, 0.02))
+    assert len(bayes) == 2 * 2 * 2
+    assert {c["bayes_margem"] for c in bayes} == {0.0, 0.02}
+    assert all("score_threshold" not in c for c in bayes)
+    assert all(c["peso_padrao"] == pytest.approx(1 - c["peso_terminal"]) for c in bayes)
+
+
+def test_folds_escolhem_pelo_treino_e_medem_no_teste():
+    configs = [{"score_threshold": 0.6, "bayes_margem": 0.0, "peso_terminal": 0.55, "gale_max": 2},
+               {"score_threshold": 0.7, "bayes_margem": 0.0, "peso_terminal": 0.55, "gale_max": 2},
+               {"score_threshold": 0.8, "bayes_margem": 0.0, "peso_terminal": 0.55, "gale_max": 2}]
+    placares = [
+        [_placar(10, 10, 5), _placar(10, 10, 5), _placar(10, 10, -50), _placar(10, 10, 1)],
+        [_placar(10, 10, 0), _placar(10, 10, 20), _placar(10, 10, 30), _placar(10, 10, -7)],
+        # lucro alto mas poucas entradas no treino: nunca é candidata
+        [_placar(1, 0, 900), _placar(1, 0, 900), _placar(1, 0, 900), _placar(1, 0, 900)],
+    ]
+    lista = wf.folds(placares, configs, segs_treino=2, objetivo="lucro", min_entradas=20)
+    assert [f["segmento_teste"] for f in lista] == [2, 3]
+
+    # fold 0: treino = seg 0+1 => config 1 (20 > 10); teste no seg 2, fora da amostra
+    assert lista[0]["config"]["score_threshold"] == 0.7
+    assert lista[0]["treino"]["lucro"] == 20
+    assert lista[0]["teste"]["lucro"] == 30
+    assert lista[0]["referencia_teste"]["lucro"] == -50
+    # fold 1: treino = seg 1+2 => config 1 de novo (50 > -45); teste no seg 3
+    assert lista[1]["config"]["score_threshold"] == 0.7
+    assert lista[1]["teste"]["lucro"] == -7
+
+    res = wf.resumo(lista, placares, configs, base=0, objetivo="lucro", min_entradas=20)
+    assert res["fora_da_amostra"]["lucro"] == 30 - 7
+    assert res["referencia"]["lucro"] == -50 + 1
+    assert res["trocas_de_config"] == 0
+    assert res["retrospectivo_in_sample"]["lucro"] == 23
+
+
+def test_fold_sem_candidato_fica_sem_config():
+    configs = [{"score_threshold": 0.6, "bayes_margem": 0.0, "peso_terminal": 0.55, "gale_max": 2}]
+    placares = [[_placar(1, 1, 0)] * 3]
+    lista = wf.folds(placares, configs, segs_treino=1, min_entradas=20)
+    assert [f["config"] for f in lista] == [None, None]
+    assert lista[0]["referencia_teste"]["greens"] == 1
+
+
+def test_segmentos_somam_o_mesmo_que_um_engine_direto(tmp_path):
+    rng = random.Random(11)
+    numeros = [rng.randrange(37) for _ in range(3000)]
+    log = tmp_path / "m1.csv"
+    log.write_text("".join(f"m1,{n}\n" for n in numeros))
+    configs = [ConfigEngine().para_dict(), {**ConfigEngine().para_dict(), "gale_max": 1}]
+
+    placares = wf.avaliar_configs(([str(log)], configs, 700, "agressivo"))
+    for cfg, segs in zip(configs, placares):
+        assert len(segs) == 5                       # 3000 spins em segmentos de 700
+        m = MesaEngine("m1", config=ConfigEngine.de_dict(cfg), isolada=True)
+        greens = reds = 0
+        for n in numeros:
+            status = m.processar(n, "agressivo", "replay")["status"]
+            greens += status == "GREEN"
+            reds += status == "RED"
+        total = wf._somar(segs)
+        assert (total[wf._GREEN], total[wf._RED]) == (greens, reds)
+        assert greens + reds > 0
@@ -0,0 +1,32 @@
+import logging
+import threading
+
+from backend.worker import WorkerSegundoPlano
+
+
+def test_duravel_nao_e_descartado_com_a_fila_cheia():
+    w = WorkerSegundoPlano(maxsize=3)
+    solta = threading.Event()
+    feitos = []
+    w.enviar(solta.wait)                        # segura o worker
+    enviados = [w.enviar(feitos.append, ("opcional", k)) for k in range(5)]
+    for k in range(5):
+        w.enviar_duravel(feitos.append, ("duravel", k))
+    solta.set()
+    w.drenar()
+    assert enviados.count(False) == w.descartados > 0
+    assert [k for tipo, k in feitos if tipo == "duravel"] == list(range(5))
+    assert w.info()["duraveis_acima_do_limite"] == 5
+
+
+def test_erro_de_job_e_logado(caplog):
+    w = WorkerSegundoPlano()
+
+    def quebra():
+        raise RuntimeError("disco cheio")
+
+    with caplog.at_level(logging.ERROR, logger="backend.worker"):
+        w.enviar(quebra)
+        w.drenar()
+    assert w.erros == 1 and "disco cheio" in w.info()["ultimo_erro"]
+    assert any("quebra" in r.getMessage() and r.exc_info for r in caplog.records)